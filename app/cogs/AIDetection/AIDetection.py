@@ -6,18 +6,21 @@ Analyze images and videos for AI-generated content.
 """
 
 import os
+from typing import TYPE_CHECKING
 
 import discord
 from cogs.lancocog import LancoCog
 from discord import Emoji
 from discord.ext import commands
-from sightengine.client import SightEngineClient
-from sightengine.models import CheckRequest, CheckResponse
 from utils.emoji_uploader import EmojiUploader, LocalEmoji
 from utils.file_downloader import FileDownloader
 from utils.progressbar_generator import ProgressEmoteGenerator
 from utils.tracked_message import track_message_ids
 
+if TYPE_CHECKING:
+    from sightengine.client import SightEngineClient
+    from sightengine.models import CheckResponse
+
 
 class AIDetection(
     LancoCog,
@@ -28,10 +31,7 @@ class AIDetection(
 
     def __init__(self, bot):
         super().__init__(bot)
-        self.client = SightEngineClient(
-            api_user=os.getenv("SIGHTENGINE_API_USER"),
-            api_secret=os.getenv("SIGHTENGINE_API_SECRET"),
-        )
+        self._client = None
         self.cache_dir = os.path.join(self.get_cog_data_directory(), "Cache")
         self.file_downloader = FileDownloader()
         self.register_context_menu(
@@ -80,7 +80,20 @@ class AIDetection(
             content="An error occurred while processing the request."
         )
 
-    async def get_attachment_details(self, message: discord.Message) -> CheckResponse:
+    def get_client(self) -> "SightEngineClient":
+        # the SDK takes half a second to import, so wait for the first check
+        if self._client is None:
+            from sightengine.client import SightEngineClient
+
+            self._client = SightEngineClient(
+                api_user=os.getenv("SIGHTENGINE_API_USER"),
+                api_secret=os.getenv("SIGHTENGINE_API_SECRET"),
+            )
+        return self._client
+
+    async def get_attachment_details(self, message: discord.Message) -> "CheckResponse":
+        from sightengine.models import CheckRequest
+
         results = await self.file_downloader.download_attachments(
             message, self.cache_dir
         )
@@ -101,10 +114,10 @@ class AIDetection(
             params=params,
         )
 
-        response = await self.client.check(request)
+        response = await self.get_client().check(request)
         return response
 
-    async def build_response_embed(self, response: CheckResponse) -> discord.Embed:
+    async def build_response_embed(self, response: "CheckResponse") -> discord.Embed:
         embed = discord.Embed(
             title="AI Detection Results",
             color=discord.Color.blue(),
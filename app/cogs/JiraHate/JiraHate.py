@@ -10,8 +10,8 @@ import random
 import aiohttp
 import discord
 from bs4 import BeautifulSoup
-from cogs.lancocog import LancoCog
-from discord.ext import commands, tasks
+from cogs.common.pollercog import PollerCog, PollSource
+from discord.ext import commands
 from feedparser import parse
 from pydantic import BaseModel
 from utils.markdown_utils import html_to_markdown
@@ -34,24 +34,28 @@ class FeedItem(BaseModel):
 
 
 class JiraHate(
-    LancoCog,
+    PollerCog,
     name="JiraHate",
     description="Random IFuckingHateJira quotes.",
 ):
-    UPDATE_INTERVAL = 300  # seconds
+    POLL_INTERVAL = 300  # seconds
+    MAX_INTERVAL = POLL_INTERVAL
 
     def __init__(self, bot):
         super().__init__(bot)
         self.quotes = dict[int, JiraQuote]()
         self.latest_quote_id = None
 
-    async def cog_load(self):
-        self.get_feed.start()
+    async def get_sources(self) -> list[PollSource]:
+        return [PollSource(key="feed", label=f"{BASE_URL}feed.xml")]
 
-    def cog_unload(self):
-        self.get_feed.cancel()
+    async def fetch(self, source: PollSource) -> list[FeedItem]:
+        return await self.get_feed()
+
+    async def process(self, source: PollSource, feed_items: list[FeedItem]) -> int:
+        self.latest_quote_id = self.get_latest_id(feed_items)
+        return len(feed_items)
 
-    @tasks.loop(seconds=UPDATE_INTERVAL)
     async def get_feed(self) -> list[FeedItem]:
         """Fetch the latest quotes from IFuckingHateJira"""
         feed_items = []
@@ -61,17 +65,17 @@ class JiraHate(
             async with session.get(url) as response:
                 feed_text = await response.text()
                 feed = parse(feed_text)
-                items = feed.entries
-
-                for item in items:
-                    feed_item = FeedItem(
-                        title=item.title,
-                        link=item.link,
-                        description=item.description,
-                        pubDate=item.published,
+
+                for item in feed.entries:
+                    feed_items.append(
+                        FeedItem(
+                            title=item.title,
+                            link=item.link,
+                            description=item.description,
+                            pubDate=item.published,
+                        )
                     )
 
-                self.latest_quote_id = self.get_latest_id(items)
                 return feed_items
 
     async def get_quote_by_id(self, quote_id: int) -> JiraQuote:
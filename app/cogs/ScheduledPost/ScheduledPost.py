@@ -8,7 +8,6 @@ in any channel, with optional embeds and role pings.
 import datetime
 import uuid
 
-import dateparser
 import discord
 from cogs.lancocog import LancoCog
 from croniter import croniter
@@ -309,7 +308,10 @@ class ScheduledPost(
             next_run = cron.get_next(datetime.datetime)
             return schedule, next_run
 
-        # Try natural language
+        # Try natural language. dateparser is imported here, on the first
+        # schedule someone writes, as it takes a quarter second to import
+        import dateparser
+
         parsed = dateparser.parse(schedule, settings={"PREFER_DATES_FROM": "future"})
         if parsed and parsed > now:
             # Build a cron expression from the parsed time
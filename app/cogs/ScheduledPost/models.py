@@ -15,7 +15,7 @@ class ScheduledPost(BaseModel):
     embed_color = IntegerField(null=True)
     role_ping_id = BigIntegerField(null=True)
     cron_expression = TextField()  # e.g. "0 9 * * 1" for every Monday at 9am
-    next_run_at = DateTimeField()
+    next_run_at = DateTimeField(index=True)
     last_run_at = DateTimeField(null=True)
     is_recurring = BooleanField(default=True)
     is_active = BooleanField(default=True)
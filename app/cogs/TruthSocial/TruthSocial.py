@@ -5,6 +5,7 @@ Description:
 TruthSocial embed support
 """
 
+import asyncio
 import os
 import re
 
@@ -13,6 +14,7 @@ from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
 from truthbrush.api import Api
+from utils import opengraph
 from utils.command_utils import is_bot_owner_or_admin
 from utils.file_downloader import FileDownloader
 from utils.tracked_message import track_message_ids
@@ -70,8 +72,15 @@ class TruthSocial(
             handle = status_match.group("handle")
             status_id = status_match.group("status_id")
 
-            status_data = self.client.pull_status(status_id)
-            status = StatusModel(**status_data)
+            try:
+                # truthbrush is synchronous, keep it off the event loop
+                status_data = await asyncio.to_thread(
+                    self.client.pull_status, status_id
+                )
+                status = StatusModel(**status_data)
+            except Exception as e:
+                self.logger.warning(f"Failed to pull status {status_id}: {e}")
+                return await self.send_page_preview(message, status_match.group(0))
 
             user = status.account
 
@@ -127,8 +136,12 @@ class TruthSocial(
         if user_match:
             handle = user_match.group("handle")
 
-            user_data = self.client.lookup(handle)
-            user = UserModel(**user_data)
+            try:
+                user_data = await asyncio.to_thread(self.client.lookup, handle)
+                user = UserModel(**user_data)
+            except Exception as e:
+                self.logger.warning(f"Failed to look up {handle}: {e}")
+                return await self.send_page_preview(message, user_match.group(0))
 
             avatar_filename = user.avatar_static.split("/")[-1]
             local_avatar_path = os.path.join(self.avatar_cache_dir, avatar_filename)
@@ -157,6 +170,25 @@ class TruthSocial(
             embed.set_thumbnail(url=f"attachment://{avatar_filename}")
             return await message.channel.send(embed=embed, file=file)
 
+    async def send_page_preview(
+        self, message: discord.Message, url: str
+    ) -> discord.Message | None:
+        """Fall back to the page's OpenGraph tags when the API is unavailable"""
+        metadata = await opengraph.fetch_metadata(url)
+        if not metadata or not metadata.title:
+            return None
+
+        embed = discord.Embed(
+            title=metadata.title[:256],
+            url=url,
+            description=(metadata.description or "")[:4096] or None,
+            color=discord.Color.blue(),
+        )
+        if metadata.images:
+            embed.set_image(url=metadata.images[0])
+        embed.set_footer(text="Truth Social", icon_url=EMBED_ICON_URL)
+        return await message.channel.send(embed=embed)
+
     @truth_social_group.command(
         name="toggle", description="Enable or disable TruthSocial embeds"
     )
@@ -3,7 +3,7 @@ from cogs.lancocog import LancoCog
 from discord import TextChannel, app_commands
 from discord.ext import commands, tasks
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent
+from utils import agents
 from utils.ai_utils import run_agent
 from utils.command_utils import is_bot_owner_or_admin
 from utils.message_utils import get_user_messages
@@ -32,8 +32,8 @@ class ADHDChannel(
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="You are a helpful assistant that analyzes channel discussions and determines trending topics.",
             output_type=ChannelDiscussion,
         )
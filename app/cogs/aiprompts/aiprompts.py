@@ -1,13 +1,11 @@
-import os
-
 import discord
 from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
-from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
 from reactionmenu import ReactionButton, ReactionMenu
+from utils import agents
 from utils.ai_utils import run_agent
 from utils.command_utils import is_bot_owner_or_admin
 from utils.tracked_message import track_message_ids
@@ -72,25 +70,17 @@ class OpenAIPrompts(
         name="aiprompt", description="AI prompt commands", guild_only=True
     )
 
-    def __init__(self, bot: commands.Bot):
-        super().__init__(bot)
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.custom_agents: dict[int, Agent] = {}  # AI ID -> Agent
-
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([AIPromptConfig])
 
     def get_agent(self, AIpromptConfig: AIPromptConfig) -> Agent:
-        ai_id = AIpromptConfig.id
-        if ai_id not in self.custom_agents:
-            agent = Agent(
-                model="openai:gpt-5-nano",
-                system_prompt="You are a helpful assistant that responds to user queries.",
-                output_type=CustomBotConversation,
-            )
-            self.custom_agents[ai_id] = agent
-        return self.custom_agents[ai_id]
+        # every prompt shares one agent; the prompt itself goes in the message
+        return agents.get_agent(
+            "openai:gpt-5-nano",
+            system_prompt="You are a helpful assistant that responds to user queries.",
+            output_type=CustomBotConversation,
+        )
 
     async def get_user_prompt(self, ctx: commands.Context) -> str:
         if ctx.message.reference:
@@ -197,6 +187,7 @@ class OpenAIPrompts(
             response = await run_agent(
                 lambda: agent.run(formatted_message),
                 message.channel.send,
+                guild_id=message.guild.id,
             )
             if response is None:
                 return
@@ -6,7 +6,7 @@ class AutoReactConfig(BaseModel):
     phrase = CharField()
     emoji = CharField()
     is_regex = BooleanField(default=False)
-    guild_id = BigIntegerField()
+    guild_id = BigIntegerField(index=True)
 
     class Meta:
         table_name = "auto_react"
@@ -6,7 +6,7 @@ class AutoResponseConfig(BaseModel):
     phrase = CharField()
     response = CharField()
     is_regex = BooleanField(default=False)
-    guild_id = BigIntegerField()
+    guild_id = BigIntegerField(index=True)
 
     class Meta:
         table_name = "auto_response"
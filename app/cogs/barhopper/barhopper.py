@@ -7,13 +7,13 @@ from urllib.parse import urlencode
 
 import aiofiles
 import aiohttp
-import cachetools
 import discord
 import googlemaps
 import pytz
 from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
+from utils import cache
 from utils.command_utils import is_bot_owner
 
 from .models import Bar
@@ -29,8 +29,8 @@ class BarHopper(LancoCog, name="BarHopper", description="Bar hopper commands"):
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
         self.gmaps = googlemaps.Client(key=os.getenv("GMAPS_API_KEY"))
-        self.bar_details_cache = cachetools.TTLCache(
-            maxsize=100, ttl=60 * 60 * 24
+        self.bar_details_cache = cache.ttl(
+            "barhopper.bar_details", maxsize=100, ttl=60 * 60 * 24
         )  # 24 hours
 
     async def cog_load(self):
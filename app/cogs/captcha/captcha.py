@@ -7,7 +7,13 @@ from cogs.lancocog import RoundGameCog
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import Select, View
-from utils.roundgame.dbmodels import RoundGameResult
+from utils.command_utils import is_bot_owner
+from utils.roundgame import leaderboard
+from utils.roundgame.dbmodels import (
+    RoundGameDailyTotal,
+    RoundGameResult,
+    RoundGameTotal,
+)
 
 from .captcha_gen import generate_captcha
 from .models import (
@@ -34,6 +40,8 @@ class CaptchaCog(
     SCORING_VERSION = SCORING_VERSION
     GUESS_TIME = 15
     TIME_BETWEEN_ROUNDS = 3
+    # pre-generated challenges kept ready per mode
+    POOL_SIZE = 10
 
     captcha_group = app_commands.Group(
         name="captcha", description="Captcha game commands", guild_only=True
@@ -51,8 +59,12 @@ class CaptchaCog(
 
     async def cog_load(self):
         await super().cog_load()
-        self.bot.database.create_tables([RoundGameResult])
+        self.bot.database.create_tables(
+            [RoundGameResult, RoundGameTotal, RoundGameDailyTotal]
+        )
         self._ready_at = time.time()
+        for mode in self.MODES:
+            self.challenge_pool(mode)
 
     @property
     def active_sessions(self):
@@ -62,8 +74,24 @@ class CaptchaCog(
     def sessions_starting(self):
         return _sessions_starting
 
+    def challenge_pool(self, mode: CaptchaMode):
+        async def produce(count: int):
+            return await asyncio.to_thread(
+                lambda: [generate_captcha(mode) for _ in range(count)]
+            )
+
+        return self.asset_pool(mode.name, produce, self.POOL_SIZE, batch=2)
+
     # ── RoundGameCog implementations ──────────────────────────────────────────
 
+    async def prepare_round(self, session: CaptchaSession, index: int):
+        r = session.rounds[index]
+        if r.challenge is None:
+            pool = self.challenge_pool(session.mode)
+            r.challenge = pool.take_one() or await asyncio.to_thread(
+                generate_captcha, session.mode
+            )
+
     def should_record_guess(self, message: discord.Message) -> bool:
         return 1 <= len(message.content.strip()) <= 100
 
@@ -186,21 +214,15 @@ class CaptchaCog(
 
     async def on_game_end(self, session: CaptchaSession):
         if len(session.members) > 1:
-            RoundGameResult.insert_many(
-                [
-                    {
-                        RoundGameResult.game_name: self.GAME_NAME,
-                        RoundGameResult.game_id: session.game_id,
-                        RoundGameResult.guild_id: session.channel.guild.id,
-                        RoundGameResult.user_id: user_id,
-                        RoundGameResult.mode: session.mode.name,
-                        RoundGameResult.score: score,
-                        RoundGameResult.rounds_played: len(session.rounds),
-                        RoundGameResult.scoring_version: self.SCORING_VERSION,
-                    }
-                    for user_id, score in session.members.items()
-                ]
-            ).execute()
+            leaderboard.record_results(
+                self.GAME_NAME,
+                session.game_id,
+                session.channel.guild.id,
+                session.mode.name,
+                self.SCORING_VERSION,
+                session.members,
+                len(session.rounds),
+            )
             self.logger.info(
                 f"Recorded captcha results for game {session.game_id} — {len(session.members)} players"
             )
@@ -431,32 +453,12 @@ class CaptchaCog(
         ]
     )
     async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
-        import datetime
-
-        guild_id = interaction.guild.id
-        query = RoundGameResult.select().where(
-            RoundGameResult.game_name == self.GAME_NAME,
-            RoundGameResult.guild_id == guild_id,
-            RoundGameResult.scoring_version == self.SCORING_VERSION,
+        period_label = leaderboard.PERIODS.get(period, "All Time")
+        top = leaderboard.top_scores(
+            self.GAME_NAME, interaction.guild.id, self.SCORING_VERSION, period
         )
 
-        now = datetime.datetime.utcnow()
-        if period == "today":
-            cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            query = query.where(RoundGameResult.played_at >= cutoff)
-            period_label = "Today"
-        elif period == "week":
-            cutoff = now - datetime.timedelta(days=7)
-            query = query.where(RoundGameResult.played_at >= cutoff)
-            period_label = "This Week"
-        else:
-            period_label = "All Time"
-
-        totals: dict[int, float] = {}
-        for row in query:
-            totals[row.user_id] = totals.get(row.user_id, 0) + row.score
-
-        if not totals:
+        if not top:
             embed = discord.Embed(
                 title=f"Captcha Leaderboard ({period_label})",
                 description="No results yet. Games require at least 2 players to count.",
@@ -465,9 +467,8 @@ class CaptchaCog(
             await interaction.response.send_message(embed=embed)
             return
 
-        sorted_players = sorted(totals.items(), key=lambda x: x[1], reverse=True)
         lines = []
-        for user_id, score in sorted_players[:10]:
+        for user_id, score in top:
             member = interaction.guild.get_member(user_id)
             name = member.display_name if member else f"<{user_id}>"
             lines.append(f"{len(lines) + 1}. `{name}` ({score:.0f})")
@@ -478,6 +479,20 @@ class CaptchaCog(
         embed.add_field(name="Top Players", value="\n".join(lines), inline=False)
         await interaction.response.send_message(embed=embed)
 
+    @captcha_group.command(
+        name="rebuildleaderboard",
+        description="Regenerate the leaderboard totals from recorded results",
+    )
+    @is_bot_owner()
+    async def rebuildleaderboard(self, interaction: discord.Interaction):
+        rows = await asyncio.to_thread(leaderboard.rebuild, self.GAME_NAME)
+        self.logger.info(
+            f"{interaction.user} rebuilt the leaderboard from {rows} results"
+        )
+        await interaction.response.send_message(
+            f"Rebuilt the leaderboard from **{rows}** results.", ephemeral=True
+        )
+
     # ── Session init ──────────────────────────────────────────────────────────
 
     async def initialize_session(
@@ -493,15 +508,8 @@ class CaptchaCog(
         try:
             session = CaptchaSession(mode, channel, host, self.GUESS_TIME)
             self.active_sessions[channel.id] = session
-
-            # Generate all challenges up front (sync, but fast)
-            challenges = await asyncio.to_thread(
-                lambda: [generate_captcha(mode) for _ in range(num_rounds)]
-            )
-            rounds = [
-                CaptchaRound(number=i, challenge=c) for i, c in enumerate(challenges)
-            ]
-            session.init(rounds)
+            # challenges are drawn from the pool as rounds come up (prepare_round)
+            session.init([CaptchaRound(number=i) for i in range(num_rounds)])
         except Exception as e:
             self.logger.error(
                 f"Failed to initialize captcha session in #{channel}: {e}",
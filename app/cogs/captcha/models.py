@@ -2,6 +2,7 @@ import random
 import string
 from dataclasses import dataclass, field
 from io import BytesIO
+from typing import Optional
 
 
 @dataclass
@@ -20,7 +21,8 @@ class CaptchaGuessResult:
 @dataclass
 class CaptchaRound:
     number: int
-    challenge: CaptchaChallenge
+    # filled in by the prefetch stage shortly before the round is played
+    challenge: Optional[CaptchaChallenge] = None
     # {user_id: CaptchaGuessResult} — insertion order = answer order
     guesses: dict = field(default_factory=dict)
 
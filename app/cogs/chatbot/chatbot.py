@@ -2,8 +2,9 @@ import base64
 import io
 import re
 import time
-from collections import defaultdict, deque
+from collections import deque
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import discord
 import pytz
@@ -11,20 +12,26 @@ from cogs.lancocog import LancoCog
 from discord.ext import commands
 from PIL import Image
 from pydantic_ai import Agent, BinaryContent, ImageUrl
-from pydantic_ai.messages import ModelMessage
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart
+from utils import agents, cache, message_buffer
 from utils.ai_utils import run_agent
 from utils.config import get_guild_config
 from utils.message_utils import DISCORD_MESSAGE_LIMIT, exceeds_discord_limit
 from utils.tracked_message import is_message_tracked
 
+from .memory import ConversationMemory
+from .models import ChatMemory
+from .references import ReferenceResolver
+
 _MENTION_RE = re.compile(r"<@!?(\d+)>")
 
-MAX_HISTORY_MESSAGES = 40  # rolling window (~20 back-and-forth turns)
+CHAT_MODEL = "openai:gpt-5-nano"
+HISTORY_TOKEN_BUDGET = 6000  # estimated tokens of past turns sent with each message
+MAX_RESIDENT_CHANNELS = 200  # conversations held in memory, the rest are in the DB
+RECENT_OWN_MESSAGES = 1000  # own message IDs kept to recognise replies to the bot
 CONTEXT_MESSAGE_LIMIT = 10  # recent channel messages to inject as context
 CONTEXT_MAX_AGE = 30 * 60  # seconds; channel messages older than this are not injected
-HISTORY_IDLE_RESET = (
-    2 * 60 * 60
-)  # seconds of channel inactivity before agent history is dropped
+HISTORY_IDLE_RESET = timedelta(hours=2)  # channel inactivity before history is dropped
 MAX_IMAGE_SIZE = (
     25 * 1024 * 1024
 )  # 25 MB, pre-resize (always resized down before sending)
@@ -33,8 +40,9 @@ MAX_INPUT_LENGTH = 1500  # chars, raw user message before context injection
 MAX_ATTACHMENTS = 3  # per message
 RATE_LIMIT_REQUESTS = 5  # max requests per user per window
 RATE_LIMIT_WINDOW = 60  # seconds
-MAX_TEXT_CACHE_ENTRIES = 200  # evict oldest when exceeded
-MAX_IMAGE_CACHE_ENTRIES = 50  # processed image bytes, fewer since they're larger
+MAX_RATE_LIMITED_USERS = 10000  # users tracked within a window
+MAX_TEXT_CACHE_ENTRIES = 200  # evict least recently used when exceeded
+MAX_IMAGE_CACHE_BYTES = 16 * 1024 * 1024  # processed images, bounded by size
 MAX_IMAGE_DIMENSION = 1024  # longest side in pixels after resize
 IMAGE_QUALITY = 85  # JPEG quality for resized output
 CACHE_TTL = 3600  # seconds before a cached attachment is considered stale
@@ -52,6 +60,14 @@ DOCUMENT_MIME_TYPES = {
     "application/pdf",
 }
 
+SUMMARY_PROMPT = (
+    "You keep a running summary of a Discord channel's conversation with a chatbot. "
+    "You are given the current summary (if any) and the oldest messages, which are about to "
+    "leave the chatbot's context. Reply with the updated summary only: under 150 words, plain "
+    "prose, keeping who said what, facts, preferences and unresolved questions, and dropping "
+    "greetings, small talk and the bracketed timestamps and user details."
+)
+
 
 GLOBAL_PROMPT = [
     "You are a general-purpose Discord bot with Lancaster, PA specific features. Your homepage is https://lancobot.dev",
@@ -102,16 +118,37 @@ class ChatBot(
 ):
     def __init__(self, bot):
         super().__init__(bot)
-        self.channel_agents: dict[int, Agent] = {}
-        self.channel_history: dict[int, list[ModelMessage]] = {}
-        # attachment_id -> (timestamp, decoded text)
-        self.text_cache: dict[int, tuple[float, str]] = {}
-        # attachment_id -> (timestamp, resized JPEG bytes)
-        self.image_cache: dict[int, tuple[float, bytes]] = {}
-        # user_id -> deque of request timestamps for rate limiting
-        self.user_rate_limits: dict[int, deque] = defaultdict(deque)
-        # channel_id -> monotonic timestamp of last handled message
-        self.channel_last_active: dict[int, float] = {}
+        # ((owner, bot name, loaded cogs), prompt)
+        self._static_prompt: Optional[tuple[tuple, str]] = None
+        self.memory = ConversationMemory(
+            max_resident=MAX_RESIDENT_CHANNELS,
+            token_budget=HISTORY_TOKEN_BUDGET,
+            idle_reset=HISTORY_IDLE_RESET,
+            summarize=self.summarize,
+        )
+        self.references = ReferenceResolver(RECENT_OWN_MESSAGES)
+        # attachment_id -> decoded text
+        self.text_cache: cache.Cache[int, str] = cache.ttl(
+            "chatbot.text_attachments", MAX_TEXT_CACHE_ENTRIES, CACHE_TTL
+        )
+        # attachment_id -> resized JPEG bytes
+        self.image_cache: cache.Cache[int, bytes] = cache.ttl(
+            "chatbot.image_attachments", MAX_IMAGE_CACHE_BYTES, CACHE_TTL, getsizeof=len
+        )
+        # user_id -> deque of request timestamps for rate limiting; an entry
+        # expires a window after the user's last request, when all of its
+        # timestamps have gone stale anyway
+        self.user_rate_limits: cache.Cache[int, deque] = cache.ttl(
+            "chatbot.rate_limits", MAX_RATE_LIMITED_USERS, RATE_LIMIT_WINDOW
+        )
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.bot.database.create_tables([ChatMemory])
+
+    async def cog_unload(self):
+        self.memory.close()
+        await super().cog_unload()
 
     def _process_image(self, data: bytes) -> bytes:
         img = Image.open(io.BytesIO(data))
@@ -123,34 +160,31 @@ class ChatBot(
         img.save(out, format="JPEG", quality=IMAGE_QUALITY)
         return out.getvalue()
 
-    async def _get_image(self, att: discord.Attachment) -> bytes | None:
-        now = time.monotonic()
+    async def _get_image(
+        self, att: discord.Attachment | message_buffer.BufferedAttachment
+    ) -> bytes | None:
         cached = self.image_cache.get(att.id)
-        if cached:
-            ts, data = cached
-            if now - ts < CACHE_TTL:
-                return data
-            del self.image_cache[att.id]
-        if len(self.image_cache) >= MAX_IMAGE_CACHE_ENTRIES:
-            self.image_cache.pop(next(iter(self.image_cache)))
+        if cached is not None:
+            return cached
         try:
             raw = await att.read()
             data = self._process_image(raw)
-            self.image_cache[att.id] = (now, data)
+            self.image_cache[att.id] = data
             return data
         except Exception as e:
             self.logger.warning("Failed to process image %s: %s", att.filename, e)
-            self.image_cache.pop(att.id, None)
             return None
 
     def _is_rate_limited(self, user_id: int) -> bool:
         now = time.monotonic()
-        timestamps = self.user_rate_limits[user_id]
+        timestamps = self.user_rate_limits.get(user_id) or deque()
         while timestamps and now - timestamps[0] > RATE_LIMIT_WINDOW:
             timestamps.popleft()
         if len(timestamps) >= RATE_LIMIT_REQUESTS:
             return True
         timestamps.append(now)
+        # storing again restarts the entry's expiry from this request
+        self.user_rate_limits[user_id] = timestamps
         return False
 
     def _resolve_mentions(self, text: str, guild: discord.Guild) -> str:
@@ -162,31 +196,26 @@ class ChatBot(
 
         return _MENTION_RE.sub(replace, text)
 
-    def get_channel_prompt(self, channel: discord.TextChannel) -> str:
+    def get_static_prompt(self) -> str:
+        """Instructions shared by every channel. Sent ahead of the channel
+        prompt and unchanged until the loaded cogs change, so providers can
+        serve them from their prompt cache."""
         owner = self.bot.get_user(self.bot.owner_id)
         owner_name = "Syntack"
         if owner and owner.name.lower() != owner_name:
             owner_name = owner.name
-
         bot_name = self.bot.user.display_name
-        topic = getattr(channel, "topic", None)
-        member_count = channel.guild.member_count
+
+        key = (owner_name, bot_name, tuple(self.bot.cogs))
+        if self._static_prompt is not None and self._static_prompt[0] == key:
+            return self._static_prompt[1]
 
         _INTERNAL_COGS = {"LancoCog", "EmbedFixCog", "Demo"}
 
-        context_lines = [
+        prompt = [
             f"You are a helpful assistant. Your creator is {owner_name}. You are known as {bot_name}.",
-            f"Guild: {channel.guild.name} ({member_count} members)",
-            f"Channel: #{channel.name}",
+            *GLOBAL_PROMPT,
         ]
-        if topic:
-            context_lines.append(f"Channel topic: {topic}")
-        category = getattr(channel, "category", None)
-        if category:
-            context_lines.append(f"Channel category: {category.name}")
-        if isinstance(channel, discord.Thread) and channel.parent:
-            context_lines.append(f"Thread in: #{channel.parent.name}")
-
         loaded_features = sorted(
             (cog.qualified_name, cog.description)
             for cog in self.bot.cogs.values()
@@ -196,26 +225,75 @@ class ChatBot(
             features_lines = "\n".join(
                 f"{name}: {desc}" for name, desc in loaded_features
             )
-            context_lines.append(f"Loaded features:\n{features_lines}")
+            prompt.append(f"Loaded features:\n{features_lines}")
+
+        self._static_prompt = (key, "\n\n".join(prompt))
+        return self._static_prompt[1]
+
+    def get_channel_prompt(self, channel: discord.TextChannel) -> str:
+        """Where the conversation is happening; varies per channel and request"""
+        context_lines = [
+            f"Guild: {channel.guild.name} ({channel.guild.member_count} members)",
+            f"Channel: #{channel.name}",
+        ]
+        topic = getattr(channel, "topic", None)
+        if topic:
+            context_lines.append(f"Channel topic: {topic}")
+        category = getattr(channel, "category", None)
+        if category:
+            context_lines.append(f"Channel category: {category.name}")
+        if isinstance(channel, discord.Thread) and channel.parent:
+            context_lines.append(f"Thread in: #{channel.parent.name}")
+        return "\n".join(context_lines)
+
+    def get_agent(self) -> Agent:
+        # one agent for every channel: the channel prompt is passed as run
+        # instructions, which unlike a system prompt are re-sent on every run
+        # and never stored in (or trimmed out of) the history
+        return agents.get_agent(
+            CHAT_MODEL,
+            instructions=self.get_static_prompt(),
+            model_settings={"openai_reasoning_effort": "low"},
+        )
 
-        channel_prompt = GLOBAL_PROMPT.copy()
-        channel_prompt.insert(0, "\n".join(context_lines))
+    async def summarize(
+        self, summary: Optional[str], messages: list[ModelMessage]
+    ) -> Optional[str]:
+        """Fold turns leaving the context window into the channel's summary"""
+        summary_agent = agents.get_agent(
+            CHAT_MODEL,
+            instructions=SUMMARY_PROMPT,
+            model_settings={"openai_reasoning_effort": "low"},
+        )
 
-        return "\n\n".join(channel_prompt)
+        transcript = []
+        for message in messages:
+            if isinstance(message, ModelRequest):
+                for part in message.parts:
+                    content = getattr(part, "content", None)
+                    if isinstance(content, (list, tuple)):
+                        content = " ".join(c for c in content if isinstance(c, str))
+                    if content:
+                        transcript.append(f"User: {content}")
+            elif isinstance(message, ModelResponse):
+                text = "".join(
+                    part.content for part in message.parts if isinstance(part, TextPart)
+                )
+                if text:
+                    transcript.append(f"Bot: {text}")
 
-    def get_agent(self, channel: discord.TextChannel) -> Agent:
-        if channel.id not in self.channel_agents:
-            agent = Agent(
-                model="openai:gpt-5-nano",
-                system_prompt=self.get_channel_prompt(channel),
-                output_type=str,
-                model_settings={"openai_reasoning_effort": "low"},
-            )
-            self.channel_agents[channel.id] = agent
-        return self.channel_agents[channel.id]
+        prompt = (
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"Messages leaving the context:\n" + "\n".join(transcript)
+        )
+        response = await run_agent(lambda: summary_agent.run(prompt))
+        return response.output if response else None
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        if message.author.id == self.bot.user.id:
+            self.references.add_own(message)
+
         if message.author.bot:
             return
 
@@ -225,22 +303,24 @@ class ChatBot(
         if message.content.startswith(self.bot.get_guild_prefix(message.guild)):
             return
 
+        is_mention = self.bot.user.mentioned_in(message)
         is_reply = False
 
         if message.reference:
-            referenced_msg = await message.channel.fetch_message(
-                message.reference.message_id
+            referenced = await self.references.resolve(
+                message, self.bot.user, need_details=is_mention
             )
-            if referenced_msg.author.id == self.bot.user.id:
-                if referenced_msg.embeds or is_message_tracked(referenced_msg.id):
+            if referenced is None:
+                # deleted, or someone else's and this is not a mention
+                pass
+            elif referenced.author_id == self.bot.user.id:
+                if referenced.has_embeds or is_message_tracked(
+                    message.reference.message_id
+                ):
                     return
                 is_reply = True
-            elif referenced_msg.author.bot:
+            elif referenced.author_bot or referenced.has_embeds:
                 return
-            elif referenced_msg.embeds:
-                return
-
-        is_mention = self.bot.user.mentioned_in(message)
 
         if not is_mention and not is_reply:
             return
@@ -304,9 +384,10 @@ class ChatBot(
         ctx_images: list[ImageUrl] = []
         seen_this_request: set[int] = set()
         context_cutoff = message.created_at - timedelta(seconds=CONTEXT_MAX_AGE)
-        async for msg in message.channel.history(
-            limit=CONTEXT_MESSAGE_LIMIT, before=message
-        ):
+        recent = await message_buffer.history(
+            message.channel, CONTEXT_MESSAGE_LIMIT, before=message
+        )
+        for msg in recent:
             if msg.created_at < context_cutoff:
                 break  # history is newest-first, everything past this is older
             if msg.author.bot:
@@ -401,18 +482,11 @@ class ChatBot(
                     )
             elif any(ct.startswith(p) for p in TEXT_MIME_PREFIXES):
                 if att.size <= MAX_TEXT_SIZE:
-                    now = time.monotonic()
-                    cached = self.text_cache.get(att.id)
-                    if cached and now - cached[0] < CACHE_TTL:
-                        text_data = cached[1]
-                    else:
-                        if att.id in self.text_cache:
-                            del self.text_cache[att.id]
-                        if len(self.text_cache) >= MAX_TEXT_CACHE_ENTRIES:
-                            self.text_cache.pop(next(iter(self.text_cache)))
+                    text_data = self.text_cache.get(att.id)
+                    if text_data is None:
                         raw = await att.read()
                         text_data = raw.decode("utf-8", errors="replace")
-                        self.text_cache[att.id] = (now, text_data)
+                        self.text_cache[att.id] = text_data
                     direct_parts.append(
                         f"[File: {att.filename}]\n```\n{text_data}\n```"
                     )
@@ -436,22 +510,24 @@ class ChatBot(
         message_parts.extend(direct_parts)
         message_parts.extend(ctx_images)
 
-        agent = self.get_agent(message.channel)
-
-        # Drop stale agent history after a long idle gap so old conversations
+        agent = self.get_agent()
+        # stale history is dropped after a long idle gap so old conversations
         # don't bleed into fresh ones
-        last_active = self.channel_last_active.get(message.channel.id)
-        if (
-            last_active is not None
-            and time.monotonic() - last_active > HISTORY_IDLE_RESET
-        ):
-            self.channel_history.pop(message.channel.id, None)
-
-        history = self.channel_history.get(message.channel.id, [])
+        conversation = await self.memory.get(message.channel.id)
+        instructions = self.get_channel_prompt(message.channel)
+        if conversation.summary:
+            instructions += (
+                "\n\nSummary of the earlier conversation in this channel, "
+                f"for reference only:\n{conversation.summary}"
+            )
+        history = list(conversation.messages)
 
         response = await run_agent(
-            lambda: agent.run(message_parts, message_history=history),
+            lambda: agent.run(
+                message_parts, message_history=history, instructions=instructions
+            ),
             message.reply,
+            guild_id=message.guild.id,
         )
         if response is None:
             return
@@ -468,11 +544,8 @@ class ChatBot(
                 DISCORD_MESSAGE_LIMIT,
             )
 
-        # Accumulate history with a rolling window
-        prior = self.channel_history.get(message.channel.id, [])
-        combined = prior + response.new_messages()
-        self.channel_history[message.channel.id] = combined[-MAX_HISTORY_MESSAGES:]
-        self.channel_last_active[message.channel.id] = time.monotonic()
+        # Accumulate history, trimmed to the token budget
+        await self.memory.append(conversation, response.new_messages())
 
         # Only ping the person we're replying to - suppress all other mention types
         await message.reply(
@@ -0,0 +1,240 @@
+"""Bounded, persistent conversation memory for the chatbot.
+
+Each channel's conversation is a list of pydantic-ai ``ModelMessage``s plus an
+optional running summary. ``ConversationMemory`` keeps:
+
+- only the most recently active channels resident, in an LRU; every update is
+  written through to ``chatbot_memory``, so an evicted channel (or every
+  channel, after a restart) is simply read back on its next message;
+- only as many whole turns as fit in a token budget, newest first, instead of
+  a fixed message count. Images and files are kept for the latest turn only,
+  and the instructions pydantic-ai records on every request are dropped,
+  since the agent re-sends them on each run anyway;
+- optionally, a summary of the turns that fall out of the budget, written in
+  the background by a ``Summarizer`` so replies never wait on it.
+"""
+
+import asyncio
+import dataclasses
+import datetime
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from pydantic import ValidationError
+from pydantic_ai import BinaryContent, ImageUrl
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    SystemPromptPart,
+    UserPromptPart,
+)
+from utils import cache
+
+from .models import ChatMemory
+
+logger = logging.getLogger(__name__)
+
+#: Rough text-to-token ratio used for budgeting; exact counts are not needed
+CHARS_PER_TOKEN = 4
+#: Budgeted cost of one image or file
+MEDIA_TOKENS = 800
+
+#: ``(previous summary, messages leaving the context) -> new summary``
+Summarizer = Callable[[Optional[str], list[ModelMessage]], Awaitable[Optional[str]]]
+
+
+def estimate_tokens(message: ModelMessage) -> int:
+    tokens = 0
+    for part in message.parts:
+        content = getattr(part, "content", "")
+        for item in content if isinstance(content, (list, tuple)) else [content]:
+            if isinstance(item, (ImageUrl, BinaryContent)):
+                tokens += MEDIA_TOKENS
+            else:
+                tokens += len(str(item)) // CHARS_PER_TOKEN + 1
+    return tokens
+
+
+def _starts_turn(message: ModelMessage) -> bool:
+    return isinstance(message, ModelRequest) and any(
+        isinstance(part, UserPromptPart) for part in message.parts
+    )
+
+
+def trim(
+    messages: list[ModelMessage], budget: int
+) -> tuple[list[ModelMessage], list[ModelMessage]]:
+    """Split into ``(kept, dropped)``: the newest whole turns within ``budget``.
+
+    The latest turn is always kept, even on its own over budget.
+    """
+    starts = [i for i, message in enumerate(messages) if _starts_turn(message)]
+    if not starts:
+        return [], list(messages)
+
+    cut = starts[-1]
+    used = sum(estimate_tokens(m) for m in messages[cut:])
+    for start in reversed(starts[:-1]):
+        cost = sum(estimate_tokens(m) for m in messages[start:cut])
+        if used + cost > budget:
+            break
+        used += cost
+        cut = start
+    return messages[cut:], messages[:cut]
+
+
+def _without_media(part: UserPromptPart) -> UserPromptPart:
+    if isinstance(part.content, str):
+        return part
+    content = []
+    for item in part.content:
+        if isinstance(item, ImageUrl):
+            item = "[an image was shared here]"
+        elif isinstance(item, BinaryContent):
+            item = "[a file was shared here]"
+        content.append(item)
+    return dataclasses.replace(part, content=content)
+
+
+def compact(
+    messages: list[ModelMessage], keep_media_from: Optional[int] = None
+) -> list[ModelMessage]:
+    """Drop recorded instructions and system prompts, and media before
+    ``keep_media_from`` (all media if None)"""
+    compacted = []
+    for index, message in enumerate(messages):
+        if isinstance(message, ModelRequest):
+            keep_media = keep_media_from is not None and index >= keep_media_from
+            parts = [
+                (
+                    part
+                    if keep_media or not isinstance(part, UserPromptPart)
+                    else _without_media(part)
+                )
+                for part in message.parts
+                if not isinstance(part, SystemPromptPart)
+            ]
+            message = dataclasses.replace(message, parts=parts, instructions=None)
+        compacted.append(message)
+    return compacted
+
+
+@dataclass
+class Conversation:
+    channel_id: int
+    messages: list[ModelMessage] = field(default_factory=list)
+    summary: Optional[str] = None
+    last_active: Optional[datetime.datetime] = None
+    # trimmed turns the summarizer has not folded into ``summary`` yet
+    unsummarized: list[ModelMessage] = field(default_factory=list)
+
+
+class ConversationMemory:
+    """Per-channel conversations. See the module docstring."""
+
+    def __init__(
+        self,
+        max_resident: int,
+        token_budget: int,
+        idle_reset: datetime.timedelta,
+        summarize: Optional[Summarizer] = None,
+    ):
+        self.token_budget = token_budget
+        self.idle_reset = idle_reset
+        self.summarize = summarize
+        self._resident: cache.Cache[int, Conversation] = cache.lru(
+            "chatbot.conversations", max_resident
+        )
+        # channel_id -> (conversation, task) for summaries being written
+        self._summarizing: dict[int, tuple[Conversation, asyncio.Task]] = {}
+        self.stats = {"resident_hits": 0, "loads": 0, "summaries": 0}
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    async def get(self, channel_id: int) -> Conversation:
+        """The channel's conversation, reset if it has been idle too long"""
+        conversation = self._resident.get(channel_id)
+        if conversation is not None:
+            self.stats["resident_hits"] += 1
+        elif channel_id in self._summarizing:
+            # evicted mid-summary; keep using the object the summary lands on
+            conversation = self._summarizing[channel_id][0]
+        else:
+            self.stats["loads"] += 1
+            conversation = await asyncio.to_thread(self._load, channel_id)
+        self._resident[channel_id] = conversation
+
+        if (
+            conversation.last_active
+            and datetime.datetime.utcnow() - conversation.last_active > self.idle_reset
+        ):
+            conversation.messages = []
+            conversation.summary = None
+            conversation.unsummarized.clear()
+        return conversation
+
+    async def append(
+        self, conversation: Conversation, new_messages: list[ModelMessage]
+    ) -> None:
+        """Add a finished run's messages, trim to budget and save"""
+        kept, dropped = trim(
+            conversation.messages + list(new_messages), self.token_budget
+        )
+        latest_turn = max((i for i, m in enumerate(kept) if _starts_turn(m)), default=0)
+        conversation.messages = compact(kept, keep_media_from=latest_turn)
+        conversation.last_active = datetime.datetime.utcnow()
+
+        if dropped and self.summarize:
+            conversation.unsummarized.extend(compact(dropped))
+            if conversation.channel_id not in self._summarizing:
+                task = asyncio.create_task(self._summarize_dropped(conversation))
+                self._summarizing[conversation.channel_id] = (conversation, task)
+
+        await asyncio.to_thread(self._save, conversation)
+
+    def close(self) -> None:
+        for _, task in self._summarizing.values():
+            task.cancel()
+        self._summarizing.clear()
+        self._resident.clear()
+
+    async def _summarize_dropped(self, conversation: Conversation) -> None:
+        try:
+            while conversation.unsummarized:
+                batch = list(conversation.unsummarized)
+                try:
+                    summary = await self.summarize(conversation.summary, batch)
+                except Exception as e:
+                    logger.warning(
+                        f"Summarizing channel {conversation.channel_id} failed: {e}"
+                    )
+                    summary = None
+                del conversation.unsummarized[: len(batch)]
+                if summary:
+                    conversation.summary = summary
+                    self.stats["summaries"] += 1
+                    await asyncio.to_thread(self._save, conversation)
+        finally:
+            self._summarizing.pop(conversation.channel_id, None)
+
+    def _load(self, channel_id: int) -> Conversation:
+        row = ChatMemory.get_or_none(ChatMemory.channel_id == channel_id)
+        if row is None:
+            return Conversation(channel_id)
+        try:
+            messages = ModelMessagesTypeAdapter.validate_json(row.messages)
+        except ValidationError as e:
+            logger.warning(f"Discarding unreadable history for {channel_id}: {e}")
+            messages = []
+        return Conversation(channel_id, messages, row.summary, row.last_active)
+
+    def _save(self, conversation: Conversation) -> None:
+        ChatMemory.replace(
+            channel_id=conversation.channel_id,
+            messages=ModelMessagesTypeAdapter.dump_json(conversation.messages).decode(),
+            summary=conversation.summary,
+            last_active=conversation.last_active or datetime.datetime.utcnow(),
+        ).execute()
@@ -0,0 +1,15 @@
+import datetime
+
+from db import BaseModel
+from peewee import *
+
+
+class ChatMemory(BaseModel):
+    channel_id = BigIntegerField(primary_key=True)
+    # serialized list[ModelMessage], via ModelMessagesTypeAdapter
+    messages = TextField()
+    summary = TextField(null=True)
+    last_active = DateTimeField(default=datetime.datetime.utcnow)
+
+    class Meta:
+        table_name = "chatbot_memory"
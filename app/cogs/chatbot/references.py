@@ -0,0 +1,95 @@
+"""Working out what a message replies to, without a REST call where possible.
+
+The chatbot answers replies to its own messages, so every reply in a guild
+used to cost a ``fetch_message`` just to learn who wrote the message being
+replied to. That is usually known already, and is looked up in order of cost:
+
+1. ``message.reference.resolved``, which the gateway fills in for most replies;
+2. the channel's ``message_buffer``, which also knows a recent message that is
+   missing was deleted;
+3. the bot's own recent message IDs. Every message the bot sent since the
+   resolver started is remembered, up to a limit, so a recent message that is
+   not among them was written by someone else;
+4. REST, as a last resort.
+"""
+
+from collections import Counter, OrderedDict
+from typing import NamedTuple, Optional
+
+import discord
+from utils import message_buffer
+
+
+class Reference(NamedTuple):
+    """What the chatbot needs to know about a replied-to message"""
+
+    author_id: int
+    author_bot: bool
+    has_embeds: bool
+
+
+class ReferenceResolver:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # own message ID -> whether it has embeds, oldest first
+        self._own: OrderedDict[int, bool] = OrderedDict()
+        # every own message with an ID above this is in ``_own``
+        self._own_complete_after = discord.utils.time_snowflake(discord.utils.utcnow())
+        self.stats: Counter = Counter()
+
+    def add_own(self, message: discord.Message) -> None:
+        """Remember a message the bot sent"""
+        self._own[message.id] = bool(message.embeds)
+        while len(self._own) > self.capacity:
+            evicted, _ = self._own.popitem(last=False)
+            self._own_complete_after = evicted
+
+    async def resolve(
+        self,
+        message: discord.Message,
+        bot_user: discord.abc.Snowflake,
+        need_details: bool,
+    ) -> Optional[Reference]:
+        """The message ``message`` replies to, or None if it is gone.
+
+        Without ``need_details`` only replies to the bot matter, so None is
+        also returned, without a REST call, for a message known to be someone
+        else's.
+        """
+        reference = message.reference
+        resolved = reference.resolved
+        if isinstance(resolved, discord.DeletedReferencedMessage):
+            self.stats["resolved"] += 1
+            return None
+        if isinstance(resolved, discord.Message):
+            self.stats["resolved"] += 1
+            return Reference(
+                resolved.author.id, resolved.author.bot, bool(resolved.embeds)
+            )
+
+        message_id = reference.message_id
+        buffer = message_buffer.get_buffer(reference.channel_id)
+        if buffer is not None:
+            buffered = buffer.get(message_id)
+            if buffered is not None:
+                self.stats["buffer"] += 1
+                return Reference(
+                    buffered.author.id, buffered.author.bot, buffered.has_embeds
+                )
+            if buffer.covers(message_id):
+                self.stats["buffer"] += 1
+                return None
+
+        if message_id in self._own:
+            self.stats["own"] += 1
+            return Reference(bot_user.id, True, self._own[message_id])
+        if not need_details and message_id > self._own_complete_after:
+            self.stats["own"] += 1
+            return None
+
+        self.stats["rest"] += 1
+        try:
+            fetched = await message.channel.fetch_message(message_id)
+        except discord.HTTPException:
+            return None
+        return Reference(fetched.author.id, fetched.author.bot, bool(fetched.embeds))
@@ -3,8 +3,9 @@ from cogs.lancocog import LancoCog
 from discord import app_commands, ui
 from discord.ext import commands
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, BinaryContent
+from pydantic_ai import BinaryContent
 from reactionmenu import ReactionButton, ReactionMenu
+from utils import agents
 from utils.ai_utils import run_agent
 from utils.apm import transaction as apm_transaction
 from utils.command_utils import is_bot_owner_or_admin
@@ -182,8 +183,8 @@ class Commands(LancoCog, name="Commands", description="Custom guild commands"):
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Generate a concise and relevant response based on the user's command prompt.",
             output_type=AICommandResponse,
         )
@@ -345,6 +346,7 @@ class Commands(LancoCog, name="Commands", description="Custom guild commands"):
                         response = await run_agent(
                             lambda: self.agent.run(command.command_response),
                             message.channel.send,
+                            guild_id=message.guild.id,
                         )
                         if response is None:
                             return
@@ -1,8 +1,7 @@
-import asyncio
 import re
 
 import discord
-from cachetools import LRUCache
+from cogs.common.embedwatch import EmbedWatch
 from cogs.lancocog import LancoCog
 from db import BaseModel
 from discord import app_commands
@@ -61,7 +60,7 @@ class _HandlerSelectView(discord.ui.View):
         return True
 
 
-class EmbedFixConfigBase(BaseModel):
+class EmbedFixConfigBase(BaseModel, abstract=True):
     guild_id = BigIntegerField(primary_key=True)
     enabled = BooleanField(default=False)
     handler_id = CharField(default="")
@@ -142,7 +141,17 @@ class EmbedFixCog(LancoCog, name="EmbedFixCog", description="Abstract embed fix
         self.config_model = config_model
         self.skip_if_handled_by_discord = skip_if_handled_by_discord
         self.wait_time = wait_time
-        self.fixed_messages = LRUCache(maxsize=1000)  # message_id -> fixed_message_id
+        self.embed_watch = EmbedWatch(
+            bot,
+            self.logger,
+            deadline=wait_time,
+            name=f"embedwatch.{self.qualified_name}",
+        )
+
+    @property
+    def fixed_messages(self):
+        """message_id -> fixed_message_id, kept by the embed watch"""
+        return self.embed_watch.fixed_messages
 
     async def cog_load(self):
         await super().cog_load()
@@ -231,23 +240,20 @@ class EmbedFixCog(LancoCog, name="EmbedFixCog", description="Abstract embed fix
         if matched_idx is None:
             return
 
-        self.logger.info(
-            f"Found URL matching pattern for {self.name}: {original_url} - waiting {self.wait_time}s"
-        )
-
-        await asyncio.sleep(self.wait_time)
-
-        # re-fetch the message to get the latest content
-        message = await message.channel.fetch_message(message.id)
-        if message.embeds and self.skip_if_handled_by_discord:
-            self.logger.info("Discord embedded the link, no need to fix it")
-            return
-
         embed_config = self.config_model.get_or_none(guild_id=message.guild.id)
         if not embed_config or not embed_config.enabled:
             self.logger.info("Embed fix not enabled for this server")
             return
 
+        self.logger.info(f"Found URL matching pattern for {self.name}: {original_url}")
+
+        # Only worth waiting for when Discord's own embed would be kept;
+        # otherwise the original's preview gets suppressed either way.
+        if self.skip_if_handled_by_discord:
+            if await self.embed_watch.wait_for_embed(message):
+                self.logger.info("Discord embedded the link, no need to fix it")
+                return
+
         active = self._active_handler(embed_config)
         pr = active.patterns[min(matched_idx, len(active.patterns) - 1)]
         fixed_url = original_url.replace(pr.original, pr.replacement)
@@ -260,18 +266,18 @@ class EmbedFixCog(LancoCog, name="EmbedFixCog", description="Abstract embed fix
         if message.channel.permissions_for(message.guild.me).manage_messages:
             await message.edit(suppress=True)
 
-        self.fixed_messages[message.id] = fixed_msg.id
+        self.embed_watch.record_fix(message.id, fixed_msg.id)
 
         # Per handler, not per cog: which service a guild actually rewrites
         # through is what decides whether a handler still needs maintaining.
-        # Reported after the fact because this path sleeps before it acts.
         self.record_activity(
             active.id, tx_type=apm.TX_EMBED_FIX, guild_id=message.guild.id
         )
 
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        await self.embed_watch.handle_raw_edit(payload)
+
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
-        fixed_message_id = self.fixed_messages.pop(message.id, None)
-        if fixed_message_id:
-            fixed_message = await message.channel.fetch_message(fixed_message_id)
-            await fixed_message.delete()
+        await self.embed_watch.handle_delete(message)
@@ -0,0 +1,114 @@
+"""Find out whether Discord embedded a link, without asking it.
+
+Discord's unfurler adds a link preview after the message is created, as a
+``MESSAGE_UPDATE`` carrying ``embeds``. Embed-fix cogs used to sleep for a
+fixed time and then ``fetch_message`` to see whether that had happened,
+which is one REST call and the whole sleep for every link. ``EmbedWatch``
+listens for the update instead:
+
+    if await self.embed_watch.wait_for_embed(message):
+        return  # Discord handled it
+    fixed = await message.reply(...)
+    self.embed_watch.record_fix(message.id, fixed.id)
+
+``wait_for_embed`` returns as soon as the update arrives, or False at the
+deadline. The owning cog forwards its ``on_raw_message_edit`` and
+``on_message_delete`` events to ``handle_raw_edit``/``handle_delete``. The raw
+edit event fires even for messages that have aged out of discord.py's cache.
+
+The watch also keeps the ``message -> our fix`` map, so a fix can be removed
+when its original is deleted, or optionally when Discord's own embed turns
+up after the deadline.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import discord
+from utils import cache
+
+
+class EmbedWatch:
+    def __init__(
+        self,
+        bot,
+        logger: logging.Logger,
+        deadline: float = 2.5,
+        retract_late_fixes: bool = False,
+        maxsize: int = 1000,
+        name: str = "embedwatch",
+    ):
+        self.bot = bot
+        self.logger = logger
+        self.deadline = deadline
+        #: delete our fix if Discord's embed arrives after the deadline
+        self.retract_late_fixes = retract_late_fixes
+        # message_id -> fix id
+        self.fixed_messages: cache.Cache[int, int] = cache.lru(name, maxsize)
+        self._pending: dict[int, asyncio.Future] = {}
+
+    async def wait_for_embed(
+        self, message: discord.Message, deadline: Optional[float] = None
+    ) -> bool:
+        """Wait for Discord to embed a message's links.
+
+        Returns True as soon as an embed shows up, or False once ``deadline``
+        seconds pass without one.
+        """
+        if message.embeds:
+            return True
+
+        future = self._pending.get(message.id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[message.id] = future
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future),
+                self.deadline if deadline is None else deadline,
+            )
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if self._pending.get(message.id) is future:
+                del self._pending[message.id]
+
+    def record_fix(self, message_id: int, fixed_message_id: int) -> None:
+        self.fixed_messages[message_id] = fixed_message_id
+
+    async def handle_raw_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        if not payload.data.get("embeds"):
+            return
+
+        future = self._pending.get(payload.message_id)
+        if future and not future.done():
+            future.set_result(True)
+            return
+
+        if not self.retract_late_fixes:
+            return
+        fixed_message_id = self.fixed_messages.pop(payload.message_id, None)
+        if not fixed_message_id:
+            return
+
+        self.logger.info(
+            f"Discord eventually embedded message {payload.message_id} in channel "
+            f"{payload.channel_id}, removing our embed"
+        )
+        channel = self.bot.get_channel(payload.channel_id)
+        await self._delete(channel, payload.channel_id, fixed_message_id)
+
+    async def handle_delete(self, message: discord.Message) -> None:
+        fixed_message_id = self.fixed_messages.pop(message.id, None)
+        if fixed_message_id:
+            await self._delete(message.channel, message.channel.id, fixed_message_id)
+
+    async def _delete(self, channel, channel_id: int, message_id: int) -> None:
+        try:
+            if channel is None:
+                channel = await self.bot.fetch_channel(channel_id)
+            # a partial message deletes by ID, without fetching it first
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            pass
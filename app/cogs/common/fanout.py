@@ -0,0 +1,166 @@
+"""Deliver one fetched batch of items to many subscriptions.
+
+Subscription cogs (YouTube, FixIt, Everbridge) all fetch a source once and then
+post whatever each subscriber has not seen yet. ``SubscriptionFanout`` is that
+second half:
+
+    new = await self.fanout.deliver(
+        configs,
+        items,  # oldest first
+        is_new=lambda config, item: item.id > (config.last_known or 0),
+        send=lambda channel, config, item: channel.send(...),
+        advance=self.advance,  # move config's watermark, self.mark_dirty(config)
+    )
+
+Each subscriber works from its own in-memory watermark: ``is_new`` decides its
+pending items, and ``advance`` is called after every successful send so the
+watermark never runs ahead of what was actually posted. A failed send stops
+that subscriber for this cycle and leaves the rest untouched. Persisting the
+advanced watermarks is left to the caller, which for a ``PollerCog`` means a
+single transaction at the end of the cycle.
+
+Subscribers are served concurrently, but every send first takes a token from
+the guild's ``GuildRateBudget``, so a burst of new items cannot flood one
+guild. The default budget is shared by every fan-out in the process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+import discord
+from utils import cache
+
+MAX_BUDGET_KEYS = 10000  # guilds (or DM channels) with a bucket
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "lock")
+
+    def __init__(self, tokens: float):
+        self.tokens = tokens
+        self.updated: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+
+class GuildRateBudget:
+    """A token bucket per guild: ``rate`` sends per ``per`` seconds.
+
+    Waiters for the same guild queue behind a lock, so they are served in
+    order and one busy guild never delays another. Buckets are kept in an LRU
+    of ``max_keys``, so the guild that goes is the one that sent least
+    recently, whose bucket has most likely refilled.
+    """
+
+    def __init__(
+        self,
+        rate: int = 5,
+        per: float = 5.0,
+        max_keys: int = MAX_BUDGET_KEYS,
+        name: str = "fanout.guild_budget",
+    ):
+        self.rate = rate
+        self.per = per
+        self._buckets: cache.Cache[Hashable, _Bucket] = cache.lru(name, max_keys)
+
+    async def acquire(self, key: Hashable) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.rate)
+        async with bucket.lock:
+            while True:
+                now = time.monotonic()
+                if bucket.updated is not None:
+                    bucket.tokens = min(
+                        self.rate,
+                        bucket.tokens + (now - bucket.updated) * self.rate / self.per,
+                    )
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                await asyncio.sleep((1 - bucket.tokens) * self.per / self.rate)
+
+
+default_budget = GuildRateBudget()
+
+
+class SubscriptionFanout:
+    """Posts new items to subscribed channels. See the module docstring."""
+
+    def __init__(
+        self,
+        bot,
+        logger: logging.Logger,
+        budget: Optional[GuildRateBudget] = None,
+        max_concurrency: int = 8,
+    ):
+        self.bot = bot
+        self.logger = logger
+        self.budget = budget or default_budget
+        self.max_concurrency = max_concurrency
+        self._warned_channels: set[int] = set()
+
+    def resolve_channel(self, channel_id: int) -> Optional[discord.abc.Messageable]:
+        """Look up a subscription's channel, warning once per missing channel"""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None and channel_id not in self._warned_channels:
+            self._warned_channels.add(channel_id)
+            self.logger.warning(f"Channel {channel_id} not found, skipping")
+        return channel
+
+    async def deliver(
+        self,
+        subscriptions: Iterable[Any],
+        items: list[Any],
+        *,
+        is_new: Callable[[Any, Any], bool],
+        send: Callable[[discord.abc.Messageable, Any, Any], Awaitable[Any]],
+        advance: Callable[[Any, Any], None],
+    ) -> int:
+        """Send each subscription the items it has not seen.
+
+        :param subscriptions: Rows with a ``channel_id``
+        :param items: The fetched batch, oldest first
+        :param is_new: Whether an item is past a subscription's watermark
+        :param send: Posts one item to one subscription's channel
+        :param advance: Moves a subscription's watermark past a sent item
+        :return: The number of messages sent
+        """
+        if not items:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(subscription) -> int:
+            channel = self.resolve_channel(subscription.channel_id)
+            if channel is None:
+                return 0
+            pending = [item for item in items if is_new(subscription, item)]
+            if not pending:
+                return 0
+
+            guild = getattr(channel, "guild", None)
+            budget_key = guild.id if guild else channel.id
+            sent = 0
+            async with semaphore:
+                for item in pending:
+                    await self.budget.acquire(budget_key)
+                    try:
+                        await send(channel, subscription, item)
+                    except Exception as e:
+                        # leave the watermark on the last item that did go out,
+                        # so this one is retried next cycle
+                        self.logger.error(
+                            f"Failed to send to channel {subscription.channel_id}: {e}"
+                        )
+                        break
+                    advance(subscription, item)
+                    sent += 1
+            return sent
+
+        results = await asyncio.gather(*(run(s) for s in subscriptions))
+        return sum(results)
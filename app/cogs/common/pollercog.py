@@ -0,0 +1,431 @@
+"""Shared base for cogs that poll an external feed on a timer.
+
+A feed cog used to hand-roll a ``tasks.loop`` with its own error handling and
+watermark bookkeeping. ``PollerCog`` owns that loop instead; a subclass only
+says what its sources are, how to fetch one, and what to do with the result:
+
+    class MyFeed(PollerCog, name="MyFeed", description="..."):
+        POLL_INTERVAL = 60
+
+        async def get_sources(self) -> list[PollSource]:
+            return [PollSource(key=url) for url in self.urls()]
+
+        async def fetch(self, source: PollSource):
+            return await self.download(source.key)
+
+        async def process(self, source: PollSource, result) -> int:
+            ...  # post what is new, self.mark_dirty(config) for watermarks
+            return posted
+
+What every subclass gets:
+
+*Scheduling* - sources are fetched concurrently (bounded by
+``MAX_CONCURRENCY``), and each sleep between cycles is jittered, so a dozen
+feed cogs loaded in the same second do not all fire on the same boundary
+forever after. The interval adapts: a cycle that delivered something drops it
+back to ``POLL_INTERVAL``, an idle one stretches it towards ``MAX_INTERVAL``.
+
+*Circuit breaking* - each source has its own breaker. ``FAILURE_THRESHOLD``
+consecutive failures open it and the source is skipped; after
+``RECOVERY_TIMEOUT`` a single half-open probe decides whether it closes again.
+One dead feed therefore costs one request per timeout, not one per cycle.
+Only ``fetch`` failures count: an error in ``process`` (Discord refusing a
+send, say) says nothing about the feed, so it is logged and counted in the
+metrics but leaves the breaker alone.
+
+*Dedup and watermarks* - ``seen_ids`` keeps a bounded in-memory set of item IDs
+per key, so an item is never delivered twice within a process even when the
+persisted watermark lags. Watermark rows passed to ``mark_dirty`` are written
+once per cycle, in a single transaction.
+
+*Metrics* - per-source poll counts, errors and fetch latency, read by the
+webserver's ``/status``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import random
+import time
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable, Optional
+
+from cogs.lancocog import LancoCog
+from peewee import Model
+
+
+@dataclass
+class PollSource:
+    """One independently fetched thing: a feed URL, a subreddit, an API.
+
+    ``key`` identifies the source across cycles, so it is what the breaker,
+    the metrics and the seen set hang off. ``data`` carries whatever the cog
+    needs to process it (typically the subscriptions that share it).
+    """
+
+    key: str
+    label: Optional[str] = None
+    data: Any = None
+
+    def __post_init__(self) -> None:
+        if self.label is None:
+            self.label = self.key
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probe -> closed.
+
+    ``allow`` is asked before each fetch. While open it refuses until
+    ``reset_timeout`` has passed, then lets exactly one probe through; the
+    probe's outcome closes the breaker or re-opens it for another timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now: Optional[float] = None) -> bool:
+        """Count a failure. Returns True if this one opened the breaker."""
+        now = time.monotonic() if now is None else now
+        self.failures += 1
+        was_open = self.state != self.CLOSED
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = now
+            self._probing = False
+            return not was_open
+        return False
+
+
+@dataclass
+class SourceMetrics:
+    polls: int = 0
+    errors: int = 0
+    #: cycles the breaker refused to fetch this source
+    skipped: int = 0
+    #: items ``process`` reported delivering
+    items: int = 0
+    last_latency: Optional[float] = None
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+    last_error: Optional[str] = None
+    last_success: Optional[datetime.datetime] = None
+
+    def record_latency(self, seconds: float) -> None:
+        self.last_latency = seconds
+        self.total_latency += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+    def as_dict(self) -> dict:
+        fetched = self.polls - self.skipped
+        return {
+            "polls": self.polls,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "items": self.items,
+            "last_latency_ms": (
+                round(self.last_latency * 1000)
+                if self.last_latency is not None
+                else None
+            ),
+            "avg_latency_ms": (
+                round(self.total_latency / fetched * 1000) if fetched > 0 else None
+            ),
+            "max_latency_ms": round(self.max_latency * 1000),
+            "last_error": self.last_error,
+            "last_success": (
+                self.last_success.isoformat() if self.last_success else None
+            ),
+        }
+
+
+class SeenIds:
+    """Insertion-ordered set that forgets its oldest entries past ``maxlen``.
+
+    Feeds only ever show their newest items, so an ID old enough to fall off
+    the end can no longer come back; bounding the set keeps a long-running
+    process from accumulating every ID it has ever seen.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self.maxlen = maxlen
+        self._ids: OrderedDict[Hashable, None] = OrderedDict()
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, item_id: Hashable) -> bool:
+        """Remember an ID. Returns False if it was already known."""
+        if item_id in self._ids:
+            self._ids.move_to_end(item_id)
+            return False
+        self._ids[item_id] = None
+        while len(self._ids) > self.maxlen:
+            self._ids.popitem(last=False)
+        return True
+
+    def update(self, item_ids: Iterable[Hashable]) -> None:
+        for item_id in item_ids:
+            self.add(item_id)
+
+
+class PollerCog(LancoCog, name="PollerCog", description="Abstract feed poller cog"):
+    """Abstract base for feed cogs. See the module docstring."""
+
+    #: Seconds between cycles while sources are producing items
+    POLL_INTERVAL: float = 60
+    #: Upper bound the interval stretches to while nothing new turns up.
+    #: Defaults to 3x POLL_INTERVAL; set equal to it to disable adapting.
+    MAX_INTERVAL: Optional[float] = None
+    #: Growth factor applied to the interval after an idle cycle
+    IDLE_BACKOFF: float = 1.5
+    #: +/- fraction of the interval randomised on every sleep
+    JITTER: float = 0.1
+    #: Sources fetched at once
+    MAX_CONCURRENCY: int = 4
+    FAILURE_THRESHOLD: int = 3
+    RECOVERY_TIMEOUT: float = 60
+    #: IDs remembered per seen set
+    SEEN_LIMIT: int = 1000
+
+    def __init__(self, bot, *args, **kwargs):
+        super().__init__(bot, *args, **kwargs)
+        self.interval: float = self.POLL_INTERVAL
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.metrics: dict[str, SourceMetrics] = {}
+        self._seen: dict[Hashable, SeenIds] = {}
+        self._dirty: dict[tuple, Model] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+
+    # --- to implement ------------------------------------------------------
+
+    @abstractmethod
+    async def get_sources(self) -> list[PollSource]:
+        """The sources to poll this cycle. Called once per cycle."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fetch(self, source: PollSource) -> Any:
+        """Fetch one source. Raising counts as a failure for its breaker."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def process(self, source: PollSource, result: Any) -> int:
+        """Act on a fetched result; return how many items were delivered.
+        Raising is logged, but does not count against the source's breaker."""
+        raise NotImplementedError
+
+    async def on_circuit_open(self, source: PollSource) -> None:
+        """Called when a source's breaker opens. No-op by default."""
+
+    # --- lifecycle ---------------------------------------------------------
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.start_polling()
+
+    async def cog_unload(self):
+        await super().cog_unload()
+        # super() cancelled the loop; keep whatever the last cycle advanced
+        self.flush_watermarks()
+
+    def start_polling(self) -> None:
+        if self._poll_task and not self._poll_task.done():
+            return
+        self._poll_task = self.track_task(asyncio.create_task(self._poll_loop()))
+
+    async def _poll_loop(self) -> None:
+        await self.bot.wait_until_ready()
+        # Spread the first cycle out so cogs loaded together stay apart
+        await asyncio.sleep(random.uniform(0, min(self.POLL_INTERVAL, 10)))
+        while True:
+            try:
+                delivered = await self.poll_once()
+                self._adapt_interval(delivered)
+            except Exception:
+                self.logger.exception("Error in poll cycle")
+            await asyncio.sleep(self._jittered(self.interval))
+
+    def _max_interval(self) -> float:
+        if self.MAX_INTERVAL is None:
+            return self.POLL_INTERVAL * 3
+        return max(self.MAX_INTERVAL, self.POLL_INTERVAL)
+
+    def _adapt_interval(self, delivered: int) -> None:
+        if delivered:
+            self.interval = self.POLL_INTERVAL
+        else:
+            self.interval = min(self.interval * self.IDLE_BACKOFF, self._max_interval())
+
+    def _jittered(self, seconds: float) -> float:
+        return max(0.0, seconds * random.uniform(1 - self.JITTER, 1 + self.JITTER))
+
+    # --- a cycle -----------------------------------------------------------
+
+    async def poll_once(self) -> int:
+        """Run one cycle over every source. Returns the items delivered."""
+        sources = await self.get_sources()
+        if not sources:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def run(source: PollSource) -> int:
+            async with semaphore:
+                return await self._poll_source(source)
+
+        try:
+            results = await asyncio.gather(*(run(s) for s in sources))
+        finally:
+            self.flush_watermarks()
+        return sum(results)
+
+    async def _poll_source(self, source: PollSource) -> int:
+        breaker = self.breaker(source.key)
+        metrics = self.metrics.setdefault(source.key, SourceMetrics())
+        metrics.polls += 1
+
+        if not breaker.allow():
+            metrics.skipped += 1
+            return 0
+        probing = breaker.state == CircuitBreaker.HALF_OPEN
+        if probing:
+            self.logger.info(f"[{source.label}] Probing after open circuit")
+
+        started = time.perf_counter()
+        try:
+            result = await self.fetch(source)
+        except Exception as e:
+            metrics.record_latency(time.perf_counter() - started)
+            await self._record_failure(source, breaker, metrics, e)
+            return 0
+        metrics.record_latency(time.perf_counter() - started)
+
+        # the fetch succeeded, so the source is healthy whatever happens to
+        # the delivery
+        if probing:
+            self.logger.info(f"[{source.label}] Recovered, closing circuit")
+        breaker.record_success()
+
+        try:
+            delivered = await self.process(source, result) or 0
+        except Exception as e:
+            metrics.errors += 1
+            metrics.last_error = f"{type(e).__name__}: {e}"
+            self.logger.exception(f"[{source.label}] Error processing: {e}")
+            return 0
+
+        metrics.items += delivered
+        metrics.last_error = None
+        metrics.last_success = datetime.datetime.now(datetime.timezone.utc)
+        return delivered
+
+    async def _record_failure(
+        self,
+        source: PollSource,
+        breaker: CircuitBreaker,
+        metrics: SourceMetrics,
+        error: Exception,
+    ) -> None:
+        metrics.errors += 1
+        metrics.last_error = f"{type(error).__name__}: {error}"
+        self.logger.error(f"[{source.label}] Error fetching: {error}")
+        if breaker.record_failure():
+            self.logger.warning(
+                f"[{source.label}] {breaker.failures} consecutive failure(s), "
+                f"pausing for {breaker.reset_timeout:.0f}s"
+            )
+            try:
+                await self.on_circuit_open(source)
+            except Exception:
+                self.logger.exception(f"[{source.label}] Error in on_circuit_open")
+
+    # --- state -------------------------------------------------------------
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker(
+                self.FAILURE_THRESHOLD, self.RECOVERY_TIMEOUT
+            )
+        return self.breakers[key]
+
+    def seen_ids(self, key: Hashable) -> SeenIds:
+        if key not in self._seen:
+            self._seen[key] = SeenIds(self.SEEN_LIMIT)
+        return self._seen[key]
+
+    def forget_source(self, key: str) -> None:
+        """Drop a source's state, e.g. after its last subscription is removed."""
+        self.breakers.pop(key, None)
+        self.metrics.pop(key, None)
+        self._seen.pop(key, None)
+
+    def mark_dirty(self, *instances: Model) -> None:
+        """Queue watermark rows to be saved at the end of the cycle."""
+        for instance in instances:
+            pk = instance._pk
+            if isinstance(pk, list):
+                pk = tuple(pk)
+            self._dirty[(type(instance), pk)] = instance
+
+    def flush_watermarks(self) -> int:
+        """Save every queued row in one transaction. Returns the row count.
+
+        If the transaction fails the rows stay queued for the next flush, so
+        a watermark is not lost (and its items re-posted after a restart).
+        """
+        if not self._dirty:
+            return 0
+        dirty = list(self._dirty.values())
+        try:
+            with self.bot.database.atomic():
+                for instance in dirty:
+                    instance.save()
+        except Exception:
+            self.logger.exception(f"Failed to persist {len(dirty)} watermark(s)")
+            return 0
+        self._dirty.clear()
+        return len(dirty)
+
+    def poller_metrics(self) -> dict:
+        """Per-source metrics plus breaker state, for status reporting."""
+        return {
+            "interval_seconds": round(self.interval, 1),
+            "sources": {
+                key: {
+                    **metrics.as_dict(),
+                    "circuit": self.breaker(key).state,
+                }
+                for key, metrics in self.metrics.items()
+            },
+        }
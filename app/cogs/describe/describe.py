@@ -5,8 +5,9 @@ import discord
 from cogs.lancocog import LancoCog
 from discord.ext import commands
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, BinaryContent
+from pydantic_ai import BinaryContent
 from pydantic_ai.exceptions import ModelHTTPError
+from utils import agents
 from utils.file_downloader import FileDownloader
 from utils.tracked_message import track_message_ids
 
@@ -28,8 +29,8 @@ class Describe(
         self.register_context_menu(
             name="Describe", callback=self.ctx_menu, errback=self.ctx_menu_error
         )
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Describe this image.",
             output_type=FileDetails,
         )
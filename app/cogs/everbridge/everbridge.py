@@ -9,9 +9,10 @@ import datetime
 import os
 
 import discord
-from cogs.lancocog import LancoCog
+from cogs.common.fanout import SubscriptionFanout
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from everbridge import EverbridgeClient
 from everbridge.models import Notification
 from utils.command_utils import is_bot_owner_or_admin
@@ -20,7 +21,7 @@ from .models import EverbridgeConfig
 
 
 class Everbridge(
-    LancoCog,
+    PollerCog,
     name="Everbridge",
     description="Subscribe to Everbridge emergency alert notifications",
 ):
@@ -30,7 +31,8 @@ class Everbridge(
         guild_only=True,
     )
 
-    UPDATE_INTERVAL = 10  # seconds
+    POLL_INTERVAL = 10  # seconds
+    MAX_INTERVAL = 30
 
     def __init__(self, bot):
         super().__init__(bot)
@@ -39,24 +41,22 @@ class Everbridge(
             username=os.getenv("EVERBRIDGE_USERNAME"),
             password=os.getenv("EVERBRIDGE_PASSWORD"),
         )
-        self._warned_channels: set[int] = set()
+        self.fanout = SubscriptionFanout(bot, self.logger)
 
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([EverbridgeConfig])
-        self.poll.start()
 
-    def cog_unload(self):
-        self.poll.cancel()
+    async def get_sources(self) -> list[PollSource]:
+        """A single account-wide source, polled only while anyone subscribes."""
+        everbridge_configs = list(EverbridgeConfig.select())
+        if not everbridge_configs:
+            self.logger.debug("No Everbridge configurations found.")
+            return []
+        return [PollSource(key="notifications", data=everbridge_configs)]
 
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def poll(self):
-        """Poll for new Everbridge notifications."""
-        self.logger.debug("Polling...")
-        try:
-            await self.get_new_notifications()
-        except Exception as e:
-            self.logger.error(f"Error polling: {e}")
+    async def fetch(self, source: PollSource) -> list[Notification]:
+        return await self.client.get_notifications()
 
     async def build_notification_embed(
         self, notification: Notification, config: EverbridgeConfig
@@ -74,54 +74,45 @@ class Everbridge(
         embed.set_footer(text=f"ID: {notification.id}")
         return embed
 
-    async def get_new_notifications(self):
-        """Get new Everbridge notifications."""
-        everbridge_configs = EverbridgeConfig.select()
-        if not everbridge_configs:
-            self.logger.debug("No Everbridge configurations found.")
-            return
-
-        notifications = await self.client.get_notifications()
-
+    async def process(
+        self, source: PollSource, notifications: list[Notification]
+    ) -> int:
+        """Send new Everbridge notifications to each subscribed channel."""
         if not notifications:
             self.logger.debug("No new notifications found.")
-            return
+            return 0
 
-        # reverse the notifs
-        notifications.reverse()
+        notifications = sorted(notifications, key=lambda n: n.createdAt)
 
-        for config in everbridge_configs:
-            channel = self.bot.get_channel(config.channel_id)
-            if not channel:
-                if config.channel_id not in self._warned_channels:
-                    self._warned_channels.add(config.channel_id)
-                    self.logger.warning(f"Channel {config.channel_id} not found.")
-                continue
+        # configs without a last event date are skipped rather than flooded
+        # with the account's whole history
+        everbridge_configs = [c for c in source.data if c.last_event_date]
 
-            last_event_date = config.last_event_date
-
-            # For testing
-            # last_event_date = datetime.datetime.now() - datetime.timedelta(weeks=4)
-
-            if not last_event_date:
-                return  # if no last event date, skip this config
-
-            new_notifications = [
-                notification
-                for notification in notifications
-                if notification.createdAt > last_event_date
-            ]
-
-            self.logger.info(
-                f"New notifications for channel {config.channel_id}: {len(new_notifications)}"
-            )
+        return await self.fanout.deliver(
+            everbridge_configs,
+            notifications,
+            is_new=lambda config, n: n.createdAt > config.last_event_date,
+            send=self.send_notification,
+            advance=self.advance_watermark,
+        )
 
-            if new_notifications:
-                for notification in new_notifications:
-                    embed = await self.build_notification_embed(notification, config)
-                    await channel.send(embed=embed)
-                    config.last_event_date = notification.createdAt
-                    config.save()
+    async def send_notification(
+        self,
+        channel: discord.TextChannel,
+        config: EverbridgeConfig,
+        notification: Notification,
+    ) -> None:
+        self.logger.info(
+            f"New notification for channel {config.channel_id}: {notification.id}"
+        )
+        embed = await self.build_notification_embed(notification, config)
+        await channel.send(embed=embed)
+
+    def advance_watermark(
+        self, config: EverbridgeConfig, notification: Notification
+    ) -> None:
+        config.last_event_date = notification.createdAt
+        self.mark_dirty(config)
 
     @commands.command()
     async def ebtest(self, ctx):
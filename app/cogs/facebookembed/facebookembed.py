@@ -1,14 +1,13 @@
 import asyncio
 import re
 
-import aiohttp
 import discord
-from bs4 import BeautifulSoup
 from cogs.common.embedfixcog import EmbedFixCog
 from cogs.lancocog import UrlHandler
 from discord import app_commands
 from discord.ext import commands
 from main import LancoBot
+from utils import opengraph
 from utils.command_utils import is_bot_owner_or_admin
 
 from .models import FacebookEmbedConfig
@@ -51,15 +50,10 @@ POST_PATTERN = re.compile(
 )
 PAGE_PATTERN = re.compile(r"https?://(?:www\.|web\.|m\.)?facebook\.com/" + _PAGE_SHAPE)
 
-_OG_PROPERTY = re.compile(r"^og:")
-
 # Facebook serves OG data inconsistently across user-agents, so the native
 # handlers try both (see get_og_tags_resilient).
 FB_CRAWLER_UA = "facebookexternalhit/1.1"
-BROWSER_UA = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
-)
+BROWSER_UA = opengraph.BROWSER_UA
 
 FB_BLUE = discord.Color.from_rgb(8, 102, 255)
 
@@ -203,7 +197,7 @@ class FacebookEmbed(
     async def _send_fix(self, message: discord.Message, **send_kwargs):
         """Reply with the fixed embed(s) and suppress the original's preview."""
         fixed_msg = await message.reply(**send_kwargs)
-        self.fixed_messages[message.id] = fixed_msg.id
+        self.embed_watch.record_fix(message.id, fixed_msg.id)
         if message.channel.permissions_for(message.guild.me).manage_messages:
             await message.edit(suppress=True)
 
@@ -337,34 +331,13 @@ class FacebookEmbed(
     async def get_og_tags(self, url: str, user_agent: str = FB_CRAWLER_UA) -> dict:
         """Return og:* tags as a dict, plus an "images" list of every og:image.
 
-        Returns {} on any fetch error.
+        Returns {} on any fetch error. Lookups go through the shared OpenGraph
+        cache, which is keyed by user agent as well as URL.
         """
-        headers = {"User-Agent": user_agent}
-        try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        self.logger.error(
-                            f"Failed to fetch {url}: status {response.status}"
-                        )
-                        return {}
-                    html = await response.text()
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Error fetching {url}: {e}")
+        metadata = await opengraph.fetch_metadata(url, user_agent=user_agent)
+        if not metadata:
             return {}
-
-        soup = BeautifulSoup(html, "html.parser")
-        tags = {"images": []}
-        for meta in soup.find_all("meta", property=_OG_PROPERTY):
-            content = meta.get("content")
-            if not content:
-                continue
-            if meta["property"] == "og:image":
-                if content not in tags["images"]:
-                    tags["images"].append(content)
-            else:
-                tags[meta["property"]] = content
-        return tags
+        return {**metadata.og(), "images": list(metadata.images)}
 
 
 async def setup(bot):
@@ -1,13 +1,9 @@
 import os
 
-import cairosvg
 import discord
-import imageio
-import pillow_heif
 from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
-from PIL import Image
 from utils.command_utils import is_bot_owner_or_admin
 from utils.file_downloader import FileDownloader
 
@@ -96,8 +92,13 @@ class FileFixer(LancoCog, name="FileFixer", description="Attempt to fix files"):
         embed.set_image(url=f"attachment://{filename}")
         await original_message.reply(file=file, embed=embed)
 
+    # The converters import their libraries on first use: they are heavy, and
+    # cairosvg needs a system libcairo that not every host has.
+
     async def fix_avif(self, local_path: str) -> str:
         try:
+            import imageio
+
             avif_image = imageio.imread(local_path)
             output_file = local_path.lower().replace(".avif", ".png")
 
@@ -108,9 +109,11 @@ class FileFixer(LancoCog, name="FileFixer", description="Attempt to fix files"):
             self.logger.error(f"Error: {e}")
 
     async def fix_heic(self, local_path: str) -> str:
-        pillow_heif.register_heif_opener()
-
         try:
+            import pillow_heif
+            from PIL import Image
+
+            pillow_heif.register_heif_opener()
             heic_image = Image.open(local_path)
             output_file = local_path.lower().replace(".heic", ".png")
 
@@ -122,6 +125,8 @@ class FileFixer(LancoCog, name="FileFixer", description="Attempt to fix files"):
 
     async def fix_svg(self, local_path: str) -> str:
         try:
+            import cairosvg
+
             output_file = local_path.lower().replace(".svg", ".png")
             svg_image = cairosvg.svg2png(url=local_path, write_to=output_file)
             self.logger.info(f"Conversion successful: {local_path} -> {output_file}")
@@ -3,7 +3,7 @@ from peewee import *
 
 
 class FishbowlConfig(BaseModel):
-    channel_id = IntegerField()
+    channel_id = IntegerField(index=True)
     ttl = FloatField()
 
     class Meta:
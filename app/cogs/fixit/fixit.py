@@ -2,9 +2,10 @@ import urllib.parse
 
 import aiohttp
 import discord
-from cogs.lancocog import LancoCog
+from cogs.common.fanout import SubscriptionFanout
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import TextChannel, app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from seeclickfix.client import SeeClickFixClient
 from seeclickfix.models.issue import Issue, Status
 from utils.command_utils import is_bot_owner_or_admin
@@ -12,38 +13,28 @@ from utils.command_utils import is_bot_owner_or_admin
 from .models import FixItConfig
 
 
-class FixIt(LancoCog, name="FixIt", description="FixIt issue tracking"):
+class FixIt(PollerCog, name="FixIt", description="FixIt issue tracking"):
     g = app_commands.Group(name="fixit", description="Fix it", guild_only=True)
 
-    UPDATE_INTERVAL = 30  # seconds
+    POLL_INTERVAL = 30  # seconds
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
         self.client = SeeClickFixClient()
+        self.fanout = SubscriptionFanout(bot, self.logger)
 
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([FixItConfig])
-        self.poll.start()
-
-    def cog_unload(self):
-        self.poll.cancel()
-
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def poll(self):
-        """Poll for new issues"""
-        self.logger.debug("Polling...")
-        try:
-            await self.get_new_issues()
-        except Exception as e:
-            self.logger.error(f"Error polling: {e}")
-
-    async def get_new_issues(self):
-        """Get new issues and share them to the configured channels"""
-        fixit_configs = FixItConfig().select()
+
+    async def get_sources(self) -> list[PollSource]:
+        """One city-wide source, polled only while anyone subscribes"""
+        fixit_configs = list(FixItConfig.select())
         if not fixit_configs:
-            return
+            return []
+        return [PollSource(key="issues", data=fixit_configs)]
 
+    async def fetch(self, source: PollSource):
         params = {
             "min_lat": 40.02961244400919,
             "min_lng": -76.333590881195,
@@ -53,29 +44,32 @@ class FixIt(LancoCog, name="FixIt", description="FixIt issue tracking"):
             "page": 1,
         }
 
-        issues_response = await self.client.get_issues(**params)
-
-        for issue in issues_response.issues:
-            for fixit_config in fixit_configs:
-                if (
-                    fixit_config.last_known_issue
-                    and issue.id <= fixit_config.last_known_issue
-                ):
-                    continue
-
-                channel = self.bot.get_channel(fixit_config.channel_id)
-                if channel is None:
-                    self.logger.warning(
-                        f"Channel {fixit_config.channel_id} not found, skipping issue {issue.id}"
-                    )
-                    continue
+        return await self.client.get_issues(**params)
+
+    async def process(self, source: PollSource, issues_response) -> int:
+        """Share new issues to the configured channels"""
+        issues = sorted(issues_response.issues, key=lambda issue: issue.id)
+        return await self.fanout.deliver(
+            source.data,
+            issues,
+            is_new=self.is_new_issue,
+            send=self.send_issue,
+            advance=self.advance_watermark,
+        )
 
-                self.logger.info(f"New FixIt issue: {issue.id} - {issue.summary}")
+    @staticmethod
+    def is_new_issue(config: FixItConfig, issue: Issue) -> bool:
+        return not config.last_known_issue or issue.id > config.last_known_issue
 
-                await self.share_issue(issue, channel)
+    async def send_issue(
+        self, channel: TextChannel, config: FixItConfig, issue: Issue
+    ) -> None:
+        self.logger.info(f"New FixIt issue: {issue.id} - {issue.summary}")
+        await self.share_issue(issue, channel)
 
-                fixit_config.last_known_issue = issue.id
-                fixit_config.save()
+    def advance_watermark(self, config: FixItConfig, issue: Issue) -> None:
+        config.last_known_issue = issue.id
+        self.mark_dirty(config)
 
     @g.command(
         name="subscribe",
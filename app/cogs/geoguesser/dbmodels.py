@@ -20,9 +20,33 @@ class GeoguesserLocation(BaseModel):
     road_lat = FloatField()
     road_lng = FloatField()
     label = CharField(null=True)
+    # the GeoguesserPopulation run that produced this row; null for rows that
+    # predate population runs
+    generation = UUIDField(null=True)
 
     class Meta:
         table_name = "geoguesser_locations"
+        indexes = ((("mode", "generation"), False),)
+
+
+class GeoguesserPopulation(BaseModel):
+    """One run of /geoguesser populate for a mode.
+
+    ``running`` while locations are being streamed in (and after a crash, until
+    resumed), ``active`` once its locations have replaced the mode's pool, and
+    ``retired`` when a later run replaces it in turn.
+    """
+
+    id = UUIDField(primary_key=True, default=uuid4)
+    mode = CharField()
+    target = IntegerField()
+    completed = IntegerField(default=0)
+    status = CharField(default="running")
+    started_at = DateTimeField(default=datetime.datetime.utcnow)
+    finished_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = "geoguesser_populations"
 
 
 class GeoguesserGameResult(BaseModel):
@@ -38,3 +62,15 @@ class GeoguesserGameResult(BaseModel):
 
     class Meta:
         table_name = "geoguesser_game_results"
+
+
+class GeocodeCacheEntry(BaseModel):
+    """A guess Google has already geocoded; coordinates are null for a miss"""
+
+    query = CharField(primary_key=True)
+    lat = FloatField(null=True)
+    lng = FloatField(null=True)
+    resolved_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    class Meta:
+        table_name = "geoguesser_geocode_cache"
@@ -0,0 +1,257 @@
+"""Offline place index for resolving guesses without a geocoding call.
+
+Most guesses name the same few hundred places: boroughs, townships,
+neighbourhoods, landmarks, the city's main streets and the intersections
+between them. ``gazetteer.json`` lists those with an approximate coordinate
+each, and ``Gazetteer`` indexes them once at load:
+
+- names are normalised (case, punctuation, ``St``/``Ave``/``N``... expanded,
+  trailing "Lancaster City, PA"-style qualifiers dropped), and both sides of
+  an intersection are sorted so "Queen & King" and "king st and queen st"
+  are the same key;
+- looser keys also drop street and municipality types, then directions, so
+  "King and Queen" still finds "King Street & Queen Street", "N Queen" finds
+  Queen Street and "Manor" finds Manor Township;
+- anything else is matched fuzzily: a trigram index narrows the candidates
+  and edit distance picks the winner, so typos like "Elizabethtwon" resolve.
+
+A name shared by several places resolves by kind first (``KIND_PRIORITY``), so
+a bare "Manor" means the township rather than the street, then to the one
+nearest the mode's centre. A fuzzy match breaks ties between equally close
+names the same way. A miss returns None; the caller falls back to Google.
+"""
+
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .models import Coordinates
+
+logger = logging.getLogger(__name__)
+
+DATASET_PATH = Path(__file__).with_name("gazetteer.json")
+
+#: Minimum edit-distance similarity (0-1) for a fuzzy match to count
+MIN_SIMILARITY = 0.8
+#: Fuzzy candidates must share at least this fraction of trigrams
+MIN_TRIGRAM_OVERLAP = 0.3
+#: How many trigram candidates are re-ranked by edit distance
+MAX_CANDIDATES = 10
+
+ABBREVIATIONS = {
+    "st": "street",
+    "str": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "rd": "road",
+    "blvd": "boulevard",
+    "dr": "drive",
+    "ln": "lane",
+    "pk": "pike",
+    "pke": "pike",
+    "hwy": "highway",
+    "ct": "court",
+    "pl": "place",
+    "sq": "square",
+    "cir": "circle",
+    "twp": "township",
+    "boro": "borough",
+    "mt": "mount",
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+}
+
+STREET_TYPES = frozenset(
+    {
+        "street",
+        "avenue",
+        "road",
+        "boulevard",
+        "drive",
+        "lane",
+        "pike",
+        "highway",
+        "court",
+        "place",
+        "circle",
+    }
+)
+MUNICIPAL_TYPES = frozenset({"township", "borough"})
+DIRECTIONS = frozenset({"north", "south", "east", "west"})
+
+# Looser keys are only tried when the stricter ones miss, so "Lititz Pike" and
+# "Lititz" stay distinct but "N Queen" still finds "Queen Street"
+LOOSE_LEVELS = (
+    STREET_TYPES | MUNICIPAL_TYPES,
+    STREET_TYPES | MUNICIPAL_TYPES | DIRECTIONS,
+)
+
+#: Which kind of place a name shared between kinds means, most likely first
+KIND_PRIORITY = ("municipality", "neighborhood", "landmark", "street", "intersection")
+
+_QUALIFIERS = re.compile(
+    r"(?:[\s,]*\b(?:lancaster city|lancaster county|pa|pennsylvania|usa)\b)+[\s,]*$"
+)
+_INTERSECTION = re.compile(r"\s*(?:&|@|/|\+|\band\b|\bat\b|\bx\b)\s*")
+_PUNCTUATION = re.compile(r"[^\w\s&@/+]")
+
+
+def normalize(name: str, drop: frozenset = frozenset()) -> str:
+    """Return the index key for a place name or guess, minus any ``drop`` words"""
+    text = name.casefold().replace("-", " ").replace("'", "").replace("’", "")
+    stripped = _QUALIFIERS.sub("", text)
+    # "Lancaster City" on its own is a place, not a qualifier
+    if stripped.strip(" ,"):
+        text = stripped
+
+    sides = []
+    for side in _INTERSECTION.split(text):
+        words = [ABBREVIATIONS.get(w, w) for w in _PUNCTUATION.sub(" ", side).split()]
+        words = [w for w in words if w not in drop] or words
+        if words:
+            sides.append(" ".join(words))
+    return " & ".join(sorted(sides))
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Levenshtein similarity, 1.0 for identical strings"""
+    if a == b:
+        return 1.0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        previous = current
+    return 1 - previous[-1] / len(a)
+
+
+@dataclass
+class Place:
+    name: str
+    kind: str
+    lat: float
+    lng: float
+    aliases: list[str] = field(default_factory=list)
+
+    @property
+    def coordinates(self) -> Coordinates:
+        return Coordinates(self.lat, self.lng)
+
+
+class Gazetteer:
+    """In-memory name index over a list of places. See the module docstring."""
+
+    def __init__(self, places: list[Place]):
+        self.places = places
+        self._exact: dict[str, list[Place]] = {}
+        self._loose: list[dict[str, list[Place]]] = [{} for _ in LOOSE_LEVELS]
+        self._trigrams: dict[str, set[str]] = {}
+
+        for place in places:
+            names = [place.name, *place.aliases]
+            # "Main Street, Lititz" also answers to plain "Main Street"
+            names += [n.split(",")[0] for n in names if "," in n]
+            for name in names:
+                key = normalize(name)
+                self._exact.setdefault(key, []).append(place)
+                for index, drop in zip(self._loose, LOOSE_LEVELS):
+                    index.setdefault(normalize(name, drop), []).append(place)
+                for gram in trigrams(key):
+                    self._trigrams.setdefault(gram, set()).add(key)
+
+    @classmethod
+    def load(cls, path: Path = DATASET_PATH) -> "Gazetteer":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        gazetteer = cls([Place(**entry) for entry in data["places"]])
+        logger.info(
+            f"Loaded gazetteer: {len(gazetteer.places)} places, "
+            f"{len(gazetteer._exact)} names"
+        )
+        return gazetteer
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def lookup(
+        self, query: str, near: Optional[tuple[float, float]] = None
+    ) -> Optional[Place]:
+        """Resolve a guess to a place, or None if nothing is close enough"""
+        key = normalize(query)
+        if not key:
+            return None
+
+        candidates = self._exact.get(key)
+        for index, drop in zip(self._loose, LOOSE_LEVELS):
+            if candidates:
+                break
+            candidates = index.get(normalize(query, drop))
+        if not candidates:
+            fuzzy = self._fuzzy_key(key)
+            candidates = self._exact.get(fuzzy) if fuzzy else None
+        if not candidates:
+            return None
+        best_rank = min(map(_kind_rank, candidates))
+        return self._nearest(
+            [p for p in candidates if _kind_rank(p) == best_rank], near
+        )
+
+    def _fuzzy_key(self, key: str) -> Optional[str]:
+        query_grams = trigrams(key)
+        shared: dict[str, int] = {}
+        for gram in query_grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        def overlap(candidate: str) -> float:
+            common = shared[candidate]
+            return common / (len(query_grams) + len(trigrams(candidate)) - common)
+
+        ranked = sorted(shared, key=overlap, reverse=True)[:MAX_CANDIDATES]
+        best, best_score = None, (MIN_SIMILARITY, -len(KIND_PRIORITY))
+        for candidate in ranked:
+            if overlap(candidate) < MIN_TRIGRAM_OVERLAP:
+                break
+            # equally similar names go to the likelier kind of place
+            rank = min(map(_kind_rank, self._exact[candidate]))
+            score = (similarity(key, candidate), -rank)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    @staticmethod
+    def _nearest(places: list[Place], near: Optional[tuple[float, float]]) -> Place:
+        if near is None or len(places) == 1:
+            return places[0]
+        lat, lng = near
+        scale = math.cos(math.radians(lat))
+        return min(
+            places, key=lambda p: (p.lat - lat) ** 2 + ((p.lng - lng) * scale) ** 2
+        )
+
+
+def _kind_rank(place: Place) -> int:
+    try:
+        return KIND_PRIORITY.index(place.kind)
+    except ValueError:
+        return len(KIND_PRIORITY)
@@ -1,8 +1,10 @@
 import asyncio
+import functools
 import os
 import re
 import time
 from math import floor
+from pathlib import Path
 
 import aiofiles
 import aiohttp
@@ -12,13 +14,23 @@ from cogs.lancocog import RoundGameCog
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import Select, View
+from utils import http
 from utils.command_utils import is_bot_owner
-from utils.roundgame.dbmodels import RoundGameResult
-
-from .dbmodels import SCORING_VERSION
+from utils.roundgame import leaderboard
+from utils.roundgame.dbmodels import (
+    RoundGameDailyTotal,
+    RoundGameResult,
+    RoundGameTotal,
+)
+
+from .dbmodels import SCORING_VERSION, GeocodeCacheEntry
 from .dbmodels import GeoguesserLocation as LocationModel
+from .dbmodels import GeoguesserPopulation
+from .gazetteer import Gazetteer
 from .locationutils import LocationUtils
 from .models import Coordinates, GeoGuesserLocation, Mode, Round
+from .population import Populator, TokenBucket, active_generations, start_or_resume
+from .sampling import YieldGrid
 from .session import GameSession
 
 # module-level state — survives cog hot-reloads since the module itself is not reloaded
@@ -36,6 +48,11 @@ class GeoGuesser(
     SCORING_VERSION = SCORING_VERSION
     GUESS_TIME = 20
     TIME_BETWEEN_ROUNDS = 10
+    # locations with street view images already on disk, kept ready per mode
+    POOL_SIZE = 5
+    # Google requests per second, shared by the population workers and the
+    # lookups games make (guess geocoding, labels)
+    GMAPS_RATE = 10
 
     geoguesser_group = app_commands.Group(
         name="geoguesser", description="GeoGuesser commands", guild_only=True
@@ -65,18 +82,47 @@ class GeoGuesser(
         super().__init__(bot)
         self.gmaps = None
         self.location_utils = None
+        self.active_generations: dict = {}
+        self.sampling_grids: dict[str, YieldGrid] = {}
+        self.gmaps_limiter = TokenBucket(self.GMAPS_RATE)
+        self._populating: set[str] = set()
         self._ready_at: float = 0.0
         _sessions_starting.clear()
 
     async def cog_load(self):
         await super().cog_load()
-        self.bot.database.create_tables([LocationModel, RoundGameResult])
+        self.bot.database.create_tables(
+            [
+                LocationModel,
+                GeoguesserPopulation,
+                GeocodeCacheEntry,
+                RoundGameResult,
+                RoundGameTotal,
+                RoundGameDailyTotal,
+            ]
+        )
         self._ready_at = time.time()
         api_key = os.getenv("GMAPS_API_KEY")
         if not api_key:
             raise ValueError("GMAPS_API_KEY is not set")
         self.gmaps = await asyncio.to_thread(googlemaps.Client, key=api_key)
-        self.location_utils = LocationUtils(self.gmaps)
+        gazetteer = await asyncio.to_thread(Gazetteer.load)
+        self.location_utils = LocationUtils(
+            self.gmaps, gazetteer, limiter=self.gmaps_limiter
+        )
+        self.active_generations = active_generations(self.modes)
+        for run in GeoguesserPopulation.select().where(
+            GeoguesserPopulation.status == "running"
+        ):
+            self.logger.warning(
+                f"Population of '{run.mode}' was interrupted at "
+                f"{run.completed}/{run.target}; /geoguesser populate resumes it"
+            )
+        for mode in self.modes:
+            self.sampling_grids[mode.name] = await asyncio.to_thread(
+                self.load_sampling_grid, mode
+            )
+            self.location_pool(mode)
 
     @property
     def active_sessions(self):
@@ -220,21 +266,15 @@ class GeoGuesser(
 
     async def on_game_end(self, session: GameSession):
         if len(session.members) > 1:
-            RoundGameResult.insert_many(
-                [
-                    {
-                        RoundGameResult.game_name: self.GAME_NAME,
-                        RoundGameResult.game_id: session.game_id,
-                        RoundGameResult.guild_id: session.channel.guild.id,
-                        RoundGameResult.user_id: user_id,
-                        RoundGameResult.mode: session.mode.name,
-                        RoundGameResult.score: score,
-                        RoundGameResult.rounds_played: len(session.rounds),
-                        RoundGameResult.scoring_version: self.SCORING_VERSION,
-                    }
-                    for user_id, score in session.members.items()
-                ]
-            ).execute()
+            leaderboard.record_results(
+                self.GAME_NAME,
+                session.game_id,
+                session.channel.guild.id,
+                session.mode.name,
+                self.SCORING_VERSION,
+                session.members,
+                len(session.rounds),
+            )
             self.logger.info(
                 f"Recorded results for game {session.game_id} — {len(session.members)} players"
             )
@@ -276,41 +316,92 @@ class GeoGuesser(
             os.makedirs(cache_dir)
         return cached_image_path
 
-    async def load_locations_from_db(
-        self, mode: Mode, count: int
-    ) -> list[GeoGuesserLocation]:
-        db_locations = (
-            LocationModel.select()
+    def get_sampling_grid_path(self, mode: Mode) -> Path:
+        slug = re.sub(r"\W+", "_", mode.name.lower())
+        return Path(self.get_cog_data_directory()) / "sampling" / f"{slug}.npz"
+
+    def load_sampling_grid(self, mode: Mode) -> YieldGrid:
+        """The mode's saved yield grid, or a new one seeded from its locations"""
+        grid = YieldGrid.load(mode, self.get_sampling_grid_path(mode))
+        if grid:
+            return grid
+        grid = YieldGrid(mode)
+        # every generation's rows: a cell that yielded once is still a road
+        seeded = grid.seed(
+            LocationModel.select(LocationModel.initial_lat, LocationModel.initial_lng)
             .where(LocationModel.mode == mode.name)
-            .order_by(self.bot.database.random())
-            .limit(count)
+            .tuples()
         )
-        locations = []
-        for location in db_locations:
-            locations.append(
-                GeoGuesserLocation(
-                    Coordinates(location.initial_lat, location.initial_lng),
-                    Coordinates(location.road_lat, location.road_lng),
-                    id=location.id,
-                    label=location.label,
-                )
+        self.logger.info(f"Seeded '{mode.name}' sampling grid with {seeded} hits")
+        return grid
+
+    def locations_query(self, mode: Mode):
+        """The locations games may use: the mode's active generation only"""
+        generation = self.active_generations.get(mode.name)
+        return LocationModel.select().where(
+            LocationModel.mode == mode.name,
+            (
+                LocationModel.generation == generation
+                if generation
+                else LocationModel.generation.is_null()
+            ),
+        )
+
+    def load_locations_from_db(
+        self, mode: Mode, count: int, exclude: set = frozenset()
+    ) -> list[GeoGuesserLocation]:
+        query = self.locations_query(mode)
+        if exclude:
+            query = query.where(LocationModel.id.not_in(list(exclude)))
+        db_locations = query.order_by(self.bot.database.random()).limit(count)
+        return [
+            GeoGuesserLocation(
+                Coordinates(location.initial_lat, location.initial_lng),
+                Coordinates(location.road_lat, location.road_lng),
+                id=location.id,
+                label=location.label,
             )
+            for location in db_locations
+        ]
 
-        async def cache_image(location: GeoGuesserLocation):
-            cached_image_path = self.get_street_view_cache_path(location)
-            if not await asyncio.to_thread(os.path.exists, cached_image_path):
-                street_view_url = self.location_utils.get_street_view_url(
-                    location.road_coords
-                )
-                async with aiohttp.ClientSession() as s:
-                    async with s.get(street_view_url) as resp:
-                        if resp.status == 200:
-                            data = await resp.read()
-                            async with aiofiles.open(cached_image_path, "wb") as f:
-                                await f.write(data)
+    async def cache_street_view_image(self, location: GeoGuesserLocation) -> bool:
+        """Download a location's street view image unless it is already on disk"""
+        cached_image_path = self.get_street_view_cache_path(location)
+        if await asyncio.to_thread(os.path.exists, cached_image_path):
+            return True
+
+        street_view_url = self.location_utils.get_street_view_url(location.road_coords)
+        try:
+            async with http.get_session("streetview").get(street_view_url) as resp:
+                if resp.status != 200:
+                    self.logger.warning(
+                        f"Street view image for {location.id} failed: {resp.status}"
+                    )
+                    return False
+                data = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"Street view image for {location.id} failed: {e}")
+            return False
+        async with aiofiles.open(cached_image_path, "wb") as f:
+            await f.write(data)
+        return True
+
+    def location_pool(self, mode: Mode):
+        """Locations for ``mode`` whose street view images are already cached"""
+
+        async def produce(count: int):
+            pool = self.asset_pools.get(mode.name)
+            pooled = {location.id for location in pool.peek()} if pool else set()
+            locations = self.load_locations_from_db(mode, count, exclude=pooled)
+            cached = await asyncio.gather(
+                *[self.cache_street_view_image(loc) for loc in locations]
+            )
+            return [loc for loc, ok in zip(locations, cached) if ok]
+
+        return self.asset_pool(mode.name, produce, self.POOL_SIZE, batch=self.POOL_SIZE)
 
-        await asyncio.gather(*[cache_image(loc) for loc in locations])
-        return locations
+    async def prepare_round(self, session: GameSession, index: int):
+        await self.cache_street_view_image(session.rounds[index].location)
 
     async def callback(self, interaction: discord.Interaction):
         mode_value = interaction.data["values"][0]
@@ -319,9 +410,7 @@ class GeoGuesser(
             interaction.channel_id
         )
 
-        available = (
-            LocationModel.select().where(LocationModel.mode == mode.name).count()
-        )
+        available = self.locations_query(mode).count()
         if available == 0:
             await interaction.response.edit_message(
                 content=f"No locations available for **{mode.name}**. A bot owner needs to run `/geoguesser populate` first.",
@@ -577,41 +666,12 @@ class GeoGuesser(
         ]
     )
     async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
-        import datetime
-
-        guild_id = interaction.guild.id
-        try:
-            query = RoundGameResult.select().where(
-                RoundGameResult.game_name == self.GAME_NAME,
-                RoundGameResult.guild_id == guild_id,
-                RoundGameResult.scoring_version == self.SCORING_VERSION,
-            )
-            list(query)
-        except Exception as e:
-            self.logger.error(f"Leaderboard query failed: {e}")
-            await interaction.response.send_message(
-                "Leaderboard unavailable. Run `poetry run migrate` to apply pending migrations.",
-                ephemeral=True,
-            )
-            return
-
-        now = datetime.datetime.utcnow()
-        if period == "today":
-            cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            query = query.where(RoundGameResult.played_at >= cutoff)
-            period_label = "Today"
-        elif period == "week":
-            cutoff = now - datetime.timedelta(days=7)
-            query = query.where(RoundGameResult.played_at >= cutoff)
-            period_label = "This Week"
-        else:
-            period_label = "All Time"
-
-        totals: dict[int, float] = {}
-        for row in query:
-            totals[row.user_id] = totals.get(row.user_id, 0) + row.score
+        period_label = leaderboard.PERIODS.get(period, "All Time")
+        top = leaderboard.top_scores(
+            self.GAME_NAME, interaction.guild.id, self.SCORING_VERSION, period
+        )
 
-        if not totals:
+        if not top:
             embed = discord.Embed(
                 title=f"GeoGuesser Leaderboard ({period_label})",
                 description="No results recorded yet.\nGames require at least 2 players to count toward the leaderboard.",
@@ -620,9 +680,8 @@ class GeoGuesser(
             await interaction.response.send_message(embed=embed)
             return
 
-        sorted_players = sorted(totals.items(), key=lambda x: x[1], reverse=True)
         lines = []
-        for user_id, score in sorted_players[:10]:
+        for user_id, score in top:
             member = interaction.guild.get_member(user_id)
             name = member.display_name if member else f"<{user_id}>"
             lines.append(f"{len(lines) + 1}. `{name}` ({score:.0f})")
@@ -636,13 +695,32 @@ class GeoGuesser(
         )
         await interaction.response.send_message(embed=embed)
 
+    @geoguesser_group.command(
+        name="rebuildleaderboard",
+        description="Regenerate the leaderboard totals from recorded results",
+    )
+    @is_bot_owner()
+    async def rebuildleaderboard(self, interaction: discord.Interaction):
+        rows = await asyncio.to_thread(leaderboard.rebuild, self.GAME_NAME)
+        self.logger.info(
+            f"{interaction.user} rebuilt the leaderboard from {rows} results"
+        )
+        await interaction.response.send_message(
+            f"Rebuilt the leaderboard from **{rows}** results.", ephemeral=True
+        )
+
     @geoguesser_group.command(
         name="populate", description="Populate the database with locations"
     )
+    @app_commands.describe(count="How many locations to generate")
     @is_bot_owner()
-    async def populate(self, interaction: discord.Interaction):
+    async def populate(
+        self,
+        interaction: discord.Interaction,
+        count: app_commands.Range[int, 1, 5000] = 100,
+    ):
         select = self.build_modes_select()
-        select.callback = self.population_callback
+        select.callback = functools.partial(self.population_callback, count=count)
         view = View()
         view.add_item(select)
         await interaction.response.send_message(view=view)
@@ -655,9 +733,17 @@ class GeoGuesser(
         async def wipe_callback(i: discord.Interaction):
             mode_value = i.data["values"][0]
             mode = next((m for m in self.modes if m.name == mode_value), None)
-            deleted = (
-                LocationModel.delete().where(LocationModel.mode == mode.name).execute()
-            )
+            with self.bot.database.atomic():
+                deleted = (
+                    LocationModel.delete()
+                    .where(LocationModel.mode == mode.name)
+                    .execute()
+                )
+                GeoguesserPopulation.delete().where(
+                    GeoguesserPopulation.mode == mode.name
+                ).execute()
+            self.active_generations[mode.name] = None
+            self.location_pool(mode).clear()
             self.logger.info(
                 f"{i.user} wiped {deleted} locations for mode '{mode.name}'"
             )
@@ -696,19 +782,22 @@ class GeoGuesser(
     async def stats(self, interaction: discord.Interaction):
         lines = []
         for mode in self.modes:
-            count = (
-                LocationModel.select().where(LocationModel.mode == mode.name).count()
-            )
+            count = self.locations_query(mode).count()
             labeled = (
-                LocationModel.select()
-                .where(
-                    LocationModel.mode == mode.name, LocationModel.label.is_null(False)
-                )
+                self.locations_query(mode)
+                .where(LocationModel.label.is_null(False))
                 .count()
             )
             lines.append(
                 f"{mode.icon} **{mode.name}**: {count} locations ({labeled} labeled)"
             )
+            grid = self.sampling_grids.get(mode.name)
+            if grid:
+                cells = grid.stats()
+                lines.append(
+                    f"  Sampling grid: {cells['productive']} productive of "
+                    f"{cells['explored']} explored cells ({cells['cells']} total)"
+                )
 
         games = (
             RoundGameResult.select(RoundGameResult.game_id)
@@ -718,6 +807,14 @@ class GeoGuesser(
         )
         lines.append(f"\nGames recorded: **{games}**")
 
+        lookups = self.location_utils.lookup_stats
+        cached = GeocodeCacheEntry.select().count()
+        lines.append(
+            f"Guesses resolved: {lookups['gazetteer']} offline, "
+            f"{lookups['cache']} cached, {lookups['google']} via Google "
+            f"({cached} cached geocodes)"
+        )
+
         embed = discord.Embed(
             title="GeoGuesser Stats", description="\n".join(lines), color=0x316CA3
         )
@@ -731,46 +828,41 @@ class GeoGuesser(
         import random
         import uuid
 
-        from peewee import chunked
-
         members = [m for m in interaction.guild.members if not m.bot]
         if not members:
             await interaction.response.send_message("No members found.", ephemeral=True)
             return
 
-        game_id = uuid.uuid4()
-        rows = [
-            {
-                RoundGameResult.game_name: self.GAME_NAME,
-                RoundGameResult.game_id: game_id,
-                RoundGameResult.guild_id: interaction.guild.id,
-                RoundGameResult.user_id: member.id,
-                RoundGameResult.mode: self.city_mode.name,
-                RoundGameResult.score: round(random.uniform(10, 500), 1),
-                RoundGameResult.rounds_played: 10,
-                RoundGameResult.scoring_version: self.SCORING_VERSION,
-            }
-            for member in members
-        ]
-        # chunked so a large guild cannot blow past SQLite's bound-parameter limit
-        for batch in chunked(rows, 100):
-            RoundGameResult.insert_many(batch).execute()
+        leaderboard.record_results(
+            self.GAME_NAME,
+            uuid.uuid4(),
+            interaction.guild.id,
+            self.city_mode.name,
+            self.SCORING_VERSION,
+            {member.id: round(random.uniform(10, 500), 1) for member in members},
+            rounds_played=10,
+        )
 
         await interaction.response.send_message(
             f"Seeded dummy results for {len(members)} members.", ephemeral=True
         )
 
-    async def population_callback(self, interaction: discord.Interaction):
+    async def save_sampling_grid(self, mode: Mode):
+        grid = self.sampling_grids.get(mode.name)
+        if grid:
+            await asyncio.to_thread(grid.save, self.get_sampling_grid_path(mode))
+
+    async def population_callback(self, interaction: discord.Interaction, count: int):
         mode_value = interaction.data["values"][0]
         mode = next((mode for mode in self.modes if mode.name == mode_value), None)
 
+        if mode.name in self._populating:
+            await interaction.response.send_message(
+                f"**{mode.name}** is already being populated.", ephemeral=True
+            )
+            return
         await interaction.response.defer()
 
-        count = 100
-        self.logger.info(
-            f"{interaction.user} started populating {count} locations for mode '{mode.name}'"
-        )
-
         def make_progress_embed(description: str, color=0x316CA3) -> discord.Embed:
             return discord.Embed(
                 title=f"Populating {mode.icon} {mode.name}",
@@ -778,103 +870,102 @@ class GeoGuesser(
                 color=color,
             )
 
-        progress_msg = await interaction.followup.send(
-            embed=make_progress_embed(f"Generating **{count}** locations..."),
-            wait=True,
-            ephemeral=True,
-        )
-
+        self._populating.add(mode.name)
         try:
-            import threading
-
-            completed = {"count": 0, "last_label": ""}
-            completed_lock = threading.Lock()
-
-            def generate_and_save():
-                import concurrent.futures
-
-                import googlemaps
+            run = start_or_resume(mode, count)
+            if run.completed:
+                description = (
+                    f"Resuming an interrupted run: **{run.completed} / {run.target}** "
+                    f"locations already saved."
+                )
+            else:
+                description = f"Generating **{run.target}** locations..."
+            self.logger.info(
+                f"{interaction.user} started populating '{mode.name}' "
+                f"(generation {run.id}, {run.completed}/{run.target})"
+            )
+            progress_msg = await interaction.followup.send(
+                embed=make_progress_embed(description), wait=True, ephemeral=True
+            )
 
-                api_key = os.getenv("GMAPS_API_KEY")
-                workers = min(count, 5)
+            progress = {"count": run.completed, "last_label": ""}
 
-                def generate_one(_):
-                    client = googlemaps.Client(key=api_key)
-                    utils = LocationUtils(client)
-                    loc = utils.get_geoguesser_location_sync(mode)
-                    with completed_lock:
-                        completed["count"] += 1
-                        completed["last_label"] = (
-                            loc.label
-                            or f"{loc.road_coords.lat:.4f}, {loc.road_coords.lng:.4f}"
-                        )
-                    self.logger.info(
-                        f"Generated location {completed['count']}/{count} for '{mode.name}': {completed['last_label']}"
-                    )
-                    return loc
-
-                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
-                    locations = list(pool.map(generate_one, range(count)))
-
-                # Write through the shared database rather than a second connection,
-                # so these writes are serialized with the rest of the bot instead of
-                # contending for the file lock. insert_many keeps the replacement to
-                # two statements instead of one per location.
-                LocationModel.delete().where(LocationModel.mode == mode.name).execute()
-                LocationModel.insert_many(
-                    [
-                        {
-                            LocationModel.mode: mode.name,
-                            LocationModel.initial_lat: location.initial_location.lat,
-                            LocationModel.initial_lng: location.initial_location.lng,
-                            LocationModel.road_lat: location.road_coords.lat,
-                            LocationModel.road_lng: location.road_coords.lng,
-                            LocationModel.label: location.label,
-                        }
-                        for location in locations
-                    ]
-                ).execute()
-                return locations
+            def on_progress(done: int, location: GeoGuesserLocation):
+                progress["count"] = done
+                progress["last_label"] = (
+                    location.label
+                    or f"{location.road_coords.lat:.4f}, {location.road_coords.lng:.4f}"
+                )
 
-            task = asyncio.create_task(asyncio.to_thread(generate_and_save))
+            location_utils = LocationUtils(
+                self.gmaps,
+                limiter=self.gmaps_limiter,
+                grids=self.sampling_grids,
+            )
+            populator = Populator(location_utils, on_progress=on_progress)
+            task = asyncio.create_task(asyncio.to_thread(populator.run, run, mode))
 
             while not task.done():
-                await asyncio.sleep(5)
-                done = completed["count"]
-                if done > 0 and not task.done():
+                await asyncio.wait({task}, timeout=5)
+                if not task.done():
                     try:
                         await progress_msg.edit(
                             embed=make_progress_embed(
-                                f"Generating locations... **{done} / {count}** complete.\nLast: {completed['last_label']}"
+                                f"Generating locations... **{progress['count']} / {run.target}** "
+                                f"complete.\nLast: {progress['last_label']}"
                             )
                         )
                     except discord.HTTPException:
                         pass
 
-            collected = await task
-            labeled_count = sum(1 for l in collected if l.label)
-            total = (
-                LocationModel.select().where(LocationModel.mode == mode.name).count()
+            try:
+                await task
+            except Exception as e:
+                self.logger.error(
+                    f"Populate failed for '{mode.name}': {e}", exc_info=True
+                )
+                await self.save_sampling_grid(mode)
+                await progress_msg.edit(
+                    embed=make_progress_embed(
+                        f"Failed after **{run.completed} / {run.target}** locations: "
+                        f"```{e}```\nRun `/geoguesser populate` again to resume.",
+                        color=discord.Color.red(),
+                    )
+                )
+                return
+
+            self.active_generations[mode.name] = run.id
+            await self.save_sampling_grid(mode)
+            pool = self.location_pool(mode)
+            pool.clear()
+            pool.refill()
+            labeled_count = (
+                self.locations_query(mode)
+                .where(LocationModel.label.is_null(False))
+                .count()
             )
+            generation = location_utils.generation_stats
+            accepted = max(generation["accepted"], 1)
             self.logger.info(
-                f"Populate complete for '{mode.name}': {len(collected)} added ({labeled_count} labeled), {total} total"
+                f"Populate complete for '{mode.name}': {run.completed} locations "
+                f"({labeled_count} labeled), {generation['samples']} samples, "
+                f"{generation['api_calls'] / accepted:.1f} API calls per location"
             )
             embed = make_progress_embed(
                 "Population complete.", color=discord.Color.green()
             )
-            embed.add_field(
-                name="Locations added", value=str(len(collected)), inline=True
-            )
+            embed.add_field(name="Locations", value=str(run.completed), inline=True)
             embed.add_field(name="Street labels", value=str(labeled_count), inline=True)
-            embed.add_field(name="Total in pool", value=str(total), inline=True)
-            await progress_msg.edit(embed=embed)
-        except Exception as e:
-            self.logger.error(f"Populate failed for '{mode.name}': {e}", exc_info=True)
-            await progress_msg.edit(
-                embed=make_progress_embed(
-                    f"Failed: ```{e}```", color=discord.Color.red()
+            if generation["samples"]:
+                embed.add_field(
+                    name="Acceptance",
+                    value=f"{generation['accepted'] / generation['samples']:.0%} "
+                    f"({generation['api_calls'] / accepted:.1f} API calls each)",
+                    inline=True,
                 )
-            )
+            await progress_msg.edit(embed=embed)
+        finally:
+            self._populating.discard(mode.name)
 
     async def initialize_session(
         self,
@@ -889,7 +980,14 @@ class GeoGuesser(
         try:
             session = GameSession(mode, channel, host, self.gmaps, self.location_utils)
             self.active_sessions[channel.id] = session
-            locations = await self.load_locations_from_db(mode, rounds)
+            # warm locations play first; the rest are prefetched round by round
+            locations = self.location_pool(mode).take(rounds)
+            if len(locations) < rounds:
+                locations += self.load_locations_from_db(
+                    mode,
+                    rounds - len(locations),
+                    exclude={location.id for location in locations},
+                )
             self.logger.info(
                 f"Loaded {len(locations)} locations for session in #{channel}"
             )
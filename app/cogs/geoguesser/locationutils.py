@@ -1,25 +1,78 @@
 import asyncio
+import datetime
 import logging
+import math
 import os
 import random
 import re
+import threading
+import time
 from cmath import cos, sin
+from typing import Optional
 from urllib.parse import urlencode
 
 import aiohttp
 import requests
+from utils import cache
 
+from .dbmodels import GeocodeCacheEntry
+from .gazetteer import Gazetteer
 from .models import Coordinates, GeoGuesserLocation, Mode
+from .sampling import YieldGrid
+
+# How long a guess Google could not resolve is remembered before retrying
+NEGATIVE_CACHE_TTL = datetime.timedelta(days=1)
+
+# Result types that only place a guess "somewhere in the region"
+_AREA_TYPES = {
+    "political",
+    "country",
+    "administrative_area_level_1",
+    "administrative_area_level_2",
+    "administrative_area_level_3",
+    "locality",
+    "postal_code",
+}
+
+
+def _geocode_expires(key: str, value: tuple, now: float) -> float:
+    expires = value[1]
+    return math.inf if expires is None else expires
 
 
 class LocationUtils:
-    def __init__(self, gmaps):
+    def __init__(
+        self,
+        gmaps,
+        gazetteer: Optional[Gazetteer] = None,
+        limiter=None,
+        grids: Optional[dict[str, YieldGrid]] = None,
+    ):
         self.gmaps = gmaps
+        self.gazetteer = gazetteer
+        # anything with a blocking acquire(), taken before each Google request
+        self.limiter = limiter
+        # per mode name; candidates come from these instead of uniform sampling
+        self.grids = grids or {}
+        # requests.Session is not thread-safe, and population calls come
+        # from several worker threads: one session per thread
+        self._local = threading.local()
         self.logger = logging.getLogger(__name__)
+        # guesses are resolved from worker threads, so the memory cache is locked
+        # query -> (coords, monotonic expiry or None to keep until evicted)
+        self._geocode_cache: cache.Cache[str, tuple] = cache.tlru(
+            "geoguesser.geocode", 4096, ttu=_geocode_expires
+        )
+        self._geocode_lock = threading.Lock()
+        self.lookup_stats = {"gazetteer": 0, "cache": 0, "google": 0}
+        # updated from the populator's worker threads, under _stats_lock
+        self.generation_stats = {"samples": 0, "accepted": 0, "api_calls": 0}
+        self._stats_lock = threading.Lock()
 
     def get_location_label(self, coords: Coordinates) -> str:
         """Returns the best human-readable label for the given coordinates via reverse geocode."""
         try:
+            self._throttle()
             results = self.gmaps.reverse_geocode((coords.lat, coords.lng))
             if not results:
                 raise ValueError("No results")
@@ -87,20 +140,109 @@ class LocationUtils:
             )
             return f"{coords.lat:.5f}, {coords.lng:.5f}"
 
-    def get_coordinates_from_location(self, location_name: str) -> Coordinates:
-        """Returns the coordinates of the location"""
-        # TODO cache location names to avoid unnecessary API calls
-        geocode_result = self.gmaps.geocode(
-            location_name
-        )  # called from a thread via session.handle_guess
-        if len(geocode_result) > 0:
-            lat = geocode_result[0]["geometry"]["location"]["lat"]
-            lng = geocode_result[0]["geometry"]["location"]["lng"]
-            return Coordinates(lat, lng)
-        else:
-            self.logger.error(f"Error: {location_name} not found")
+    def get_coordinates_from_location(
+        self, location_name: str, near: Optional[tuple[float, float]] = None
+    ) -> Optional[Coordinates]:
+        """Returns the coordinates of the location.
+
+        Tries the offline gazetteer first, then guesses Google has already
+        resolved, and only then asks Google, writing its answer (including a
+        miss) through to the cache. ``near`` picks between places that share
+        a name. Blocking; called from a thread via session.handle_guess.
+        """
+        if self.gazetteer:
+            place = self.gazetteer.lookup(location_name, near)
+            if place:
+                self.lookup_stats["gazetteer"] += 1
+                return place.coordinates
+
+        key = " ".join(location_name.casefold().split())
+        found, coords = self._get_cached_geocode(key)
+        if found:
+            self.lookup_stats["cache"] += 1
+            return coords
+
+        self.lookup_stats["google"] += 1
+        coords = self._geocode(location_name)
+        self._set_cached_geocode(key, coords)
+        return coords
+
+    def _geocode(self, location_name: str) -> Optional[Coordinates]:
+        self._acquire()
+        geocode_result = self.gmaps.geocode(location_name)
+        if not geocode_result:
+            self.logger.info(f"{location_name} not found")
             return None
 
+        result = geocode_result[0]
+        # An unresolvable guess plus the mode qualifier comes back as a partial
+        # match on the qualifier itself, i.e. the city or county centre
+        if result.get("partial_match") and set(result.get("types", [])) <= _AREA_TYPES:
+            self.logger.info(f"{location_name} only matched the surrounding area")
+            return None
+
+        location = result["geometry"]["location"]
+        return Coordinates(location["lat"], location["lng"])
+
+    def _get_cached_geocode(self, key: str) -> tuple[bool, Optional[Coordinates]]:
+        with self._geocode_lock:
+            cached = self._geocode_cache.get(key)
+        if cached:
+            return True, cached[0]
+
+        entry = GeocodeCacheEntry.get_or_none(GeocodeCacheEntry.query == key)
+        if entry is None:
+            return False, None
+        if entry.lat is None:
+            age = datetime.datetime.utcnow() - entry.resolved_at
+            if age > NEGATIVE_CACHE_TTL:
+                return False, None
+            self._remember_geocode(key, None, NEGATIVE_CACHE_TTL - age)
+            return True, None
+
+        coords = Coordinates(entry.lat, entry.lng)
+        self._remember_geocode(key, coords)
+        return True, coords
+
+    def _set_cached_geocode(self, key: str, coords: Optional[Coordinates]):
+        GeocodeCacheEntry.replace(
+            query=key,
+            lat=coords.lat if coords else None,
+            lng=coords.lng if coords else None,
+            resolved_at=datetime.datetime.utcnow(),
+        ).execute()
+        self._remember_geocode(key, coords, None if coords else NEGATIVE_CACHE_TTL)
+
+    def _remember_geocode(
+        self,
+        key: str,
+        coords: Optional[Coordinates],
+        ttl: Optional[datetime.timedelta] = None,
+    ):
+        expires = time.monotonic() + ttl.total_seconds() if ttl else None
+        with self._geocode_lock:
+            self._geocode_cache[key] = (coords, expires)
+
+    def _http(self) -> requests.Session:
+        """This thread's HTTP session"""
+        session = getattr(self._local, "http", None)
+        if session is None:
+            session = self._local.http = requests.Session()
+        return session
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.generation_stats[stat] += 1
+
+    def _acquire(self):
+        if self.limiter:
+            self.limiter.acquire()
+
+    def _throttle(self):
+        """Take a token for a request made while generating a location"""
+        self._count("api_calls")
+        self._acquire()
+
     def get_street_view_url(self, coords: Coordinates) -> str:
         """Returns a street view image URL for the given coordinates"""
         base_url = "https://maps.googleapis.com/maps/api/streetview?"
@@ -179,24 +321,39 @@ class LocationUtils:
         return await asyncio.to_thread(self.get_geoguesser_location_sync, mode)
 
     def get_geoguesser_location_sync(self, mode: Mode) -> GeoGuesserLocation:
-        """Returns a geoguesser location within the bounding box"""
-        road = None
-        while not road:
-            lat, lng = self.get_random_subcoordinate_from_center(
-                mode.center, mode.radius, 1
-            )[0]
-
-            if isinstance(lat, complex):
-                lat = lat.real
-            if isinstance(lng, complex):
-                lng = lng.real
-
-            initial_location = Coordinates(lat, lng)
-            roads = self.gmaps.snap_to_roads(initial_location.to_tuple())
-            if len(roads) > 0:
-                road = roads[0]
+        """Returns a geoguesser location within the mode's radius.
+
+        Candidates are drawn from the mode's yield grid when there is one, and
+        every candidate's outcome is recorded back into it.
+        """
+        grid = self.grids.get(mode.name)
+        while True:
+            self._count("samples")
+            if grid:
+                lat, lng, cell = grid.sample()
             else:
-                self.logger.error("Error: No roads found, trying again...")
+                lat, lng = self.get_random_subcoordinate_from_center(
+                    mode.center, mode.radius, 1
+                )[0]
+                lat, lng = lat.real, lng.real
+
+            location = self._try_location(Coordinates(lat, lng))
+            if grid:
+                grid.record(cell, location is not None)
+            if location:
+                self._count("accepted")
+                return location
+
+    def _try_location(
+        self, initial_location: Coordinates
+    ) -> Optional[GeoGuesserLocation]:
+        """The location for one candidate point, or None if it is unusable"""
+        self._throttle()
+        roads = self.gmaps.snap_to_roads(initial_location.to_tuple())
+        if not roads:
+            self.logger.debug("No roads found, trying again...")
+            return None
+        road = roads[0]
 
         road_coords = Coordinates(
             road["location"]["latitude"], road["location"]["longitude"]
@@ -208,16 +365,17 @@ class LocationUtils:
             f"?location={road_coords.lat},{road_coords.lng}"
             f"&key={os.getenv('GMAPS_API_KEY')}"
         )
-        meta_resp = requests.get(metadata_url)
+        self._throttle()
+        meta_resp = self._http().get(metadata_url)
         if meta_resp.status_code != 200 or meta_resp.json().get("status") != "OK":
             self.logger.debug(f"No street view imagery for {road_coords}, retrying...")
-            return self.get_geoguesser_location_sync(mode)
+            return None
 
         label = self.get_location_label(road_coords)
 
         # reject coordinate-only labels — retry to get a properly named location
         if re.match(r"^-?\d+\.\d+,", label):
             self.logger.debug(f"No named label for {road_coords}, retrying...")
-            return self.get_geoguesser_location_sync(mode)
+            return None
 
         return GeoGuesserLocation(initial_location, road_coords, label=label)
@@ -0,0 +1,182 @@
+"""Streaming, resumable population of a mode's location pool.
+
+Generating a location takes several Google calls (snap to roads, street view
+metadata, reverse geocode), so a large pool is slow and costs quota. The
+populator therefore never holds the whole pool in memory:
+
+- locations are generated by a small thread pool sharing one client, with a
+  ``TokenBucket`` keeping the combined request rate under ``RATE``;
+- every ``CHUNK_SIZE`` completed locations are committed, tagged with the
+  run's generation ID, so a crash only loses the chunk in flight;
+- a run that did not finish stays ``running`` and picks up where it left off
+  the next time the mode is populated;
+- games only read the mode's ``active`` generation, and the finished run is
+  swapped in (and the old pool deleted) in one transaction.
+"""
+
+import concurrent.futures
+import datetime
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from peewee import chunked
+
+from .dbmodels import GeoguesserLocation as LocationModel
+from .dbmodels import GeoguesserPopulation
+from .locationutils import LocationUtils
+from .models import GeoGuesserLocation, Mode
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free"""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def active_generations(modes: list[Mode]) -> dict:
+    """Map each mode's name to its active generation ID (None for legacy rows)"""
+    active = {mode.name: None for mode in modes}
+    for run in GeoguesserPopulation.select().where(
+        GeoguesserPopulation.status == "active"
+    ):
+        active[run.mode] = run.id
+    return active
+
+
+def start_or_resume(mode: Mode, target: int) -> GeoguesserPopulation:
+    """The mode's interrupted run if there is one, otherwise a new run"""
+    run = (
+        GeoguesserPopulation.select()
+        .where(
+            GeoguesserPopulation.mode == mode.name,
+            GeoguesserPopulation.status == "running",
+        )
+        .order_by(GeoguesserPopulation.started_at.desc())
+        .first()
+    )
+    if run:
+        run.completed = (
+            LocationModel.select().where(LocationModel.generation == run.id).count()
+        )
+        return run
+    return GeoguesserPopulation.create(mode=mode.name, target=target)
+
+
+class Populator:
+    """Fills one population run. Blocking; run it in a thread."""
+
+    CHUNK_SIZE = 25
+    WORKERS = 5
+
+    def __init__(
+        self,
+        location_utils: LocationUtils,
+        on_progress: Optional[Callable[[int, GeoGuesserLocation], None]] = None,
+    ):
+        self.location_utils = location_utils
+        self.on_progress = on_progress
+
+    def run(self, run: GeoguesserPopulation, mode: Mode) -> GeoguesserPopulation:
+        remaining = run.target - run.completed
+        logger.info(
+            f"Populating '{mode.name}' (generation {run.id}): "
+            f"{run.completed}/{run.target} already done"
+        )
+
+        buffer: list[GeoGuesserLocation] = []
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.WORKERS)
+        # the futures not yet taken into the buffer
+        pending: set[concurrent.futures.Future] = set()
+        try:
+            pending = {
+                executor.submit(self.location_utils.get_geoguesser_location_sync, mode)
+                for _ in range(remaining)
+            }
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    location = future.result()
+                    pending.discard(future)
+                    buffer.append(location)
+                    if self.on_progress:
+                        self.on_progress(run.completed + len(buffer), location)
+                    if len(buffer) >= self.CHUNK_SIZE:
+                        self._flush(run, mode, buffer)
+        finally:
+            # keep whatever finished, even if a location failed first: calls
+            # already in flight are paid for, so wait for them too
+            executor.shutdown(wait=True, cancel_futures=True)
+            buffer.extend(
+                future.result()
+                for future in pending
+                if not future.cancelled() and future.exception() is None
+            )
+            self._flush(run, mode, buffer)
+
+        self._activate(run, mode)
+        return run
+
+    def _flush(
+        self, run: GeoguesserPopulation, mode: Mode, buffer: list[GeoGuesserLocation]
+    ) -> None:
+        if not buffer:
+            return
+        rows = [
+            {
+                LocationModel.mode: mode.name,
+                LocationModel.initial_lat: location.initial_location.lat,
+                LocationModel.initial_lng: location.initial_location.lng,
+                LocationModel.road_lat: location.road_coords.lat,
+                LocationModel.road_lng: location.road_coords.lng,
+                LocationModel.label: location.label,
+                LocationModel.generation: run.id,
+            }
+            for location in buffer
+        ]
+        with LocationModel._meta.database.atomic():
+            for batch in chunked(rows, 100):
+                LocationModel.insert_many(batch).execute()
+            run.completed += len(buffer)
+            run.save(only=[GeoguesserPopulation.completed])
+        buffer.clear()
+
+    def _activate(self, run: GeoguesserPopulation, mode: Mode) -> None:
+        with LocationModel._meta.database.atomic():
+            LocationModel.delete().where(
+                LocationModel.mode == mode.name,
+                (LocationModel.generation != run.id)
+                | LocationModel.generation.is_null(),
+            ).execute()
+            GeoguesserPopulation.update(status="retired").where(
+                GeoguesserPopulation.mode == mode.name,
+                GeoguesserPopulation.status == "active",
+            ).execute()
+            run.status = "active"
+            run.finished_at = datetime.datetime.utcnow()
+            run.save()
+        logger.info(f"Generation {run.id} is now the '{mode.name}' pool")
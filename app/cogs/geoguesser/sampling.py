@@ -0,0 +1,182 @@
+"""Road-yield grid for picking candidate locations.
+
+A uniformly random point in a mode's circle usually lands in a field, so most
+of the Google calls made while populating went to samples that were then
+rejected (no road to snap to, no street view, no usable label). A
+``YieldGrid`` covers the circle with ``CELL_SIZE`` square cells and counts,
+per cell, the samples that became a location (hits) and those that did not
+(misses). Candidates are drawn from cells in proportion to their estimated
+yield, so roads get most of the samples while unexplored cells keep a small
+chance of being tried. Roads run through neighbouring cells, so each cell's
+estimate starts from the yield of the block around it and a cell the grid has
+never tried next to productive ones is already favoured.
+
+The counts are two small NumPy arrays, saved per mode as ``.npz`` and seeded
+from the locations earlier population runs already accepted.
+"""
+
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .models import Mode
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE = 111320.0
+
+#: Side of a grid cell, in meters
+CELL_SIZE = 250
+#: Cells are also pooled into square blocks of this many cells a side, whose
+#: yield is the prior for each of their cells
+BLOCK = 4
+#: How many samples' worth of weight the block prior carries in a cell
+PRIOR_WEIGHT = 2
+#: A cell's weight is its estimated yield raised to this power; higher values
+#: favour proven cells more strongly over unexplored ones
+SHARPNESS = 3
+
+Cell = tuple[int, int]
+
+
+class YieldGrid:
+    """Per-cell hit/miss counts over one mode's circle. Thread-safe."""
+
+    def __init__(
+        self,
+        mode: Mode,
+        hits: Optional[np.ndarray] = None,
+        misses: Optional[np.ndarray] = None,
+        seed: Optional[int] = None,
+    ):
+        self.mode = mode
+        self.size = math.ceil(2 * mode.radius / CELL_SIZE)
+        shape = (self.size, self.size)
+        self.hits = hits if hits is not None else np.zeros(shape, np.uint32)
+        self.misses = misses if misses is not None else np.zeros(shape, np.uint32)
+
+        # offsets of cell centres from the mode's centre, in meters
+        offsets = (np.arange(self.size) + 0.5) * CELL_SIZE - mode.radius
+        north, east = np.meshgrid(offsets, offsets, indexing="ij")
+        self._inside = north**2 + east**2 <= mode.radius**2
+        self._lng_scale = math.cos(math.radians(mode.center[0]))
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._cumulative: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, mode: Mode, path: Path) -> Optional["YieldGrid"]:
+        """The grid saved at ``path``, or None if missing or for another geometry"""
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            grid = cls(mode, data["hits"], data["misses"])
+            geometry = (float(data["radius"]), float(data["cell_size"]))
+        if geometry != (mode.radius, CELL_SIZE) or grid.hits.shape != (
+            grid.size,
+            grid.size,
+        ):
+            logger.info(f"Discarding stale sampling grid for '{mode.name}'")
+            return None
+        return grid
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            hits, misses = self.hits.copy(), self.misses.copy()
+        np.savez_compressed(
+            path,
+            hits=hits,
+            misses=misses,
+            radius=self.mode.radius,
+            cell_size=CELL_SIZE,
+        )
+
+    def cell_of(self, lat: float, lng: float) -> Optional[Cell]:
+        north = (lat - self.mode.center[0]) * METERS_PER_DEGREE
+        east = (lng - self.mode.center[1]) * METERS_PER_DEGREE * self._lng_scale
+        row = int((north + self.mode.radius) // CELL_SIZE)
+        col = int((east + self.mode.radius) // CELL_SIZE)
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return row, col
+        return None
+
+    def seed(self, coordinates: Iterable[tuple[float, float]]) -> int:
+        """Count already accepted ``(lat, lng)`` samples as hits; returns how many"""
+        cells = [self.cell_of(lat, lng) for lat, lng in coordinates]
+        cells = [cell for cell in cells if cell]
+        if cells:
+            rows, cols = zip(*cells)
+            with self._lock:
+                np.add.at(self.hits, (list(rows), list(cols)), 1)
+                self._cumulative = None
+        return len(cells)
+
+    def sample(self) -> tuple[float, float, Cell]:
+        """A random ``(lat, lng)`` inside the circle, and the cell it came from"""
+        with self._lock:
+            if self._cumulative is None:
+                self._cumulative = np.cumsum(self._weights(), axis=None)
+            index = int(
+                np.searchsorted(
+                    self._cumulative,
+                    self._rng.random() * self._cumulative[-1],
+                    side="right",
+                )
+            )
+            row, col = divmod(min(index, self.size * self.size - 1), self.size)
+            for _ in range(10):
+                north, east = (
+                    np.array([row, col]) + self._rng.random(2)
+                ) * CELL_SIZE - self.mode.radius
+                if north**2 + east**2 <= self.mode.radius**2:
+                    break
+            else:
+                # a cell on the rim; its centre is inside the circle
+                north, east = (
+                    np.array([row, col]) + 0.5
+                ) * CELL_SIZE - self.mode.radius
+
+        lat = self.mode.center[0] + north / METERS_PER_DEGREE
+        lng = self.mode.center[1] + east / (METERS_PER_DEGREE * self._lng_scale)
+        return float(lat), float(lng), (row, col)
+
+    def record(self, cell: Cell, accepted: bool) -> None:
+        with self._lock:
+            counts = self.hits if accepted else self.misses
+            counts[cell] += 1
+            self._cumulative = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            tried = (self.hits + self.misses) > 0
+            return {
+                "cells": int(self._inside.sum()),
+                "explored": int((tried & self._inside).sum()),
+                "productive": int(((self.hits > 0) & self._inside).sum()),
+                "hits": int(self.hits.sum()),
+                "misses": int(self.misses.sum()),
+            }
+
+    def _weights(self) -> np.ndarray:
+        hits = self.hits.astype(np.float64)
+        tries = hits + self.misses
+
+        # block yield under a uniform prior: 0.5 until the block is tried
+        blocks = math.ceil(self.size / BLOCK)
+        pad = blocks * BLOCK - self.size
+
+        def per_block(counts: np.ndarray) -> np.ndarray:
+            padded = np.pad(counts, ((0, pad), (0, pad)))
+            return padded.reshape(blocks, BLOCK, blocks, BLOCK).sum(axis=(1, 3))
+
+        block_yield = (per_block(hits) + 1) / (per_block(tries) + 2)
+        prior = np.kron(block_yield, np.ones((BLOCK, BLOCK)))[: self.size, : self.size]
+
+        # the cell's own samples then pull its yield towards 1 or 0
+        cell_yield = (hits + PRIOR_WEIGHT * prior) / (tries + PRIOR_WEIGHT)
+        return np.where(self._inside, cell_yield**SHARPNESS, 0.0)
@@ -48,7 +48,9 @@ class GameSession(RoundGameSession[Round, GuessResult]):
 
         guess = self.mode.get_qualified_guess(guess)
         self.logger.info(f"Qualified guess: '{guess}'")
-        guess_location = self.location_utils.get_coordinates_from_location(guess)
+        guess_location = self.location_utils.get_coordinates_from_location(
+            guess, near=self.mode.center
+        )
         self.logger.info(
             f"Guess resolved to: {guess_location} (actual: {r.location.road_coords})"
         )
@@ -56,12 +58,6 @@ class GameSession(RoundGameSession[Round, GuessResult]):
             self.logger.debug(f"Could not resolve guess to coordinates: {guess}")
             return None
 
-        # false positive: city mode returns center coords for unresolvable guesses
-        false_pos_coords = Coordinates(40.0378755, -76.3055144)
-        if guess_location == false_pos_coords:
-            self.logger.debug(f"False positive coordinates for guess: {guess}")
-            return None
-
         meters = self._haversine_meters(r.location.road_coords, guess_location)
         score_radius = self.mode.score_radius
         distance_score = max(0, 1 - meters / score_radius) * 100
@@ -5,8 +5,9 @@ import discord
 from cogs.lancocog import LancoCog
 from discord.ext import commands
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, BinaryContent
+from pydantic_ai import BinaryContent
 from pydantic_ai.exceptions import ModelHTTPError
+from utils import agents
 from utils.file_downloader import FileDownloader
 from utils.tracked_message import track_message_ids
 
@@ -34,8 +35,8 @@ class HotDog(LancoCog, name="HotDog", description="Profile Glizzies"):
         self.register_context_menu(
             name="Hot Dog", callback=self.ctx_menu, errback=self.ctx_menu_error
         )
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Describe this image.",
             output_type=ImageDetails,
         )
@@ -2,8 +2,8 @@ import hashlib
 import logging
 
 import googlemaps
-from cachetools import LRUCache
 from lcwc.incident import Incident
+from utils import cache
 
 
 class IncidentGeocoder:
@@ -12,7 +12,9 @@ class IncidentGeocoder:
     def __init__(self, gmaps: googlemaps.Client) -> None:
         self.logger = logging.getLogger(__name__)
         self.client = gmaps
-        self.cache = LRUCache(maxsize=512)
+        self.cache: cache.Cache[str, tuple[float, float]] = cache.lru(
+            "incidents.geocoder", 512
+        )
 
     def get_absolute_address(self, incident: Incident) -> str:
         """Creates an absolute address from the given incident
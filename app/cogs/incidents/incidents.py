@@ -10,9 +10,9 @@ import aiohttp
 import discord
 import googlemaps
 import pytz
-from cogs.lancocog import LancoCog
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ui import Select, View
 from lcwc.arcgis import ArcGISClient, ArcGISIncident
 from lcwc.category import IncidentCategory
@@ -34,15 +34,20 @@ class IncidentFeedOption:
     description: str
 
 
-class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
+class Incidents(PollerCog, name="Incidents", description="LCWC Incident feed"):
     incidents_group = app_commands.Group(
         name="incidents", description="Incident commands", guild_only=True
     )
 
     est = pytz.timezone("US/Eastern")
 
+    POLL_INTERVAL = 5  # seconds
+    # no idle backoff: after a quiet spell the next incident is the one that
+    # matters, so it must not wait for a stretched interval
+    MAX_INTERVAL = POLL_INTERVAL
     FAILURE_THRESHOLD = 3
-    RECOVERY_CHECK_MINUTES = 1
+    # how long a failed client rests before a half-open probe checks on it
+    RECOVERY_TIMEOUT = 60
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
@@ -64,7 +69,6 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
         self.current_client = self.arcgis_client
         self.preferred_client = self.current_client
         self.auto_switched = False
-        self.consecutive_failures = 0
 
         self.active_incidents = []
         self.last_sync_attempt = None
@@ -82,54 +86,49 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
             self.set_client_from_name(client_config.value)
         self.preferred_client = self.current_client
 
-        self.get_incidents_loop.change_interval(seconds=5)
-        self.get_incidents_loop.start()
-        self.recovery_check_loop.start()
+    @property
+    def consecutive_failures(self) -> int:
+        return self.breaker(self.current_client.name).failures
 
-    async def cog_unload(self):
-        self.get_incidents_loop.cancel()
-        self.recovery_check_loop.cancel()
+    async def get_sources(self) -> list[PollSource]:
+        """The active client, plus the preferred one while it is being probed
 
-    @tasks.loop(seconds=10)
-    async def get_incidents_loop(self):
-        incidents = await self.get_incidents()
-        if incidents:
-            await self.process_incidents(incidents)
-            self.active_incidents = incidents
-
-    @tasks.loop(minutes=1)
-    async def recovery_check_loop(self):
-        if not self.auto_switched or self.current_client is self.preferred_client:
-            return
+        The preferred client's breaker is left open when we fall back, so it
+        only gets a half-open probe every RECOVERY_TIMEOUT seconds.
+        """
+        sources = [PollSource(key=self.current_client.name, data=self.current_client)]
+        if self.auto_switched and self.current_client is not self.preferred_client:
+            sources.append(
+                PollSource(key=self.preferred_client.name, data=self.preferred_client)
+            )
+        return sources
 
-        self.logger.info(f"Checking if {self.preferred_client.name} is back online...")
+    async def fetch(self, source: PollSource):
+        client: Client = source.data
+        self.logger.debug(f"Getting incidents via {client.name}")
+        if client is self.current_client:
+            self.last_sync_attempt = datetime.datetime.now(datetime.timezone.utc)
         async with aiohttp.ClientSession() as session:
-            try:
-                incidents = await self.preferred_client.get_incidents(session)
-                self.logger.info(
-                    f"{self.preferred_client.name} is back online, switching back"
-                )
+            return await client.get_incidents(session)
+
+    async def process(self, source: PollSource, incidents) -> int:
+        client: Client = source.data
+        if client is not self.current_client:
+            if self.auto_switched and client is self.preferred_client:
+                self.logger.info(f"{client.name} is back online, switching back")
                 await self._recover_to_preferred(incidents)
-            except Exception as e:
-                self.logger.info(f"{self.preferred_client.name} still offline: {e}")
+            return 0
 
-    async def get_incidents(self):
-        self.logger.debug(f"Getting incidents via {self.current_client.name}")
-        incidents = []
-        async with aiohttp.ClientSession() as session:
-            try:
-                self.last_sync_attempt = datetime.datetime.now(datetime.timezone.utc)
-                incidents = await self.current_client.get_incidents(session)
-                self.last_successful_sync = datetime.datetime.now(datetime.timezone.utc)
-                self.consecutive_failures = 0
-            except Exception as e:
-                self.logger.error(f"Error getting incidents: {e}")
-                self.consecutive_failures += 1
-                if self.consecutive_failures >= self.FAILURE_THRESHOLD:
-                    await self._try_switch_to_fallback()
-                return None
-
-        return incidents
+        self.last_successful_sync = datetime.datetime.now(datetime.timezone.utc)
+        if not incidents:
+            return 0
+        sent = await self.process_incidents(incidents)
+        self.active_incidents = incidents
+        return sent
+
+    async def on_circuit_open(self, source: PollSource) -> None:
+        if source.data is self.current_client:
+            await self._try_switch_to_fallback()
 
     async def _try_switch_to_fallback(self):
         try:
@@ -159,7 +158,6 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
                 config.save()
 
         self.auto_switched = True
-        self.consecutive_failures = 0
         self.set_client_from_name(new_client.name)
 
     async def _recover_to_preferred(self, incidents):
@@ -175,15 +173,15 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
                 config.save()
 
         self.auto_switched = False
-        self.consecutive_failures = 0
         self.set_client_from_name(self.preferred_client.name)
 
-    async def process_incidents(self, incidents):
+    async def process_incidents(self, incidents) -> int:
         feed_configs = IncidentConfig.select().where(IncidentConfig.enabled == True)
 
         if not feed_configs:
-            return
+            return 0
 
+        sent = 0
         for feed_config in feed_configs:
             for incident in incidents:
                 is_new = await self.is_new_incident(incident, feed_config.channel_id)
@@ -213,6 +211,9 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
                             incident.date.timestamp()
                         )
                     feed_config.save()
+                    sent += 1
+
+        return sent
 
     def is_using_arcgis(self) -> bool:
         return isinstance(self.current_client, ArcGISClient)
@@ -485,7 +486,7 @@ class Incidents(LancoCog, name="Incidents", description="LCWC Incident feed"):
         # Manual override clears auto-switch state and updates preferred client
         self.preferred_client = self.current_client
         self.auto_switched = False
-        self.consecutive_failures = 0
+        self.breaker(self.current_client.name).record_success()
 
         config, created = IncidentsGlobalConfig.get_or_create(
             name="client", defaults={"value": client_value}
@@ -6,13 +6,14 @@ import time
 from abc import abstractmethod
 from math import floor
 from pathlib import Path
-from typing import Generic, TypeVar
+from typing import Awaitable, Callable, Generic, TypeVar
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 from pydantic import BaseModel
-from utils import apm
+from utils import apm, metrics
+from utils.roundgame.prefetch import AssetPool
 from utils.roundgame.session import RoundGameSession
 
 TSession = TypeVar("TSession", bound=RoundGameSession)
@@ -30,6 +31,17 @@ class LancoCog(commands.Cog, name="LancoCog", description="Base class for all co
         self.context_menus = []
         self._tracked_tasks = []
 
+        # Cog._inject looks listeners up on the instance, so these timed
+        # wrappers are what gets registered with the bot
+        for event, method_name in self.__cog_listeners__:
+            if method_name not in vars(self):
+                listener = getattr(self, method_name)
+                setattr(
+                    self,
+                    method_name,
+                    metrics.instrument_listener(self.get_cog_name(), event, listener),
+                )
+
     def track_task(self, task):
         """Register a background task to be cancelled on cog unload."""
         self._tracked_tasks.append(task)
@@ -94,6 +106,17 @@ class RoundGameCog(LancoCog, Generic[TSession]):
     SCORING_VERSION: int = 1
     GUESS_TIME: int = 20
     TIME_BETWEEN_ROUNDS: int = 10
+    # how many rounds past the current one are prepared in the background
+    PREFETCH_AHEAD: int = 2
+
+    def __init__(self, bot: commands.Bot, *args, **kwargs):
+        super().__init__(bot, *args, **kwargs)
+        self.asset_pools: dict[str, AssetPool] = {}
+
+    async def cog_unload(self):
+        for pool in self.asset_pools.values():
+            pool.close()
+        await super().cog_unload()
 
     @property
     def WARNING_TIME(self) -> int:
@@ -142,9 +165,91 @@ class RoundGameCog(LancoCog, Generic[TSession]):
     ):
         raise NotImplementedError
 
+    async def prepare_round(self, session: TSession, index: int):
+        """Get round ``index``'s assets ready to post.
+
+        Runs in the background, a few rounds ahead of play (see
+        ``PREFETCH_AHEAD``), so games can start before every round is ready.
+        """
+        pass
+
     async def on_round_end(self, session: TSession):
         pass
 
+    def asset_pool(
+        self,
+        key: str,
+        produce: Callable[[int], Awaitable[list]],
+        size: int,
+        batch: int = 1,
+    ) -> AssetPool:
+        """Return this cog's pool for ``key``, creating and filling it on first use"""
+        pool = self.asset_pools.get(key)
+        if pool is None:
+            pool = AssetPool(
+                f"{self.GAME_NAME}/{key}", produce, size, batch, logger=self.logger
+            )
+            self.asset_pools[key] = pool
+            pool.refill()
+        return pool
+
+    def prefetch_rounds(self, session: TSession) -> asyncio.Task | None:
+        """Start preparing the current round and the next ``PREFETCH_AHEAD``.
+
+        Returns the current round's task.
+        """
+        last = min(len(session.rounds), session.current_round + 1 + self.PREFETCH_AHEAD)
+        for index in range(session.current_round, last):
+            if index not in session.prepared:
+                session.prepared[index] = asyncio.create_task(
+                    self.prepare_round(session, index)
+                )
+        return session.prepared.get(session.current_round)
+
+    async def _await_current_round_ready(self, session: TSession) -> bool:
+        """Wait for the current round to be prepared, preparing it again inline
+        if the background attempt failed. False if it cannot be prepared."""
+        index = session.current_round
+        try:
+            task = self.prefetch_rounds(session)
+            if task is not None:
+                await task
+            return True
+        except asyncio.CancelledError:
+            if session.cancelled:
+                return True  # stopped meanwhile; the caller checks
+            raise
+        except Exception:
+            self.logger.exception(
+                f"[{self.GAME_NAME}] Preparing round {index + 1} in #{session.channel} "
+                "failed; retrying"
+            )
+
+        try:
+            await self.prepare_round(session, index)
+            return True
+        except Exception:
+            self.logger.exception(
+                f"[{self.GAME_NAME}] Round {index + 1} in #{session.channel} could "
+                "not be prepared; ending the game"
+            )
+            return False
+
+    async def _end_unplayable_session(self, session: TSession):
+        """End a game whose current round cannot be posted, so the channel is
+        free for a new one"""
+        session.cancel()
+        if self.active_sessions.get(session.channel.id) is session:
+            self.active_sessions.pop(session.channel.id)
+        try:
+            await session.channel.send(
+                "Something went wrong getting the next round ready, so this game "
+                "has ended."
+            )
+            await self._cleanup_stopped_session(session)
+        except discord.HTTPException as e:
+            self.logger.warning(f"Failed to announce the game ending: {e}")
+
     async def on_game_end(self, session: TSession):
         pass
 
@@ -209,6 +314,13 @@ class RoundGameCog(LancoCog, Generic[TSession]):
             f"starting in #{session.channel}"
         )
 
+        # normally already done, having been prefetched during the last round
+        if not await self._await_current_round_ready(session):
+            await self._end_unplayable_session(session)
+            return
+        if session.cancelled:
+            return
+
         embed, files = await self.build_round_embed(session, intro)
 
         send_kwargs = {"embed": embed}
@@ -1,4 +1,3 @@
-import asyncio
 import re
 from urllib.parse import urlparse
 
@@ -6,6 +5,7 @@ import discord
 from cogs.common.embedfixcog import EmbedFixCog
 from discord import app_commands
 from discord.ext import commands
+from utils import cache
 from utils.command_utils import is_bot_owner_or_admin
 
 from .models import PaywallBypassConfig, PaywallPattern
@@ -56,7 +56,9 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot, "Paywall Bypass", _HANDLERS, PaywallBypassConfig)
-        self._pattern_cache: dict[int, set[str]] = {}
+        self._pattern_cache: cache.Cache[int, set[str]] = cache.lru(
+            "paywallbypass.patterns", 1024
+        )
 
     async def cog_load(self):
         # EmbedFixCog.cog_load creates PaywallBypassConfig, our shared base table
@@ -64,10 +66,11 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
         self.bot.database.create_tables([PaywallPattern])
 
     def _guild_patterns(self, guild_id: int) -> set[str]:
-        if guild_id not in self._pattern_cache:
+        patterns = self._pattern_cache.get(guild_id)
+        if patterns is None:
             rows = PaywallPattern.select().where(PaywallPattern.guild_id == guild_id)
-            self._pattern_cache[guild_id] = {r.pattern for r in rows}
-        return self._pattern_cache[guild_id]
+            patterns = self._pattern_cache[guild_id] = {r.pattern for r in rows}
+        return patterns
 
     def _is_paywalled(self, url: str, guild_id: int) -> bool:
         domain = _extract_domain(url)
@@ -105,17 +108,16 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
         if not self._is_paywalled(original_url, message.guild.id):
             return
 
-        self.logger.info(
-            f"Found paywalled URL: {original_url} - waiting {self.wait_time}s"
-        )
-        await asyncio.sleep(self.wait_time)
-
-        message = await message.channel.fetch_message(message.id)
         config = self.config_model.get_or_none(guild_id=message.guild.id)
         if not config or not config.enabled:
             self.logger.info("Paywall bypass not enabled for this server")
             return
 
+        # Let Discord's preview land first so the bypass reads as a follow-up
+        # to it; either way the link gets a bypass.
+        self.logger.info(f"Found paywalled URL: {original_url}")
+        await self.embed_watch.wait_for_embed(message)
+
         active = self._active_handler(config)
         service_url = _SERVICE_URLS[active.id]
         bypass_url = service_url + original_url
@@ -140,7 +142,7 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
             )
         )
         fixed_msg = await message.reply(embed=embed, view=view, mention_author=False)
-        self.fixed_messages[message.id] = fixed_msg.id
+        self.embed_watch.record_fix(message.id, fixed_msg.id)
 
     @g.command(name="toggle", description="Toggle paywall bypass for this server")
     @is_bot_owner_or_admin()
@@ -170,7 +172,7 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
             )
             return
         PaywallPattern.create(guild_id=interaction.guild.id, pattern=domain)
-        self._pattern_cache.pop(interaction.guild.id, None)
+        self._pattern_cache.invalidate(interaction.guild.id)
         await interaction.response.send_message(
             f"Added `{domain}` to paywall patterns.", ephemeral=True
         )
@@ -189,7 +191,7 @@ class PaywallBypass(EmbedFixCog, name="Paywall Bypass", description="Bypass payw
             )
             .execute()
         )
-        self._pattern_cache.pop(interaction.guild.id, None)
+        self._pattern_cache.invalidate(interaction.guild.id)
         if deleted:
             await interaction.response.send_message(
                 f"Removed `{domain}` from paywall patterns.", ephemeral=True
@@ -1,7 +1,6 @@
 import os
 
 import discord
-import fitz
 from discord import app_commands
 from discord.ext import commands
 from utils.command_utils import is_bot_owner_or_admin
@@ -87,6 +86,8 @@ class PDFPreview(
         of pages rendered is capped by both the PDF's page count and
         ``MAX_PREVIEW_PAGES`` (Discord renders at most 4 gallery images).
         """
+        import fitz
+
         pdf_filename = os.path.basename(pdf_path)
         base_name = pdf_filename.replace(".pdf", "")
 
@@ -14,16 +14,17 @@ import aiohttp
 import asyncpraw
 import discord
 from asyncpraw.models import Subreddit
-from cogs.lancocog import LancoCog
-from discord.ext import commands, tasks
+from cogs.common.pollercog import PollerCog, PollSource
+from discord.ext import commands
 
 
 class RandomNsfwReddit(
-    LancoCog,
+    PollerCog,
     name="RandomNsfwReddit",
     description="Post random NSFW Reddit content to age-gated channels",
 ):
-    UPDATE_INTERVAL = 6 * 60 * 60  # 6 hours in seconds
+    POLL_INTERVAL = 6 * 60 * 60  # 6 hours in seconds
+    MAX_INTERVAL = POLL_INTERVAL
 
     def __init__(self, bot):
         super().__init__(bot)
@@ -35,21 +36,17 @@ class RandomNsfwReddit(
         self.nsfw_subreddits_cache = []
         self.last_updated = None
 
-    async def cog_load(self):
-        self.update_nsfw_subreddits.start()
+    async def get_sources(self) -> list[PollSource]:
+        return [PollSource(key="nsfw411", label="NSFW411 wiki")]
 
-    def cog_unload(self):
-        self.update_nsfw_subreddits.cancel()
-
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def update_nsfw_subreddits(self):
+    async def fetch(self, source: PollSource) -> None:
         """Periodically update the NSFW subreddits cache."""
         self.logger.info("Updating NSFW subreddits cache...")
-        try:
-            await self.fetch_subreddits_from_nsfw411()
-            self.logger.info("NSFW subreddits cache updated successfully.")
-        except Exception as e:
-            self.logger.error(f"Failed to update NSFW subreddits: {e}")
+        await self.fetch_subreddits_from_nsfw411()
+
+    async def process(self, source: PollSource, result: None) -> int:
+        self.logger.info("NSFW subreddits cache updated successfully.")
+        return len(self.nsfw_subreddits_cache)
 
     async def fetch_subreddits_from_nsfw411(self) -> list[str]:
         self.logger.debug("Fetching NSFW411 subreddits...")
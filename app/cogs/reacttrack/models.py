@@ -13,3 +13,4 @@ class ReactEvent(BaseModel):
 
     class Meta:
         table_name = "react_events"
+        indexes = ((("guild_id", "user_id", "timestamp"), False),)
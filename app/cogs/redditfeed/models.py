@@ -33,4 +33,5 @@ class RedditPost(BaseModel):
 
     class Meta:
         table_name = "reddit_post"
+        indexes = ((("subreddit", "created"), False),)
         primary_key = CompositeKey("post_id", "message_id")
@@ -3,12 +3,12 @@ import os
 import urllib.parse
 
 import asyncpraw
-import cachetools
 import discord
 from asyncpraw.models import Submission
-from cogs.lancocog import LancoCog
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import TextChannel, app_commands
 from discord.ext import commands, tasks
+from utils import cache
 from utils.command_utils import is_bot_owner_or_admin
 from utils.file_downloader import FileDownloader
 from utils.image_utils import blur_image
@@ -17,12 +17,13 @@ from utils.markdown_utils import reddit_to_discord
 from .models import RedditFeedConfig, RedditPost
 
 
-class RedditFeed(LancoCog, name="RedditFeed", description="Reddit feed polling"):
+class RedditFeed(PollerCog, name="RedditFeed", description="Reddit feed polling"):
     reddit_feed_group = app_commands.Group(
         name="reddit", description="Poll Reddit for new posts", guild_only=True
     )
 
-    UPDATE_INTERVAL = 10  # seconds
+    POLL_INTERVAL = 10  # seconds
+    MAX_INTERVAL = 60
     STATE_CHECK_INTERVAL = (
         120  # seconds — how often to actively check recent posts for state changes
     )
@@ -55,35 +56,24 @@ class RedditFeed(LancoCog, name="RedditFeed", description="Reddit feed polling")
             client_secret=os.getenv("REDDIT_SECRET"),
             user_agent="LanCo Discord Bot (by /u/syntack)",
         )
-        self.subreddit_icon_cache = cachetools.TTLCache(
-            maxsize=100, ttl=60 * 60 * 24
+        self.subreddit_icon_cache = cache.ttl(
+            "redditfeed.subreddit_icons", maxsize=100, ttl=60 * 60 * 24
         )  # 24 hours
         self.cache_dir = os.path.join(self.get_cog_data_directory(), "Cache")
         self.file_downloader = FileDownloader()
-        # In-memory seen set guarding against re-posts between poll cycles.
-        # Seeded from DB on first poll.
-        self._seen_ids: dict[str, set[str]] = {}  # subreddit -> set of post_ids
-        self._seen_ids_loaded: set[str] = set()  # subreddits whose DB rows are loaded
+        # Subreddits whose seen set (see PollerCog.seen_ids) has been seeded
+        # from the DB; seeded on first poll.
+        self._seen_ids_loaded: set[str] = set()
 
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([RedditFeedConfig, RedditPost])
-        self.poll.start()
         self.check_post_states.start()
 
-    def cog_unload(self):
-        self.poll.cancel()
+    async def cog_unload(self):
+        await super().cog_unload()
         self.check_post_states.cancel()
 
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def poll(self):
-        """Poll for new posts in watched subreddits"""
-        self.logger.debug("Polling...")
-        try:
-            await self.get_new_posts()
-        except Exception as e:
-            self.logger.error(f"Error polling: {e}")
-
     @tasks.loop(seconds=10)
     async def check_post_states(self):
         """Actively fetch recent posts by ID to catch edits and removals."""
@@ -108,139 +98,146 @@ class RedditFeed(LancoCog, name="RedditFeed", description="Reddit feed polling")
         )
         return deleted, removed, removed_by_reddit
 
-    async def get_new_posts(self):
-        """Get new posts from watched subreddits and share them to the configured channels"""
-        reddit_configs = RedditFeedConfig.select()
-        if not reddit_configs:
-            return
-
-        # build up a map of subreddits to configs for efficiency
-        subreddit_channels = {}
-        for reddit_config in reddit_configs:
-            if reddit_config.subreddit not in subreddit_channels:
-                subreddit_channels[reddit_config.subreddit] = []
-            subreddit_channels[reddit_config.subreddit].append(reddit_config)
-
-        for sr, configs in subreddit_channels.items():
-            self.logger.debug(f"[{sr}] Polling {len(configs)} channel config(s)")
-            subreddit = await self.reddit.subreddit(sr)
-
-            submissions = []
-            async for submission in subreddit.new(limit=self.POST_LIMIT):
-                submissions.append(submission)
-            submissions = sorted(submissions, key=lambda s: s.created_utc)
-            self.logger.debug(
-                f"[{sr}] Fetched {len(submissions)} submissions from Reddit"
+    async def get_sources(self) -> list[PollSource]:
+        """One source per watched subreddit, shared by all its channels"""
+        subreddit_channels: dict[str, list[RedditFeedConfig]] = {}
+        for reddit_config in RedditFeedConfig.select():
+            subreddit_channels.setdefault(reddit_config.subreddit, []).append(
+                reddit_config
             )
-
-            # Seed in-memory seen set from DB once per subreddit, then keep it
-            # updated in-process so write-queue latency can't cause re-posts.
-            if sr not in self._seen_ids_loaded:
-                self._seen_ids[sr] = set(
-                    row[0]
-                    for row in RedditPost.select(RedditPost.post_id)
-                    .where(RedditPost.subreddit == sr.lower())
-                    .tuples()
-                )
-                self._seen_ids_loaded.add(sr)
-            seen_ids = self._seen_ids.setdefault(sr, set())
-            self.logger.debug(f"[{sr}] {len(seen_ids)} known post IDs in DB")
-
-            new_count = sum(1 for s in submissions if s.id not in seen_ids)
-            if new_count:
-                self.logger.info(f"[{sr}] {new_count} new post(s) to process")
-
-            # Safety valve: too many "new" posts at once means the baseline is
-            # lost/stale, not that the subreddit suddenly exploded. Adopt the
-            # current feed as the baseline (persist the high-water mark so future
-            # restarts stay quiet) and post nothing, rather than spamming days of
-            # old posts to every channel.
-            if new_count > self.MAX_NEW_POSTS_PER_POLL:
-                self.logger.warning(
-                    f"[{sr}] {new_count} new posts in one poll exceeds safety "
-                    f"threshold ({self.MAX_NEW_POSTS_PER_POLL}); adopting current "
-                    f"feed as baseline and skipping posting to avoid a re-post spam"
-                )
-                newest_ts = max((s.created_utc for s in submissions), default=None)
-                for s in submissions:
-                    seen_ids.add(s.id)
-                if newest_ts is not None:
-                    for config in configs:
-                        config.last_known_post_creation = newest_ts
-                        config.save()
+        return [
+            PollSource(key=sr, data=configs)
+            for sr, configs in subreddit_channels.items()
+        ]
+
+    async def fetch(self, source: PollSource) -> list[Submission]:
+        sr = source.key
+        self.logger.debug(f"[{sr}] Polling {len(source.data)} channel config(s)")
+        subreddit = await self.reddit.subreddit(sr)
+
+        submissions = []
+        async for submission in subreddit.new(limit=self.POST_LIMIT):
+            submissions.append(submission)
+        self.logger.debug(f"[{sr}] Fetched {len(submissions)} submissions from Reddit")
+        return sorted(submissions, key=lambda s: s.created_utc)
+
+    async def process(self, source: PollSource, submissions: list[Submission]) -> int:
+        """Share new posts from one subreddit to its configured channels"""
+        sr = source.key
+        configs: list[RedditFeedConfig] = source.data
+
+        # Seed the in-memory seen set from DB once per subreddit, then keep it
+        # updated in-process so a lagging DB write can't cause re-posts.
+        seen_ids = self.seen_ids(sr)
+        if sr not in self._seen_ids_loaded:
+            seen_ids.update(
+                row[0]
+                for row in RedditPost.select(RedditPost.post_id)
+                .where(RedditPost.subreddit == sr.lower())
+                .order_by(RedditPost.created)
+                .tuples()
+            )
+            self._seen_ids_loaded.add(sr)
+        self.logger.debug(f"[{sr}] {len(seen_ids)} known post IDs in DB")
+
+        new_count = sum(1 for s in submissions if s.id not in seen_ids)
+        if new_count:
+            self.logger.info(f"[{sr}] {new_count} new post(s) to process")
+
+        # Safety valve: too many "new" posts at once means the baseline is
+        # lost/stale, not that the subreddit suddenly exploded. Adopt the
+        # current feed as the baseline (persist the high-water mark so future
+        # restarts stay quiet) and post nothing, rather than spamming days of
+        # old posts to every channel.
+        if new_count > self.MAX_NEW_POSTS_PER_POLL:
+            self.logger.warning(
+                f"[{sr}] {new_count} new posts in one poll exceeds safety "
+                f"threshold ({self.MAX_NEW_POSTS_PER_POLL}); adopting current "
+                f"feed as baseline and skipping posting to avoid a re-post spam"
+            )
+            newest_ts = max((s.created_utc for s in submissions), default=None)
+            seen_ids.update(s.id for s in submissions)
+            if newest_ts is not None:
+                for config in configs:
+                    config.last_known_post_creation = newest_ts
+                    self.mark_dirty(config)
+            return 0
+
+        shared = 0
+        for submission in submissions:
+            # Skip already seen posts — state changes handled by check_post_states
+            if submission.id in seen_ids:
                 continue
 
-            for submission in submissions:
-                # Skip already seen posts — state changes handled by check_post_states
-                if submission.id in seen_ids:
-                    continue
+            # Skip posts older than the last known post creation for any config
+            # This prevents backfilling old content on restarts
+            min_timestamp = min(
+                (
+                    c.last_known_post_creation
+                    for c in configs
+                    if c.last_known_post_creation
+                ),
+                default=None,
+            )
+            if min_timestamp and submission.created_utc <= min_timestamp:
+                continue
 
-                # Skip posts older than the last known post creation for any config
-                # This prevents backfilling old content on restarts
-                min_timestamp = min(
-                    (
-                        c.last_known_post_creation
-                        for c in configs
-                        if c.last_known_post_creation
-                    ),
-                    default=None,
-                )
-                if min_timestamp and submission.created_utc <= min_timestamp:
-                    continue
+            # New post — share to all configured channels
+            author = submission.author.name if submission.author else "[deleted]"
+            deleted, removed, removed_by_reddit = self.get_removal_state(submission)
+            edited = bool(submission.edited)
+            permalink = f"https://reddit.com{submission.permalink}"
 
-                # New post — share to all configured channels
-                author = submission.author.name if submission.author else "[deleted]"
-                deleted, removed, removed_by_reddit = self.get_removal_state(submission)
-                edited = bool(submission.edited)
-                permalink = f"https://reddit.com{submission.permalink}"
+            self.logger.info(
+                f'[{sr}] New post: {submission.id} — "{submission.title[:60]}" {permalink}'
+            )
 
-                self.logger.info(
-                    f'[{sr}] New post: {submission.id} — "{submission.title[:60]}" {permalink}'
+            for config in configs:
+                self.logger.debug(
+                    f"[{sr}] Sharing post {submission.id} to channel {config.channel_id}"
                 )
 
-                for config in configs:
-                    self.logger.debug(
-                        f"[{sr}] Sharing post {submission.id} to channel {config.channel_id}"
+                channel = self.bot.get_channel(config.channel_id)
+                if not channel:
+                    self.logger.error(
+                        f"[{sr}] Channel {config.channel_id} not found, skipping"
                     )
+                    continue
 
-                    channel = self.bot.get_channel(config.channel_id)
-                    if not channel:
-                        self.logger.error(
-                            f"[{sr}] Channel {config.channel_id} not found, skipping"
-                        )
-                        continue
+                msg = await self.share_post(submission, channel)
+                self.logger.info(
+                    f"[{sr}] Posted {submission.id} to channel {config.channel_id} as message {msg.id}"
+                )
 
-                    msg = await self.share_post(submission, channel)
-                    self.logger.info(
-                        f"[{sr}] Posted {submission.id} to channel {config.channel_id} as message {msg.id}"
-                    )
+                now = datetime.datetime.now(datetime.timezone.utc)
+                RedditPost.create(
+                    post_id=submission.id,
+                    subreddit=submission.subreddit.display_name.lower(),
+                    channel_id=config.channel_id,
+                    title=submission.title,
+                    permalink=submission.permalink,
+                    created=submission.created_utc,
+                    author=author,
+                    is_nsfw=submission.over_18,
+                    spoiler=submission.spoiler,
+                    deleted=deleted,
+                    removed=removed,
+                    removed_by_reddit=removed_by_reddit,
+                    edited=False,  # always False on first insert; set True on update
+                    comment_count=submission.num_comments,
+                    score=submission.score,
+                    last_updated=now,
+                    message_id=msg.id,
+                )
+                config.last_known_post_creation = submission.created_utc
+                self.mark_dirty(config)
+                shared += 1
 
-                    now = datetime.datetime.now(datetime.timezone.utc)
-                    RedditPost.create(
-                        post_id=submission.id,
-                        subreddit=submission.subreddit.display_name.lower(),
-                        channel_id=config.channel_id,
-                        title=submission.title,
-                        permalink=submission.permalink,
-                        created=submission.created_utc,
-                        author=author,
-                        is_nsfw=submission.over_18,
-                        spoiler=submission.spoiler,
-                        deleted=deleted,
-                        removed=removed,
-                        removed_by_reddit=removed_by_reddit,
-                        edited=False,  # always False on first insert; set True on update
-                        comment_count=submission.num_comments,
-                        score=submission.score,
-                        last_updated=now,
-                        message_id=msg.id,
-                    )
-                    config.last_known_post_creation = submission.created_utc
-                    config.save()
+            # Mark as seen
+            seen_ids.add(submission.id)
+            self.logger.info(f"[{sr}] Marked {submission.id} as seen")
 
-                # Mark as seen
-                seen_ids.add(submission.id)
-                self.logger.info(f"[{sr}] Marked {submission.id} as seen")
+        return shared
 
     async def update_post_states(self):
         """Actively fetch recent posts by ID to detect edits and removals."""
@@ -12,7 +12,7 @@ class Reminder(BaseModel):
     set_at = DateTimeField()
     due_at = DateTimeField()
     message = TextField()
-    issued = BooleanField(default=False)
+    issued = BooleanField(default=False, index=True)
 
     class Meta:
         table_name = "user_reminders"
@@ -1,6 +1,5 @@
 import datetime
 
-import dateparser
 from cogs.lancocog import LancoCog
 from discord.ext import commands, tasks
 
@@ -67,6 +66,7 @@ class RemindMe(
     @commands.guild_only()
     async def remindme(self, ctx: commands.Context, duration: str, *, reminder: str):
         """Reminds you of something after a specified duration. Example: !remindme 2h take out the trash"""
+        import dateparser  # slow to import, so not at startup
 
         remind_time = dateparser.parse(
             duration, settings={"PREFER_DATES_FROM": "future"}
@@ -3,9 +3,9 @@ from urllib.parse import urlparse
 
 import aiohttp
 import discord
-from cogs.lancocog import LancoCog
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from feedparser import parse
 from feedparser.util import FeedParserDict
 from utils.channel_lock import command_channel_lock
@@ -15,11 +15,12 @@ from .models import RSSFeedConfig
 
 
 class RssFeed(
-    LancoCog,
+    PollerCog,
     name="RSSFeed",
     description="Poll RSS feeds and post new entries to configured channels",
 ):
-    UPDATE_INTERVAL = 10  # seconds
+    POLL_INTERVAL = 10  # seconds
+    MAX_INTERVAL = 60
     g = app_commands.Group(
         name="rssfeed", description="RSSFeed commands", guild_only=True
     )
@@ -34,10 +35,6 @@ class RssFeed(
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([RSSFeedConfig])
-        self.poll.start()
-
-    def cog_unload(self):
-        self.poll.cancel()
 
     @staticmethod
     def feed_label(url: str) -> str:
@@ -132,83 +129,103 @@ class RssFeed(
                 f"subscription"
             )
 
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def poll(self):
-        """Poll for new RSS feed items"""
-        configs = list(RSSFeedConfig.select())
-        if not configs:
-            return
+    async def get_sources(self) -> list[PollSource]:
+        """One source per feed URL, however many channels subscribe to it"""
+        by_url: dict[str, list[RSSFeedConfig]] = {}
+        for config in RSSFeedConfig.select():
+            by_url.setdefault(config.url, []).append(config)
+        return [
+            PollSource(key=url, label=self.feed_label(url), data=configs)
+            for url, configs in by_url.items()
+        ]
 
-        self.logger.debug(f"Polling {len(configs)} feed subscription(s)")
+    async def fetch(self, source: PollSource) -> FeedParserDict:
+        self.logger.debug(f"[{source.label}] Checking {source.key}")
+        return await self.get_feed(source.key)
+
+    async def process(self, source: PollSource, feed: FeedParserDict) -> int:
+        """Post new entries to every channel subscribed to the feed"""
+        label = source.label
+        if not feed.entries:
+            reason = getattr(feed, "bozo_exception", None)
+            self.warn_once(
+                source.key,
+                f"[{label}] Feed returned no entries"
+                + (f": {reason}" if reason else ""),
+            )
+        elif feed.bozo:
+            # parsed well enough to yield entries, so note it and carry on
+            self.warn_once(
+                source.key,
+                f"[{label}] Feed is malformed but yielded "
+                f"{len(feed.entries)} entries: "
+                f"{getattr(feed, 'bozo_exception', 'unknown error')}",
+            )
+        else:
+            self._warned_feeds.discard(source.key)
 
-        for config in configs:
-            label = self.feed_label(config.url)
+        posted = 0
+        for config in source.data:
             try:
-                self.logger.debug(f"[{label}] Checking {config.url}")
-                feed = await self.get_feed(config.url)
+                posted += await self.process_subscription(feed, config, label)
+            except Exception:
+                self.logger.exception(
+                    f"[{label}] Error polling {config.url} for channel "
+                    f"{config.channel_id}"
+                )
+        return posted
 
-                if not feed.entries:
-                    reason = getattr(feed, "bozo_exception", None)
-                    self.warn_once(
-                        config.url,
-                        f"[{label}] Feed returned no entries"
-                        + (f": {reason}" if reason else ""),
-                    )
-                elif feed.bozo:
-                    # parsed well enough to yield entries, so note it and carry on
-                    self.warn_once(
-                        config.url,
-                        f"[{label}] Feed is malformed but yielded "
-                        f"{len(feed.entries)} entries: "
-                        f"{getattr(feed, 'bozo_exception', 'unknown error')}",
-                    )
-                else:
-                    self._warned_feeds.discard(config.url)
+    async def process_subscription(
+        self, feed: FeedParserDict, config: RSSFeedConfig, label: str
+    ) -> int:
+        new_items = await self.get_new_items(feed, config.last_checked)
+        seen = self.seen_ids((config.channel_id, config.url))
+        new_items = [i for i in new_items if self.item_id(i) not in seen]
 
-                new_items = await self.get_new_items(feed, config.last_checked)
+        if config.last_checked is None:
+            # everything in the feed counts as new on the very first poll
+            self.logger.info(
+                f"[{label}] First poll since subscribing, "
+                f"{len(new_items)} of {len(feed.entries)} item(s) treated as new"
+            )
+        elif new_items:
+            self.logger.info(
+                f"[{label}] {len(new_items)} new item(s) of "
+                f"{len(feed.entries)} in feed"
+            )
 
-                if config.last_checked is None:
-                    # everything in the feed counts as new on the very first poll
-                    self.logger.info(
-                        f"[{label}] First poll since subscribing, "
-                        f"{len(new_items)} of {len(feed.entries)} item(s) treated as new"
-                    )
-                elif new_items:
-                    self.logger.info(
-                        f"[{label}] {len(new_items)} new item(s) of "
-                        f"{len(feed.entries)} in feed"
-                    )
+        channel = self.bot.get_channel(config.channel_id)
+        if new_items and not channel:
+            if config.channel_id not in self._warned_channels:
+                self._warned_channels.add(config.channel_id)
+                self.logger.warning(
+                    f"[{label}] Channel {config.channel_id} not found, "
+                    f"skipping {len(new_items)} item(s)"
+                )
 
-                channel = self.bot.get_channel(config.channel_id)
-                if new_items and not channel:
-                    if config.channel_id not in self._warned_channels:
-                        self._warned_channels.add(config.channel_id)
-                        self.logger.warning(
-                            f"[{label}] Channel {config.channel_id} not found, "
-                            f"skipping {len(new_items)} item(s)"
-                        )
-
-                for item in new_items:
-                    if not channel:
-                        continue
-                    msg = await self.post_item(feed.feed.title, item, channel)
-                    self.logger.info(
-                        f"[{label}] Posted {getattr(item, 'link', '?')} "
-                        f"to channel {config.channel_id} as message {msg.id}"
-                    )
+        posted = 0
+        for item in new_items:
+            if not channel:
+                continue
+            msg = await self.post_item(feed.feed.title, item, channel)
+            seen.add(self.item_id(item))
+            posted += 1
+            self.logger.info(
+                f"[{label}] Posted {getattr(item, 'link', '?')} "
+                f"to channel {config.channel_id} as message {msg.id}"
+            )
 
-                # feedparser normalises entry timestamps to UTC, so the watermark
-                # must be UTC too. Using local time here made every item published
-                # within the UTC offset compare as new on every poll, re-posting
-                # it until it aged out of the feed.
-                config.last_checked = datetime.datetime.utcnow()
-                config.save()
+        # feedparser normalises entry timestamps to UTC, so the watermark
+        # must be UTC too. Using local time here made every item published
+        # within the UTC offset compare as new on every poll, re-posting
+        # it until it aged out of the feed.
+        config.last_checked = datetime.datetime.utcnow()
+        self.mark_dirty(config)
+        return posted
 
-            except Exception:
-                self.logger.exception(
-                    f"[{label}] Error polling {config.url} for channel "
-                    f"{config.channel_id}"
-                )
+    @staticmethod
+    def item_id(entry: FeedParserDict) -> str:
+        return entry.get("id") or entry.get("link") or entry.get("title", "")
 
     async def get_feed(self, url: str) -> FeedParserDict:
         """Get the feed"""
@@ -1,6 +1,5 @@
 import datetime
 import mimetypes
-import os
 from dataclasses import dataclass
 
 import discord
@@ -8,9 +7,10 @@ from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
 from pydantic import BaseModel
-from pydantic_ai import Agent, BinaryContent
+from pydantic_ai import BinaryContent
+from utils import agents, message_buffer
 from utils.ai_utils import run_agent
-from utils.file_downloader import FileDownloader
+from utils.message_buffer import BufferedAuthor, BufferedMessage
 
 
 class SleepScreenshot(BaseModel):
@@ -40,13 +40,11 @@ class SleepCheck(
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Describe this image.",
             output_type=SleepScreenshot,
         )
-        self.cache_dir = os.path.join(self.get_cog_data_directory(), "Cache")
-        self.file_downloader = FileDownloader()
         self.active_royales = {}
 
     @g.command(
@@ -120,8 +118,8 @@ class SleepCheck(
         del self.active_royales[royale_channel.id]
 
     async def get_sleep_times(
-        self, messages: list[discord.Message]
-    ) -> dict[discord.User, datetime.timedelta]:
+        self, messages: list[BufferedMessage]
+    ) -> dict[BufferedAuthor, datetime.timedelta]:
         users = {}
         for message in messages:
             if message.author.bot:
@@ -140,36 +138,31 @@ class SleepCheck(
 
     async def get_messages_from_day(
         self, channel: discord.TextChannel, day: datetime.date
-    ) -> list[discord.Message]:
+    ) -> list[BufferedMessage]:
         """Get all messages from a specific day"""
-        messages = []
-        async for message in channel.history(
-            after=datetime.datetime(day.year, day.month, day.day),
+        messages = await message_buffer.history(
+            channel,
             limit=500,
+            after=datetime.datetime(day.year, day.month, day.day),
             oldest_first=True,
-        ):
-            if message.created_at.date() == day:
-                messages.append(message)
-
-        return messages
-
-    async def process_screenshot(self, message: discord.Message) -> SleepScreenshot:
-        results = await self.file_downloader.download_attachments(
-            message, self.cache_dir
         )
-        filename = results[0].filename
+        return [m for m in messages if m.created_at.date() == day]
 
-        with open(filename, "rb") as f:
-            image_bytes = f.read()
+    async def process_screenshot(self, message: BufferedMessage) -> SleepScreenshot:
+        attachment = message.attachments[0]
 
         # TODO might want to use python-magic so it's content-based
-        mime_type, _ = mimetypes.guess_type(filename)
+        mime_type = (
+            attachment.content_type or mimetypes.guess_type(attachment.filename)[0]
+        )
 
         # throw it out if it's not an image
         if not mime_type or not mime_type.startswith("image/"):
-            self.logger.error(f"File {filename} is not an image.")
+            self.logger.error(f"File {attachment.filename} is not an image.")
             return None
 
+        image_bytes = await attachment.read()
+
         result = await run_agent(
             lambda: self.agent.run(
                 [
@@ -181,10 +174,6 @@ class SleepCheck(
         if result is None:
             return None
 
-        # cleanup
-        for r in results:
-            os.remove(r.filename)
-
         return result.output
 
 
@@ -0,0 +1,119 @@
+import asyncio
+import base64
+import logging
+import time
+from typing import Optional
+
+from utils import cache, http
+
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+API_URL = "https://api.spotify.com/v1"
+
+# Track, album and artist metadata barely changes; playlists are edited often
+CACHE_TTL = {
+    "track": 24 * 60 * 60,
+    "album": 24 * 60 * 60,
+    "artist": 6 * 60 * 60,
+    "playlist": 30 * 60,
+}
+
+
+def _expires(key: tuple[str, str], data: dict, now: float) -> float:
+    return now + CACHE_TTL.get(key[0], 60 * 60)
+
+
+class SpotifyError(Exception):
+    """A Spotify Web API request failed"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class SpotifyClient:
+    """Minimal async Spotify Web API client for public metadata
+
+    Uses the client-credentials flow. The access token is reused until shortly
+    before it expires, and only one refresh runs at a time. Metadata responses
+    are cached per (type, id) for ``CACHE_TTL`` seconds, and concurrent lookups
+    of the same item share one request, so a track shared in several channels
+    costs one API call.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        max_entries: int = 2048,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.logger = logging.getLogger(__name__)
+
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+        self._cache: cache.Cache[tuple[str, str], dict] = cache.tlru(
+            "spotify", max_entries, ttu=_expires
+        )
+
+    async def track(self, track_id: str) -> dict:
+        return await self.get("track", track_id)
+
+    async def album(self, album_id: str) -> dict:
+        return await self.get("album", album_id)
+
+    async def playlist(self, playlist_id: str) -> dict:
+        return await self.get("playlist", playlist_id)
+
+    async def artist(self, artist_id: str) -> dict:
+        return await self.get("artist", artist_id)
+
+    async def get(self, kind: str, item_id: str) -> dict:
+        """Fetch a track, album, playlist or artist by ID, from cache if fresh"""
+        return await self._cache.get_or_load(
+            (kind, item_id), lambda: self._request(f"{API_URL}/{kind}s/{item_id}")
+        )
+
+    async def _request(self, url: str) -> dict:
+        session = http.get_session("spotify")
+        for attempt in range(2):
+            token = await self._get_token(force_refresh=attempt > 0)
+            headers = {"Authorization": f"Bearer {token}"}
+            async with session.get(url, headers=headers) as response:
+                if response.status == 401 and attempt == 0:
+                    # revoked or expired early; refresh once and retry
+                    continue
+                if response.status != 200:
+                    raise SpotifyError(response.status, await response.text())
+                return await response.json()
+        raise SpotifyError(401, "Unauthorized")
+
+    async def _get_token(self, force_refresh: bool = False) -> str:
+        async with self._token_lock:
+            if (
+                not force_refresh
+                and self._token
+                and self._token_expires > time.monotonic()
+            ):
+                return self._token
+
+            credentials = base64.b64encode(
+                f"{self.client_id}:{self.client_secret}".encode()
+            ).decode()
+            session = http.get_session("spotify")
+            async with session.post(
+                TOKEN_URL,
+                data={"grant_type": "client_credentials"},
+                headers={"Authorization": f"Basic {credentials}"},
+            ) as response:
+                if response.status != 200:
+                    raise SpotifyError(response.status, await response.text())
+                payload = await response.json()
+
+            self._token = payload["access_token"]
+            # refresh a minute early so a request never races the expiry
+            self._token_expires = time.monotonic() + payload["expires_in"] - 60
+            self.logger.debug("Refreshed Spotify access token")
+            return self._token
@@ -3,13 +3,13 @@ import os
 import re
 
 import discord
-import spotipy
-from cachetools import LRUCache
+from cogs.common.embedwatch import EmbedWatch
 from cogs.lancocog import LancoCog, UrlHandler
 from discord import app_commands
 from discord.ext import commands
 from utils.command_utils import is_bot_owner_or_admin
 
+from .client import SpotifyClient
 from .models import SpotifyEmbedConfig
 
 
@@ -24,14 +24,23 @@ class SpotifyEmbed(
         r"https?://open.spotify.com/(track|album|playlist|artist)/([a-zA-Z0-9]+)"
     )
 
+    # how long Discord gets to embed the link itself before we step in
+    EMBED_WAIT = 2.5
+
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        creds = spotipy.SpotifyClientCredentials(
+        self.spotify = SpotifyClient(
             client_id=os.getenv("SPOTIFY_CLIENT_ID"),
             client_secret=os.getenv("SPOTIFY_SECRET"),
         )
-        self.sp = spotipy.Spotify(client_credentials_manager=creds)
-        self.fixed_messages = LRUCache(maxsize=1000)  # message_id -> fixed_message_id
+        # Discord's Spotify previews are better than ours, so a late one wins
+        self.embed_watch = EmbedWatch(
+            bot,
+            self.logger,
+            deadline=self.EMBED_WAIT,
+            retract_late_fixes=True,
+            name=f"embedwatch.{self.qualified_name}",
+        )
 
         bot.register_url_handler(
             UrlHandler(
@@ -65,59 +74,41 @@ class SpotifyEmbed(
             spotify_type = match.group(1)
             spotify_id = match.group(2)
 
-            self.logger.info("Waiting for discord to embed the link...")
+            # fetch the metadata while Discord decides, so the embed is ready the
+            # moment we know it is needed; a cancelled render still warms the cache
+            render = asyncio.create_task(self.generate_embed(spotify_type, spotify_id))
 
-            # wait a bit to see if discord will embed the link
-            await asyncio.sleep(2.5)
-
-            # re-fetch the message to get the latest content
-            message = await message.channel.fetch_message(message.id)
-            if message.embeds:
+            self.logger.info("Waiting for discord to embed the link...")
+            if await self.embed_watch.wait_for_embed(message):
+                render.cancel()
                 self.logger.info("Discord embedded the link, no need to fix it")
                 return
 
-            if spotify_type == "track":
-                embed = self.generate_track_embed(spotify_id)
-            elif spotify_type == "album":
-                embed = self.generate_album_embed(spotify_id)
-            elif spotify_type == "playlist":
-                embed = self.generate_playlist_embed(spotify_id)
-            elif spotify_type == "artist":
-                embed = self.generate_artist_embed(spotify_id)
+            try:
+                embed = await render
+            except Exception as e:
+                self.logger.error(f"Failed to fetch {spotify_type} {spotify_id}: {e}")
+                return
 
             fixed_msg = await message.reply(embed=embed)
-            self.fixed_messages[message.id] = fixed_msg.id
+            self.embed_watch.record_fix(message.id, fixed_msg.id)
 
-    # Discord's own embed server adds the native embed asynchronously via a
-    # MESSAGE_UPDATE. Raw variant is used since on_message_edit is skipped if
-    # the message has since aged out of discord.py's internal cache.
-    # See: https://github.com/Rapptz/discord.py/blob/master/docs/api.rst
-    # (on_message_edit / on_raw_message_edit)
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
-        fixed_message_id = self.fixed_messages.get(payload.message_id)
-        if not fixed_message_id:
-            return
+        await self.embed_watch.handle_raw_edit(payload)
 
-        if not payload.data.get("embeds"):
-            return
+    async def generate_embed(self, spotify_type: str, spotify_id: str) -> discord.Embed:
+        if spotify_type == "track":
+            return await self.generate_track_embed(spotify_id)
+        elif spotify_type == "album":
+            return await self.generate_album_embed(spotify_id)
+        elif spotify_type == "playlist":
+            return await self.generate_playlist_embed(spotify_id)
+        elif spotify_type == "artist":
+            return await self.generate_artist_embed(spotify_id)
 
-        del self.fixed_messages[payload.message_id]
-        self.logger.info(
-            f"Discord eventually embedded message {payload.message_id} in channel "
-            f"{payload.channel_id}, removing our embed"
-        )
-        try:
-            channel = self.bot.get_channel(
-                payload.channel_id
-            ) or await self.bot.fetch_channel(payload.channel_id)
-            fixed_msg = await channel.fetch_message(fixed_message_id)
-            await fixed_msg.delete()
-        except discord.NotFound:
-            pass
-
-    def generate_track_embed(self, track_id: str) -> discord.Embed:
-        track = self.sp.track(track_id)
+    async def generate_track_embed(self, track_id: str) -> discord.Embed:
+        track = await self.spotify.track(track_id)
 
         artist_urls = []
         for artist in track["artists"]:
@@ -147,8 +138,8 @@ class SpotifyEmbed(
         embed.set_thumbnail(url=track["album"]["images"][0]["url"])
         return embed
 
-    def generate_album_embed(self, album_id: str) -> discord.Embed:
-        album = self.sp.album(album_id)
+    async def generate_album_embed(self, album_id: str) -> discord.Embed:
+        album = await self.spotify.album(album_id)
 
         track_info = []
         for i, track in enumerate(album["tracks"]["items"]):
@@ -178,8 +169,8 @@ class SpotifyEmbed(
 
         return embed
 
-    def generate_playlist_embed(self, playlist_id: str) -> discord.Embed:
-        playlist = self.sp.playlist(playlist_id)
+    async def generate_playlist_embed(self, playlist_id: str) -> discord.Embed:
+        playlist = await self.spotify.playlist(playlist_id)
 
         max_tracks = 5
         track_info = []
@@ -211,8 +202,8 @@ class SpotifyEmbed(
 
         return embed
 
-    def generate_artist_embed(self, artist_id: str) -> discord.Embed:
-        artist = self.sp.artist(artist_id)
+    async def generate_artist_embed(self, artist_id: str) -> discord.Embed:
+        artist = await self.spotify.artist(artist_id)
 
         # TODO - add top tracks
 
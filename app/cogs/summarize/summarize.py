@@ -9,9 +9,10 @@ import discord
 from cogs.lancocog import LancoCog
 from discord.ext import commands
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent
+from utils import agents
 from utils.ai_utils import run_agent
 from utils.channel_lock import command_channel_lock
+from utils.message_buffer import BufferedMessage
 from utils.message_utils import get_user_messages
 from utils.tracked_message import track_message_ids
 
@@ -60,13 +61,13 @@ class Summarize(
 
     def __init__(self, bot):
         super().__init__(bot)
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt=self.SYSTEM_PROMPT,
             output_type=ChannelDiscussion,
         )
-        self.eli5_agent = Agent(
-            model="openai:gpt-5-nano",
+        self.eli5_agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Explain the current vibe of the channel in a way that a 5-year-old would understand.",
             output_type=ChannelDiscussion,
         )
@@ -77,12 +78,12 @@ class Summarize(
         lines: list[str]
 
         """ Lines of the transcript with indexed tags, e.g. [msg0] @User Message """
-        msg_map: dict[int, discord.Message]
+        msg_map: dict[int, BufferedMessage]
 
         class Config:
             arbitrary_types_allowed = True
 
-    async def build_transcript(self, messages: list[discord.Message]) -> Transcript:
+    async def build_transcript(self, messages: list[BufferedMessage]) -> Transcript:
         """Build a transcript from messages with indexed tags."""
         lines = []
         # Build transcript with indexes because the LLM will likely hallucinate message ids
@@ -213,6 +214,7 @@ class Summarize(
         result = await run_agent(
             lambda: self.agent.run([m.content for m in messages]),
             ctx.send,
+            guild_id=ctx.guild.id if ctx.guild else None,
         )
         if result is None:
             return
@@ -240,7 +242,11 @@ class Summarize(
         if not prompt:
             return await ctx.send("Please provide a prompt for the ELI5 explanation.")
 
-        result = await run_agent(lambda: self.eli5_agent.run(prompt), ctx.send)
+        result = await run_agent(
+            lambda: self.eli5_agent.run(prompt),
+            ctx.send,
+            guild_id=ctx.guild.id if ctx.guild else None,
+        )
         if result is None:
             return
 
@@ -269,6 +275,7 @@ class Summarize(
         result = await run_agent(
             lambda: self.agent.run([m.content for m in messages]),
             ctx.send,
+            guild_id=ctx.guild.id if ctx.guild else None,
         )
         if result is None:
             return
@@ -1,41 +1,55 @@
 import asyncio
 import datetime
 import os
-import time
 from sys import version_info as sysv
 from time import monotonic
+from typing import Optional
 
 import aiohttp
 import discord
 import psutil
 from cogs.lancocog import LancoCog
 from discord.ext import commands
+from utils import cache, memory, token_tracker
 from utils.command_utils import is_bot_owner
 from utils.dist_utils import get_bot_version, get_commit_hash
 from utils.network_utils import get_external_ip
 
 USAGE_API = "https://api.openai.com/v1/organization/usage/completions"
 CACHE_TTL = 300  # seconds
+USAGE_BREAKDOWN_LIMIT = 10  # rows listed in /token-usage
+MEMORY_ROWS = 10  # rows listed by the /memory commands
+CACHE_ROWS = 25  # caches listed by /cachestats
+QUERY_ROWS = 10  # statements listed by /queryaudit
 
 # Estimate: ~0.1 mL of water per token (Li et al. 2023, "Making AI Less Thirsty", arxiv.org/abs/2304.03271;
 # OpenAI has not published figures - GPT-5 may consume more, treat this as a conservative lower bound)
 ML_PER_TOKEN = 0.1
 
 
+def _code_block(lines: list[str]) -> str:
+    """Lines as a code block that fits an embed description"""
+    text = "\n".join(lines) or "(nothing)"
+    return f"```\n{text[:4000]}\n```"
+
+
 class SystemCog(LancoCog, name="SystemCog", description="System and admin commands"):
+    g = discord.app_commands.Group(name="memory", description="Memory diagnostics")
+
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
         self._openai_admin_key = os.getenv("OPENAI_ADMIN_KEY")
         self._openai_project_id = os.getenv("OPENAI_PROJECT_ID")
-        self._usage_cache: dict[int, tuple[float, datetime.datetime, dict]] = (
-            {}
-        )  # days -> (monotonic, fetched_at, data)
+        # days -> (fetched_at, data)
+        self._usage_cache: cache.Cache[int, tuple[datetime.datetime, dict]] = cache.ttl(
+            "system.openai_usage", maxsize=16, ttl=CACHE_TTL
+        )
 
     async def cog_load(self):
         await super().cog_load()
         if not self._openai_admin_key:
             self.logger.warning(
-                "OPENAI_ADMIN_KEY not set - token usage commands will not work"
+                "OPENAI_ADMIN_KEY not set - /token-usage cannot reconcile against the account"
             )
         if not self._openai_project_id:
             self.logger.warning(
@@ -78,11 +92,10 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
 
     async def _get_usage(self, days: int) -> dict | None:
         """Return cached usage data for the given day range, fetching if stale."""
-        cached_at, fetched_at, cached_data = self._usage_cache.get(
-            days, (0, None, None)
-        )
-        if cached_data is not None and (time.monotonic() - cached_at) < CACHE_TTL:
+        cached = self._usage_cache.get(days)
+        if cached is not None:
             self.logger.debug("Returning cached usage data for %d days", days)
+            fetched_at, cached_data = cached
             return cached_data, fetched_at
 
         now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
@@ -90,7 +103,7 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
         data = await self._fetch_usage(start, now)
         if data is not None:
             fetched_at = datetime.datetime.now(datetime.timezone.utc)
-            self._usage_cache[days] = (time.monotonic(), fetched_at, data)
+            self._usage_cache[days] = (fetched_at, data)
         return data, fetched_at
 
     def _aggregate_usage(self, data: dict) -> tuple[dict[str, dict], int, int]:
@@ -310,64 +323,116 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
             f"Unblocked {user.mention}", ephemeral=True
         )
 
-    @discord.app_commands.command(
-        name="token-usage", description="Show OpenAI token usage"
-    )
+    async def _ledger_usage(
+        self, days: int, by: str = "model"
+    ) -> dict[str, token_tracker.Totals]:
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        return await asyncio.to_thread(token_tracker.usage_by, by, since)
+
+    def _group_label(self, by: str, key) -> str:
+        if by == "guild_id":
+            guild = self.bot.get_guild(key) if key else None
+            return guild.name if guild else ("DMs" if not key else str(key))
+        return str(key)
+
+    @discord.app_commands.command(name="token-usage", description="Show AI token usage")
     @discord.app_commands.describe(
-        days="Number of past days to include (default 30, max 90)"
+        days="Number of past days to include (default 30, max 90)",
+        by="Break usage down by model, cog or server",
+        reconcile="Compare against the OpenAI account usage API",
+    )
+    @discord.app_commands.choices(
+        by=[
+            discord.app_commands.Choice(name="Model", value="model"),
+            discord.app_commands.Choice(name="Cog", value="cog"),
+            discord.app_commands.Choice(name="Server", value="guild_id"),
+        ]
     )
     @is_bot_owner()
-    async def token_usage(self, interaction: discord.Interaction, days: int = 30):
-        if not self._openai_admin_key:
-            await interaction.response.send_message(
-                "OPENAI_ADMIN_KEY is not configured."
-            )
-            return
-
+    async def token_usage(
+        self,
+        interaction: discord.Interaction,
+        days: int = 30,
+        by: str = "model",
+        reconcile: bool = False,
+    ):
         days = max(1, min(days, 90))
         await interaction.response.defer()
 
-        data, fetched_at = await self._get_usage(days)
-        if data is None:
+        usage = await self._ledger_usage(days, by)
+        if not usage:
             await interaction.followup.send(
-                "Failed to fetch usage data. Check logs for details."
+                f"No usage recorded in the past {days} day(s)."
             )
             return
 
-        by_model, total_in, total_out = self._aggregate_usage(data)
-        if not by_model:
-            await interaction.followup.send(
-                f"No usage data found for the past {days} day(s)."
-            )
-            return
+        total = token_tracker.Totals()
+        for totals in usage.values():
+            total.add(totals)
 
-        total = total_in + total_out
         embed = discord.Embed(
-            title=f"OpenAI Token Usage - Past {days} day(s)",
-            description=f"**{total:,}** total tokens  *{total_in:,} in / {total_out:,} out*",
+            title=f"AI Token Usage - Past {days} day(s)",
+            description=(
+                f"**{total.total_tokens:,}** total tokens  "
+                f"*{total.input_tokens:,} in / {total.output_tokens:,} out*\n"
+                f"{total.calls:,} calls, ~${total.cost_usd:,.2f}"
+            ),
             color=discord.Color.blurple(),
         )
 
         lines = []
-        for model, counts in sorted(
-            by_model.items(), key=lambda x: -(x[1]["input"] + x[1]["output"])
-        ):
-            t = counts["input"] + counts["output"]
-            pct = (t / total * 100) if total else 0
+        ranked = sorted(usage.items(), key=lambda x: -x[1].total_tokens)
+        for key, totals in ranked[:USAGE_BREAKDOWN_LIMIT]:
+            pct = (
+                totals.total_tokens / total.total_tokens * 100
+                if total.total_tokens
+                else 0
+            )
             cached_note = (
-                f"  *({counts['cached']:,} cached)*" if counts["cached"] else ""
+                f"  *({totals.cached_tokens:,} cached)*" if totals.cached_tokens else ""
             )
+            avg_latency = totals.latency_ms / totals.calls if totals.calls else 0
             lines.append(
-                f"`{model}`\n"
-                f"↑ {counts['input']:,}  ↓ {counts['output']:,}  *{t:,} ({pct:.1f}%)*{cached_note}"
+                f"`{self._group_label(by, key)}`\n"
+                f"↑ {totals.input_tokens:,}  ↓ {totals.output_tokens:,}  "
+                f"*{totals.total_tokens:,} ({pct:.1f}%)*{cached_note}\n"
+                f"{totals.calls:,} calls, avg {avg_latency / 1000:.1f}s, ~${totals.cost_usd:,.2f}"
             )
-        embed.add_field(name="Model Breakdown", value="\n\n".join(lines), inline=False)
-        embed.set_footer(
-            text=f"Updated {fetched_at.strftime('%b %d, %Y %I:%M %p')} UTC"
+        if len(ranked) > USAGE_BREAKDOWN_LIMIT:
+            lines.append(f"*...and {len(ranked) - USAGE_BREAKDOWN_LIMIT} more*")
+        breakdown = {"model": "Model", "cog": "Cog", "guild_id": "Server"}[by]
+        embed.add_field(
+            name=f"{breakdown} Breakdown", value="\n\n".join(lines)[:1024], inline=False
         )
 
+        if reconcile:
+            embed.add_field(
+                name="Reconciliation",
+                value=await self._reconciliation(days, total),
+                inline=False,
+            )
+        embed.set_footer(text="From the local usage ledger; costs are estimates")
+
         await interaction.followup.send(embed=embed)
 
+    async def _reconciliation(self, days: int, ledger: token_tracker.Totals) -> str:
+        """How the ledger compares to what OpenAI billed the account"""
+        if not self._openai_admin_key:
+            return "OPENAI_ADMIN_KEY is not configured."
+        data, fetched_at = await self._get_usage(days)
+        if data is None:
+            return "Failed to fetch usage data. Check logs for details."
+        _, api_in, api_out = self._aggregate_usage(data)
+        api_total = api_in + api_out
+        untracked = api_total - ledger.total_tokens
+        return (
+            f"OpenAI reports **{api_total:,}** tokens "
+            f"*({api_in:,} in / {api_out:,} out)*.\n"
+            f"{untracked:,} tokens were used outside the ledger "
+            f"(other projects, or calls not made through run_agent).\n"
+            f"*API data from {fetched_at.strftime('%b %d, %Y %I:%M %p')} UTC*"
+        )
+
     @token_usage.error
     async def token_usage_error(
         self,
@@ -382,35 +447,29 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
             self.logger.error("token_usage error: %s", error)
 
     @discord.app_commands.command(
-        name="token-water", description="Estimate water consumed by OpenAI token usage"
+        name="token-water", description="Estimate water consumed by AI token usage"
     )
     @discord.app_commands.describe(
         days="Number of past days to include (default 30, max 90)"
     )
     @is_bot_owner()
     async def token_water(self, interaction: discord.Interaction, days: int = 30):
-        if not self._openai_admin_key:
-            await interaction.response.send_message(
-                "OPENAI_ADMIN_KEY is not configured."
-            )
-            return
-
         days = max(1, min(days, 90))
         await interaction.response.defer()
 
-        data, fetched_at = await self._get_usage(days)
-        if data is None:
+        usage = await self._ledger_usage(days)
+        if not usage:
             await interaction.followup.send(
-                "Failed to fetch usage data. Check logs for details."
+                f"No usage recorded in the past {days} day(s)."
             )
             return
 
-        by_model, total_in, total_out = self._aggregate_usage(data)
-        if not by_model:
-            await interaction.followup.send(
-                f"No usage data found for the past {days} day(s)."
-            )
-            return
+        by_model = {
+            model: {"input": t.input_tokens, "output": t.output_tokens}
+            for model, t in usage.items()
+        }
+        total_in = sum(v["input"] for v in by_model.values())
+        total_out = sum(v["output"] for v in by_model.values())
 
         total_tokens = total_in + total_out
         total_ml = total_tokens * ML_PER_TOKEN
@@ -473,9 +532,7 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
             ),
             inline=False,
         )
-        embed.set_footer(
-            text=f"Updated {fetched_at.strftime('%b %d, %Y %I:%M %p')} UTC"
-        )
+        embed.set_footer(text="From the local usage ledger")
         await interaction.followup.send(embed=embed)
 
     @token_water.error
@@ -491,6 +548,267 @@ class SystemCog(LancoCog, name="SystemCog", description="System and admin comman
         else:
             self.logger.error("token_water error: %s", error)
 
+    @discord.app_commands.command(
+        name="cachestats", description="Show hit rates and sizes of the bot's caches"
+    )
+    @is_bot_owner()
+    async def cachestats(self, interaction: discord.Interaction):
+        rows = cache.all_stats()
+        rows.sort(key=lambda r: r["hits"] + r["misses"] + r["coalesced"], reverse=True)
+        lines = [
+            f"{'hit %':>6} {'entries':>13} {'hits':>8} {'misses':>7} "
+            f"{'evicted':>7} {'expired':>7}  cache"
+        ]
+        for r in rows[:CACHE_ROWS]:
+            hit_rate = "-" if r["hit_rate"] is None else f"{r['hit_rate']:.1%}"
+            size = f"{r['entries']}/{r['maxsize']}"
+            if r["size"] != r["entries"]:
+                # weighted by size rather than counted
+                size = f"{r['size'] // 1024}K/{r['maxsize'] // 1024}K"
+            lines.append(
+                f"{hit_rate:>6} {size:>13} {r['hits']:>8} {r['misses']:>7} "
+                f"{r['evictions']:>7} {r['expirations']:>7}  {r['name']}"
+            )
+        embed = discord.Embed(
+            title="Caches", description=_code_block(lines), color=0x00FF00
+        )
+        embed.set_footer(text=f"{len(rows)} caches; counts since each was created")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @discord.app_commands.command(
+        name="queryaudit",
+        description="Show SQL statements that scan tables or run slow",
+    )
+    @discord.app_commands.describe(
+        show="Which statements to list", reset="Start over, capturing plans afresh"
+    )
+    @discord.app_commands.choices(
+        show=[
+            discord.app_commands.Choice(name="Table scans", value="scans"),
+            discord.app_commands.Choice(name="Slow", value="slow"),
+            discord.app_commands.Choice(name="Most time", value="top"),
+        ]
+    )
+    @is_bot_owner()
+    async def queryaudit(
+        self,
+        interaction: discord.Interaction,
+        show: str = "scans",
+        reset: bool = False,
+    ):
+        auditor = getattr(self.bot.database, "auditor", None)
+        if auditor is None:
+            await interaction.response.send_message(
+                "This database is not audited.", ephemeral=True
+            )
+            return
+
+        lines = []
+        if show == "scans":
+            for s in auditor.scans(QUERY_ROWS):
+                lines += [
+                    f"{s['total_ms']:>9} ms {s['count']:>7}x  "
+                    f"scans {', '.join(s['scans'])}",
+                    f"  {s['fingerprint'][:300]}",
+                    *(f"  > {detail}" for detail in s["plan"]),
+                    "",
+                ]
+        elif show == "slow":
+            for q in auditor.slow_log(QUERY_ROWS):
+                at = datetime.datetime.fromtimestamp(q["at"]).strftime("%H:%M:%S")
+                lines += [f"{q['ms']:>9} ms  {at}", f"  {q['fingerprint'][:300]}"]
+        else:
+            for s in auditor.top(QUERY_ROWS):
+                lines += [
+                    f"{s['total_ms']:>9} ms {s['count']:>7}x "
+                    f"max {s['max_ms']} ms{'  SCAN' if s['scans'] else ''}",
+                    f"  {s['fingerprint'][:300]}",
+                ]
+
+        since = datetime.datetime.fromtimestamp(auditor.since)
+        embed = discord.Embed(
+            title="Query audit", description=_code_block(lines), color=0x00FF00
+        )
+        embed.set_footer(
+            text=f"{auditor.statement_count()} statements since "
+            f"{since:%Y-%m-%d %H:%M}; slow is over {auditor.slow_seconds * 1000:g} ms"
+        )
+        if reset:
+            auditor.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # --- /memory: see utils.memory ---------------------------------------
+
+    async def _snapshot_label_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[discord.app_commands.Choice[str]]:
+        return [
+            discord.app_commands.Choice(name=label, value=label)
+            for label in memory.snapshot_labels()
+            if current.lower() in label.lower()
+        ]
+
+    @g.command(name="status", description="RSS, allocation tracing and GC state")
+    @is_bot_owner()
+    async def memory_status(self, interaction: discord.Interaction):
+        status = memory.status()
+        report = status["gc"]
+        lines = [
+            f"RSS: {status['rss_mb']} MB",
+            (
+                f"Tracing: on, {status['traced_mb']} MB traced "
+                f"(peak {status['traced_peak_mb']} MB)"
+                if status["tracing"]
+                else "Tracing: off"
+            ),
+            f"Snapshots: {', '.join(status['snapshots']) or 'none'}",
+            "",
+            f"GC: {'enabled' if report['enabled'] else 'DISABLED'}, "
+            f"thresholds {report['thresholds']}, pending {report['counts']}",
+        ]
+        lines += [
+            f"gen {g['generation']}: {g['collections']} runs, "
+            f"{g['collected']} collected, {g['uncollectable']} uncollectable"
+            for g in report["generations"]
+        ]
+        if report["uncollectable"]:
+            lines.append(f"gc.garbage: {report['uncollectable']} objects")
+        embed = discord.Embed(
+            title="Memory", description=_code_block(lines), color=0x00FF00
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @g.command(name="trace", description="Start or stop tracing allocations")
+    @discord.app_commands.describe(
+        enabled="Tracing slows allocations down; stopping drops the snapshots"
+    )
+    @is_bot_owner()
+    async def memory_trace(self, interaction: discord.Interaction, enabled: bool):
+        if enabled:
+            changed = memory.start_tracing()
+            message = "Tracing started" if changed else "Already tracing"
+        else:
+            changed = memory.stop_tracing()
+            message = "Tracing stopped" if changed else "Not tracing"
+        await interaction.response.send_message(message, ephemeral=True)
+
+    @g.command(name="snapshot", description="Snapshot traced allocations")
+    @discord.app_commands.describe(label="Name to compare against later")
+    @is_bot_owner()
+    async def memory_snapshot(
+        self, interaction: discord.Interaction, label: Optional[str] = None
+    ):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            label = await asyncio.to_thread(memory.take_snapshot, label)
+        except RuntimeError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
+            return
+        rows = memory.top_allocations(label, MEMORY_ROWS)
+        lines = [
+            f"{r['size_kb']:>10} KB {r['count']:>8}  {r['location']}" for r in rows
+        ]
+        embed = discord.Embed(
+            title=f"Snapshot {label}: largest allocations",
+            description=_code_block(lines),
+            color=0x00FF00,
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @g.command(name="diff", description="What grew between two snapshots")
+    @discord.app_commands.describe(
+        older="Snapshot to compare from",
+        newer="Snapshot to compare to (default: take one now)",
+    )
+    @discord.app_commands.autocomplete(
+        older=_snapshot_label_autocomplete, newer=_snapshot_label_autocomplete
+    )
+    @is_bot_owner()
+    async def memory_diff(
+        self,
+        interaction: discord.Interaction,
+        older: str,
+        newer: Optional[str] = None,
+    ):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            if newer is None:
+                newer = await asyncio.to_thread(memory.take_snapshot)
+            rows = await asyncio.to_thread(memory.diff, older, newer, MEMORY_ROWS)
+        except (KeyError, RuntimeError) as e:
+            await interaction.followup.send(e.args[0], ephemeral=True)
+            return
+        lines = [
+            f"{r['size_diff_kb']:>+10} KB {r['count_diff']:>+8}  {r['location']}"
+            for r in rows
+        ]
+        embed = discord.Embed(
+            title=f"Growth from {older} to {newer}",
+            description=_code_block(lines),
+            color=0x00FF00,
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @g.command(name="census", description="What each cog and module cache retains")
+    @is_bot_owner()
+    async def memory_census(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        result = await asyncio.to_thread(memory.census, self.bot)
+
+        def row(r: dict) -> str:
+            length = f" len={r['length']}" if "length" in r else ""
+            return f"{r['size_kb']:>9} KB  {r['owner']}.{r['attribute']}{length}"
+
+        lines = []
+        for cog in result["cogs"][:MEMORY_ROWS]:
+            lines.append(f"{cog['size_kb']:>9} KB  {cog['cog']}")
+            lines += [f"  {row(r)}" for r in cog["top"][:2] if r["size_kb"]]
+        lines += ["", "Module-level containers:"]
+        lines += [row(r) for r in result["modules"][:MEMORY_ROWS]]
+        embed = discord.Embed(
+            title="Memory census",
+            description=_code_block(lines),
+            color=0x00FF00,
+        )
+        embed.set_footer(text=f"Walked in {result['seconds']}s")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @g.command(name="gc", description="Garbage collector report")
+    @discord.app_commands.describe(
+        collect="Run a full collection first",
+        types="Also count live objects by type (walks the heap)",
+    )
+    @is_bot_owner()
+    async def memory_gc(
+        self,
+        interaction: discord.Interaction,
+        collect: bool = False,
+        types: bool = False,
+    ):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        lines = []
+        if collect:
+            freed = await asyncio.to_thread(memory.collect)
+            lines += [
+                f"Collected {freed['collected']} objects in {freed['ms']} ms",
+                "",
+            ]
+        report = await asyncio.to_thread(memory.gc_report, MEMORY_ROWS if types else 0)
+        lines += [
+            f"gen {g['generation']}: {g['collections']} runs, "
+            f"{g['collected']} collected, {g['uncollectable']} uncollectable"
+            for g in report["generations"]
+        ]
+        lines.append(f"gc.garbage: {report['uncollectable']} objects")
+        lines += [f"  {name}: {n}" for name, n in report["uncollectable_types"]]
+        if types:
+            lines += ["", "Live objects by type:"]
+            lines += [f"{n:>10}  {name}" for name, n in report["top_types"]]
+        embed = discord.Embed(
+            title="Garbage collector", description=_code_block(lines), color=0x00FF00
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(SystemCog(bot))
@@ -6,7 +6,8 @@ from cogs.lancocog import LancoCog
 from discord import Embed, Message
 from discord.ext import commands
 from pydantic import BaseModel
-from pydantic_ai import Agent, BinaryContent
+from pydantic_ai import BinaryContent
+from utils import agents
 from utils.ai_utils import run_agent
 from utils.file_downloader import FileDownloader
 
@@ -89,8 +90,8 @@ class TipView(discord.ui.View):
 class TipCalc(LancoCog, name="TipCalc", description="Tip calculator commands"):
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
-        self.agent = Agent(
-            model="openai:gpt-5-nano",
+        self.agent = agents.get_agent(
+            "openai:gpt-5-nano",
             system_prompt="Describe this image.",
             output_type=BillDetails,
         )
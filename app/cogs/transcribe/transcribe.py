@@ -1,11 +1,10 @@
+import asyncio
 import os
 
 import discord
-import whisper
 from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
-from pydub import AudioSegment
 from utils.command_utils import is_bot_owner_or_admin
 from utils.voice_message import download_voice_message, is_voice_message
 
@@ -24,7 +23,9 @@ class Transcribe(
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
         self.cache_dir = os.path.join(self.get_cog_data_directory(), "Cache")
-        self.model = whisper.load_model("base", device="cpu")
+        # loaded on the first transcription, not at startup
+        self._model = None
+        self._model_lock = asyncio.Lock()
         self.register_context_menu(
             name="Transcribe", callback=self.ctx_menu, errback=self.ctx_menu_error
         )
@@ -33,6 +34,16 @@ class Transcribe(
         await super().cog_load()
         self.bot.database.create_tables([TranscribeConfig])
 
+    async def get_model(self):
+        async with self._model_lock:
+            if self._model is None:
+                import whisper
+
+                self._model = await asyncio.to_thread(
+                    whisper.load_model, "base", device="cpu"
+                )
+        return self._model
+
     async def ctx_menu(
         self, interaction: discord.Interaction, message: discord.Message
     ) -> None:
@@ -85,6 +96,9 @@ class Transcribe(
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
 
+        from pydub import AudioSegment
+
+        model = await self.get_model()
         ogg_file_path = await download_voice_message(message, self.cache_dir)
         ogg_audio = AudioSegment.from_file(ogg_file_path, format="ogg")
 
@@ -92,7 +106,7 @@ class Transcribe(
         ogg_audio.export(wav_file_path, format="wav")
 
         try:
-            result = self.model.transcribe(wav_file_path)
+            result = model.transcribe(wav_file_path)
             transcription = result["text"]
         except Exception as e:
             self.logger.error(e)
@@ -1,12 +1,12 @@
 import os
 import random
 
-import cachetools
 import discord
 import pyowm
 from cogs.lancocog import LancoCog
 from discord.ext import commands
 from opencage.geocoder import OpenCageGeocode, OpenCageGeocodeError
+from utils import cache
 
 
 class Weather(LancoCog, name="Weather", description="Fetches the weather"):
@@ -14,9 +14,11 @@ class Weather(LancoCog, name="Weather", description="Fetches the weather"):
         super().__init__(bot)
         self.geocoder = None
         self.owm = None
-        self.location_cache = {}
-        self.weather_statuses = cachetools.TTLCache(maxsize=100, ttl=120)
-        self.air_statuses = cachetools.TTLCache(maxsize=100, ttl=120)
+        self.location_cache: cache.Cache[str, tuple[float, float]] = cache.lru(
+            "weather.locations", 1024
+        )
+        self.weather_statuses = cache.ttl("weather.forecasts", maxsize=100, ttl=120)
+        self.air_statuses = cache.ttl("weather.air_quality", maxsize=100, ttl=120)
 
     async def cog_load(self):
         opencage_key = os.getenv("OPENCAGE_API_KEY")
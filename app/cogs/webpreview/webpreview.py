@@ -2,14 +2,13 @@ import asyncio
 from typing import Optional
 from urllib.parse import urlparse
 
-import aiohttp
 import discord
-from bs4 import BeautifulSoup
 from cogs.lancocog import LancoCog
 from cogs.webpreview.models import WebPreviewConfig
 from discord import app_commands
 from discord.ext import commands
 from pydantic import BaseModel
+from utils import opengraph
 from utils.command_utils import is_bot_owner_or_admin
 
 
@@ -71,7 +70,7 @@ class WebPreview(
         await asyncio.sleep(3)
 
         page_details = await self.get_page_details(url)
-        if not page_details:
+        if not page_details or not (page_details.title or page_details.description):
             return
 
         embed = discord.Embed(
@@ -82,40 +81,12 @@ class WebPreview(
     async def get_page_details(self, url: str) -> PageDetails:
         self.logger.info(f"Getting page details for {url}")
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-        }
+        # cached and shared, so a link posted in several channels is fetched once
+        metadata = await opengraph.fetch_metadata(url)
+        if not metadata:
+            return None
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    self.logger.error(
-                        f"Failed to get page details for {url}, status: {response.status}, reason: {response.reason}"
-                    )
-                    return None
-
-                html = await response.text()
-                soup = BeautifulSoup(html, "html.parser")
-
-                title = None
-                description = None
-
-                # first try meta tags
-                title = soup.title.string
-                meta_description = soup.find("meta", attrs={"name": "description"})
-                if meta_description:
-                    description = meta_description["content"]
-
-                # try open graph tags
-                og_title = soup.find("meta", attrs={"name": "og:title"})
-
-                if og_title:
-                    title = og_title["value"]
-                og_description = soup.find("meta", attrs={"name": "og:description"})
-                if og_description:
-                    description = og_description["value"]
-
-                return PageDetails(title=title, description=description)
+        return PageDetails(title=metadata.title, description=metadata.description)
 
     @g.command(name="toggle", description="Toggle Web previews for this server")
     @is_bot_owner_or_admin()
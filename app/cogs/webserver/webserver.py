@@ -5,6 +5,7 @@ Description:
 WebServer cog
 """
 
+import asyncio
 import datetime
 import math
 import os
@@ -16,6 +17,7 @@ from aiohttp import web
 from cogs.lancocog import LancoCog
 from discord import app_commands
 from discord.ext import commands
+from utils import loop_health, memory, metrics
 from utils.command_utils import is_bot_owner
 from utils.dist_utils import get_bot_version, get_commit_hash
 
@@ -33,6 +35,14 @@ class WebServer(
         super().__init__(bot)
         self.port = int(os.getenv("WEBSERVER_PORT", self.DEFAULT_PORT))
         self._runner: web.AppRunner | None = None
+        metrics.gauge(
+            "discord_gateway_latency_seconds",
+            "Latest gateway heartbeat latency",
+            function=lambda: None if math.isnan(bot.latency) else bot.latency,
+        )
+        metrics.gauge(
+            "discord_guilds", "Guilds the bot is in", function=lambda: len(bot.guilds)
+        )
 
     async def cog_load(self):
         await super().cog_load()
@@ -81,52 +91,87 @@ class WebServer(
             return False
         return secrets.compare_digest(value, token)
 
-    async def handle_status(self, request: web.Request) -> web.Response:
-        """Detailed status, gated behind WEBSERVER_TOKEN.
+    def _unauthorized(self, request: web.Request) -> web.Response | None:
+        """The error response for a request without the WEBSERVER_TOKEN, if any.
 
         Fails closed: with no token configured the endpoint stays disabled.
-        Every field is read from memory, so a request costs nothing.
         """
         token = os.getenv("WEBSERVER_TOKEN", "")
         if not token:
             return web.json_response(
-                {"error": "WEBSERVER_TOKEN is not set, /status is disabled"},
+                {"error": f"WEBSERVER_TOKEN is not set, {request.path} is disabled"},
                 status=503,
             )
         if not self._token_matches(request, token):
             return web.json_response({"error": "unauthorized"}, status=401)
+        return None
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        """Detailed status, gated behind WEBSERVER_TOKEN.
+
+        Every field is read from memory, so a request costs nothing. The one
+        exception is opt-in: ``?census=1`` adds ``utils.memory``'s census of
+        what each cog retains, which walks the heap in a worker thread.
+        """
+        if denied := self._unauthorized(request):
+            return denied
 
         ready = self.bot.is_ready()
-        return web.json_response(
-            {
-                "status": "ok" if ready else "starting",
-                "ready": ready,
-                "uptime_seconds": self._uptime_seconds(),
-                "latency_ms": self._latency_ms(),
-                "guilds": len(self.bot.guilds),
-                # Cache size, not a real user count
-                "cached_users": len(self.bot.users),
-                "commands": len(self.bot.commands),
-                "slash_commands": len(self.bot.tree.get_commands()),
-                "cogs_loaded": len(self.bot.extensions),
-                "cogs_failed": sorted(getattr(self.bot, "failed_cogs", {})),
-                "message_cache": len(self.bot.cached_messages),
-                "url_handlers": len(self.bot.url_handlers),
-                # Guild emojis and stickers come from the local cache. The
-                # application emoji count is deliberately absent: it is the only
-                # one needing a REST call, and caching it would just serve a
-                # stale number for a metric nothing acts on.
-                "emojis": len(self.bot.emojis),
-                "stickers": len(self.bot.stickers),
-                "voice_clients": len(self.bot.voice_clients),
-                "dev_mode": self.bot.dev_mode,
-                "version": get_bot_version(),
-                "commit": (get_commit_hash() or "unknown")[:7],
-                "python_version": f"{sysv.major}.{sysv.minor}.{sysv.micro}",
-                "discordpy_version": discord.__version__,
-            }
+        status = {
+            "status": "ok" if ready else "starting",
+            "ready": ready,
+            "uptime_seconds": self._uptime_seconds(),
+            "latency_ms": self._latency_ms(),
+            "guilds": len(self.bot.guilds),
+            # Cache size, not a real user count
+            "cached_users": len(self.bot.users),
+            "commands": len(self.bot.commands),
+            "slash_commands": len(self.bot.tree.get_commands()),
+            "cogs_loaded": len(self.bot.extensions),
+            "cogs_failed": sorted(getattr(self.bot, "failed_cogs", {})),
+            "message_cache": len(self.bot.cached_messages),
+            "url_handlers": len(self.bot.url_handlers),
+            # Guild emojis and stickers come from the local cache. The
+            # application emoji count is deliberately absent: it is the only
+            # one needing a REST call, and caching it would just serve a
+            # stale number for a metric nothing acts on.
+            "emojis": len(self.bot.emojis),
+            "stickers": len(self.bot.stickers),
+            "voice_clients": len(self.bot.voice_clients),
+            "dev_mode": self.bot.dev_mode,
+            "version": get_bot_version(),
+            "commit": (get_commit_hash() or "unknown")[:7],
+            "python_version": f"{sysv.major}.{sysv.minor}.{sysv.micro}",
+            "discordpy_version": discord.__version__,
+            "pollers": self._poller_metrics(),
+            "event_loop": loop_health.snapshot(),
+            "memory": memory.status(),
+        }
+        if request.query.get("census"):
+            status["memory"]["census"] = await asyncio.to_thread(
+                memory.census, self.bot
+            )
+        return web.json_response(status)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Everything in ``utils.metrics``, in Prometheus' text format. Gated
+        like /status; point the scraper's bearer token at WEBSERVER_TOKEN."""
+        if denied := self._unauthorized(request):
+            return denied
+        return web.Response(
+            body=metrics.render().encode(),
+            headers={"Content-Type": metrics.CONTENT_TYPE},
         )
 
+    def _poller_metrics(self) -> dict:
+        # Duck-typed rather than an isinstance check, so a hot-reloaded
+        # cogs.common.pollercog module doesn't hide the cogs built from it
+        return {
+            cog.get_cog_name(): cog.poller_metrics()
+            for cog in self.bot.get_lanco_cogs()
+            if callable(getattr(cog, "poller_metrics", None))
+        }
+
     @property
     def running(self) -> bool:
         return self._runner is not None
@@ -140,6 +185,7 @@ class WebServer(
         app = web.Application()
         app.router.add_get("/health", self.handle_health)
         app.router.add_get("/status", self.handle_status)
+        app.router.add_get("/metrics", self.handle_metrics)
         runner = web.AppRunner(app)
         await runner.setup()
         try:
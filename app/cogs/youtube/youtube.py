@@ -6,9 +6,10 @@ from dataclasses import dataclass
 import aiohttp
 import discord
 from aiogoogle import Aiogoogle
-from cogs.lancocog import LancoCog
+from cogs.common.fanout import SubscriptionFanout
+from cogs.common.pollercog import PollerCog, PollSource
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from utils.command_utils import is_bot_owner_or_admin
 
 from .models import YoutubeSubscription
@@ -22,7 +23,7 @@ class YoutubeVideo:
 
 
 class Youtube(
-    LancoCog,
+    PollerCog,
     name="Youtube",
     description="Subscribe to YouTube channels and post new video notifications",
 ):
@@ -30,71 +31,67 @@ class Youtube(
         name="youtube", description="Youtube commands", guild_only=True
     )
 
-    UPDATE_INTERVAL = 10 * 60  # 10 minutes
+    POLL_INTERVAL = 10 * 60  # 10 minutes
+    MAX_INTERVAL = POLL_INTERVAL
 
     def __init__(self, bot: commands.Bot):
         super().__init__(bot)
         self.google = Aiogoogle(api_key=os.getenv("YOUTUBE_API_KEY"))
+        self.fanout = SubscriptionFanout(bot, self.logger)
 
     async def cog_load(self):
         await super().cog_load()
         self.bot.database.create_tables([YoutubeSubscription])
-        self.poll.start()
-
-    def cog_unload(self):
-        self.poll.cancel()
-
-    @tasks.loop(seconds=UPDATE_INTERVAL)
-    async def poll(self):
-        """Poll for new videos from subscribed channels"""
-        self.logger.debug("Polling...")
-        try:
-            await self.get_new_videos()
-        except Exception as e:
-            self.logger.error(f"Error polling: {e}")
-
-    async def get_new_videos(self):
-        """Get new videos from watched channels and share them to the configured channels"""
-        youtube_configs = YoutubeSubscription.select()
-        if not youtube_configs:
-            return
-
-        # build up a map of channels and configs to post to for efficiency
-        youtube_channels = {}
-        for youtube_config in youtube_configs:
-            if not youtube_config.yt_channel_id in youtube_channels:
-                youtube_channels[youtube_config.yt_channel_id] = []
-            youtube_channels[youtube_config.yt_channel_id].append(youtube_config)
-
-        for channel, configs in youtube_channels.items():
-            self.logger.debug(f"Checking for new videos from channel: {channel}")
-
-            videos = await self.get_latest_videos(channel, limit=5)
-            videos.sort(key=lambda x: x.uploaded_at, reverse=True)
-
-            for video in videos:
-                for config in configs:
-                    published = video.uploaded_at
 
-                    # skip old videos
-                    if config.last_publish and published <= config.last_publish:
-                        continue
+    async def get_sources(self) -> list[PollSource]:
+        """One source per YouTube channel, shared by every subscription to it"""
+        youtube_channels: dict[str, list[YoutubeSubscription]] = {}
+        for youtube_config in YoutubeSubscription.select():
+            youtube_channels.setdefault(youtube_config.yt_channel_id, []).append(
+                youtube_config
+            )
+        return [
+            PollSource(key=yt_channel_id, data=configs)
+            for yt_channel_id, configs in youtube_channels.items()
+        ]
+
+    async def fetch(self, source: PollSource) -> list[YoutubeVideo]:
+        self.logger.debug(f"Checking for new videos from channel: {source.key}")
+        videos = await self.get_latest_videos(source.key, limit=5)
+        videos.sort(key=lambda x: x.uploaded_at)
+        return videos
 
-                    url = "https://www.youtube.com/watch?v=" + video.video_id
-                    self.logger.info(
-                        f"Found new video in {channel} for {config.channel_id}: {url}"
-                    )
+    async def process(self, source: PollSource, videos: list[YoutubeVideo]) -> int:
+        """Share new videos from one YouTube channel to its subscriptions"""
+        return await self.fanout.deliver(
+            source.data,
+            videos,
+            is_new=self.is_new_video,
+            send=self.send_video,
+            advance=self.advance_watermark,
+        )
 
-                    channel = self.bot.get_channel(config.channel_id)
-                    if not channel:
-                        self.logger.error(
-                            f"Channel {config.channel_id} not found, skipping"
-                        )
-                        continue
+    @staticmethod
+    def is_new_video(config: YoutubeSubscription, video: YoutubeVideo) -> bool:
+        return not config.last_publish or video.uploaded_at > config.last_publish
+
+    async def send_video(
+        self,
+        channel: discord.TextChannel,
+        config: YoutubeSubscription,
+        video: YoutubeVideo,
+    ) -> None:
+        self.logger.info(
+            f"Found new video in {config.yt_channel_id} for {config.channel_id}: "
+            f"https://www.youtube.com/watch?v={video.video_id}"
+        )
+        await self.share_video(video, channel)
 
-                    msg = await self.share_video(video, channel)
-                    config.last_publish = published
-                    config.save()
+    def advance_watermark(
+        self, config: YoutubeSubscription, video: YoutubeVideo
+    ) -> None:
+        config.last_publish = video.uploaded_at
+        self.mark_dirty(config)
 
     async def share_video(self, video: YoutubeVideo, channel: discord.TextChannel):
         url = f"https://www.youtube.com/watch?v={video.video_id}"
@@ -1,8 +1,124 @@
+import functools
+import re
+import time
+import weakref
+from typing import Optional
+
 from peewee import *
+from utils import metrics
+from utils.query_audit import QueryAuditor
 
 database_proxy = DatabaseProxy()
 
+QUERY_SECONDS = metrics.histogram(
+    "db_query_duration_seconds",
+    "Time to execute a SQL statement",
+    ["operation", "table"],
+)
+
+_TABLE_RE = re.compile(
+    r'\b(?:FROM|INTO|UPDATE|TABLE(?: IF (?:NOT )?EXISTS)?)\s+"?(\w+)"?', re.IGNORECASE
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def classify_sql(sql: str) -> tuple[str, str]:
+    """``(operation, table)`` of a statement, for labelling its timings"""
+    operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    match = _TABLE_RE.search(sql)
+    return operation, match.group(1) if match else ""
+
+
+# every BaseModel subclass, in definition order; see verify_schema
+_models: list[type["BaseModel"]] = []
+# models whose tables and indexes each database is known to have
+_verified: "weakref.WeakKeyDictionary[Database, set]" = weakref.WeakKeyDictionary()
+
+
+class TimedSqliteDatabase(SqliteDatabase):
+    """A SqliteDatabase that records how long each statement takes.
+
+    Each statement is also handed to ``auditor`` (see ``utils.query_audit``),
+    which keeps the slow ones and the plans of those that scan whole tables.
+
+    ``create_tables`` skips models whose schema this database has already
+    created or verified (see ``verify_schema``), so the call cogs make in
+    ``cog_load`` costs no SQL after startup.
+    """
+
+    def __init__(self, *args, auditor: Optional[QueryAuditor] = None, **kwargs):
+        self.auditor = auditor if auditor is not None else QueryAuditor()
+        super().__init__(*args, **kwargs)
+
+    def create_tables(self, models, **options):
+        verified = _verified.setdefault(self, set())
+        pending = [m for m in models if m not in verified]
+        if pending:
+            super().create_tables(pending, **options)
+            verified.update(pending)
+
+    def drop_tables(self, models, **kwargs):
+        _verified.get(self, set()).difference_update(models)
+        super().drop_tables(models, **kwargs)
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            operation, table = classify_sql(sql)
+            QUERY_SECONDS.observe(elapsed, operation=operation, table=table)
+            self.auditor.record(self, sql, params, elapsed)
+
 
 class BaseModel(Model):
+    """Base for the bot's models. Subclasses register themselves for
+    ``verify_schema``; pass ``abstract=True`` for one that only exists to be
+    subclassed and has no table of its own."""
+
+    def __init_subclass__(cls, abstract: bool = False, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not abstract:
+            _models.append(cls)
+
     class Meta:
         database = database_proxy
+
+
+def registered_models() -> list[type[BaseModel]]:
+    """Every concrete model imported so far, the latest class per table (a
+    hot reload defines a model again)"""
+    by_table = {model._meta.table_name: model for model in _models}
+    return list(by_table.values())
+
+
+def _schema_names(model: type[Model]) -> set[Optional[str]]:
+    indexes = model._meta.fields_to_index()
+    return {model._meta.table_name} | {getattr(i, "_name", None) for i in indexes}
+
+
+def verify_schema(database: Database, models=None) -> list[type[Model]]:
+    """Create the tables and indexes that ``models`` (default: every registered
+    model) are missing, in one transaction, and return the models that needed
+    it.
+
+    One query against sqlite_master settles which exist, instead of the
+    CREATE ... IF NOT EXISTS round trips per model that ``create_tables``
+    makes. Afterwards ``TimedSqliteDatabase.create_tables`` is a no-op for
+    these models.
+    """
+    models = registered_models() if models is None else list(models)
+    existing = {
+        name
+        for (name,) in database.execute_sql(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')"
+        )
+    }
+    missing = [m for m in models if not _schema_names(m) <= existing]
+    if missing:
+        with database.atomic():
+            # the base class's, so the fast path cannot skip them
+            Database.create_tables(database, missing)
+    _verified.setdefault(database, set()).update(models)
+    return missing
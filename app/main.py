@@ -1,9 +1,11 @@
 import asyncio
 import datetime
+import importlib
 import logging
 import os
 import signal
 import sys
+import time
 from dataclasses import dataclass
 from enum import Enum, auto
 from typing import Optional
@@ -11,20 +13,48 @@ from typing import Optional
 import discord
 import elasticapm
 from cogs.lancocog import LancoCog, UrlHandler
-from db import BaseModel, database_proxy
+from db import (
+    BaseModel,
+    TimedSqliteDatabase,
+    database_proxy,
+    registered_models,
+    verify_schema,
+)
 from discord.ext import commands
 from logtail import LogtailHandler
 from peewee import *
-from utils import apm, env
+from utils import (
+    apm,
+    cache,
+    env,
+    hot_reload,
+    http,
+    loop_health,
+    message_buffer,
+    token_tracker,
+)
 from utils.command_utils import is_bot_owner
 from utils.dist_utils import get_bot_version, get_commit_hash, get_service_version
-from utils.logs import WinTimedRotatingFileHandler, add_ecs_file_handler
+from utils.logs import (
+    CaptureLimiter,
+    WinTimedRotatingFileHandler,
+    add_ecs_file_handler,
+    start_queue,
+)
+from utils.query_audit import QueryAuditor
 from utils.router import ImageRouter, Intent
-from watchfiles import Change, awatch
+from watchfiles import PythonFilter, awatch
 
 DATA_DIR = "data"
-LOGS_DIR = "logs"
+LOGS_DIR = os.getenv("LOGS_DIR", "logs")
+APP_DIR = "app"
 COGS_DIR = "app/cogs"
+UTILS_DIR = "app/utils"
+# quiet time, in ms, that ends a batch of file changes for the hot reloader;
+# long enough to catch an editor's save-all as one batch
+HOT_RELOAD_QUIET_MS = 300
+# how many of the slowest cogs the startup summary names
+SLOWEST_COGS_LOGGED = 5
 
 logger = logging.getLogger()
 
@@ -73,9 +103,15 @@ class CustomFormatter(logging.Formatter):
         ),
     }
 
+    def __init__(self):
+        super().__init__()
+        self._formatters = {
+            level: logging.Formatter(fmt, datefmt="%H:%M:%S")
+            for level, fmt in self.FORMATS.items()
+        }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, self.FORMATS[logging.INFO])
-        formatter = logging.Formatter(log_fmt, datefmt="%H:%M:%S")
+        formatter = self._formatters.get(record.levelno, self._formatters[logging.INFO])
         return formatter.format(record)
 
 
@@ -168,6 +204,10 @@ if os.getenv("LOGTAIL_TOKEN"):
 # ECS_LOG_FILE names a path.
 add_ecs_file_handler(logger)
 
+# Everything above now writes from a background thread, so logging on the
+# event loop never waits on disk or Logtail.
+start_queue(logger)
+
 # Elastic APM (optional). Enabled only when ELASTIC_APM_SERVER_URL is set.
 # The agent self-configures from standard ELASTIC_APM_* environment variables
 # (SERVER_URL, SECRET_TOKEN or API_KEY, VERIFY_SERVER_CERT, etc.) so this works
@@ -178,19 +218,33 @@ apm_client = None
 
 
 class ApmLoggingHandler(logging.Handler):
+    """Reports error records to APM, deduplicated and rate limited.
+
+    Added after the log queue, so it runs on the thread that logged and the
+    error is linked to the transaction active at the time. The limiter keeps
+    that cost bounded when an error repeats.
+    """
+
+    def __init__(self, level=logging.ERROR):
+        super().__init__(level=level)
+        self.limiter = CaptureLimiter()
+
     def emit(self, record):
         if apm_client is None:
             return
         if record.name.startswith("elasticapm"):
             return
+        if not self.limiter.allow(record):
+            return
         try:
             if record.exc_info and record.exc_info[0] is not None:
                 apm_client.capture_exception(exc_info=record.exc_info, handled=True)
             else:
-                try:
-                    raise Exception(record.getMessage())
-                except Exception:
-                    apm_client.capture_exception(handled=True)
+                apm_client.capture_message(
+                    param_message={"message": str(record.msg), "params": record.args},
+                    level=record.levelname.lower(),
+                    logger_name=record.name,
+                )
         except Exception:
             self.handleError(record)
 
@@ -279,12 +333,13 @@ def capture_apm_exception(exc_info=None, **context) -> None:
 intents = discord.Intents.all()
 
 DEFAULT_PREFIX = "."
-_prefix_cache: dict[int, str] = {}
+# guild_id -> prefix, including the default for guilds that never set one
+_prefix_cache: cache.Cache[int, str] = cache.lru("guild_prefixes", 4096)
 
 
 def get_prefix(bot, message):
     if message.guild:
-        guild_prefix = _prefix_cache.get(message.guild.id, DEFAULT_PREFIX)
+        guild_prefix = bot.get_guild_prefix(message.guild)
         # Always include the default prefix so core bot commands remain accessible
         return list({DEFAULT_PREFIX, guild_prefix})
     return DEFAULT_PREFIX
@@ -307,7 +362,7 @@ def init_db() -> Database:
     # queue is not used: it executes BEGIN on its writer thread's connection
     # while COMMIT runs on the caller's, so transactions (including the one
     # inside get_or_create) never commit and leak the write lock.
-    db = SqliteDatabase(
+    db = TimedSqliteDatabase(
         sqlite_path,
         pragmas={
             "journal_mode": "wal",
@@ -315,6 +370,9 @@ def init_db() -> Database:
             "foreign_keys": 1,
             "busy_timeout": 5000,
         },
+        auditor=QueryAuditor(
+            slow_seconds=float(os.getenv("DB_SLOW_QUERY_MS", 100)) / 1000
+        ),
     )
 
     database_proxy.initialize(db)
@@ -349,6 +407,14 @@ class CogLoadResult:
     name: str
     status: CogStatus = CogStatus.ERROR
     error: Optional[str] = None
+    # milliseconds spent importing the cog's modules, and in setup/cog_load;
+    # left unset for reloads and for the step a failure never reached
+    import_ms: Optional[float] = None
+    setup_ms: Optional[float] = None
+
+    @property
+    def total_ms(self) -> float:
+        return (self.import_ms or 0.0) + (self.setup_ms or 0.0)
 
 
 def _purge_cog_modules(dotted: str):
@@ -389,8 +455,9 @@ class LancoBot(commands.Bot):
 
     def get_guild_prefix(self, guild: Optional[discord.Guild] = None) -> str:
         if guild:
-            if guild.id in _prefix_cache:
-                return _prefix_cache[guild.id]
+            prefix = _prefix_cache.get(guild.id)
+            if prefix is not None:
+                return prefix
             from utils.config import GuildConfig
 
             config = GuildConfig.get_or_none(guild_id=guild.id)
@@ -411,28 +478,87 @@ class LancoBot(commands.Bot):
     def is_cog_loaded(self, name: str) -> bool:
         return f"cogs.{name}" in self.extensions
 
+    def _cog_failed(self, result: "CogLoadResult", error: Exception) -> None:
+        """Record a load failure. Call from the except block, so APM gets the
+        traceback."""
+        logger.error(f"Failed to load cog {result.name}: {error}")
+        capture_apm_exception(cog=result.name, event="cog_load")
+        result.status = CogStatus.ERROR
+        result.error = str(error)
+        self.failed_cogs[result.name] = str(error)
+
+    def _import_cog(self, result: "CogLoadResult") -> bool:
+        """Import a cog's modules ahead of load_extension, timing it on its own.
+
+        load_extension re-executes only the package __init__, which then finds
+        the submodules already imported.
+        """
+        started = time.perf_counter()
+        try:
+            importlib.import_module(f"cogs.{result.name}")
+        except Exception as e:
+            self._cog_failed(result, e)
+            return False
+        finally:
+            result.import_ms = (time.perf_counter() - started) * 1000
+        return True
+
+    async def _setup_cog(self, result: "CogLoadResult") -> "CogLoadResult":
+        started = time.perf_counter()
+        try:
+            await self.load_extension(f"cogs.{result.name}")
+            result.status = CogStatus.LOADED
+            self.failed_cogs.pop(result.name, None)
+        except Exception as e:
+            self._cog_failed(result, e)
+        finally:
+            result.setup_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def _verify_schema(self) -> None:
+        """Create every imported model's missing tables in one go, so the
+        create_tables calls in cog_load find nothing left to do."""
+        started = time.perf_counter()
+        try:
+            created = verify_schema(self.database)
+        except DatabaseError as e:
+            # each cog still creates its own tables in cog_load
+            logger.error(f"Schema verification failed: {e}")
+            capture_apm_exception(event="verify_schema")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Verified schema of {len(registered_models())} models in "
+            f"{elapsed_ms:.0f} ms, {len(created)} needed creating"
+        )
+        if created:
+            logger.debug(f"Created {', '.join(m.__name__ for m in created)}")
+
     async def load_cog(self, name: str) -> "CogLoadResult":
         dotted = f"cogs.{name}"
         result = CogLoadResult(name)
+        if dotted not in self.extensions:
+            if self._import_cog(result):
+                await self._setup_cog(result)
+            return result
+
         try:
-            if dotted in self.extensions:
-                logger.info(f"Reloading {name}")
-                _purge_cog_modules(dotted)
-                await self.reload_extension(dotted)
-                result.status = CogStatus.RELOADED
-            else:
-                await self.load_extension(dotted)
-                result.status = CogStatus.LOADED
+            logger.info(f"Reloading {name}")
+            _purge_cog_modules(dotted)
+            await self.reload_extension(dotted)
+            result.status = CogStatus.RELOADED
             self.failed_cogs.pop(name, None)
         except Exception as e:
-            logger.error(f"Failed to load cog {name}: {e}")
-            capture_apm_exception(cog=name, event="cog_load")
-            result.status = CogStatus.ERROR
-            result.error = str(e)
-            self.failed_cogs[name] = str(e)
+            self._cog_failed(result, e)
         return result
 
     async def load_cogs(self) -> list["CogLoadResult"]:
+        """Load every cog in COGS_DIR, honouring COG_WHITELIST/COG_BLACKLIST.
+
+        Imports run one at a time, since they hold the import lock and are
+        CPU-bound anyway. setup() and cog_load() then run concurrently, so a
+        cog waiting on the network at load does not hold up the rest.
+        """
         cog_whitelist_env = os.getenv("COG_WHITELIST", "")
         cog_whitelist = (
             {c.strip().lower() for c in cog_whitelist_env.split(",") if c.strip()}
@@ -451,7 +577,7 @@ class LancoBot(commands.Bot):
         if cog_blacklist:
             logger.info(f"COG_BLACKLIST active: {cog_blacklist}")
 
-        results = []
+        names = []
         for entry in os.scandir(COGS_DIR):
             if not entry.is_dir():
                 continue
@@ -460,17 +586,47 @@ class LancoBot(commands.Bot):
             if cog_blacklist and entry.name.lower() in cog_blacklist:
                 continue
             if os.path.isfile(os.path.join(entry.path, "__init__.py")):
-                result = await self.load_cog(entry.name)
-                results.append(result)
+                names.append(entry.name)
+
+        # cogs already loaded (/reloadall) go through the reload path as before
+        results, fresh = [], []
+        for name in names:
+            if self.is_cog_loaded(name):
+                results.append(await self.load_cog(name))
+            else:
+                fresh.append(CogLoadResult(name))
+                results.append(fresh[-1])
+
+        started = time.perf_counter()
+        imported = [r for r in fresh if self._import_cog(r)]
+        import_ms = (time.perf_counter() - started) * 1000
+        self._verify_schema()
+        started = time.perf_counter()
+        await asyncio.gather(*(self._setup_cog(r) for r in imported))
+        setup_ms = (time.perf_counter() - started) * 1000
 
         ok = sum(
             1 for r in results if r.status in (CogStatus.LOADED, CogStatus.RELOADED)
         )
         failed = [r.name for r in results if r.status == CogStatus.ERROR]
-        summary = f"Loaded {ok} cog(s)"
+        summary = (
+            f"Loaded {ok} cog(s) in {import_ms + setup_ms:.0f} ms "
+            f"(imports {import_ms:.0f} ms, setup {setup_ms:.0f} ms)"
+        )
         if failed:
             summary += f", {len(failed)} failed: {', '.join(failed)}"
         logger.info(summary)
+        slowest = sorted(results, key=lambda r: r.total_ms, reverse=True)
+        slowest = slowest[:SLOWEST_COGS_LOGGED]
+        if slowest:
+            logger.info(
+                "Slowest cogs: "
+                + ", ".join(
+                    f"{r.name} {r.total_ms:.0f} ms "
+                    f"(import {r.import_ms or 0:.0f}, setup {r.setup_ms or 0:.0f})"
+                    for r in slowest
+                )
+            )
         return results
 
     async def unload_cog(self, name: str) -> "CogLoadResult":
@@ -534,27 +690,62 @@ class LancoBot(commands.Bot):
 
     async def setup_hook(self):
         self.add_listener(self.router.handle_message, "on_message")
+        message_buffer.register(self)
+        loop_health.start()
+        token_tracker.start(self.database)
         if self.dev_mode:
             self.loop.create_task(self._hot_reload_watcher())
 
+    async def close(self):
+        await super().close()
+        # after the cogs have unloaded, so none of them is mid-request
+        await http.close_sessions()
+        await token_tracker.stop()
+        await loop_health.stop()
+
     async def _hot_reload_watcher(self):
-        async for changes in awatch(COGS_DIR):
-            reverse_ordered_changes = sorted(changes, reverse=True)
-            for change_type, change_path in reverse_ordered_changes:
-                path = os.path.normpath(change_path)
-                tokens = path.split(os.sep)
-                try:
-                    cogs_index = tokens.index("cogs")
-                except ValueError:
-                    continue
-                if cogs_index + 1 >= len(tokens):
-                    continue
-                cog_name = tokens[cogs_index + 1]
-
-                if change_type == Change.deleted:
-                    await self.unload_cog(cog_name)
-                else:
-                    await self.load_cog(cog_name)
+        graph = hot_reload.ImportGraph(APP_DIR)
+        await asyncio.to_thread(graph.refresh)
+        async for changes in awatch(
+            COGS_DIR, UTILS_DIR, watch_filter=PythonFilter(), step=HOT_RELOAD_QUIET_MS
+        ):
+            await self.hot_reload([path for _, path in changes], graph)
+
+    async def hot_reload(
+        self, paths: list[str], graph: hot_reload.ImportGraph
+    ) -> hot_reload.ReloadPlan:
+        """Reload what a batch of changed files affects: each changed cog
+        once, plus the loaded cogs importing a changed shared module. See
+        utils.hot_reload."""
+        started = time.perf_counter()
+        loaded = {
+            name.removeprefix("cogs.")
+            for name in self.extensions
+            if name.startswith("cogs.")
+        }
+        plan = graph.plan(paths, loaded)
+        if plan.restart:
+            logger.warning(
+                f"Changed {', '.join(sorted(plan.restart))}, which the bot core "
+                "imports; restart to pick it up"
+            )
+        hot_reload.purge_modules(plan.purge)
+        # each cog purges and imports its own modules, so they can run together
+        results = await asyncio.gather(
+            *(self.unload_cog(name) for name in sorted(plan.unload)),
+            *(self.load_cog(name) for name in sorted(plan.reload)),
+        )
+        if results:
+            failed = [r.name for r in results if r.status == CogStatus.ERROR]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            summary = (
+                f"Hot reload: {len(plan.reload)} reloaded, "
+                f"{len(plan.unload)} unloaded in {elapsed_ms:.0f} ms"
+            )
+            if failed:
+                summary += f", {len(failed)} failed: {', '.join(failed)}"
+            logger.info(summary)
+        return plan
 
 
 class InstrumentedCommandTree(discord.app_commands.CommandTree):
@@ -858,5 +1049,17 @@ async def main():
             db_backup.stop()
 
 
+async def profile_startup():
+    """Load the cogs as main() would and print what each cost, without
+    connecting to Discord. See utils.startup_profile."""
+    from utils.config import GuildConfig
+    from utils.startup_profile import cog_report
+
+    database.create_tables([GuildConfig])
+    results = await bot.load_cogs()
+    print(cog_report(results))
+    await bot.close()
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -3,17 +3,38 @@ import os
 import sys
 
 
-def _run():
+def _app_path():
     # main.py uses bare imports (from cogs..., from db...) that require app/ on sys.path,
     # matching the behavior of `python app/main.py` which adds the script directory automatically.
     app_dir = os.path.dirname(os.path.abspath(__file__))
     if app_dir not in sys.path:
         sys.path.insert(0, app_dir)
+
+
+def _run():
+    _app_path()
+    # as in the Dockerfile: skip pydantic's plugin scan, which imports logfire
+    os.environ.setdefault("PYDANTIC_DISABLE_PLUGINS", "__all__")
+    from utils.startup_profile import PROFILE_FLAG
+
+    if PROFILE_FLAG in sys.argv[1:]:
+        from utils.startup_profile import profile
+
+        raise SystemExit(profile())
+
     from app.main import main
 
     asyncio.run(main())
 
 
+def profile_startup_child():
+    """Started by --profile-startup, under -X importtime"""
+    _app_path()
+    from app.main import profile_startup
+
+    asyncio.run(profile_startup())
+
+
 # BOT_ENV selects the .env.<env> file and, through it, dev mode and the APM
 # environment. Set in the real process environment so it outranks that file:
 # otherwise a DEV_MODE=false left in a dotenv would demote `poetry run dev`.
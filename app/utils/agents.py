@@ -0,0 +1,73 @@
+"""Shared pydantic-ai agents, one per configuration.
+
+Agents built per call or per channel cost a construction each time and, worse,
+tend to carry prompts that differ between requests. Providers cache prompt
+prefixes: when the leading part of a request matches a recent one byte for
+byte, it is billed at the cached-input rate and answered sooner (see the
+cached tokens in ``/token-usage``). So:
+
+- build agents through ``get_agent``, which hands back the same ``Agent`` for
+  the same model, prompts, output type and settings;
+- keep an agent's ``instructions`` static. Anything that varies per request
+  (channel, time, conversation summary) goes in the ``instructions`` passed to
+  ``run``, which pydantic-ai sends after the agent's own:
+
+    agent = agents.get_agent(MODEL, instructions=RULES)
+    result = await agent.run(prompt, instructions=f"Channel: #{channel.name}")
+
+A changed static prompt is a new configuration and gets a new agent; the old
+one ages out of the cache.
+"""
+
+import logging
+from typing import Any, Optional
+
+from pydantic_ai import Agent
+from utils import cache
+
+logger = logging.getLogger(__name__)
+
+#: Agents kept; configurations beyond this are rebuilt when next used
+MAX_AGENTS = 64
+
+_agents: cache.Cache[tuple, Agent] = cache.lru("agents", MAX_AGENTS)
+stats = {"built": 0, "reused": 0}
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def get_agent(
+    model: str,
+    *,
+    instructions: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    output_type: Any = str,
+    model_settings: Optional[dict] = None,
+) -> Agent:
+    """The agent for this configuration, built on first use"""
+    key = (model, instructions, system_prompt, output_type, _freeze(model_settings))
+    agent = _agents.get(key)
+    if agent is not None:
+        stats["reused"] += 1
+        return agent
+
+    stats["built"] += 1
+    logger.debug(f"Building agent for {model} ({len(_agents)} cached)")
+    agent = _agents[key] = Agent(
+        model=model,
+        instructions=instructions,
+        system_prompt=system_prompt or (),
+        output_type=output_type,
+        model_settings=model_settings,
+        # resolve the provider on the first run, not here: cogs build their
+        # agents at load, and the provider SDK import alone costs most of a
+        # second of startup
+        defer_model_check=True,
+    )
+    return agent
@@ -1,8 +1,11 @@
 import logging
+import sys
+import time
 from typing import Awaitable, Callable
 
 from pydantic_ai.agent import AgentRunResult
 from pydantic_ai.exceptions import ModelHTTPError
+from utils import token_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -17,18 +20,30 @@ async def _noop(_: str) -> None:
     pass
 
 
+def _calling_cog(depth: int = 2) -> str:
+    """The cog package of the code ``depth`` frames up, e.g. ``chatbot``"""
+    module = sys._getframe(depth).f_globals.get("__name__", "")
+    parts = module.split(".")
+    return parts[1] if parts[0] == "cogs" and len(parts) > 1 else module
+
+
 async def run_agent(
     agent_call: Callable[[], Awaitable[AgentRunResult]],
     on_error: Callable[[str], Awaitable[None]] = _noop,
     *,
     model_name: str | None = None,
     cog_name: str | None = None,
+    guild_id: int | None = None,
 ) -> AgentRunResult | None:
     """Run a pydantic-ai agent call, invoking on_error with a user-facing message on failure.
 
-    Pass model_name and cog_name to record token usage for the /token-usage command.
+    Token usage is recorded for /token-usage, attributed to ``cog_name`` (by
+    default the calling cog) and ``guild_id``. ``model_name`` overrides the
+    model the response reports.
     Returns the result on success, or None if an error occurred.
     """
+    cog_name = cog_name or _calling_cog()
+    start = time.perf_counter()
     try:
         result = await agent_call()
     except ModelHTTPError as e:
@@ -40,12 +55,17 @@ async def run_agent(
         await on_error("Something went wrong on my end.\nTry again later!")
         return None
 
-    if model_name or cog_name:
-        try:
-            from utils.token_tracker import record_usage
-
-            record_usage(model_name or "unknown", cog_name or "unknown", result.usage())
-        except Exception:
-            logger.debug("Failed to record token usage", exc_info=True)
+    try:
+        new_messages = result.new_messages()
+        token_tracker.record_usage(
+            model_name or result.response.model_name or "unknown",
+            cog_name,
+            result.usage,
+            guild_id=guild_id,
+            latency=time.perf_counter() - start,
+            cost=token_tracker.cost_of(new_messages),
+        )
+    except Exception:
+        logger.debug("Failed to record token usage", exc_info=True)
 
     return result
@@ -123,6 +123,28 @@ def record(tx_type: str, name: str, *, result: str = RESULT_SUCCESS, **labels) -
         logger.debug("Failed to record %s transaction", tx_type, exc_info=True)
 
 
+def record_span(tx_type: str, name: str, duration: float, **labels) -> None:
+    """Report work that already happened and took ``duration`` seconds, as a
+    transaction holding one span that long. Never raises, like :func:`record`.
+    """
+    apm = client()
+    if apm is None:
+        return
+    try:
+        apm.begin_transaction(tx_type)
+        label(**labels)
+        with elasticapm.capture_span(
+            name=name,
+            span_type=tx_type,
+            labels={k: str(v) for k, v in labels.items() if v is not None},
+            duration=duration,
+        ):
+            pass
+        apm.end_transaction(name, RESULT_SUCCESS)
+    except Exception:
+        logger.debug("Failed to record %s span", tx_type, exc_info=True)
+
+
 def app_command_cog(command) -> Optional[str]:
     binding = getattr(command, "binding", None)
     return binding.qualified_name if binding else None
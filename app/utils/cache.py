@@ -0,0 +1,316 @@
+"""Bounded, measured in-memory caches.
+
+Every cache in the bot should be one of these, so that none grows without
+bound and every hit rate can be read off ``/cachestats`` and ``/metrics``:
+
+    self.locations: cache.Cache[str, Coordinates] = cache.lru("weather.locations", 1024)
+    self.forecasts = cache.ttl("weather.forecasts", maxsize=100, ttl=120)
+
+They are ``cachetools`` caches underneath, so they behave like a dict whose
+oldest entries fall out:
+
+- ``lru(name, maxsize)`` evicts the least recently used entry when full;
+- ``ttl(name, maxsize, ttl)`` also drops entries ``ttl`` seconds after they
+  were stored;
+- ``tlru(name, maxsize, ttu)`` lets ``ttu(key, value, now)`` pick each
+  entry's expiry time, for data that goes stale at different rates.
+
+With ``getsizeof``, ``maxsize`` is a total weight instead of an entry count
+(``getsizeof=len`` bounds a cache of ``bytes`` by bytes). A value heavier than
+the whole cache is not stored.
+
+``get_or_load`` fills a miss from an async loader, and concurrent lookups of
+the same key share one load. ``invalidate`` (and ``clear``) also cancel the
+storing of loads already in flight, so an invalidation that lands while a
+load is running is not undone by the stale result.
+
+A cache registers under its name when created; a cog that is reloaded
+replaces its caches' entries. Counts are kept per cache object, so they start
+over on reload. Caches are not locked: one shared with worker threads needs
+its owner's lock, as for any dict.
+"""
+
+import asyncio
+import time
+import weakref
+from collections.abc import MutableMapping
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+import cachetools
+from utils import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class _Counts:
+    __slots__ = (
+        "hits",
+        "misses",
+        "coalesced",
+        "evictions",
+        "expirations",
+        "load_errors",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+
+# cachetools calls popitem() to make room and expire() to drop stale entries;
+# these count both
+
+
+class _LRU(cachetools.LRUCache):
+    counts: _Counts
+
+    def popitem(self):
+        item = super().popitem()
+        self.counts.evictions += 1
+        return item
+
+
+class _TTL(cachetools.TTLCache):
+    counts: _Counts
+
+    def popitem(self):
+        item = super().popitem()
+        self.counts.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.counts.expirations += len(expired)
+        return expired
+
+
+class _TLRU(cachetools.TLRUCache):
+    counts: _Counts
+
+    def popitem(self):
+        item = super().popitem()
+        self.counts.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.counts.expirations += len(expired)
+        return expired
+
+
+class Cache(MutableMapping, Generic[K, V]):
+    """A named, bounded cache. Create one with ``lru``, ``ttl`` or ``tlru``."""
+
+    def __init__(self, name: str, kind: str, data: cachetools.Cache):
+        self.name = name
+        self.kind = kind
+        self.counts = _Counts()
+        self._data = data
+        self._data.counts = self.counts
+        self._inflight: dict[K, asyncio.Task] = {}
+        _register(self)
+
+    def __repr__(self) -> str:
+        return f"<Cache {self.name} {self.kind} {len(self)}/{self.maxsize}>"
+
+    @property
+    def maxsize(self) -> float:
+        return self._data.maxsize
+
+    @property
+    def currsize(self) -> float:
+        """Entries held, or their total weight with ``getsizeof``"""
+        return self._data.currsize
+
+    # --- mapping --------------------------------------------------------------
+
+    def __getitem__(self, key: K) -> V:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.counts.misses += 1
+            raise
+        self.counts.hits += 1
+        return value
+
+    def get(self, key: K, default=None):
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.counts.misses += 1
+            return default
+        self.counts.hits += 1
+        return value
+
+    def peek(self, key: K, default=None):
+        """Look up without counting a hit or a miss, for callers that decide
+        for themselves whether an entry is still good (and count it)"""
+        return self._data.get(key, default)
+
+    def __setitem__(self, key: K, value: V) -> None:
+        try:
+            self._data[key] = value
+        except ValueError:
+            # heavier than the whole cache; drop the old value, keep nothing
+            self._data.pop(key, None)
+
+    def __delitem__(self, key: K) -> None:
+        del self._data[key]
+
+    def pop(self, key: K, *default):
+        return self._data.pop(key, *default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+
+    def invalidate(self, key: K) -> None:
+        """Drop ``key``, including the result of a load of it in flight"""
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+
+    # --- loading ----------------------------------------------------------------
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """The cached value, or ``await loader()`` stored under ``key``.
+
+        Concurrent callers of a missing key share the first caller's load; if
+        it raises, they all get the exception and nothing is stored.
+        """
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            self.counts.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.counts.misses += 1
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.counts.coalesced += 1
+        # shielded so one caller being cancelled doesn't fail the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        try:
+            value = await loader()
+        except Exception:
+            self.counts.load_errors += 1
+            raise
+        # invalidated while loading: hand the value to the waiting callers,
+        # but don't keep it
+        if self._inflight.get(key) is asyncio.current_task():
+            self[key] = value
+        return value
+
+    def _forget(self, key: K, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    # --- stats ----------------------------------------------------------------
+
+    def stats(self) -> dict:
+        counts = self.counts
+        lookups = counts.hits + counts.misses + counts.coalesced
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "entries": len(self._data),
+            "size": self.currsize,
+            "maxsize": self.maxsize,
+            "hits": counts.hits,
+            "misses": counts.misses,
+            "coalesced": counts.coalesced,
+            "hit_rate": (
+                round((counts.hits + counts.coalesced) / lookups, 3)
+                if lookups
+                else None
+            ),
+            "evictions": counts.evictions,
+            "expirations": counts.expirations,
+            "load_errors": counts.load_errors,
+            "loading": len(self._inflight),
+        }
+
+
+def lru(name: str, maxsize: int, getsizeof: Optional[Callable] = None) -> Cache[K, V]:
+    """A cache that evicts the least recently used entry when full"""
+    return Cache(name, "lru", _LRU(maxsize, getsizeof))
+
+
+def ttl(
+    name: str,
+    maxsize: int,
+    ttl: float,
+    getsizeof: Optional[Callable] = None,
+) -> Cache[K, V]:
+    """An LRU cache whose entries also expire ``ttl`` seconds after being
+    stored"""
+    return Cache(name, "ttl", _TTL(maxsize, ttl, time.monotonic, getsizeof))
+
+
+def tlru(
+    name: str,
+    maxsize: int,
+    ttu: Callable[[K, V, float], float],
+    getsizeof: Optional[Callable] = None,
+) -> Cache[K, V]:
+    """An LRU cache whose entries expire at ``ttu(key, value, now)``, on the
+    ``time.monotonic`` clock"""
+    return Cache(name, "tlru", _TLRU(maxsize, ttu, time.monotonic, getsizeof))
+
+
+# --- registry ------------------------------------------------------------------
+
+_caches: "weakref.WeakValueDictionary[str, Cache]" = weakref.WeakValueDictionary()
+
+
+def _register(cache: Cache) -> None:
+    _caches[cache.name] = cache
+
+
+def caches() -> list[Cache]:
+    """Every live cache, by name"""
+    return sorted(list(_caches.values()), key=lambda c: c.name)
+
+
+def all_stats() -> list[dict]:
+    return [c.stats() for c in caches()]
+
+
+def _read(field: str) -> Callable[[], dict]:
+    def read():
+        return {(c.name,): getattr(c.counts, field) for c in caches()}
+
+    return read
+
+
+for _field, _help in (
+    ("hits", "Cache lookups that found an entry"),
+    ("misses", "Cache lookups that found nothing"),
+    ("coalesced", "Cache misses that joined a load already in flight"),
+    ("evictions", "Cache entries evicted to make room"),
+    ("expirations", "Cache entries dropped when their time ran out"),
+    ("load_errors", "Cache loads that raised"),
+):
+    metrics.counter(f"cache_{_field}_total", _help, ["cache"], function=_read(_field))
+
+metrics.gauge(
+    "cache_entries",
+    "Entries held per cache",
+    ["cache"],
+    function=lambda: {(c.name,): len(c) for c in caches()},
+)
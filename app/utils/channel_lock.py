@@ -37,8 +37,12 @@ def command_channel_lock():
                 # Execute the original command
                 await func(self, ctx, *args, **kwargs)
             finally:
-                # Mark the command as not running
-                __active_commands[channel_id][command_name] = False
+                # Mark the command as not running; forget channels with nothing
+                # running so the dict only holds commands in progress
+                running = __active_commands[channel_id]
+                running.pop(command_name, None)
+                if not running:
+                    del __active_commands[channel_id]
 
         return wrapper
 
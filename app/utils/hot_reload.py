@@ -0,0 +1,216 @@
+"""What to reload when files change under ``app/``, for dev mode's watcher.
+
+A batch of changed paths becomes one ``ReloadPlan``: each affected cog is
+reloaded once however many of its files changed, and a change to a shared
+module (anything in ``utils``, or ``cogs/common`` and the like, outside every
+cog package) reloads just the cogs that import it, directly or through other
+shared modules.
+
+Who imports what comes from the source: every ``import`` statement of every
+module under ``app/``, including the ones inside functions, so a lazily
+imported module counts too. Files are only re-parsed once they change.
+
+A shared module that the bot core (``main`` and what it imports) depends on
+cannot be swapped out under the running bot: the core would keep the old
+module, and any state in it (registries, caches) would split in two. Those
+are reported in ``restart`` instead.
+"""
+
+import ast
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+#: The module everything else hangs off; what it imports is the bot core
+CORE_MODULE = "main"
+
+
+@dataclass
+class ReloadPlan:
+    #: cogs to (re)load, one entry each however many of their files changed
+    reload: set[str] = field(default_factory=set)
+    #: cogs whose package is gone
+    unload: set[str] = field(default_factory=set)
+    #: shared modules to drop from sys.modules before reloading, so the cogs
+    #: that import them get the new code
+    purge: set[str] = field(default_factory=set)
+    #: changed modules the core depends on; only a restart picks these up
+    restart: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.reload or self.unload or self.restart)
+
+
+def _package(module: str, path: str) -> str:
+    if os.path.basename(path) == "__init__.py":
+        return module
+    return module.rpartition(".")[0]
+
+
+def parse_imports(source: str, module: str, path: str) -> set[str]:
+    """Absolute names of every module ``source`` imports. ``from a import b``
+    yields both ``a`` and ``a.b``, since ``b`` may be a submodule."""
+    imported = set()
+    for node in ast.walk(ast.parse(source, path)):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = _package(module, path).split(".")
+                parts = parts[: len(parts) - (node.level - 1)]
+                base = ".".join(filter(None, [*parts, base]))
+            if base:
+                imported.add(base)
+            imported.update(
+                f"{base}.{alias.name}" if base else alias.name for alias in node.names
+            )
+    return imported
+
+
+class ImportGraph:
+    """Imports between the modules under ``app_dir``. See the module
+    docstring."""
+
+    def __init__(self, app_dir: str, cogs_package: str = "cogs"):
+        self.app_dir = os.path.abspath(app_dir)
+        self.cogs_package = cogs_package
+        # path -> (mtime, module, imports)
+        self._parsed: dict[str, tuple[float, str, set[str]]] = {}
+
+    def module_name(self, path: str) -> Optional[str]:
+        """The module a ``.py`` file under ``app_dir`` is imported as"""
+        path = os.path.abspath(path)
+        if not path.endswith(".py") or not path.startswith(self.app_dir + os.sep):
+            return None
+        parts = os.path.relpath(path, self.app_dir)[: -len(".py")].split(os.sep)
+        if parts[-1] == "__init__":
+            parts.pop()
+        return ".".join(parts) or None
+
+    def cog_of(self, module: str) -> Optional[str]:
+        """The cog a module belongs to, or None for a shared module"""
+        parts = module.split(".")
+        if len(parts) < 2 or parts[0] != self.cogs_package:
+            return None
+        path = os.path.join(self.app_dir, self.cogs_package, parts[1])
+        if os.path.isfile(path + ".py"):
+            return None  # a module beside the cogs, like lancocog
+        if os.path.isdir(path) and not os.path.isfile(
+            os.path.join(path, "__init__.py")
+        ):
+            return None  # a directory of shared modules, like common
+        # a cog package, or one that has just been deleted
+        return parts[1]
+
+    def refresh(self) -> dict[str, set[str]]:
+        """module -> the modules under ``app_dir`` it imports, re-parsing only
+        files that changed since the last call"""
+        seen = set()
+        for root, dirs, files in os.walk(self.app_dir):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for filename in files:
+                if not filename.endswith(".py"):
+                    continue
+                path = os.path.join(root, filename)
+                seen.add(path)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                cached = self._parsed.get(path)
+                if cached and cached[0] == mtime:
+                    continue
+                module = self.module_name(path)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        imports = parse_imports(f.read(), module, path)
+                except (OSError, SyntaxError, ValueError):
+                    # half-saved; keep what it imported last time
+                    imports = cached[2] if cached else set()
+                self._parsed[path] = (mtime, module, imports)
+        for path in set(self._parsed) - seen:
+            del self._parsed[path]
+
+        modules = {module for _, module, _ in self._parsed.values()}
+        return {
+            module: imports & modules for _, module, imports in self._parsed.values()
+        }
+
+    def plan(
+        self,
+        paths: Iterable[str],
+        loaded: Optional[set[str]] = None,
+        exists=os.path.isfile,
+    ) -> ReloadPlan:
+        """What to do about a batch of changed (or deleted) files.
+
+        A cog whose own files changed is always (re)loaded; one that only
+        imports a changed module is reloaded if it is in ``loaded`` (when
+        given), so a cog unloaded on purpose stays unloaded.
+        """
+        graph = self.refresh()
+        dependents: dict[str, set[str]] = {}
+        for module, imports in graph.items():
+            for imported in imports:
+                dependents.setdefault(imported, set()).add(module)
+
+        core = _closure({CORE_MODULE}, graph)
+        plan = ReloadPlan()
+        shared = set()
+        for path in paths:
+            module = self.module_name(path)
+            if module is None:
+                continue
+            cog = self.cog_of(module)
+            if cog is not None:
+                plan.reload.add(cog)
+            elif module in core:
+                plan.restart.add(module)
+            elif module.split(".")[0] in ("utils", self.cogs_package):
+                shared.add(module)
+
+        # everything that imports a changed shared module, and so on up
+        affected = _closure(shared, dependents)
+        for module in affected:
+            cog = self.cog_of(module)
+            if cog is not None:
+                if loaded is None or cog in loaded:
+                    plan.reload.add(cog)
+            else:
+                # a shared module outside the core; the reloaded cogs
+                # import it afresh
+                plan.purge.add(module)
+
+        for cog in list(plan.reload):
+            package = os.path.join(self.app_dir, self.cogs_package, cog)
+            if not exists(os.path.join(package, "__init__.py")):
+                plan.reload.discard(cog)
+                plan.unload.add(cog)
+        return plan
+
+
+def purge_modules(names: Iterable[str]) -> None:
+    """Forget modules so that the next import runs them afresh.
+
+    Also drops each one from its parent package's attributes, or
+    ``from utils import opengraph`` would still find the old module there.
+    """
+    for name in names:
+        sys.modules.pop(name, None)
+        parent, _, child = name.rpartition(".")
+        package = sys.modules.get(parent)
+        if getattr(getattr(package, child, None), "__name__", None) == name:
+            delattr(package, child)
+
+
+def _closure(start: set[str], edges: dict[str, set[str]]) -> set[str]:
+    found = set(start)
+    pending = list(start)
+    while pending:
+        for following in edges.get(pending.pop(), ()):
+            if following not in found:
+                found.add(following)
+                pending.append(following)
+    return found
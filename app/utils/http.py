@@ -0,0 +1,99 @@
+"""Shared aiohttp sessions.
+
+Most cogs open a fresh ``aiohttp.ClientSession`` per request, which pays for a
+new connection pool, DNS lookup and TLS handshake every time. Code that makes
+frequent requests should borrow a pooled session from here instead:
+
+    session = http.get_session()
+    async with session.get(url) as response:
+        ...
+
+Sessions are created lazily, keyed by name so a client that needs its own
+default headers or timeout can have them without affecting anyone else, and
+closed together when the bot shuts down. Never close a borrowed session.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
+# Per-host cap, so one slow site cannot take every connection in the pool
+LIMIT_PER_HOST = 8
+DNS_CACHE_SECONDS = 300
+
+_sessions: dict[str, aiohttp.ClientSession] = {}
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_client_request_duration_seconds",
+    "Requests made through the pooled sessions, until response headers arrive",
+    ["session", "method", "status"],
+)
+
+
+def _timing(name: str) -> aiohttp.TraceConfig:
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - context.start,
+            session=name,
+            method=params.method,
+            status=params.response.status,
+        )
+
+    async def on_request_exception(session, context, params):
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - context.start,
+            session=name,
+            method=params.method,
+            status="error",
+        )
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+def get_session(
+    name: str = "default",
+    headers: Optional[dict] = None,
+    timeout: Optional[aiohttp.ClientTimeout] = None,
+) -> aiohttp.ClientSession:
+    """Return the pooled session called ``name``, creating it on first use.
+
+    ``headers`` and ``timeout`` only apply when the session is created; later
+    calls with the same name get the existing session as-is.
+    """
+    session = _sessions.get(name)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=LIMIT_PER_HOST, ttl_dns_cache=DNS_CACHE_SECONDS
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=timeout or DEFAULT_TIMEOUT,
+            trace_configs=[_timing(name)],
+        )
+        _sessions[name] = session
+        logger.debug(f"Created pooled HTTP session: {name}")
+    return session
+
+
+async def close_sessions() -> None:
+    """Close every pooled session. Called once on shutdown."""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    await asyncio.gather(
+        *(s.close() for s in sessions if not s.closed), return_exceptions=True
+    )
@@ -1,5 +1,11 @@
 """Log handlers, including ECS-formatted JSON output for Elastic ingestion.
 
+Handlers write on a background thread: ``start_queue`` moves the root
+logger's handlers behind a ``QueueListener``, so a log call on the event loop
+costs a record copy and a queue put rather than disk and network I/O. When
+the log thread falls behind, DEBUG and INFO records are shed first; see
+``SheddingQueueHandler``.
+
 The console and the human-readable log file are unchanged; this adds a second
 file written as ECS JSON, one document per line, for a shipper to tail into
 Elasticsearch. Two files rather than one because the formats serve different
@@ -14,15 +20,19 @@ fields are supplied here too.
 
 from __future__ import annotations
 
+import atexit
+import copy
 import logging
 import os
+import queue
 import re
 import shutil
-from logging.handlers import TimedRotatingFileHandler
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from typing import Optional
 
 import ecs_logging
-from utils import env
+from utils import env, metrics
 from utils.dist_utils import get_service_version
 
 logger = logging.getLogger(__name__)
@@ -30,6 +40,14 @@ logger = logging.getLogger(__name__)
 DEFAULT_SERVICE_NAME = "lanco-bot"
 #: Daily ECS files kept on disk. Elasticsearch is the durable copy.
 DEFAULT_RETENTION_DAYS = 7
+#: Records waiting for the log thread before anything is dropped
+QUEUE_SIZE = 10_000
+#: Queue fill, as a fraction of QUEUE_SIZE, past which DEBUG and INFO are shed
+SHED_AT = 0.8
+
+RECORDS_DROPPED = metrics.counter(
+    "log_records_dropped_total", "Log records dropped under overload", ["level"]
+)
 
 
 def rotate_by_copy() -> bool:
@@ -190,3 +208,132 @@ def add_ecs_file_handler(root: logging.Logger) -> Optional[logging.Handler]:
     kept = f"{days} day(s) kept" if days else "kept indefinitely"
     logger.info(f"ECS log output enabled: {path} ({kept})")
     return handler
+
+
+class SheddingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when overloaded.
+
+    Past ``SHED_AT`` of the queue, records below WARNING are dropped; once the
+    queue is full, everything is. Drops are counted and reported with a single
+    warning once the queue has drained back below half the shedding mark.
+    """
+
+    def __init__(self, log_queue: queue.Queue, shed_at: float = SHED_AT):
+        super().__init__(log_queue)
+        self.shed_at = max(1, int(log_queue.maxsize * shed_at))
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, while they still hold what was logged, but
+        # leave formatting and the traceback to the handlers on the log thread.
+        # APM trace ids were attached when the record was created, so ECS
+        # output still correlates.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self.shed_at:
+            self._drop(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop(record)
+            return
+        if self._unreported and self.queue.qsize() < self.shed_at // 2:
+            self._report_drops()
+
+    def _drop(self, record: logging.LogRecord) -> None:
+        self.dropped += 1
+        self._unreported += 1
+        RECORDS_DROPPED.inc(level=record.levelname)
+
+    def _report_drops(self) -> None:
+        count, self._unreported = self._unreported, 0
+        notice = logging.makeLogRecord(
+            {
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Dropped {count} log record(s) while the log queue was full",
+            }
+        )
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            self._unreported += count
+
+
+_listener: Optional[QueueListener] = None
+
+
+def start_queue(root: logging.Logger, size: int = QUEUE_SIZE) -> QueueListener:
+    """Move ``root``'s handlers onto a background thread behind a queue.
+
+    Handlers added to ``root`` afterwards run on the calling thread as
+    before, which is what a handler needing the caller's context wants.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    log_queue: queue.Queue = queue.Queue(maxsize=size)
+    _listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers[:] = [SheddingQueueHandler(log_queue)]
+    _listener.start()
+    # before logging's own shutdown flushes the handlers
+    atexit.register(stop_queue)
+    return _listener
+
+
+def stop_queue() -> None:
+    """Write out whatever is queued and stop the log thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class CaptureLimiter:
+    """Decides which error records are worth reporting to APM.
+
+    The first record per logger, message template and exception type is let
+    through each ``window`` seconds; repeats are suppressed, and no more than
+    ``limit`` records pass per window overall, so an error logged in a tight
+    loop files one APM error rather than thousands.
+    """
+
+    _NUMBERS = re.compile(r"\d+")
+
+    def __init__(self, window: float = 60.0, limit: int = 20, clock=time.monotonic):
+        self.window = window
+        self.limit = limit
+        self.suppressed = 0
+        self._clock = clock
+        self._seen: dict[tuple, float] = {}
+        self._window_start = clock()
+        self._count = 0
+
+    def _key(self, record: logging.LogRecord) -> tuple:
+        # ids and counts interpolated by f-strings would make every line unique
+        template = self._NUMBERS.sub("#", str(record.msg))[:200]
+        exc_type = record.exc_info[0] if record.exc_info else None
+        return record.name, template, exc_type
+
+    def allow(self, record: logging.LogRecord) -> bool:
+        now = self._clock()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._count = 0
+            self._seen = {k: t for k, t in self._seen.items() if now - t < self.window}
+
+        key = self._key(record)
+        last = self._seen.get(key)
+        if (last is not None and now - last < self.window) or self._count >= self.limit:
+            self.suppressed += 1
+            return False
+        self._seen[key] = now
+        self._count += 1
+        return True
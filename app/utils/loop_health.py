@@ -0,0 +1,304 @@
+"""Event loop health: how late the loop runs, and what blocked it.
+
+Synchronous work on the event loop (a peewee query in a listener, PIL or
+PyMuPDF in a cog, a blocking HTTP client) stalls every other task, gateway
+heartbeats included, and used to be noticed only once heartbeats were late.
+``LoopMonitor`` watches for it in two ways:
+
+- a sampler task sleeps ``SAMPLE_INTERVAL`` at a time and records how much
+  later than that it woke up in a histogram of loop lag;
+- a watchdog thread checks that the sampler keeps ticking. Once a tick is
+  ``STALL_THRESHOLD`` overdue, it captures the loop thread's stack and
+  attributes the stall to the innermost bot frame (``cogs.<name>`` or
+  ``utils.<name>``), which is the code that called whatever blocked.
+
+Stalls are totalled per site, so the sites costing the most loop time are the
+ones to move off the loop first. Everything is exported through
+``snapshot()`` (served by the webserver's ``/status``) and each stall is also
+reported to APM as a ``loop_stall`` span, labelled with its cog and function.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from utils import apm, metrics
+
+logger = logging.getLogger(__name__)
+
+#: How often the sampler wakes, in seconds
+SAMPLE_INTERVAL = 0.1
+#: Lag, in seconds, past which the loop counts as stalled
+STALL_THRESHOLD = 0.25
+#: Upper bounds of the lag histogram buckets, in milliseconds
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+#: Recent stalls kept with their stacks
+RECENT_STALLS = 20
+#: Stack frames kept per recent stall
+STACK_DEPTH = 8
+#: Sites listed in ``snapshot()``, worst first
+TOP_SITES = 10
+
+TX_LOOP_STALL = "loop_stall"
+
+LAG_SECONDS = metrics.histogram(
+    "event_loop_lag_seconds",
+    "How much later than scheduled the loop ran the lag sampler",
+    buckets=[bound / 1000 for bound in LAG_BUCKETS_MS],
+)
+STALLS = metrics.counter(
+    "event_loop_stalls_total", "Loop stalls, by blamed cog", ["cog"]
+)
+STALL_SECONDS = metrics.counter(
+    "event_loop_stall_seconds_total",
+    "Time the loop spent stalled, by blamed cog",
+    ["cog"],
+)
+
+# modules whose frames a stall is attributed to
+_APP_PACKAGES = ("cogs.", "utils.", "main")
+
+
+@dataclass
+class StallSite:
+    cog: str
+    function: str
+    location: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class Stall:
+    site: StallSite
+    stack: list[str] = field(default_factory=list)
+    duration_ms: float = 0.0
+    at: float = 0.0
+
+
+class Histogram:
+    """Counts per fixed bucket, plus total, sum and max"""
+
+    def __init__(self, bounds: tuple = LAG_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        buckets = {
+            f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)
+        }
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "sum_ms": round(self.sum, 1),
+            "max_ms": round(self.max, 1),
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+def attribute(frame) -> tuple[str, str, str]:
+    """``(cog, function, location)`` for a stack: the function and location of
+    its innermost bot frame (or of ``frame`` itself if there is none), and the
+    cog of its innermost ``cogs.`` frame (or that frame's module otherwise)"""
+    site = cog = None
+    current = frame
+    while current is not None and cog is None:
+        module = current.f_globals.get("__name__", "")
+        if site is None and module.startswith(_APP_PACKAGES):
+            site = current
+        if module.startswith("cogs."):
+            cog = module.split(".")[1]
+        current = current.f_back
+    site = site or frame
+
+    code = site.f_code
+    location = f"{os.path.basename(code.co_filename)}:{site.f_lineno}"
+    return cog or site.f_globals.get("__name__", "?"), code.co_name, location
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = SAMPLE_INTERVAL,
+        threshold: float = STALL_THRESHOLD,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.sites: dict[tuple[str, str, str], StallSite] = {}
+        self.recent: deque[Stall] = deque(maxlen=RECENT_STALLS)
+
+        self._lock = threading.Lock()
+        self._last_tick = time.perf_counter()
+        # captured by the watchdog during the current stall
+        self._pending: Optional[Stall] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling the running loop"""
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _sample(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                lag = max(0.0, now - self._last_tick - self.interval)
+                self._last_tick = now
+                stall, self._pending = self._pending, None
+            self.lag.observe(lag * 1000)
+            LAG_SECONDS.observe(lag)
+            if stall is not None:
+                self._finish(stall, lag * 1000)
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            with self._lock:
+                overdue = time.perf_counter() - self._last_tick - self.interval
+                if overdue < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                cog, function, location = attribute(frame)
+                key = (cog, function, location)
+                site = self.sites.get(key) or StallSite(cog, function, location)
+                self.sites[key] = site
+                stack = traceback.format_list(
+                    traceback.extract_stack(frame)[-STACK_DEPTH:]
+                )
+                self._pending = Stall(site, [line.rstrip() for line in stack])
+                del frame
+
+    def _finish(self, stall: Stall, duration_ms: float) -> None:
+        site = stall.site
+        stall.duration_ms = duration_ms
+        stall.at = time.time()
+        site.count += 1
+        site.total_ms += duration_ms
+        site.max_ms = max(site.max_ms, duration_ms)
+        self.recent.append(stall)
+        STALLS.inc(cog=site.cog)
+        STALL_SECONDS.inc(duration_ms / 1000, cog=site.cog)
+        logger.warning(
+            f"Event loop blocked for {duration_ms:.0f}ms in "
+            f"{site.cog}.{site.function} ({site.location})"
+        )
+        apm.record_span(
+            TX_LOOP_STALL,
+            f"{site.cog}.{site.function}",
+            duration_ms / 1000,
+            cog=site.cog,
+            function=site.function,
+            location=site.location,
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda s: s.total_ms, reverse=True)
+            recent = list(self.recent)
+        return {
+            "sample_interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.threshold * 1000,
+            "lag": self.lag.to_dict(),
+            "stalls": sum(site.count for site in sites),
+            "stall_sites": [
+                {
+                    "cog": site.cog,
+                    "function": site.function,
+                    "location": site.location,
+                    "count": site.count,
+                    "total_ms": round(site.total_ms, 1),
+                    "max_ms": round(site.max_ms, 1),
+                }
+                for site in sites[:TOP_SITES]
+                if site.count
+            ],
+            "recent_stalls": [
+                {
+                    "cog": stall.site.cog,
+                    "function": stall.site.function,
+                    "duration_ms": round(stall.duration_ms, 1),
+                    "at": stall.at,
+                    "stack": stall.stack,
+                }
+                for stall in reversed(recent)
+            ],
+        }
+
+
+monitor: Optional[LoopMonitor] = None
+
+
+def start() -> LoopMonitor:
+    """Start monitoring the running loop, once per process"""
+    global monitor
+    if monitor is None:
+        monitor = LoopMonitor()
+        monitor.start()
+    return monitor
+
+
+async def stop() -> None:
+    global monitor
+    if monitor is not None:
+        await monitor.stop()
+        monitor = None
+
+
+def snapshot() -> Optional[dict]:
+    return monitor.snapshot() if monitor is not None else None
@@ -0,0 +1,334 @@
+"""Memory diagnostics for a bot that runs for weeks: what grew, and what is
+holding on to it.
+
+RSS alone says memory went up, not where. This adds three views, served by
+the owner-only ``/memory`` commands and the webserver's ``/status``:
+
+- tracemalloc snapshots, kept by label, and the difference between two of
+  them. Take one, let the bot run for a while, take another, and the source
+  lines that allocated the growth come out on top;
+- a census of what each cog retains: every attribute of every cog, plus the
+  module-level containers of ``cogs.*`` and ``utils.*`` (caches, registries),
+  measured by deep size. An unbounded dict shows up as the attribute with the
+  most entries and bytes;
+- the garbage collector's per-generation counts and anything it found
+  uncollectable.
+
+Tracing costs memory and slows every allocation down, so it is off until an
+owner starts it (or ``PYTHONTRACEMALLOC`` is set). Snapshots and the census
+walk a lot of objects: they are meant to run in a worker thread. ``status()``
+reads counters only and is cheap.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import types
+from collections import Counter, OrderedDict, deque
+from collections.abc import MutableMapping, MutableSet
+from typing import Optional
+
+import discord
+import peewee
+import psutil
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+#: Frames of traceback recorded per allocation while tracing
+TRACE_FRAMES = 1
+#: Snapshots kept; taking another evicts the oldest
+MAX_SNAPSHOTS = 4
+#: Rows in a snapshot's top list or a diff
+TOP_STATS = 15
+#: Objects walked per attribute before the census gives up on it
+CENSUS_MAX_OBJECTS = 200_000
+#: Attributes listed per cog, and module-level containers listed overall
+CENSUS_TOP = 5
+CENSUS_TOP_MODULES = 15
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+# Objects the census does not count or walk into: code and types, which are
+# not retained data, and objects shared bot-wide. A cog holding a Guild or
+# the bot is holding a reference, not the object.
+_SHARED = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+    logging.Logger,
+    asyncio.AbstractEventLoop,
+    commands.Cog,
+    discord.Client,
+    discord.Guild,
+    discord.abc.GuildChannel,
+    discord.abc.PrivateChannel,
+    discord.Thread,
+    discord.User,
+    discord.Member,
+    peewee.Database,
+)
+# what counts as a cache or registry when found on a module or cog; anything
+# else with a __len__ may run code to answer it (a peewee query runs SQL)
+_CONTAINERS = (dict, list, set, frozenset, tuple, deque, MutableMapping, MutableSet)
+
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+
+
+def _mb(size: int) -> float:
+    return round(size / 1024 / 1024, 2)
+
+
+def _kb(size: int) -> float:
+    return round(size / 1024, 1)
+
+
+def _location(frame: tracemalloc.Frame) -> str:
+    filename = frame.filename
+    marker = f"site-packages{os.sep}"
+    if marker in filename:
+        filename = filename.split(marker, 1)[1]
+    elif filename.startswith(_APP_DIR):
+        filename = os.path.relpath(filename, _APP_DIR)
+    return f"{filename}:{frame.lineno}"
+
+
+# --- tracemalloc -------------------------------------------------------------
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def start_tracing(frames: int = TRACE_FRAMES) -> bool:
+    """Start tracing allocations. Returns False if already tracing."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    logger.info(f"tracemalloc started ({frames} frame(s))")
+    return True
+
+
+def stop_tracing() -> bool:
+    """Stop tracing and drop the snapshots. Returns False if not tracing."""
+    if not tracemalloc.is_tracing():
+        return False
+    tracemalloc.stop()
+    _snapshots.clear()
+    logger.info("tracemalloc stopped")
+    return True
+
+
+def snapshot_labels() -> list[str]:
+    return list(_snapshots)
+
+
+def take_snapshot(label: Optional[str] = None) -> str:
+    """Snapshot the traced allocations under ``label`` and return the label.
+
+    Blocks for as long as it takes to copy every trace, so run it in a thread.
+    """
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    label = label or time.strftime("%H:%M:%S")
+    _snapshots.pop(label, None)
+    _snapshots[label] = snapshot
+    while len(_snapshots) > MAX_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+    return label
+
+
+def _get_snapshot(label: Optional[str]) -> tracemalloc.Snapshot:
+    if not _snapshots:
+        raise KeyError("no snapshots taken")
+    if label is None:
+        return next(reversed(_snapshots.values()))
+    if label not in _snapshots:
+        raise KeyError(f"no snapshot {label!r}; have {', '.join(_snapshots)}")
+    return _snapshots[label]
+
+
+def top_allocations(label: Optional[str] = None, limit: int = TOP_STATS) -> list:
+    """The source lines holding the most memory in a snapshot (default: the
+    latest)"""
+    stats = _get_snapshot(label).statistics("lineno")
+    return [
+        {
+            "location": _location(stat.traceback[0]),
+            "size_kb": _kb(stat.size),
+            "count": stat.count,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+def diff(older: str, newer: Optional[str] = None, limit: int = TOP_STATS) -> list:
+    """The source lines whose allocations grew (or shrank) the most between two
+    snapshots, largest change first"""
+    stats = _get_snapshot(newer).compare_to(_get_snapshot(older), "lineno")
+    return [
+        {
+            "location": _location(stat.traceback[0]),
+            "size_diff_kb": _kb(stat.size_diff),
+            "size_kb": _kb(stat.size),
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+        if stat.size_diff or stat.count_diff
+    ]
+
+
+# --- census ------------------------------------------------------------------
+
+
+def deep_size(
+    obj, seen: Optional[set[int]] = None, limit: int = CENSUS_MAX_OBJECTS
+) -> tuple[int, int, bool]:
+    """``(bytes, objects, truncated)`` reachable from ``obj``.
+
+    Objects in ``seen`` are skipped and the ones walked are added to it, so
+    sharing one set across calls counts each object once. Shared bot-wide
+    objects are neither counted nor walked; see ``_SHARED``.
+    """
+    seen = set() if seen is None else seen
+    size = count = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _SHARED):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current, 0)
+        count += 1
+        if count >= limit:
+            return size, count, True
+        pending.extend(gc.get_referents(current))
+    return size, count, False
+
+
+def _holding(owner: str, name: str, value, seen: set[int]) -> dict:
+    size, count, truncated = deep_size(value, seen)
+    row = {
+        "owner": owner,
+        "attribute": name,
+        "type": type(value).__name__,
+        "size_kb": _kb(size),
+        "objects": count,
+    }
+    if isinstance(value, _CONTAINERS):
+        row["length"] = len(value)
+    if truncated:
+        row["truncated"] = True
+    return row
+
+
+def _module_containers(seen: set[int]) -> list[dict]:
+    rows = []
+    for name, module in list(sys.modules.items()):
+        if not name.startswith(("cogs.", "utils.")) or module is None:
+            continue
+        for attribute, value in list(vars(module).items()):
+            if attribute.startswith("__") or not isinstance(value, _CONTAINERS):
+                continue
+            rows.append(_holding(name, attribute, value, seen))
+    return rows
+
+
+def census(bot: commands.Bot, top: int = CENSUS_TOP) -> dict:
+    """What each cog, and each ``cogs.*``/``utils.*`` module's containers,
+    retains, largest first. An object reachable from two places is counted
+    once, for the first.
+
+    Walks every reachable object, so run it in a thread.
+    """
+    started = time.perf_counter()
+    seen: set[int] = set()
+    cogs = []
+    for cog in bot.get_lanco_cogs():
+        rows = [
+            _holding(cog.get_cog_name(), name, value, seen)
+            for name, value in list(vars(cog).items())
+            if name not in ("_bot", "logger")
+        ]
+        rows.sort(key=lambda r: r["size_kb"], reverse=True)
+        cogs.append(
+            {
+                "cog": cog.get_cog_name(),
+                "size_kb": round(sum(r["size_kb"] for r in rows), 1),
+                "objects": sum(r["objects"] for r in rows),
+                "top": rows[:top],
+            }
+        )
+    cogs.sort(key=lambda c: c["size_kb"], reverse=True)
+    modules = sorted(_module_containers(seen), key=lambda r: -r["size_kb"])
+    return {
+        "cogs": cogs,
+        "modules": modules[:CENSUS_TOP_MODULES],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# --- garbage collector -------------------------------------------------------
+
+
+def gc_report(top_types: int = 0) -> dict:
+    """Collector state per generation. ``top_types`` > 0 also counts every
+    tracked object by type, which walks the whole heap."""
+    report = {
+        "enabled": gc.isenabled(),
+        "thresholds": list(gc.get_threshold()),
+        "counts": list(gc.get_count()),
+        "frozen": gc.get_freeze_count(),
+        "generations": [
+            {"generation": generation, **stats}
+            for generation, stats in enumerate(gc.get_stats())
+        ],
+        "uncollectable": len(gc.garbage),
+        "uncollectable_types": Counter(
+            type(o).__qualname__ for o in gc.garbage
+        ).most_common(10),
+    }
+    if top_types:
+        report["top_types"] = Counter(
+            type(o).__qualname__ for o in gc.get_objects()
+        ).most_common(top_types)
+    return report
+
+
+def collect() -> dict:
+    """Run a full collection and report what it freed"""
+    started = time.perf_counter()
+    collected = gc.collect()
+    return {
+        "collected": collected,
+        "uncollectable": len(gc.garbage),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def status() -> dict:
+    """Cheap summary for /status"""
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "rss_mb": _mb(psutil.Process().memory_info().rss),
+        "tracing": tracemalloc.is_tracing(),
+        "traced_mb": _mb(traced),
+        "traced_peak_mb": _mb(peak),
+        "snapshots": snapshot_labels(),
+        "gc": gc_report(),
+    }
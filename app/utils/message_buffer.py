@@ -0,0 +1,276 @@
+"""Recent messages per channel, fed from the gateway.
+
+Cogs that give the AI channel context (chatbot, summarize, adhdchannel,
+sleepcheck) used to page through ``channel.history`` on every use, which is
+one or more REST calls against a tight per-route rate limit, for messages the
+bot had already received over the gateway. Instead, every guild message is
+recorded here as a compact ``BufferedMessage`` (author, content, attachment
+references, timestamp) in a bounded per-channel buffer, kept current by edits
+and deletes:
+
+    messages = await message_buffer.history(channel, limit=25)
+
+``history`` mirrors ``channel.history``. Each buffer knows the point after
+which it has seen every message in its channel; whatever part of a request
+lies before that point is fetched over REST, and the fetched messages are
+added to the buffer so the next request is served from memory.
+
+Buffers are dropped on a full gateway reconnect, since messages sent while
+disconnected were never received.
+"""
+
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import discord
+from utils import cache, http
+
+logger = logging.getLogger(__name__)
+
+#: Messages kept per channel
+CHANNEL_CAPACITY = 100
+#: Channels with a buffer; the least recently active is dropped first
+MAX_CHANNELS = 500
+
+
+@dataclass(frozen=True, slots=True)
+class BufferedAuthor:
+    id: int
+    name: str
+    display_name: str
+    bot: bool
+
+
+@dataclass(frozen=True, slots=True)
+class BufferedAttachment:
+    id: int
+    filename: str
+    url: str
+    content_type: Optional[str]
+    size: int
+
+    async def read(self) -> bytes:
+        async with http.get_session("attachments").get(self.url) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+
+@dataclass(frozen=True, slots=True)
+class BufferedMessage:
+    id: int
+    channel_id: int
+    guild_id: Optional[int]
+    author: BufferedAuthor
+    content: str
+    clean_content: str
+    attachments: tuple[BufferedAttachment, ...]
+    has_embeds: bool
+    created_at: datetime.datetime
+    edited_at: Optional[datetime.datetime]
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "BufferedMessage":
+        author = message.author
+        return cls(
+            id=message.id,
+            channel_id=message.channel.id,
+            guild_id=message.guild.id if message.guild else None,
+            author=BufferedAuthor(
+                author.id, author.name, author.display_name, author.bot
+            ),
+            content=message.content,
+            clean_content=message.clean_content,
+            attachments=tuple(
+                BufferedAttachment(a.id, a.filename, a.url, a.content_type, a.size)
+                for a in message.attachments
+            ),
+            has_embeds=bool(message.embeds),
+            created_at=message.created_at,
+            edited_at=message.edited_at,
+        )
+
+    @property
+    def jump_url(self) -> str:
+        guild = self.guild_id or "@me"
+        return f"https://discord.com/channels/{guild}/{self.channel_id}/{self.id}"
+
+
+class ChannelBuffer:
+    """One channel's recent messages, oldest first.
+
+    Every message with an ID above ``complete_after`` is in the buffer, except
+    those that were deleted.
+    """
+
+    def __init__(self, complete_after: int):
+        self.complete_after = complete_after
+        self._messages: dict[int, BufferedMessage] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def add(self, message: BufferedMessage) -> None:
+        newest = next(reversed(self._messages), 0)
+        self._messages[message.id] = message
+        if message.id < newest:
+            self._messages = dict(sorted(self._messages.items()))
+        while len(self._messages) > CHANNEL_CAPACITY:
+            evicted = next(iter(self._messages))
+            del self._messages[evicted]
+            self.complete_after = evicted
+
+    def get(self, message_id: int) -> Optional[BufferedMessage]:
+        return self._messages.get(message_id)
+
+    def covers(self, message_id: int) -> bool:
+        """Whether a message with this ID would be here unless deleted"""
+        return message_id > self.complete_after
+
+    def update(self, message: BufferedMessage) -> None:
+        if message.id in self._messages:
+            self._messages[message.id] = message
+
+    def remove(self, message_id: int) -> None:
+        self._messages.pop(message_id, None)
+
+    def backfill(self, older: list[BufferedMessage], exhausted_to: Optional[int]):
+        """Add ``older``, the messages right below ``complete_after``, newest
+        first; ``exhausted_to`` is the ID below which there are no more"""
+        added = older[: CHANNEL_CAPACITY - len(self._messages)]
+        self._messages = {
+            **{m.id: m for m in reversed(added)},
+            **self._messages,
+        }
+        if len(added) == len(older) and exhausted_to is not None:
+            self.complete_after = exhausted_to
+        elif added:
+            self.complete_after = added[-1].id - 1
+
+    def between(self, after: int, before: int) -> list[BufferedMessage]:
+        return [m for m in self._messages.values() if after < m.id < before]
+
+
+_buffers: cache.Cache[int, ChannelBuffer] = cache.lru("message_buffer", MAX_CHANNELS)
+stats = {"buffered": 0, "rest": 0}
+
+SnowflakeOrTime = Union[discord.abc.Snowflake, datetime.datetime, None]
+# above any real message ID
+_NEWEST = 2**63
+
+
+def _snowflake(value: SnowflakeOrTime, default: int, high: bool = False) -> int:
+    if value is None:
+        return default
+    if isinstance(value, datetime.datetime):
+        return discord.utils.time_snowflake(value, high=high)
+    return value.id
+
+
+def get_buffer(channel_id: int) -> Optional[ChannelBuffer]:
+    return _buffers.get(channel_id)
+
+
+async def history(
+    channel: discord.abc.Messageable,
+    limit: int,
+    *,
+    before: SnowflakeOrTime = None,
+    after: SnowflakeOrTime = None,
+    oldest_first: bool = False,
+) -> list[BufferedMessage]:
+    """Like ``channel.history``, served from the buffer where it can be.
+
+    Returns newest first, or oldest first with ``oldest_first``.
+    """
+    before_id = _snowflake(before, default=_NEWEST)
+    after_id = _snowflake(after, default=0, high=True)
+    buffer = _buffers.get(channel.id)
+    cached = buffer.between(after_id, before_id) if buffer is not None else []
+
+    if buffer is not None and buffer.covers(after_id + 1):
+        covered = True
+    else:
+        # with newest first, enough buffered messages make the gap irrelevant
+        covered = not oldest_first and len(cached) >= limit
+
+    if covered:
+        stats["buffered"] += 1
+        return cached[:limit] if oldest_first else cached[::-1][:limit]
+
+    stats["rest"] += 1
+    boundary = buffer.complete_after + 1 if buffer is not None else before_id
+    gap_before = min(before_id, boundary)
+    needed = limit if oldest_first else limit - len(cached)
+    fetched = [
+        BufferedMessage.from_message(m)
+        async for m in channel.history(
+            limit=needed,
+            before=discord.Object(id=gap_before) if gap_before < _NEWEST else None,
+            after=discord.Object(id=after_id) if after_id else None,
+            oldest_first=oldest_first,
+        )
+    ]
+
+    if oldest_first:
+        return (fetched + cached)[:limit]
+
+    # keep what was fetched if it sits right below what the channel's buffer
+    # covers; looked up again since gateway events may have changed it
+    buffer = _buffers.get(channel.id)
+    if buffer is None and before is None and getattr(channel, "guild", None):
+        buffer = _buffers[channel.id] = ChannelBuffer(complete_after=gap_before - 1)
+    if buffer is not None and buffer.complete_after + 1 == gap_before:
+        exhausted = len(fetched) < needed
+        buffer.backfill(fetched, after_id if exhausted else None)
+    return (cached[::-1] + fetched)[:limit]
+
+
+async def on_message(message: discord.Message) -> None:
+    if message.guild is None:
+        return
+    buffer = _buffers.get(message.channel.id)
+    if buffer is None:
+        buffer = _buffers[message.channel.id] = ChannelBuffer(message.id - 1)
+    buffer.add(BufferedMessage.from_message(message))
+
+
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent) -> None:
+    buffer = _buffers.get(payload.channel_id)
+    if buffer is not None and payload.guild_id:
+        buffer.update(BufferedMessage.from_message(payload.message))
+
+
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent) -> None:
+    buffer = _buffers.get(payload.channel_id)
+    if buffer is not None:
+        buffer.remove(payload.message_id)
+
+
+async def on_raw_bulk_message_delete(
+    payload: discord.RawBulkMessageDeleteEvent,
+) -> None:
+    buffer = _buffers.get(payload.channel_id)
+    if buffer is not None:
+        for message_id in payload.message_ids:
+            buffer.remove(message_id)
+
+
+async def on_connect() -> None:
+    # a fresh session (not a resume) may have missed messages
+    if _buffers:
+        logger.info(f"Gateway reconnected, dropping {len(_buffers)} message buffers")
+    _buffers.clear()
+
+
+def register(bot: discord.Client) -> None:
+    """Feed the buffers from ``bot``'s gateway events"""
+    for listener in (
+        on_message,
+        on_raw_message_edit,
+        on_raw_message_delete,
+        on_raw_bulk_message_delete,
+        on_connect,
+    ):
+        bot.add_listener(listener)
@@ -1,4 +1,6 @@
-from discord import Message, TextChannel
+from discord import TextChannel
+from utils import message_buffer
+from utils.message_buffer import BufferedMessage
 
 DISCORD_MESSAGE_LIMIT = 2000
 
@@ -10,12 +12,11 @@ def exceeds_discord_limit(text: str) -> bool:
 
 async def get_user_messages(
     channel: TextChannel, limit: int, oldest_first: bool = False
-) -> list[Message]:
+) -> list[BufferedMessage]:
     """Get strictly text messages from users in a channel"""
 
-    messages = [
-        msg async for msg in channel.history(limit=limit, oldest_first=oldest_first)
-    ]
+    # from the gateway-fed buffer, with REST only for what it has not seen
+    messages = await message_buffer.history(channel, limit, oldest_first=oldest_first)
     messages = [
         m
         for m in messages
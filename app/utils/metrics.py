@@ -0,0 +1,303 @@
+"""In-process metrics, served in Prometheus' text format at ``/metrics``.
+
+APM only sees commands, router intents and embed fixes, and ``/status`` only
+point-in-time counts. This registry covers the hot paths in between, cheaply
+enough to leave on everywhere:
+
+- every listener a ``LancoCog`` registers (calls, errors, latency per cog
+  and event, wrapped automatically in ``LancoCog.__init__``);
+- the message router's stages;
+- requests made through the pooled ``utils.http`` sessions;
+- database queries;
+- event loop lag.
+
+Metrics are declared once at module level and are get-or-create, so a cog
+that is hot-reloaded picks up its existing series:
+
+    REQUESTS = metrics.counter("weather_requests_total", "Forecasts fetched", ["source"])
+    REQUESTS.labels(source="nws").inc()
+
+``labels()`` returns a child that can be kept and reused, which is what the
+hot paths do so that recording is a lock and an add.
+"""
+
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Sequence
+
+#: Default histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """The series for these label values, created on first use"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, function: Optional[Callable] = None, **kw):
+        super().__init__(*args, **kw)
+        #: read when scraped instead of the children; see ``_read_function``
+        self.function = function
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def _read_function(self) -> list[str]:
+        # an unlabelled metric's function returns its value; a labelled one's
+        # returns {label values: value}
+        value = self.function()
+        if value is None:
+            return []
+        if not self.labelnames:
+            return [f"{self.name} {_format_value(value)}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in value.items()
+        ]
+
+    def _samples(self) -> list[str]:
+        if self.function is not None:
+            return self._read_function()
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(c.value)}"
+            for key, c in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float, **labels) -> None:
+        self.labels(**labels).set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kw):
+        super().__init__(*args, **kw)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        """Context manager observing the time spent inside it"""
+        return self.labels(**labels).time()
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_registry: dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name: str, help: str, labelnames: Sequence[str], **kw):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labelnames, **kw)
+        elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered differently")
+        return metric
+
+
+def counter(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    function: Optional[Callable] = None,
+) -> Counter:
+    """A counter; with ``function``, one whose values are read when scraped,
+    for counts something else already keeps"""
+    metric = _get_or_create(Counter, name, help, labelnames)
+    if function is not None:
+        metric.function = function
+    return metric
+
+
+def gauge(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    function: Optional[Callable] = None,
+) -> Gauge:
+    """A gauge; with ``function``, one read when scraped. Unlabelled, the
+    function returns the value; labelled, a dict of label values to value."""
+    metric = _get_or_create(Gauge, name, help, labelnames)
+    if function is not None:
+        metric.function = function
+    return metric
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+
+def render() -> str:
+    """Every metric, in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# --- listeners -------------------------------------------------------------
+
+LISTENER_CALLS = counter(
+    "listener_calls_total", "Cog listener invocations", ["cog", "event"]
+)
+LISTENER_ERRORS = counter(
+    "listener_errors_total", "Cog listener invocations that raised", ["cog", "event"]
+)
+LISTENER_SECONDS = histogram(
+    "listener_duration_seconds", "Cog listener run time", ["cog", "event"]
+)
+
+
+def instrument_listener(cog: str, event: str, func: Callable) -> Callable:
+    """Wrap a bound listener coroutine to record calls, errors and latency"""
+    calls = LISTENER_CALLS.labels(cog=cog, event=event)
+    errors = LISTENER_ERRORS.labels(cog=cog, event=event)
+    seconds = LISTENER_SECONDS.labels(cog=cog, event=event)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - start)
+            calls.inc()
+
+    return wrapper
@@ -0,0 +1,308 @@
+"""OpenGraph and page metadata, fetched once and cached.
+
+Link previews only need what is in a page's ``<head>``: the title, the
+description and the ``og:*`` tags. ``OpenGraphService`` therefore streams the
+response and stops reading at ``</head>`` (or ``MAX_BYTES``, whichever comes
+first), so a multi-megabyte article costs a few kilobytes. Parsing runs in a
+worker thread with the stdlib's incremental ``HTMLParser``, which also stops
+at the end of the head, so it never blocks the event loop.
+
+Results are cached per canonical URL (tracking parameters and fragments
+stripped) and user agent:
+
+- a page that produced metadata is kept for ``ttl`` seconds; after that the
+  next lookup revalidates with ``If-None-Match``/``If-Modified-Since`` and a
+  ``304`` just extends the entry;
+- a failure (error status, non-HTML response, network error) is remembered
+  for ``negative_ttl`` seconds, so a dead link posted repeatedly is not
+  re-fetched every time;
+- concurrent lookups of the same URL share one in-flight request.
+
+The entries live in a ``utils.cache`` LRU named ``opengraph``; a lookup that
+finds only an expired entry counts as a miss there.
+
+The same article posted in five channels therefore costs one fetch:
+
+    metadata = await opengraph.fetch_metadata(url)
+    if metadata and metadata.title:
+        ...
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+from utils import cache, http
+
+logger = logging.getLogger(__name__)
+
+BROWSER_UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+MAX_BYTES = 256 * 1024
+CHUNK_SIZE = 8 * 1024
+
+# Query parameters that never change what a page is, only who gets credit
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref_src"}
+
+_HEAD_END = re.compile(rb"</head\s*>|<body[\s>]", re.IGNORECASE)
+
+
+@dataclass
+class PageMetadata:
+    """What a page's head says about it"""
+
+    url: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    #: Every ``<meta>`` with a ``property``/``name`` and ``content``, first value wins
+    tags: dict[str, str] = field(default_factory=dict)
+    #: Every distinct ``og:image``, in page order
+    images: list[str] = field(default_factory=list)
+
+    def og(self) -> dict[str, str]:
+        """Just the ``og:*`` tags"""
+        return {k: v for k, v in self.tags.items() if k.startswith("og:")}
+
+
+class _HeadComplete(Exception):
+    pass
+
+
+class _HeadParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.tags: dict[str, str] = {}
+        self.images: list[str] = []
+        self._in_title = False
+        self._title_parts: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _HeadComplete()
+        if tag == "title" and self.title is None:
+            self._in_title = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("property") or attrs.get("name")
+            content = attrs.get("content")
+            if not key or not content:
+                return
+            key = key.strip().lower()
+            content = content.strip()
+            if key == "og:image":
+                if content not in self.images:
+                    self.images.append(content)
+            self.tags.setdefault(key, content)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts).strip() or None
+        elif tag == "head":
+            raise _HeadComplete()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+
+def parse_head(data: bytes, url: str, encoding: str = "utf-8") -> PageMetadata:
+    """Parse the metadata out of the start of an HTML document.
+
+    CPU-bound; call it through ``asyncio.to_thread`` from async code.
+    """
+    parser = _HeadParser()
+    try:
+        parser.feed(data.decode(encoding, errors="replace"))
+        parser.close()
+    except _HeadComplete:
+        pass
+
+    tags = parser.tags
+    return PageMetadata(
+        url=url,
+        title=tags.get("og:title") or tags.get("twitter:title") or parser.title,
+        description=(
+            tags.get("og:description")
+            or tags.get("twitter:description")
+            or tags.get("description")
+        ),
+        tags=tags,
+        images=parser.images,
+    )
+
+
+def canonical_url(url: str) -> str:
+    """Normalise a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops the fragment, and strips ``utm_*``
+    and other tracking parameters.
+    """
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path or "/",
+            urlencode(query),
+            "",
+        )
+    )
+
+
+@dataclass
+class _Entry:
+    metadata: Optional[PageMetadata]
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class OpenGraphService:
+    """Cached, single-flight page metadata lookups. See the module docstring."""
+
+    def __init__(
+        self,
+        ttl: float = 60 * 60,
+        negative_ttl: float = 5 * 60,
+        max_entries: int = 1024,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        # expired entries stay until evicted, to be revalidated
+        self._cache: cache.Cache[tuple[str, str], _Entry] = cache.lru(
+            "opengraph", max_entries
+        )
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self.revalidated = 0
+
+    async def get(
+        self, url: str, user_agent: str = BROWSER_UA
+    ) -> Optional[PageMetadata]:
+        """Return a page's metadata, or None if it could not be fetched"""
+        key = (canonical_url(url), user_agent)
+
+        counts = self._cache.counts
+        entry = self._cache.peek(key)
+        if entry and entry.expires > time.monotonic():
+            counts.hits += 1
+            return entry.metadata
+
+        task = self._inflight.get(key)
+        if task is None:
+            counts.misses += 1
+            task = asyncio.create_task(self._refresh(key, url, user_agent, entry))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            counts.coalesced += 1
+        # shielded so one caller being cancelled doesn't fail the others
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def _refresh(
+        self,
+        key: tuple[str, str],
+        url: str,
+        user_agent: str,
+        stale: Optional[_Entry],
+    ) -> Optional[PageMetadata]:
+        headers = {
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+        }
+        if stale and stale.metadata:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        session = http.get_session("opengraph")
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and stale and stale.metadata:
+                    self.revalidated += 1
+                    stale.expires = time.monotonic() + self.ttl
+                    self._store(key, stale)
+                    return stale.metadata
+
+                if response.status != 200:
+                    logger.info(f"Failed to fetch {url}: status {response.status}")
+                    return self._store_negative(key)
+
+                if response.content_type not in ("text/html", "application/xhtml+xml"):
+                    logger.debug(f"Not an HTML page: {url} ({response.content_type})")
+                    return self._store_negative(key)
+
+                data = await self._read_head(response)
+                encoding = response.charset or "utf-8"
+                final_url = str(response.url)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info(f"Error fetching {url}: {e}")
+            return self._store_negative(key)
+
+        try:
+            metadata = await asyncio.to_thread(parse_head, data, final_url, encoding)
+        except LookupError:
+            # an unknown charset in the Content-Type header
+            metadata = await asyncio.to_thread(parse_head, data, final_url)
+
+        self._store(
+            key,
+            _Entry(
+                metadata=metadata,
+                expires=time.monotonic() + self.ttl,
+                etag=etag,
+                last_modified=last_modified,
+            ),
+        )
+        return metadata
+
+    async def _read_head(self, response: aiohttp.ClientResponse) -> bytes:
+        """Read until the head has closed or ``max_bytes`` have arrived"""
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            # only rescan the new chunk, plus enough overlap for a split tag
+            start = max(0, len(buffer) - 8)
+            buffer += chunk
+            if _HEAD_END.search(buffer, start) or len(buffer) >= self.max_bytes:
+                break
+        return bytes(buffer[: self.max_bytes])
+
+    def _store(self, key: tuple[str, str], entry: _Entry) -> None:
+        self._cache[key] = entry
+
+    def _store_negative(self, key: tuple[str, str]) -> None:
+        self._store(key, _Entry(None, time.monotonic() + self.negative_ttl))
+        return None
+
+
+default_service = OpenGraphService()
+
+
+async def fetch_metadata(
+    url: str, user_agent: str = BROWSER_UA
+) -> Optional[PageMetadata]:
+    """Look up a page's metadata through the shared service"""
+    return await default_service.get(url, user_agent)
@@ -0,0 +1,200 @@
+"""Finds the statements that read whole tables, and the slow ones.
+
+``TimedSqliteDatabase`` hands every statement it runs to its ``QueryAuditor``,
+which files it under a fingerprint: the SQL with its literals and the length
+of its ``IN (...)`` lists taken out, so every run of the same peewee query
+counts as one statement whatever its parameters.
+
+Per fingerprint it keeps a count and the total and worst time. Statements
+slower than ``slow_seconds`` also go into a bounded slow-query log, with their
+parameters.
+
+The first time a fingerprint that filters rows (a SELECT, UPDATE or DELETE with
+a WHERE) is seen, the auditor asks SQLite how it would run it with
+``EXPLAIN QUERY PLAN`` and keeps the plan. A plan that visits every row of a
+table (``SCAN <table>`` without an index) makes it a scan, which an index on
+the filtered columns would turn into a ``SEARCH``. A statement without a WHERE
+reads the whole table by design, so it is not reported.
+
+Plans are captured once, so after adding an index ``reset()`` (or a restart)
+lets them be captured again.
+"""
+
+import collections
+import functools
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from utils import cache
+
+SLOW_LOG_SIZE = 100  # latest slow statements kept
+MAX_FINGERPRINTS = 500  # statements tracked; the least recently run go first
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+# "SCAN t", or "SCAN TABLE t" before SQLite 3.36; a scan "USING INDEX" reads
+# the index in order (for an ORDER BY) and is not reported
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?!.*\bUSING\b)')
+# peewee names its tables "t1", "t2"...; plans use those names
+_ALIAS_RE = re.compile(r'"?(\w+)"?\s+AS\s+"?(\w+)"?', re.IGNORECASE)
+
+_EXPLAINED_OPERATIONS = ("SELECT", "UPDATE", "DELETE")
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """``sql`` with literals replaced by ``?`` and ``IN`` lists collapsed, so
+    runs of one query with different parameters share a fingerprint"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(?...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def scanned_tables(plan: list[str], sql: str = "") -> list[str]:
+    """The tables an ``EXPLAIN QUERY PLAN`` of ``sql`` reads every row of"""
+    aliases = {alias: table for table, alias in _ALIAS_RE.findall(sql)}
+    return [aliases.get(m.group(1), m.group(1)) for m in map(_SCAN_RE.match, plan) if m]
+
+
+@dataclass
+class QueryStats:
+    fingerprint: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    #: the ``EXPLAIN QUERY PLAN`` details, or None if it was not explained
+    plan: Optional[list[str]] = None
+    #: tables the plan reads in full
+    scans: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 3),
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "plan": self.plan,
+            "scans": self.scans,
+        }
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    sql: str
+    params: tuple
+    seconds: float
+    at: float  # time.time()
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "params": [repr(p)[:100] for p in self.params],
+            "ms": round(self.seconds * 1000, 2),
+            "at": self.at,
+        }
+
+
+class QueryAuditor:
+    """Statement statistics, slow-query log and scan plans for one database.
+    See the module docstring."""
+
+    def __init__(
+        self,
+        slow_seconds: float = 0.1,
+        slow_log_size: int = SLOW_LOG_SIZE,
+        max_fingerprints: int = MAX_FINGERPRINTS,
+        explain: bool = True,
+    ):
+        self.slow_seconds = slow_seconds
+        self.explain = explain
+        self.since = time.time()
+        self._statements: cache.Cache[str, QueryStats] = cache.lru(
+            "db.query_audit", max_fingerprints
+        )
+        self._slow: collections.deque[SlowQuery] = collections.deque(
+            maxlen=slow_log_size
+        )
+        # statements come from the event loop and from worker threads
+        self._lock = threading.Lock()
+
+    def record(self, db, sql: str, params, seconds: float) -> None:
+        """Account for one run of ``sql`` that took ``seconds``, explaining it
+        on ``db`` if it is new"""
+        key = fingerprint(sql)
+        with self._lock:
+            # a hit is a statement seen before
+            stats = self._statements.get(key)
+            new = stats is None
+            if new:
+                stats = self._statements[key] = QueryStats(key)
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if seconds >= self.slow_seconds:
+                self._slow.append(
+                    SlowQuery(key, sql, tuple(params or ()), seconds, time.time())
+                )
+        if new and self.explain and self._filters_rows(sql):
+            plan = self._explain(db, sql, params)
+            with self._lock:
+                stats.plan = plan
+                stats.scans = scanned_tables(plan, sql) if plan else []
+
+    @staticmethod
+    def _filters_rows(sql: str) -> bool:
+        operation = sql.lstrip()[:6].upper()
+        return operation in _EXPLAINED_OPERATIONS and bool(_WHERE_RE.search(sql))
+
+    @staticmethod
+    def _explain(db, sql: str, params) -> Optional[list[str]]:
+        # straight on a cursor rather than through execute_sql, which would
+        # time and audit the EXPLAIN too
+        try:
+            cursor = db.cursor()
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, tuple(params or ()))
+            return [row[-1] for row in cursor.fetchall()]
+        except sqlite3.Error:
+            return None
+
+    def reset(self) -> None:
+        """Forget everything, so plans are captured afresh (after adding an
+        index, say)"""
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self.since = time.time()
+
+    # --- reports ------------------------------------------------------------
+
+    def statement_count(self) -> int:
+        return len(self._statements)
+
+    def _sorted(self) -> list[QueryStats]:
+        with self._lock:
+            found = [self._statements.peek(key) for key in self._statements]
+        return sorted(found, key=lambda s: s.total_seconds, reverse=True)
+
+    def scans(self, limit: Optional[int] = None) -> list[dict]:
+        """Statements whose plan reads a whole table, most time spent first"""
+        return [s.as_dict() for s in self._sorted() if s.scans][:limit]
+
+    def top(self, limit: Optional[int] = None) -> list[dict]:
+        """Statements by total time spent in them"""
+        return [s.as_dict() for s in self._sorted()[:limit]]
+
+    def slow_log(self, limit: Optional[int] = None) -> list[dict]:
+        """The slow-query log, newest first"""
+        with self._lock:
+            slow = list(reversed(self._slow))
+        return [q.as_dict() for q in slow[:limit]]
@@ -1,4 +1,5 @@
 from .dbmodels import RoundGameResult
+from .prefetch import AssetPool
 from .session import RoundGameSession
 
-__all__ = ["RoundGameSession", "RoundGameResult"]
+__all__ = ["AssetPool", "RoundGameSession", "RoundGameResult"]
@@ -23,3 +23,42 @@ class RoundGameResult(BaseModel):
             (("game_name", "guild_id", "user_id"), False),
             (("game_name", "game_id"), False),
         )
+
+
+class RoundGameTotal(BaseModel):
+    """All-time score per player, kept in step with ``RoundGameResult``"""
+
+    id = AutoField()
+    game_name = CharField()
+    guild_id = BigIntegerField()
+    scoring_version = IntegerField()
+    user_id = BigIntegerField()
+    total = FloatField(default=0)
+    games = IntegerField(default=0)
+
+    class Meta:
+        table_name = "round_game_totals"
+        indexes = (
+            (("game_name", "guild_id", "scoring_version", "user_id"), True),
+            (("game_name", "guild_id", "scoring_version", "total"), False),
+        )
+
+
+class RoundGameDailyTotal(BaseModel):
+    """Score per player per UTC day, for the today and week leaderboards"""
+
+    id = AutoField()
+    game_name = CharField()
+    guild_id = BigIntegerField()
+    scoring_version = IntegerField()
+    day = DateField()
+    user_id = BigIntegerField()
+    total = FloatField(default=0)
+    games = IntegerField(default=0)
+
+    class Meta:
+        table_name = "round_game_daily_totals"
+        indexes = (
+            (("game_name", "guild_id", "scoring_version", "day", "user_id"), True),
+            (("game_name", "guild_id", "scoring_version", "day", "total"), False),
+        )
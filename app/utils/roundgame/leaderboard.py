@@ -0,0 +1,165 @@
+"""Round game leaderboards, answered from rollups rather than raw results.
+
+Every finished game adds one ``RoundGameResult`` row per player. Summing those
+rows on each ``/leaderboard`` call costs more with every game ever played, so
+the totals are also kept in two rollup tables, updated in the same
+transaction as the raw rows:
+
+- ``RoundGameTotal``: one row per (game, guild, scoring version, player);
+- ``RoundGameDailyTotal``: the same, per UTC day.
+
+All time is then an indexed ``ORDER BY total DESC LIMIT 10``; today and this
+week sum at most seven daily buckets per player. ``RoundGameResult`` stays the
+source of truth, and ``rebuild`` regenerates the rollups from it.
+"""
+
+import datetime
+import uuid
+
+from peewee import EXCLUDED, chunked, fn
+
+from .dbmodels import RoundGameDailyTotal, RoundGameResult, RoundGameTotal
+
+PERIODS = {"all": "All Time", "today": "Today", "week": "This Week"}
+WEEK_DAYS = 7
+
+
+def record_results(
+    game_name: str,
+    game_id: uuid.UUID,
+    guild_id: int,
+    mode: str,
+    scoring_version: int,
+    scores: dict[int, float],
+    rounds_played: int,
+    played_at: datetime.datetime | None = None,
+) -> None:
+    """Store a finished game's scores and fold them into the rollups"""
+    played_at = played_at or datetime.datetime.utcnow()
+    key = {
+        "game_name": game_name,
+        "guild_id": guild_id,
+        "scoring_version": scoring_version,
+    }
+
+    with RoundGameResult._meta.database.atomic():
+        rows = [
+            {
+                **key,
+                "game_id": game_id,
+                "user_id": user_id,
+                "mode": mode,
+                "score": score,
+                "rounds_played": rounds_played,
+                "played_at": played_at,
+            }
+            for user_id, score in scores.items()
+        ]
+        # chunked so a large guild cannot blow past SQLite's bound-parameter limit
+        for batch in chunked(rows, 100):
+            RoundGameResult.insert_many(batch).execute()
+
+        for model, extra in (
+            (RoundGameTotal, {}),
+            (RoundGameDailyTotal, {"day": played_at.date()}),
+        ):
+            totals = [
+                {**key, **extra, "user_id": user_id, "total": score, "games": 1}
+                for user_id, score in scores.items()
+            ]
+            for batch in chunked(totals, 100):
+                model.insert_many(batch).on_conflict(
+                    conflict_target=_conflict_target(model),
+                    update={
+                        model.total: model.total + EXCLUDED.total,
+                        model.games: model.games + EXCLUDED.games,
+                    },
+                ).execute()
+
+
+def top_scores(
+    game_name: str,
+    guild_id: int,
+    scoring_version: int,
+    period: str = "all",
+    limit: int = 10,
+) -> list[tuple[int, float]]:
+    """The guild's best ``(user_id, total)`` pairs for ``period``, best first"""
+    if period == "all":
+        query = (
+            RoundGameTotal.select(RoundGameTotal.user_id, RoundGameTotal.total)
+            .where(
+                RoundGameTotal.game_name == game_name,
+                RoundGameTotal.guild_id == guild_id,
+                RoundGameTotal.scoring_version == scoring_version,
+            )
+            .order_by(RoundGameTotal.total.desc())
+            .limit(limit)
+        )
+        return [(row.user_id, row.total) for row in query]
+
+    days = 1 if period == "today" else WEEK_DAYS
+    since = datetime.datetime.utcnow().date() - datetime.timedelta(days=days - 1)
+    total = fn.SUM(RoundGameDailyTotal.total)
+    query = (
+        RoundGameDailyTotal.select(RoundGameDailyTotal.user_id, total.alias("total"))
+        .where(
+            RoundGameDailyTotal.game_name == game_name,
+            RoundGameDailyTotal.guild_id == guild_id,
+            RoundGameDailyTotal.scoring_version == scoring_version,
+            RoundGameDailyTotal.day >= since,
+        )
+        .group_by(RoundGameDailyTotal.user_id)
+        .order_by(total.desc())
+        .limit(limit)
+    )
+    return [(row.user_id, row.total) for row in query]
+
+
+def rebuild(game_name: str | None = None) -> int:
+    """Regenerate the rollups from ``RoundGameResult``.
+
+    Only ``game_name``'s rollups if given, otherwise every game's. Returns the
+    number of raw rows that were rolled up.
+    """
+    results = RoundGameResult.select()
+    if game_name:
+        results = results.where(RoundGameResult.game_name == game_name)
+    group = [
+        RoundGameResult.game_name,
+        RoundGameResult.guild_id,
+        RoundGameResult.scoring_version,
+        RoundGameResult.user_id,
+    ]
+    day = fn.date(RoundGameResult.played_at)
+
+    with RoundGameResult._meta.database.atomic():
+        for model in (RoundGameTotal, RoundGameDailyTotal):
+            delete = model.delete()
+            if game_name:
+                delete = delete.where(model.game_name == game_name)
+            delete.execute()
+
+        for model, buckets in ((RoundGameTotal, []), (RoundGameDailyTotal, [day])):
+            model.insert_from(
+                results.select(
+                    *group,
+                    *buckets,
+                    fn.SUM(RoundGameResult.score),
+                    fn.COUNT(RoundGameResult.id),
+                ).group_by(*group, *buckets),
+                [
+                    *(getattr(model, f.name) for f in group),
+                    *([model.day] if buckets else []),
+                    model.total,
+                    model.games,
+                ],
+            ).execute()
+        return results.count()
+
+
+def _conflict_target(model) -> list:
+    fields = [model.game_name, model.guild_id, model.scoring_version, model.user_id]
+    if model is RoundGameDailyTotal:
+        fields.append(model.day)
+    return fields
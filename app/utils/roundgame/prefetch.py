@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AssetPool(Generic[T]):
+    """A small stock of ready-made round assets, refilled in the background.
+
+    ``produce(count)`` makes up to ``count`` new items (a captcha challenge, a
+    location whose street view image is already on disk) and may return fewer,
+    or none when there is nothing left to make. Taking from the pool never
+    waits on production; it hands over whatever is ready and schedules a
+    refill, so the cost of preparing assets lands between games instead of at
+    the start of one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        produce: Callable[[int], Awaitable[list[T]]],
+        size: int,
+        batch: int = 1,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.name = name
+        self.produce = produce
+        self.size = size
+        self.batch = batch
+        self.logger = logger or logging.getLogger(__name__)
+        self._ready: deque[T] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.produced = 0
+        self.taken = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def peek(self) -> list[T]:
+        return list(self._ready)
+
+    def take(self, count: int) -> list[T]:
+        """Take up to ``count`` ready items, then top the pool back up"""
+        items = [self._ready.popleft() for _ in range(min(count, len(self._ready)))]
+        self.taken += len(items)
+        self.misses += count - len(items)
+        self.refill()
+        return items
+
+    def take_one(self) -> Optional[T]:
+        items = self.take(1)
+        return items[0] if items else None
+
+    def refill(self) -> None:
+        """Start topping the pool up, unless it is full or already refilling"""
+        if len(self._ready) >= self.size:
+            return
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._refill())
+
+    def clear(self) -> None:
+        self._ready.clear()
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+        self._ready.clear()
+
+    def stats(self) -> dict:
+        return {
+            "ready": len(self._ready),
+            "size": self.size,
+            "produced": self.produced,
+            "taken": self.taken,
+            "misses": self.misses,
+        }
+
+    async def _refill(self) -> None:
+        while len(self._ready) < self.size:
+            try:
+                items = await self.produce(
+                    min(self.batch, self.size - len(self._ready))
+                )
+            except Exception as e:
+                self.logger.warning(f"Failed to refill {self.name} pool: {e}")
+                return
+            if not items:
+                return
+            self._ready.extend(items)
+            self.produced += len(items)
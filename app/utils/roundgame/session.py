@@ -30,6 +30,8 @@ class RoundGameSession(Generic[TRound, TResult]):
         self.round_task: asyncio.Task | None = None
         self.warning_task: asyncio.Task | None = None
         self.skip_message: discord.Message | None = None
+        # round index -> task preparing that round's assets
+        self.prepared: dict[int, asyncio.Task] = {}
 
     def init(self, rounds: list[TRound]):
         self.rounds = rounds
@@ -48,6 +50,8 @@ class RoundGameSession(Generic[TRound, TResult]):
 
     def cancel(self):
         self.cancelled = True
+        for task in self.prepared.values():
+            task.cancel()
 
     def get_current_round(self) -> TRound | None:
         if self.current_round >= len(self.rounds):
@@ -23,13 +23,19 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING, Awaitable, Callable, Optional
 
 import discord
-from utils import apm
+from utils import apm, metrics
 
 if TYPE_CHECKING:
     from cogs.lancocog import LancoCog
 
 logger = logging.getLogger(__name__)
 
+ROUTER_STAGE_SECONDS = metrics.histogram(
+    "router_stage_duration_seconds",
+    "Time spent per routed candidate in each pipeline stage",
+    ["router", "stage"],
+)
+
 # Each intent targets one candidate level; the router only evaluates an intent
 # against candidates at or below its level. The order is broad -> specific: an
 # image candidate is also a file candidate, so it serves both file and image
@@ -189,38 +195,47 @@ class MessageRouter:
         intents: list[Intent],
         tag: str,
     ) -> None:
-        qualified: list[Intent] = [
-            i for i in intents if self._safe_predicate(i, candidate, message)
-        ]
+        router = type(self).__name__
+        with ROUTER_STAGE_SECONDS.time(router=router, stage="predicate"):
+            qualified: list[Intent] = [
+                i for i in intents if self._safe_predicate(i, candidate, message)
+            ]
         if not qualified:
             logger.debug("%s: nothing passed the %s gate", tag, candidate.level)
             return
-        logger.info(
+        logger.debug(
             "%s: %s qualified %s", tag, candidate.level, [i.name for i in qualified]
         )
 
-        if not await self._prepare(candidate):
+        with ROUTER_STAGE_SECONDS.time(router=router, stage="prepare"):
+            prepared = await self._prepare(candidate)
+        if not prepared:
             logger.warning("%s: prepare failed, skipping", tag)
             return
 
         try:
-            await self._enrich(qualified, candidate, message)
+            with ROUTER_STAGE_SECONDS.time(router=router, stage="enrich"):
+                await self._enrich(qualified, candidate, message)
             ctx: RouterContext = self._build_context(message, candidate)
 
-            scored: list[tuple[Intent, float]] = [
-                (intent, await self._safe_confidence(intent, ctx))
-                for intent in qualified
-            ]
-            logger.info("%s: scores=%s", tag, {i.name: round(s, 2) for i, s in scored})
+            with ROUTER_STAGE_SECONDS.time(router=router, stage="confidence"):
+                scored: list[tuple[Intent, float]] = [
+                    (intent, await self._safe_confidence(intent, ctx))
+                    for intent in qualified
+                ]
+            if logger.isEnabledFor(logging.DEBUG):
+                scores = {i.name: round(s, 2) for i, s in scored}
+                logger.debug("%s: scores=%s", tag, scores)
 
             winners: list[Intent] = self._arbitrate(scored)
             if not winners:
-                logger.info("%s: nothing cleared threshold", tag)
+                logger.debug("%s: nothing cleared threshold", tag)
                 return
             logger.info("%s: dispatching %s", tag, [i.name for i in winners])
 
-            for intent in winners:
-                await self._safe_process(intent, ctx)
+            with ROUTER_STAGE_SECONDS.time(router=router, stage="process"):
+                for intent in winners:
+                    await self._safe_process(intent, ctx)
         finally:
             self._cleanup(candidate)
 
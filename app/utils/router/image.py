@@ -104,7 +104,7 @@ class ImageRouter(FileRouter):
         ]
         if not questions:
             return
-        logger.info(
+        logger.debug(
             "one shared vision call for %d intent(s), questions=%s",
             sum(isinstance(i, ImageIntent) for i in qualified),
             sorted({q.key for q in questions}),
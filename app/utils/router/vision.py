@@ -15,6 +15,7 @@ from typing import Any, Optional
 
 from pydantic import BaseModel, Field, create_model
 from pydantic_ai import Agent, BinaryContent
+from utils import agents, cache
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +41,18 @@ class VisionQuestion:
     kind: str = "bool"
 
 
+#: Distinct question sets whose output model is kept; each is also one agent
+MAX_OUTPUT_MODELS = 32
+
+
 class VisionClassifier:
     def __init__(self, model: str = "openai:gpt-5-nano"):
         self.model: str = model
+        # the same questions always get the same output model, and so the
+        # same agent and the same schema in the request
+        self._output_models: cache.Cache[tuple, type[BaseModel]] = cache.lru(
+            "router.vision", MAX_OUTPUT_MODELS
+        )
 
     def _build_output_model(self, questions: list[VisionQuestion]) -> type[BaseModel]:
         fields: dict[str, tuple[Any, Any]] = {}
@@ -81,7 +91,10 @@ class VisionClassifier:
                 "deduped %d question(s) down to %d", len(questions), len(unique)
             )
 
-        output_model: type[BaseModel] = self._build_output_model(unique)
+        output_model: Optional[type[BaseModel]] = self._output_models.get(tuple(unique))
+        if output_model is None:
+            output_model = self._build_output_model(unique)
+            self._output_models[tuple(unique)] = output_model
         prompt_lines: list[str] = ["Answer the following about the image:"]
         for q in unique:
             prompt_lines.append(f"- {q.key}: {q.prompt}")
@@ -93,8 +106,8 @@ class VisionClassifier:
             [q.key for q in unique],
         )
 
-        agent: Agent = Agent(
-            model=self.model,
+        agent: Agent = agents.get_agent(
+            self.model,
             system_prompt="You are an image classifier. Answer precisely.",
             output_type=output_model,
         )
@@ -0,0 +1,129 @@
+"""Where startup time goes: ``poetry run dev --profile-startup``.
+
+Runs the bot's startup in a child interpreter with ``-X importtime``, loading
+every cog but never connecting to Discord, then prints:
+
+- each cog's import and setup/``cog_load`` time, slowest first;
+- the import tree, pruned to the modules whose cumulative import time is at
+  least ``THRESHOLD_MS``, so a heavy SDK shows up under the cog that pulled it
+  in.
+
+CPython's own import timer does the measuring; this module only turns its
+flat, post-ordered report back into a tree.
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable
+
+PROFILE_FLAG = "--profile-startup"
+#: Imports cheaper than this, in milliseconds, are left out of the tree
+THRESHOLD_MS = 15.0
+#: How many modules the "most self time" list names
+TOP_SELF = 15
+
+_PREFIX = "import time:"
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    children: list["ImportNode"] = field(default_factory=list)
+
+
+def parse_importtime(lines: Iterable[str]) -> list[ImportNode]:
+    """The top-level imports in ``-X importtime`` output, children attached.
+
+    A module is reported once its import finishes, so children come before
+    their parent, indented one level deeper.
+    """
+    # finished nodes waiting for their parent, by depth
+    pending: dict[int, list[ImportNode]] = {}
+    for line in lines:
+        if not line.startswith(_PREFIX):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len(_PREFIX) :].split("|", 2)
+            node = ImportNode(
+                name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000
+            )
+        except ValueError:
+            continue  # the header row
+        # one space after the separator, then two more per level of nesting
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def render(
+    nodes: list[ImportNode], threshold_ms: float = THRESHOLD_MS, depth: int = 0
+) -> list[str]:
+    lines = []
+    for node in sorted(nodes, key=lambda n: n.cumulative_ms, reverse=True):
+        if node.cumulative_ms < threshold_ms:
+            continue
+        lines.append(
+            f"{node.cumulative_ms:9.1f} {node.self_ms:9.1f}  {'  ' * depth}{node.name}"
+        )
+        lines.extend(render(node.children, threshold_ms, depth + 1))
+    return lines
+
+
+def _walk(nodes: list[ImportNode]) -> Iterable[ImportNode]:
+    for node in nodes:
+        yield node
+        yield from _walk(node.children)
+
+
+def report(nodes: list[ImportNode], threshold_ms: float = THRESHOLD_MS) -> str:
+    total = sum(node.cumulative_ms for node in nodes)
+    lines = [
+        f"Imports: {total:.0f} ms",
+        "",
+        f"{'cumul ms':>9} {'self ms':>9}  module (>= {threshold_ms:g} ms)",
+        *render(nodes, threshold_ms),
+        "",
+        "Most self time:",
+    ]
+    slowest = sorted(_walk(nodes), key=lambda n: n.self_ms, reverse=True)
+    lines += [f"{n.self_ms:9.1f}  {n.name}" for n in slowest[:TOP_SELF]]
+    return "\n".join(lines)
+
+
+def cog_report(results) -> str:
+    """Per-cog load times from ``LancoBot.load_cogs``, slowest first"""
+    lines = [f"{'total ms':>9} {'import':>9} {'setup':>9}  cog"]
+    for r in sorted(results, key=lambda r: r.total_ms, reverse=True):
+        status = "" if r.error is None else f"  ({r.status.name}: {r.error})"
+        lines.append(
+            f"{r.total_ms:9.1f} {r.import_ms or 0:9.1f} {r.setup_ms or 0:9.1f}"
+            f"  {r.name}{status}"
+        )
+    return "\n".join(lines)
+
+
+def profile() -> int:
+    """Profile startup in a child interpreter and print the report"""
+    child = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from app.run import profile_startup_child; profile_startup_child()",
+        ],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    timings, other = [], []
+    for line in child.stderr.splitlines():
+        (timings if line.startswith(_PREFIX) else other).append(line)
+    if other:
+        print("\n".join(other), file=sys.stderr)
+    print()
+    print(report(parse_importtime(timings)))
+    return child.returncode
@@ -0,0 +1,224 @@
+"""Local ledger of AI token usage, for ``/token-usage`` and ``/token-water``.
+
+Every agent run that goes through ``ai_utils.run_agent`` is recorded here with
+its model, cog, guild, input/cached/output tokens, latency and estimated cost.
+Calls are summed in memory per minute and written out every
+``FLUSH_INTERVAL`` as one upsert per (minute, model, cog, guild), so recording
+costs a dict update and the table grows by at most a few rows a minute.
+
+Reports read the table through its (minute, ...) index plus whatever has not
+been flushed yet, so they are local and current. The OpenAI usage API only
+knows totals for the whole account, per model; the ledger adds which cog and
+guild the tokens went to, and the API is left for reconciling the two.
+"""
+
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass, fields
+from typing import Optional
+
+from db import BaseModel
+from peewee import *
+from pydantic_ai.messages import ModelResponse
+
+logger = logging.getLogger(__name__)
+
+#: Seconds between writes of the in-memory totals
+FLUSH_INTERVAL = 60
+
+
+class TokenUsage(BaseModel):
+    minute = DateTimeField()  # UTC, truncated to the minute
+    model = CharField()
+    cog = CharField()
+    guild_id = BigIntegerField(default=0)  # 0 outside a guild
+    calls = IntegerField(default=0)
+    input_tokens = BigIntegerField(default=0)
+    cached_tokens = BigIntegerField(default=0)
+    output_tokens = BigIntegerField(default=0)
+    latency_ms = BigIntegerField(default=0)  # summed over calls
+    cost_usd = DoubleField(default=0)
+
+    class Meta:
+        table_name = "token_usage"
+        indexes = ((("minute", "model", "cog", "guild_id"), True),)
+
+
+@dataclass
+class Totals:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms: int = 0
+    cost_usd: float = 0.0
+
+    def add(self, other: "Totals") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_COLUMNS = [f.name for f in fields(Totals)]
+
+# (minute, model, cog, guild_id) -> totals not yet written
+_pending: dict[tuple, Totals] = {}
+_flusher: Optional[asyncio.Task] = None
+
+
+def _minute(when: datetime.datetime) -> datetime.datetime:
+    return when.replace(second=0, microsecond=0)
+
+
+def cost_of(messages) -> float:
+    """Estimated USD cost of the model responses in ``messages``; responses
+    from a model without known prices count as free"""
+    cost = 0.0
+    for message in messages:
+        if isinstance(message, ModelResponse) and message.model_name:
+            try:
+                cost += float(message.cost().total_price)
+            except Exception:
+                logger.debug(f"No price for {message.model_name}", exc_info=True)
+    return cost
+
+
+def record_usage(
+    model: str,
+    cog: str,
+    usage,
+    *,
+    guild_id: Optional[int] = None,
+    latency: float = 0.0,
+    cost: float = 0.0,
+) -> None:
+    """Add one call's ``RunUsage`` to the current minute's totals"""
+    key = (
+        _minute(datetime.datetime.utcnow()),
+        model,
+        cog,
+        guild_id or 0,
+    )
+    totals = _pending.setdefault(key, Totals())
+    totals.add(
+        Totals(
+            calls=1,
+            input_tokens=usage.input_tokens or 0,
+            cached_tokens=usage.cache_read_tokens or 0,
+            output_tokens=usage.output_tokens or 0,
+            latency_ms=round(latency * 1000),
+            cost_usd=cost,
+        )
+    )
+
+
+def _take() -> list[tuple[tuple, Totals]]:
+    # on the loop thread, so no call is recorded into a batch being written
+    global _pending
+    batch, _pending = list(_pending.items()), {}
+    return batch
+
+
+def _restore(batch: list[tuple[tuple, Totals]]) -> None:
+    # keep the totals for the next attempt rather than losing them
+    for key, totals in batch:
+        _pending.setdefault(key, Totals()).add(totals)
+
+
+def _write(batch: list[tuple[tuple, Totals]]) -> int:
+    rows = [
+        {
+            "minute": minute,
+            "model": model,
+            "cog": cog,
+            "guild_id": guild_id,
+            **{name: getattr(totals, name) for name in _COLUMNS},
+        }
+        for (minute, model, cog, guild_id), totals in batch
+    ]
+    if not rows:
+        return 0
+    with TokenUsage._meta.database.atomic():
+        TokenUsage.insert_many(rows).on_conflict(
+            conflict_target=[
+                TokenUsage.minute,
+                TokenUsage.model,
+                TokenUsage.cog,
+                TokenUsage.guild_id,
+            ],
+            update={
+                getattr(TokenUsage, name): getattr(TokenUsage, name) + EXCLUDED[name]
+                for name in _COLUMNS
+            },
+        ).execute()
+    return len(rows)
+
+
+async def flush() -> int:
+    """Write the pending totals, returning how many rows were upserted"""
+    batch = _take()
+    try:
+        return await asyncio.to_thread(_write, batch)
+    except Exception:
+        _restore(batch)
+        raise
+
+
+def usage_by(
+    column: str,
+    since: datetime.datetime,
+    guild_id: Optional[int] = None,
+) -> dict[str, Totals]:
+    """Totals since ``since`` (UTC), grouped by ``model``, ``cog`` or
+    ``guild_id``, including what has not been flushed yet. Blocking."""
+    pending = list(_pending.items())
+    group = getattr(TokenUsage, column)
+    query = TokenUsage.select(
+        group.alias("key"),
+        *(fn.SUM(getattr(TokenUsage, name)).alias(name) for name in _COLUMNS),
+    ).where(TokenUsage.minute >= _minute(since))
+    if guild_id is not None:
+        query = query.where(TokenUsage.guild_id == guild_id)
+
+    result: dict[str, Totals] = {}
+    for row in query.group_by(group).dicts():
+        key = row.pop("key")
+        result[key] = Totals(**{k: v or 0 for k, v in row.items()})
+
+    index = ("minute", "model", "cog", "guild_id").index(column)
+    for key, totals in pending:
+        if key[0] >= _minute(since) and guild_id in (None, key[3]):
+            result.setdefault(key[index], Totals()).add(totals)
+    return result
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await flush()
+        except Exception as e:
+            logger.warning(f"Failed to write token usage, will retry: {e}")
+
+
+def start(database) -> None:
+    """Create the table and start writing usage out, once per process"""
+    global _flusher
+    database.create_tables([TokenUsage])
+    if _flusher is None:
+        _flusher = asyncio.get_running_loop().create_task(_flush_periodically())
+
+
+async def stop() -> None:
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        _flusher = None
+    try:
+        await flush()
+    except Exception as e:
+        logger.warning(f"Failed to write token usage on shutdown: {e}")
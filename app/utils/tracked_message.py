@@ -1,4 +1,5 @@
 from functools import wraps
+from typing import Optional
 
 import discord
 from db import BaseModel
@@ -17,10 +18,21 @@ def create_tables():
     BaseModel._meta.database.create_tables([TrackedMessage])
 
 
+# every tracked message ID, loaded on first use; lookups happen on each reply
+_tracked_ids: Optional[set[int]] = None
+
+
+def _tracked() -> set[int]:
+    global _tracked_ids
+    if _tracked_ids is None:
+        create_tables()
+        _tracked_ids = {row.message_id for row in TrackedMessage.select()}
+    return _tracked_ids
+
+
 def is_message_tracked(message_id: int) -> bool:
     """Check if a message is tracked"""
-    create_tables()
-    return TrackedMessage.get_or_none(message_id=message_id)
+    return message_id in _tracked()
 
 
 def track_message_ids():
@@ -29,7 +41,7 @@ def track_message_ids():
     def decorator(func):
         @wraps(func)
         async def wrapper(self, ctx, *args, **kwargs):
-            create_tables()
+            tracked = _tracked()
 
             # Call the original command
             result = await func(self, ctx, *args, **kwargs)
@@ -37,6 +49,7 @@ def track_message_ids():
             # After the command execution, track the message ID
             if result and isinstance(result, discord.Message):
                 TrackedMessage.create(message_id=result.id)
+                tracked.add(result.id)
 
             return result
 
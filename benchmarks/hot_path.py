@@ -0,0 +1,523 @@
+"""Benchmark of the message hot path.
+
+Boots a real ``LancoBot`` on dpytest's fake gateway, with an in-memory
+database, every cog that loads without credentials, model calls answered by
+pydantic-ai's ``TestModel`` and HTTP answered by ``benchmarks.upstream``. It
+then replays a synthetic trace (``benchmarks.trace``) through the real
+listeners and the ``ImageRouter``, one event at a time, and reports:
+
+- events per second, and per-event latency (p50/p90/p99/max), overall and by
+  kind of event;
+- event loop lag and stalls, from ``utils.loop_health``;
+- database statements per event, and the statements issued most;
+- requests that reached the fake upstream.
+
+Latency is the time from the event being dispatched until every listener it
+woke has finished. Compare against a saved run to prove a change:
+
+    poetry run bench --baseline benchmarks/baseline.json
+    poetry run bench --events 5000 --output after.json --baseline before.json
+
+Timings depend on the machine; statements per event do not, so they are the
+numbers to hold a change to when the baseline came from elsewhere.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_DIR, "app")
+COGS_DIR = os.path.join(APP_DIR, "cogs")
+
+# Before anything imports main: no dotenv, no real database
+os.environ.setdefault("BOT_ENV", "test")
+os.environ.setdefault("DB_TYPE", "sqlite")
+os.environ.setdefault("SQLITE_DB", ":memory:")
+os.environ.setdefault("PYDANTIC_AI_NO_BANNER", "1")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from benchmarks import trace as synthetic  # noqa: E402
+from benchmarks.upstream import FakeUpstream, redirect  # noqa: E402
+
+DEFAULT_EVENTS = 2000
+DEFAULT_WARMUP = 50
+#: Cogs left out by default: the webserver binds a port
+DEFAULT_EXCLUDE = ("webserver",)
+#: Messages per channel dpytest keeps; reactions target the last few
+KEEP_MESSAGES = 50
+#: Statements listed in the report, most issued first
+TOP_STATEMENTS = 10
+
+# report keys compared against a baseline, and whether lower is better
+COMPARED = {
+    "events_per_sec": False,
+    "latency_ms.p50": True,
+    "latency_ms.p99": True,
+    "db_statements_per_event": True,
+    "loop_lag_ms.p99": True,
+}
+
+
+def _percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return round(ordered[index], 3)
+
+
+def _latency(values: list[float]) -> dict:
+    return {
+        "p50": _percentile(values, 0.5),
+        "p90": _percentile(values, 0.9),
+        "p99": _percentile(values, 0.99),
+        "max": round(max(values), 3) if values else None,
+        "mean": round(sum(values) / len(values), 3) if values else None,
+    }
+
+
+def _lag(histogram: dict) -> dict:
+    # the monitor's quantiles are bucket bounds; none is above the worst seen
+    worst = histogram.get("max_ms")
+    quantiles = {q: histogram.get(f"{q}_ms") for q in ("p50", "p99")}
+    return {
+        **{
+            q: min(value, worst) if None not in (value, worst) else value
+            for q, value in quantiles.items()
+        },
+        "max": worst,
+    }
+
+
+def _statements() -> Counter:
+    """Statements executed so far, by (operation, table)"""
+    from db import QUERY_SECONDS
+
+    return Counter(
+        {key: sum(child.counts) for key, child in list(QUERY_SECONDS._children.items())}
+    )
+
+
+@contextmanager
+def offline_agents():
+    """Answer every agent from pydantic-ai's TestModel instead of a provider"""
+    import pydantic_ai.models
+    from utils import agents
+
+    build, allowed = agents.get_agent, pydantic_ai.models.ALLOW_MODEL_REQUESTS
+
+    def get_agent(model, **kwargs):
+        return build("test", **kwargs)
+
+    pydantic_ai.models.ALLOW_MODEL_REQUESTS = False
+    agents.get_agent = get_agent
+    try:
+        yield
+    finally:
+        agents.get_agent = build
+        pydantic_ai.models.ALLOW_MODEL_REQUESTS = allowed
+
+
+@contextmanager
+def _environment(**values: str):
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def _working_directory(path: str):
+    # cogs write their data directories, and dpytest the files the bot sends,
+    # relative to the working directory
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+async def boot(cogs: Optional[list[str]], exclude: list[str], cache_dir: str):
+    """A bot on dpytest's fake gateway, with cogs loaded and channels set up"""
+    import discord
+    import discord.ext.test as dpytest
+    import main
+    from db import TimedSqliteDatabase, database_proxy
+    from discord.ext.test import backend
+    from utils.config import GuildConfig
+
+    # shared cache, so work handed to threads sees the same tables
+    database = TimedSqliteDatabase(
+        "file:benchmark?mode=memory&cache=shared", uri=True, check_same_thread=False
+    )
+    database_proxy.initialize(database)
+    database.create_tables([main.BlacklistedUser, GuildConfig])
+
+    bot = main.LancoBot(
+        command_prefix=main.get_prefix,
+        intents=discord.Intents.all(),
+        owner_id=1,
+        max_messages=1000,
+    )
+    bot.database = database
+    bot.router.cache_dir = cache_dir
+    await bot._async_setup_hook()
+    dpytest.configure(
+        bot, text_channels=synthetic.CHANNELS, members=synthetic.MEMBER_COUNT
+    )
+    # dpytest's state predates discord.py keeping the loop there, which
+    # channel.typing() needs
+    backend.get_state().loop = asyncio.get_running_loop()
+    await bot.setup_hook()
+    main.COGS_DIR = COGS_DIR
+    with _environment(
+        COG_WHITELIST=",".join(cogs or ()), COG_BLACKLIST=",".join(exclude)
+    ):
+        results = await bot.load_cogs()
+    _configure_guild(bot)
+    return bot, database, results
+
+
+def _configure_guild(bot) -> None:
+    """Set the guild up like an active one: counting and R9K channels, and
+    PDF previews through the router. Web previews stay off; they wait three
+    seconds for Discord's own embed before doing anything."""
+    guild = bot.guilds[0]
+    channels = {c.name: c for c in guild.text_channels}
+    if bot.is_cog_loaded("counter"):
+        from cogs.counter.models import CounterConfig
+
+        CounterConfig.create(
+            guild_id=guild.id, channel_id=channels[synthetic.COUNTING].id
+        )
+    if bot.is_cog_loaded("r9k"):
+        from cogs.r9k.models import R9KConfig
+
+        R9KConfig.create(guild_id=guild.id, channel_id=channels[synthetic.R9K].id)
+    if bot.is_cog_loaded("pdfpreview"):
+        from cogs.pdfpreview.models import PDFPreviewConfig
+
+        PDFPreviewConfig.create(guild_id=guild.id, enabled=True, virus_check=False)
+
+
+async def _react(member, message, emoji: str) -> None:
+    """``dpytest.add_reaction``, with the fields discord.py 2.x expects"""
+    import discord.ext.test as dpytest
+    from discord.ext.test import backend, factories
+
+    state = backend.get_state()
+    state.parse_message_reaction_add(
+        {
+            "message_id": message.id,
+            "channel_id": message.channel.id,
+            "guild_id": message.guild.id,
+            "user_id": member.id,
+            "member": factories.dict_from_member(member),
+            "message_author_id": message.author.id,
+            "emoji": {"id": None, "name": emoji},
+            "type": 0,
+            "burst": False,
+            "burst_colors": [],
+        }
+    )
+    await dpytest.run_all_events()
+
+
+async def replay(bot, events: list[synthetic.Event], warmup: int) -> dict:
+    """Dispatch ``events`` in order, measuring everything after ``warmup``"""
+    import discord.ext.test as dpytest
+    from discord.ext.test import backend
+    from utils import loop_health
+
+    guild = bot.guilds[0]
+    channels = {c.name: c for c in guild.text_channels}
+    members = [m for m in guild.members if not m.bot]
+    recent: deque = deque(maxlen=20)
+
+    latencies: list[float] = []
+    by_kind: dict[str, list[float]] = defaultdict(list)
+    statements_by_kind: Counter = Counter()
+    errors: Counter = Counter()
+    statements_start = None
+    started = None
+
+    for index, event in enumerate(events):
+        if index == warmup:
+            if loop_health.monitor is not None:
+                loop_health.monitor.lag = loop_health.Histogram()
+                loop_health.monitor.sites.clear()
+                loop_health.monitor.recent.clear()
+            statements_start = _statements()
+            started = time.perf_counter()
+
+        member = members[event.member % len(members)]
+        before = sum(_statements().values())
+        start = time.perf_counter()
+        try:
+            if event.kind == "reaction":
+                if len(recent) < event.target:
+                    continue
+                await _react(member, recent[-event.target], event.emoji)
+            else:
+                content = event.content
+                if event.kind == "mention":
+                    content = f"<@{bot.user.id}> {content}"
+                message = await dpytest.message(
+                    content,
+                    channel=channels[event.channel],
+                    member=member,
+                    attachments=event.attachments or None,
+                )
+                recent.append(message)
+        except Exception as e:
+            errors[f"{event.kind}: {type(e).__name__}"] += 1
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if index >= warmup:
+            latencies.append(elapsed)
+            by_kind[event.kind].append(elapsed)
+            statements_by_kind[event.kind] += sum(_statements().values()) - before
+        # what the bot sent is not needed, and would only pile up; nor is
+        # dpytest's copy of every message, which it searches linearly
+        await dpytest.empty_queue()
+        for stored in backend._cur_config.messages.values():
+            del stored[:-KEEP_MESSAGES]
+
+    duration = time.perf_counter() - started if started else 0.0
+    statements = _statements() - (statements_start or Counter())
+    measured = len(latencies)
+    lag = loop_health.snapshot() or {}
+
+    return {
+        "events": measured,
+        "duration_s": round(duration, 3),
+        "events_per_sec": round(measured / duration, 1) if duration else None,
+        "latency_ms": _latency(latencies),
+        "by_kind": {
+            kind: {
+                "count": len(values),
+                **_latency(values),
+                "db_statements_per_event": round(
+                    statements_by_kind[kind] / len(values), 2
+                ),
+            }
+            for kind, values in sorted(by_kind.items())
+        },
+        "db_statements_per_event": (
+            round(sum(statements.values()) / measured, 2) if measured else None
+        ),
+        "db_top_statements": [
+            {"statement": f"{operation} {table}".strip(), "count": count}
+            for (operation, table), count in statements.most_common(TOP_STATEMENTS)
+        ],
+        "loop_lag_ms": _lag(lag.get("lag", {})),
+        "loop_stalls": lag.get("stalls", 0),
+        "loop_stall_sites": lag.get("stall_sites", []),
+        "errors": dict(errors),
+    }
+
+
+async def run(
+    events: int = DEFAULT_EVENTS,
+    seed: int = 0,
+    warmup: int = DEFAULT_WARMUP,
+    cogs: Optional[list[str]] = None,
+    exclude: list[str] = DEFAULT_EXCLUDE,
+    upstream_latency: float = 0.0,
+) -> dict:
+    """Boot the bot, replay a trace of ``events`` after ``warmup`` more, and
+    return the report"""
+    import discord.ext.test as dpytest
+    from utils import http, loop_health, token_tracker
+
+    upstream = FakeUpstream(latency=upstream_latency).start()
+    try:
+        with ExitStack() as stack:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+            stack.enter_context(_working_directory(workdir))
+            stack.enter_context(offline_agents())
+            stack.enter_context(redirect(upstream))
+            bot, database, results = await boot(
+                cogs, list(exclude), os.path.join(workdir, "cache")
+            )
+            try:
+                trace = synthetic.generate(warmup + events, seed)
+                report = await replay(bot, trace, warmup)
+            finally:
+                for cog in list(bot.cogs.values()):
+                    await bot.remove_cog(cog.qualified_name)
+                await dpytest.empty_queue()
+                await http.close_sessions()
+                await token_tracker.stop()
+                await loop_health.stop()
+                database.close()
+    finally:
+        upstream.stop()
+
+    loaded = [r.name for r in results if r.error is None]
+    report["upstream_requests"] = upstream.requests
+    report["cogs_loaded"] = len(loaded)
+    report["cogs_failed"] = sorted(r.name for r in results if r.error is not None)
+    report["environment"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "warmup": warmup,
+        "upstream_latency_ms": upstream_latency * 1000,
+    }
+    return report
+
+
+def _lookup(report: dict, dotted: str):
+    value = report
+    for key in dotted.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(report: dict, baseline: dict) -> list[dict]:
+    """Each compared metric, with its change against ``baseline`` as a
+    percentage that is positive when the current run is worse"""
+    rows = []
+    for metric, lower_is_better in COMPARED.items():
+        current, before = _lookup(report, metric), _lookup(baseline, metric)
+        if current is None or not before:
+            continue
+        change = (current - before) / before * 100
+        rows.append(
+            {
+                "metric": metric,
+                "baseline": before,
+                "current": current,
+                "regression_pct": round(change if lower_is_better else -change, 1),
+            }
+        )
+    return rows
+
+
+def _print_report(report: dict, comparison: list[dict]) -> None:
+    latency = report["latency_ms"]
+    print(
+        f"{report['events']} events in {report['duration_s']}s: "
+        f"{report['events_per_sec']} events/s"
+    )
+    print(
+        f"latency ms  p50 {latency['p50']}  p90 {latency['p90']}  "
+        f"p99 {latency['p99']}  max {latency['max']}"
+    )
+    for kind, stats in report["by_kind"].items():
+        print(
+            f"  {kind:<10} n={stats['count']:<5} p50 {stats['p50']:<8} "
+            f"p99 {stats['p99']:<8} db/event {stats['db_statements_per_event']}"
+        )
+    lag = report["loop_lag_ms"]
+    print(
+        f"loop lag ms  p50 {lag['p50']}  p99 {lag['p99']}  max {lag['max']}  "
+        f"stalls {report['loop_stalls']}"
+    )
+    print(f"db statements/event {report['db_statements_per_event']}")
+    for row in report["db_top_statements"]:
+        print(f"  {row['count']:>7}  {row['statement']}")
+    print(
+        f"cogs loaded {report['cogs_loaded']}, upstream requests "
+        f"{report['upstream_requests']}"
+    )
+    if report["errors"]:
+        print(f"errors {report['errors']}")
+    if comparison:
+        print("\nagainst baseline (positive is worse):")
+        for row in comparison:
+            print(
+                f"  {row['metric']:<26} {row['baseline']:>10} -> "
+                f"{row['current']:<10} {row['regression_pct']:+.1f}%"
+            )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--cogs", help="Comma-separated cogs to load (default: every cog)"
+    )
+    parser.add_argument(
+        "--exclude",
+        default=",".join(DEFAULT_EXCLUDE),
+        help="Comma-separated cogs to leave out",
+    )
+    parser.add_argument(
+        "--upstream-latency",
+        type=float,
+        default=0.0,
+        help="Milliseconds the fake upstream holds each response",
+    )
+    parser.add_argument("--output", help="Write the report as JSON here")
+    parser.add_argument("--baseline", help="Compare against this saved report")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="Exit non-zero if a compared metric is this many percent worse",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        help="Root log level while replaying (production runs at INFO)",
+    )
+    args = parser.parse_args(argv)
+
+    import main as bot_main  # noqa: F401  (configures logging)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    report = asyncio.run(
+        run(
+            events=args.events,
+            seed=args.seed,
+            warmup=args.warmup,
+            cogs=args.cogs.split(",") if args.cogs else None,
+            exclude=[c for c in args.exclude.split(",") if c],
+            upstream_latency=args.upstream_latency / 1000,
+        )
+    )
+
+    comparison = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparison = compare(report, json.load(f))
+        report["comparison"] = comparison
+    _print_report(report, comparison)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.max_regression is not None:
+        worst = [r for r in comparison if r["regression_pct"] > args.max_regression]
+        if worst:
+            print(f"\n{len(worst)} metric(s) regressed past {args.max_regression}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Synthetic gateway traffic for the hot-path benchmark.
+
+A trace is a seeded, reproducible list of events shaped like a busy guild:
+mostly chatter, with links the embed fixers and previewers pick up, image and
+file attachments for the router, a counting channel, an R9K channel with the
+occasional repeat, mentions of the bot, and reactions on recent messages.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Text channels created in the fake guild, in dpytest's configuration order
+GENERAL, LINKS, COUNTING, R9K = "general", "links", "counting", "r9k"
+CHANNELS = [GENERAL, LINKS, COUNTING, R9K]
+MEMBER_COUNT = 8
+
+#: Relative frequency of each kind of event
+MIX = {
+    "chat": 50,
+    "url": 12,
+    "attachment": 8,
+    "counter": 8,
+    "r9k": 8,
+    "mention": 4,
+    "reaction": 10,
+}
+
+URLS = [
+    "https://www.lancasteronline.com/news/local/story_{n}.html",
+    "https://twitter.com/someone/status/17{n:08d}",
+    "https://x.com/someone/status/18{n:08d}",
+    "https://www.reddit.com/r/lancaster/comments/{n:x}/a_post/",
+    "https://www.tiktok.com/@someone/video/73{n:08d}",
+    "https://www.instagram.com/p/C{n:07d}/",
+    "https://open.spotify.com/track/{n:022d}",
+    "https://www.youtube.com/watch?v=v{n:010d}",
+    "https://example.com/blog/{n}",
+]
+ATTACHMENTS = [
+    "https://cdn.discordapp.com/attachments/1/{n}/photo.png",
+    "https://cdn.discordapp.com/attachments/1/{n}/IMG_{n}.jpg",
+    "https://cdn.discordapp.com/attachments/1/{n}/meme.gif",
+    "https://cdn.discordapp.com/attachments/1/{n}/notes.txt",
+    "https://cdn.discordapp.com/attachments/1/{n}/flyer.pdf",
+]
+WORDS = (
+    "the a lancaster pretzel market bus rain weekend coffee game tonight "
+    "anyone know where good food park downtown traffic work lunch dog cat "
+    "lol yeah no maybe tomorrow new open closed really nice terrible"
+).split()
+EMOJI = ["👍", "😂", "❤️", "🔥", "👀", "⭐"]
+
+
+@dataclass
+class Event:
+    kind: str
+    channel: str
+    member: int
+    content: str = ""
+    attachments: list[str] = field(default_factory=list)
+    #: for reactions: how many messages back the reacted-to message is
+    target: Optional[int] = None
+    emoji: Optional[str] = None
+
+
+def _sentence(rng: random.Random, low: int = 3, high: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def generate(count: int, seed: int = 0) -> list[Event]:
+    """``count`` events, the same ones for the same seed"""
+    rng = random.Random(seed)
+    kinds, weights = zip(*MIX.items())
+    events: list[Event] = []
+    count_next = 1
+    r9k_said: list[str] = []
+
+    for n in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        member = rng.randrange(MEMBER_COUNT)
+        if kind == "reaction" and not events:
+            kind = "chat"
+
+        if kind == "chat":
+            events.append(Event(kind, GENERAL, member, _sentence(rng)))
+        elif kind == "url":
+            url = rng.choice(URLS).format(n=n)
+            content = f"{_sentence(rng, 0, 6)} {url}".strip()
+            events.append(Event(kind, LINKS, member, content))
+        elif kind == "attachment":
+            url = rng.choice(ATTACHMENTS).format(n=n)
+            events.append(
+                Event(kind, GENERAL, member, _sentence(rng, 0, 4), attachments=[url])
+            )
+        elif kind == "counter":
+            # mostly right, now and then someone breaks the streak
+            if rng.random() < 0.05:
+                number = count_next + rng.randint(2, 9)
+                count_next = 1
+            else:
+                number = count_next
+                count_next += 1
+            events.append(Event(kind, COUNTING, member, str(number)))
+        elif kind == "r9k":
+            if r9k_said and rng.random() < 0.15:
+                content = rng.choice(r9k_said)
+            else:
+                content = _sentence(rng)
+                r9k_said.append(content)
+            events.append(Event(kind, R9K, member, content))
+        elif kind == "mention":
+            events.append(Event(kind, GENERAL, member, _sentence(rng, 2, 10)))
+        else:
+            events.append(
+                Event(
+                    kind,
+                    GENERAL,
+                    member,
+                    target=rng.randint(1, 10),
+                    emoji=rng.choice(EMOJI),
+                )
+            )
+    return events
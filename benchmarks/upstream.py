@@ -0,0 +1,127 @@
+"""A stand-in for the internet, so the benchmark measures the bot and not it.
+
+``FakeUpstream`` serves canned responses from its own thread and event loop,
+and ``redirect`` patches aiohttp so that every request the bot makes, through
+a pooled ``utils.http`` session or a throwaway one, goes there instead:
+``https://x.com/a?b=1`` is fetched as ``http://127.0.0.1:<port>/https/x.com/a?b=1``.
+Responses are real aiohttp responses, so parsing and error handling run as
+they would in production.
+"""
+
+import asyncio
+import base64
+import mimetypes
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+# 1x1 transparent PNG
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+PDF = (
+    b"%PDF-1.1\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 100 100]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+HTML = """<!doctype html><html><head>
+<title>{title}</title>
+<meta property="og:title" content="{title}">
+<meta property="og:description" content="A page served to the benchmark.">
+<meta property="og:image" content="https://cdn.example.com/preview.png">
+<meta property="og:url" content="{url}">
+</head><body><p>{title}</p></body></html>"""
+
+
+class FakeUpstream:
+    def __init__(self, latency: float = 0.0):
+        #: seconds each response is held, to stand in for network time
+        self.latency = latency
+        self.requests = 0
+        self.port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        url = request.match_info["url"]
+        path = urlsplit(f"//{url}").path
+        content_type, _ = mimetypes.guess_type(path)
+
+        if content_type and content_type.startswith("image/"):
+            return web.Response(body=PNG, content_type="image/png")
+        if content_type == "application/pdf":
+            return web.Response(body=PDF, content_type="application/pdf")
+        if content_type == "text/plain":
+            return web.Response(text="some notes\n" * 20)
+        if "json" in request.headers.get("Accept", "") or "/api" in path:
+            return web.json_response({})
+        title = path.strip("/").replace("/", " ") or "home"
+        return web.Response(
+            text=HTML.format(title=title, url=url), content_type="text/html"
+        )
+
+    def start(self) -> "FakeUpstream":
+        started = threading.Event()
+
+        async def serve():
+            app = web.Application()
+            app.router.add_route("*", "/{url:.*}", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = self._runner.addresses[0][1]
+            started.set()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-upstream", daemon=True)
+        self._thread.start()
+        started.wait(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def rewrite(self, url) -> str:
+        parts = urlsplit(str(url))
+        if parts.hostname in ("127.0.0.1", "localhost"):
+            return str(url)
+        query = f"?{parts.query}" if parts.query else ""
+        return (
+            f"http://127.0.0.1:{self.port}/{parts.scheme}/{parts.netloc}"
+            f"{parts.path}{query}"
+        )
+
+
+@contextmanager
+def redirect(upstream: FakeUpstream):
+    """Send every aiohttp request to ``upstream`` while active"""
+    original = aiohttp.ClientSession._request
+
+    async def _request(self, method, str_or_url, **kwargs):
+        kwargs.pop("ssl", None)
+        kwargs.pop("proxy", None)
+        return await original(self, method, upstream.rewrite(str_or_url), **kwargs)
+
+    aiohttp.ClientSession._request = _request
+    try:
+        yield upstream
+    finally:
+        aiohttp.ClientSession._request = original
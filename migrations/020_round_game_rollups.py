@@ -0,0 +1,93 @@
+"""Add leaderboard rollup tables for round games and backfill them."""
+
+from peewee import (
+    AutoField,
+    BigIntegerField,
+    CharField,
+    DateField,
+    FloatField,
+    IntegerField,
+    Model,
+)
+
+from migrations.helpers import MigrationContext
+
+
+class RoundGameTotal(Model):
+    id = AutoField()
+    game_name = CharField()
+    guild_id = BigIntegerField()
+    scoring_version = IntegerField()
+    user_id = BigIntegerField()
+    total = FloatField(default=0)
+    games = IntegerField(default=0)
+
+    class Meta:
+        table_name = "round_game_totals"
+
+
+class RoundGameDailyTotal(Model):
+    id = AutoField()
+    game_name = CharField()
+    guild_id = BigIntegerField()
+    scoring_version = IntegerField()
+    day = DateField()
+    user_id = BigIntegerField()
+    total = FloatField(default=0)
+    games = IntegerField(default=0)
+
+    class Meta:
+        table_name = "round_game_daily_totals"
+
+
+def upgrade(ctx: MigrationContext) -> None:
+    ctx.create_table(RoundGameTotal)
+    ctx.create_table(RoundGameDailyTotal)
+
+    # names match what peewee derives from the app models' Meta.indexes, so
+    # the cogs' create_tables does not add a second copy of each
+    ctx.create_index(
+        "round_game_totals",
+        "roundgametotal_game_name_guild_id_scoring_version_user_id",
+        ["game_name", "guild_id", "scoring_version", "user_id"],
+        unique=True,
+    )
+    ctx.create_index(
+        "round_game_totals",
+        "roundgametotal_game_name_guild_id_scoring_version_total",
+        ["game_name", "guild_id", "scoring_version", "total"],
+    )
+    ctx.create_index(
+        "round_game_daily_totals",
+        "roundgamedailytotal_game_name_guild_id_scoring_version_d_76645c7",
+        ["game_name", "guild_id", "scoring_version", "day", "user_id"],
+        unique=True,
+    )
+    ctx.create_index(
+        "round_game_daily_totals",
+        "roundgamedailytotal_game_name_guild_id_scoring_version_day_total",
+        ["game_name", "guild_id", "scoring_version", "day", "total"],
+    )
+
+    # the cogs may have created the rollups, and recorded games into them,
+    # before this ran; every game is in round_game_results as well, so rebuild
+    # them from it rather than trusting what is there
+    if not ctx.table_exists("round_game_results"):
+        return
+    ctx.execute("DELETE FROM round_game_totals")
+    ctx.execute("DELETE FROM round_game_daily_totals")
+    ctx.execute(
+        "INSERT INTO round_game_totals "
+        "(game_name, guild_id, scoring_version, user_id, total, games) "
+        "SELECT game_name, guild_id, scoring_version, user_id, SUM(score), COUNT(*) "
+        "FROM round_game_results "
+        "GROUP BY game_name, guild_id, scoring_version, user_id"
+    )
+    ctx.execute(
+        "INSERT INTO round_game_daily_totals "
+        "(game_name, guild_id, scoring_version, day, user_id, total, games) "
+        "SELECT game_name, guild_id, scoring_version, date(played_at), user_id, "
+        "SUM(score), COUNT(*) "
+        "FROM round_game_results "
+        "GROUP BY game_name, guild_id, scoring_version, date(played_at), user_id"
+    )
@@ -0,0 +1,28 @@
+"""Tag geoguesser locations with the population run that produced them."""
+
+from peewee import CharField, DateTimeField, IntegerField, Model, UUIDField
+
+from migrations.helpers import MigrationContext
+
+
+class GeoguesserPopulation(Model):
+    id = UUIDField(primary_key=True)
+    mode = CharField()
+    target = IntegerField()
+    completed = IntegerField(default=0)
+    status = CharField(default="running")
+    started_at = DateTimeField()
+    finished_at = DateTimeField(null=True)
+
+    class Meta:
+        table_name = "geoguesser_populations"
+
+
+def upgrade(ctx: MigrationContext) -> None:
+    ctx.add_columns("geoguesser_locations", generation=UUIDField(null=True))
+    ctx.create_index(
+        "geoguesser_locations",
+        "geoguesserlocation_mode_generation",
+        ["mode", "generation"],
+    )
+    ctx.create_table(GeoguesserPopulation)
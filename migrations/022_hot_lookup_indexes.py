@@ -0,0 +1,36 @@
+"""Index the columns the bot's frequent lookups filter on.
+
+Each of these was a full table scan in the query audit (/queryaudit). The
+names match what Peewee derives from the models' declarations, so the schema
+check at startup sees them as present.
+
+custom_commands (guild_id, command_name) and rss_feed_config (channel_id, url)
+are already covered by their composite primary keys.
+"""
+
+from migrations.helpers import MigrationContext
+
+INDEXES = [
+    # reacttrack: a member's reactions in a guild over the last day
+    (
+        "react_events",
+        "reactevent_guild_id_user_id_timestamp",
+        ["guild_id", "user_id", "timestamp"],
+    ),
+    # redditfeed: known posts per subreddit, and recent ones for refreshes
+    ("reddit_post", "redditpost_subreddit_created", ["subreddit", "created"]),
+    # autoresponse / autoreact: every guild message looks up its guild's config
+    ("auto_response", "autoresponseconfig_guild_id", ["guild_id"]),
+    ("auto_react", "autoreactconfig_guild_id", ["guild_id"]),
+    # ScheduledPost: the posts due, polled every 30 seconds
+    ("scheduled_posts", "scheduledpost_next_run_at", ["next_run_at"]),
+    # fishbowl: every message looks up its channel's config
+    ("fishbowl_config", "fishbowlconfig_channel_id", ["channel_id"]),
+    # remindme: the pending reminders
+    ("user_reminders", "reminder_issued", ["issued"]),
+]
+
+
+def upgrade(ctx: MigrationContext) -> None:
+    for table, name, columns in INDEXES:
+        ctx.create_index(table, name, columns)
@@ -1,5 +1,8 @@
+import atexit
 import os
+import shutil
 import sys
+import tempfile
 
 # Set before any app import triggers DB init. BOT_ENV=test also stops main's
 # loader falling back to a developer's .env, which would replace the in-memory
@@ -7,5 +10,11 @@ import sys
 os.environ.setdefault("BOT_ENV", "test")
 os.environ.setdefault("DB_TYPE", "sqlite")
 os.environ.setdefault("SQLITE_DB", ":memory:")
+# Booting the bot writes logfile.log, and running migrations takes a
+# pre-migration backup; keep both out of the working tree.
+_scratch = tempfile.mkdtemp(prefix="lancobot-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ.setdefault("LOGS_DIR", os.path.join(_scratch, "logs"))
+os.environ.setdefault("DATABASE_BACKUP_DIRECTORY", os.path.join(_scratch, "backups"))
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
@@ -0,0 +1,51 @@
+"""Tests for the shared agent factory."""
+
+import pytest
+from pydantic import BaseModel
+from utils import agents, cache
+
+MODEL = "test"
+
+
+class Answer(BaseModel):
+    text: str
+
+
+@pytest.fixture(autouse=True)
+def clear_agents():
+    agents._agents.clear()
+    yield
+    agents._agents.clear()
+
+
+def test_same_configuration_reuses_the_agent():
+    first = agents.get_agent(
+        MODEL, instructions="Be brief.", model_settings={"temperature": 0}
+    )
+    second = agents.get_agent(
+        MODEL, instructions="Be brief.", model_settings={"temperature": 0}
+    )
+    assert first is second
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"instructions": "Be verbose."},
+        {"system_prompt": "Be brief."},
+        {"output_type": Answer},
+        {"model_settings": {"temperature": 1}},
+    ],
+)
+def test_changed_configuration_builds_a_new_agent(changes):
+    config = {"instructions": "Be brief.", "model_settings": {"temperature": 0}}
+    original = agents.get_agent(MODEL, **config)
+    assert agents.get_agent(MODEL, **{**config, **changes}) is not original
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(agents, "_agents", cache.lru("agents", 2))
+    first = agents.get_agent(MODEL, instructions="1")
+    agents.get_agent(MODEL, instructions="2")
+    agents.get_agent(MODEL, instructions="3")
+    assert agents.get_agent(MODEL, instructions="1") is not first
@@ -0,0 +1,51 @@
+"""Smoke tests for the hot-path benchmark, so the harness keeps working as
+the bot changes underneath it."""
+
+from benchmarks import hot_path
+from benchmarks import trace as synthetic
+
+
+def test_traces_are_reproducible():
+    assert synthetic.generate(200, seed=3) == synthetic.generate(200, seed=3)
+    assert synthetic.generate(200, seed=3) != synthetic.generate(200, seed=4)
+
+    kinds = {event.kind for event in synthetic.generate(500)}
+    assert kinds == set(synthetic.MIX)
+
+
+async def test_replays_a_trace_through_the_bot():
+    report = await hot_path.run(
+        events=60,
+        warmup=5,
+        cogs=["counter", "r9k", "reacttrack", "pdfpreview"],
+    )
+
+    assert report["events"] == 60
+    assert report["errors"] == {}
+    assert report["cogs_loaded"] == 4
+    assert report["latency_ms"]["p50"] > 0
+    # each message looks up the counter and R9K configuration
+    assert report["by_kind"]["chat"]["db_statements_per_event"] >= 2
+    statements = {row["statement"] for row in report["db_top_statements"]}
+    assert "SELECT counter_config" in statements
+
+
+def test_comparison_reports_regressions_as_positive():
+    baseline = {
+        "events_per_sec": 100.0,
+        "latency_ms": {"p50": 2.0, "p99": 10.0},
+        "db_statements_per_event": 4.0,
+    }
+    current = {
+        "events_per_sec": 80.0,
+        "latency_ms": {"p50": 1.0, "p99": 10.0},
+        "db_statements_per_event": 5.0,
+    }
+
+    rows = {row["metric"]: row for row in hot_path.compare(current, baseline)}
+
+    assert rows["events_per_sec"]["regression_pct"] == 20.0
+    assert rows["latency_ms.p50"]["regression_pct"] == -50.0
+    assert rows["latency_ms.p99"]["regression_pct"] == 0.0
+    assert rows["db_statements_per_event"]["regression_pct"] == 25.0
+    assert "loop_lag_ms.p99" not in rows
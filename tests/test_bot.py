@@ -163,6 +163,73 @@ async def test_is_cog_loaded_reflects_state(bot):
     assert bot.is_cog_loaded("bot")
 
 
+async def test_load_cogs_times_each_cog_and_sets_them_up_concurrently(bot, monkeypatch):
+    """Imports are timed apart from setup, and setups overlap."""
+    import asyncio
+
+    from main import CogStatus
+
+    monkeypatch.setenv("COG_WHITELIST", "bot,counter,fun")
+    running = peak = 0
+    load_extension = bot.load_extension
+
+    async def overlapping(name, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        await load_extension(name, **kwargs)
+
+    monkeypatch.setattr(bot, "load_extension", overlapping)
+    results = await bot.load_cogs()
+
+    assert sorted(r.name for r in results) == ["bot", "counter", "fun"]
+    assert all(r.status == CogStatus.LOADED for r in results)
+    assert all(r.import_ms is not None and r.setup_ms >= 10 for r in results)
+    assert peak == 3
+
+    # /reloadall: cogs already loaded are reloaded rather than loaded again
+    results = await bot.load_cogs()
+    assert all(r.status == CogStatus.RELOADED for r in results)
+
+
+async def test_hot_reload_reloads_each_changed_cog_once(bot, monkeypatch):
+    """A batch of saves reloads each cog once, and the cogs together."""
+    import asyncio
+
+    from utils.hot_reload import ImportGraph
+
+    for name in ("counter", "fun"):
+        await bot.load_cog(name)
+    reloads = []
+    running = peak = 0
+    reload_extension = bot.reload_extension
+
+    async def counting(name, **kwargs):
+        nonlocal running, peak
+        reloads.append(name)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        await reload_extension(name, **kwargs)
+
+    monkeypatch.setattr(bot, "reload_extension", counting)
+    changed = [
+        os.path.join(COGS_DIR, "counter", "counter.py"),
+        os.path.join(COGS_DIR, "counter", "__init__.py"),
+        os.path.join(COGS_DIR, "fun", "fun.py"),
+    ]
+    plan = await bot.hot_reload(changed, ImportGraph(os.path.dirname(COGS_DIR)))
+
+    assert plan.reload == {"counter", "fun"}
+    assert sorted(reloads) == ["cogs.counter", "cogs.fun"]
+    assert peak == 2
+    assert bot.is_cog_loaded("counter") and bot.is_cog_loaded("fun")
+    assert "counter" not in bot.failed_cogs
+
+
 def test_missing_cog_entry_point_is_skipped():
     """A cog directory without __init__.py should not be loadable."""
     assert not os.path.isfile(os.path.join(COGS_DIR, "csvtable", "__init__.py"))
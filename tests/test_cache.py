@@ -0,0 +1,107 @@
+"""Tests for the shared cache toolkit."""
+
+import asyncio
+
+import pytest
+from utils import cache, metrics
+
+
+def test_lru_evicts_and_counts():
+    c = cache.lru("test.lru", 2)
+    c["a"], c["b"] = 1, 2
+    assert c.get("a") == 1  # now "b" is least recently used
+    c["c"] = 3
+
+    assert "b" not in c
+    assert c.get("b") is None
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert stats["entries"] == 2
+
+
+def test_ttl_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = cache.ttl("test.ttl", 10, ttl=60)
+    c["a"] = 1
+
+    now[0] += 61
+    c["b"] = 2  # storing purges what has expired
+
+    assert c.get("a") is None
+    assert c.stats()["expirations"] == 1
+
+
+def test_size_weighted_cache_is_bounded_by_weight():
+    c = cache.lru("test.weighted", 10, getsizeof=len)
+    c["a"] = b"12345"
+    c["b"] = b"123456"  # 11 > 10: "a" goes
+
+    assert list(c) == ["b"]
+    assert c.currsize == 6
+
+    c["b"] = b"x" * 11  # heavier than the whole cache: not stored
+    assert "b" not in c
+
+
+async def test_concurrent_misses_share_one_load():
+    c = cache.lru("test.single_flight", 10)
+    loads = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return "value"
+
+    lookups = [asyncio.create_task(c.get_or_load("k", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*lookups) == ["value"] * 5
+    assert loads == 1
+    assert await c.get_or_load("k", load) == "value"
+    stats = c.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+
+
+async def test_invalidation_during_a_load_discards_its_result():
+    c = cache.lru("test.invalidate", 10)
+    release = asyncio.Event()
+
+    async def stale():
+        await release.wait()
+        return "stale"
+
+    lookup = asyncio.create_task(c.get_or_load("k", stale))
+    await asyncio.sleep(0)
+    c.invalidate("k")
+    release.set()
+
+    assert await lookup == "stale"
+    assert "k" not in c
+
+
+async def test_failed_loads_are_not_stored():
+    c = cache.lru("test.errors", 10)
+
+    async def fail():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        await c.get_or_load("k", fail)
+
+    assert "k" not in c
+    assert c.stats()["load_errors"] == 1
+
+
+def test_caches_are_exported_as_metrics():
+    c = cache.lru("test.metrics", 10)
+    c["a"] = 1
+    c.get("a")
+
+    text = metrics.render()
+
+    assert 'cache_hits_total{cache="test.metrics"} 1' in text
+    assert 'cache_entries{cache="test.metrics"} 1' in text
@@ -0,0 +1,144 @@
+"""Tests for the chatbot's bounded, persistent conversation memory."""
+
+import asyncio
+import datetime
+
+import peewee
+import pytest
+from cogs.chatbot.memory import (
+    ConversationMemory,
+    compact,
+    estimate_tokens,
+    trim,
+)
+from cogs.chatbot.models import ChatMemory
+from pydantic_ai import ImageUrl
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    UserPromptPart,
+)
+
+CHANNEL = 1234
+
+
+@pytest.fixture(autouse=True)
+def db():
+    # shared cache so writes made from worker threads land in the same database
+    db = peewee.SqliteDatabase(
+        "file:chat_memory?mode=memory&cache=shared",
+        uri=True,
+        check_same_thread=False,
+    )
+    with db.bind_ctx([ChatMemory]):
+        db.create_tables([ChatMemory])
+        yield db
+        db.drop_tables([ChatMemory])
+
+
+def turn(text: str, reply: str = "ok", image: bool = False):
+    content = [text, ImageUrl(url="data:image/jpeg;base64,AAAA")] if image else text
+    return [
+        ModelRequest(parts=[UserPromptPart(content)], instructions="channel prompt"),
+        ModelResponse(parts=[TextPart(reply)]),
+    ]
+
+
+def memory(**kwargs) -> ConversationMemory:
+    options = dict(
+        max_resident=10, token_budget=100, idle_reset=datetime.timedelta(hours=2)
+    )
+    options.update(kwargs)
+    return ConversationMemory(**options)
+
+
+def test_trim_keeps_newest_whole_turns_within_budget():
+    messages = turn("a" * 200) + turn("b" * 200) + turn("c" * 200)
+    per_turn = sum(estimate_tokens(m) for m in turn("a" * 200))
+
+    kept, dropped = trim(messages, per_turn * 2)
+
+    assert kept == messages[2:]
+    assert dropped == messages[:2]
+
+
+def test_trim_always_keeps_the_latest_turn():
+    messages = turn("a") + turn("b" * 10_000)
+
+    kept, dropped = trim(messages, 10)
+
+    assert kept == messages[2:]
+    assert dropped == messages[:2]
+
+
+def test_compact_drops_instructions_system_prompts_and_old_media():
+    messages = turn("first", image=True) + turn("second", image=True)
+    messages[0].parts.insert(0, SystemPromptPart("old system prompt"))
+
+    compacted = compact(messages, keep_media_from=2)
+
+    assert [type(p) for p in compacted[0].parts] == [UserPromptPart]
+    assert compacted[0].instructions is None
+    assert compacted[0].parts[0].content == ["first", "[an image was shared here]"]
+    assert isinstance(compacted[2].parts[0].content[1], ImageUrl)
+    # the caller's messages are left alone
+    assert messages[0].instructions == "channel prompt"
+
+
+async def test_history_survives_a_restart():
+    first = memory()
+    conversation = await first.get(CHANNEL)
+    await first.append(conversation, turn("remember the milk"))
+
+    restarted = memory()
+    conversation = await restarted.get(CHANNEL)
+
+    assert conversation.messages[0].parts[0].content == "remember the milk"
+    assert conversation.messages[0].instructions is None
+    assert restarted.stats["loads"] == 1
+
+
+async def test_resident_channels_are_bounded():
+    mem = memory(max_resident=2)
+    for channel in range(5):
+        conversation = await mem.get(channel)
+        await mem.append(conversation, turn(f"hello {channel}"))
+
+    assert len(mem) == 2
+    conversation = await mem.get(0)
+    assert conversation.messages[0].parts[0].content == "hello 0"
+
+
+async def test_trimmed_turns_are_summarized_in_the_background():
+    calls = []
+
+    async def summarize(summary, messages):
+        calls.append((summary, [m.parts[0].content for m in messages]))
+        return f"summary of {len(messages)} messages"
+
+    mem = memory(token_budget=1, summarize=summarize)
+    conversation = await mem.get(CHANNEL)
+    await mem.append(conversation, turn("one"))
+    await mem.append(conversation, turn("two"))
+    while mem._summarizing:
+        await asyncio.sleep(0.01)
+
+    assert calls == [(None, ["one", "ok"])]
+    assert conversation.summary == "summary of 2 messages"
+    assert ChatMemory.get_by_id(CHANNEL).summary == "summary of 2 messages"
+    assert [m.parts[0].content for m in conversation.messages] == ["two", "ok"]
+
+
+async def test_idle_conversations_are_reset():
+    mem = memory()
+    conversation = await mem.get(CHANNEL)
+    await mem.append(conversation, turn("old news"))
+    conversation.summary = "stale"
+    conversation.last_active -= datetime.timedelta(hours=3)
+
+    conversation = await mem.get(CHANNEL)
+
+    assert conversation.messages == []
+    assert conversation.summary is None
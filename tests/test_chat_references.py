@@ -0,0 +1,168 @@
+"""Tests for resolving chatbot reply references without REST."""
+
+import datetime
+from types import SimpleNamespace
+
+import discord
+import peewee
+import pytest
+from cogs.chatbot.references import Reference, ReferenceResolver
+from db import BaseModel
+from utils import message_buffer, tracked_message
+from utils.tracked_message import TrackedMessage
+
+BOT = SimpleNamespace(id=999, bot=True)
+HUMAN = SimpleNamespace(id=1, name="user", display_name="User", bot=False)
+GUILD = SimpleNamespace(id=1)
+# messages in these tests are sent after any resolver was created
+BASE_ID = discord.utils.time_snowflake(
+    discord.utils.utcnow() + datetime.timedelta(minutes=1)
+)
+
+
+class FakeChannel:
+    def __init__(self, channel_id=10, messages=()):
+        self.id = channel_id
+        self.guild = GUILD
+        self.messages = {m.id: m for m in messages}
+        self.fetches = 0
+
+    async def fetch_message(self, message_id):
+        self.fetches += 1
+        if message_id not in self.messages:
+            raise discord.NotFound(SimpleNamespace(status=404, reason=""), "gone")
+        return self.messages[message_id]
+
+
+def make_message(channel, n, author=HUMAN, embeds=()):
+    return SimpleNamespace(
+        id=BASE_ID + n * 1000,
+        channel=channel,
+        guild=GUILD,
+        author=author,
+        content=f"message {n}",
+        clean_content=f"message {n}",
+        attachments=[],
+        embeds=list(embeds),
+        created_at=discord.utils.snowflake_time(BASE_ID + n * 1000),
+        edited_at=None,
+    )
+
+
+def reply_to(channel, message_id):
+    reference = SimpleNamespace(
+        message_id=message_id, channel_id=channel.id, resolved=None
+    )
+    return SimpleNamespace(channel=channel, reference=reference)
+
+
+@pytest.fixture(autouse=True)
+def clear_buffers():
+    message_buffer._buffers.clear()
+    yield
+    message_buffer._buffers.clear()
+
+
+async def test_buffered_reference_needs_no_fetch():
+    channel = FakeChannel()
+    original = make_message(channel, 1, embeds=["embed"])
+    await message_buffer.on_message(original)
+
+    resolver = ReferenceResolver(capacity=10)
+    referenced = await resolver.resolve(
+        reply_to(channel, original.id), BOT, need_details=True
+    )
+
+    assert referenced == Reference(HUMAN.id, False, True)
+    assert channel.fetches == 0
+
+
+async def test_deleted_buffered_reference_is_none():
+    channel = FakeChannel()
+    original = make_message(channel, 1)
+    await message_buffer.on_message(original)
+    await message_buffer.on_raw_message_delete(
+        SimpleNamespace(channel_id=channel.id, message_id=original.id)
+    )
+
+    resolver = ReferenceResolver(capacity=10)
+    reply = reply_to(channel, original.id)
+    assert await resolver.resolve(reply, BOT, need_details=True) is None
+    assert channel.fetches == 0
+
+
+async def test_own_messages_are_recognised():
+    channel = FakeChannel()
+    resolver = ReferenceResolver(capacity=10)
+    own = make_message(channel, 1, author=BOT)
+    resolver.add_own(own)
+
+    referenced = await resolver.resolve(reply_to(channel, own.id), BOT, False)
+
+    assert referenced == Reference(BOT.id, True, False)
+    assert channel.fetches == 0
+
+
+async def test_recent_message_not_ours_skips_fetch_unless_details_needed():
+    other = make_message(None, 1)
+    channel = FakeChannel(messages=[other])
+    resolver = ReferenceResolver(capacity=10)
+
+    reply = reply_to(channel, other.id)
+    assert await resolver.resolve(reply, BOT, need_details=False) is None
+    assert channel.fetches == 0
+
+    referenced = await resolver.resolve(reply, BOT, need_details=True)
+    assert referenced == Reference(HUMAN.id, False, False)
+    assert channel.fetches == 1
+
+
+async def test_evicted_own_messages_fall_back_to_fetch():
+    channel = FakeChannel()
+    resolver = ReferenceResolver(capacity=2)
+    own = [make_message(channel, n, author=BOT) for n in range(3)]
+    channel.messages = {m.id: m for m in own}
+    for message in own:
+        resolver.add_own(message)
+
+    referenced = await resolver.resolve(reply_to(channel, own[0].id), BOT, False)
+
+    assert referenced == Reference(BOT.id, True, False)
+    assert channel.fetches == 1
+    assert resolver.stats["rest"] == 1
+
+
+async def test_missing_message_is_none():
+    channel = FakeChannel()
+    resolver = ReferenceResolver(capacity=10)
+    reply = reply_to(channel, BASE_ID - 1000)
+    assert await resolver.resolve(reply, BOT, need_details=True) is None
+
+
+@pytest.fixture
+def tracked_db():
+    db = peewee.SqliteDatabase(":memory:")
+    # create_tables goes through the base model's database
+    with db.bind_ctx([BaseModel, TrackedMessage]):
+        db.create_tables([TrackedMessage])
+        TrackedMessage.create(message_id=42)
+        tracked_message._tracked_ids = None
+        yield db
+    tracked_message._tracked_ids = None
+
+
+async def test_tracked_ids_are_loaded_once_and_kept_current(tracked_db):
+    class Cog:
+        @tracked_message.track_message_ids()
+        async def command(self, ctx):
+            sent = discord.Message.__new__(discord.Message)
+            sent.id = BASE_ID
+            return sent
+
+    assert tracked_message.is_message_tracked(42)
+    assert not tracked_message.is_message_tracked(43)
+
+    sent = await Cog().command(None)
+
+    assert tracked_message.is_message_tracked(sent.id)
+    assert TrackedMessage.get_or_none(message_id=sent.id) is not None
@@ -0,0 +1,79 @@
+"""Tests for EmbedWatch.
+
+The point of the watch is that an embed-fix decision costs no REST calls and
+no more time than Discord takes: it must resolve the moment a MESSAGE_UPDATE
+with embeds arrives, give up at the deadline otherwise, and ignore updates
+that carry no embeds (a plain content edit, or our own suppress).
+"""
+
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+from cogs.common.embedwatch import EmbedWatch
+
+
+def _message(message_id=1, embeds=()):
+    return SimpleNamespace(id=message_id, embeds=list(embeds))
+
+
+def _edit(message_id=1, embeds=()):
+    return SimpleNamespace(
+        message_id=message_id, channel_id=10, data={"embeds": list(embeds)}
+    )
+
+
+def _watch(**kwargs):
+    return EmbedWatch(SimpleNamespace(), logging.getLogger("test"), **kwargs)
+
+
+async def test_resolves_as_soon_as_the_embed_arrives():
+    watch = _watch(deadline=5)
+    waiter = asyncio.create_task(watch.wait_for_embed(_message()))
+    await asyncio.sleep(0)
+
+    started = time.monotonic()
+    await watch.handle_raw_edit(_edit(embeds=[{"type": "link"}]))
+
+    assert await waiter is True
+    assert time.monotonic() - started < 1
+
+
+async def test_edit_without_embeds_is_ignored():
+    watch = _watch(deadline=0.05)
+    waiter = asyncio.create_task(watch.wait_for_embed(_message()))
+    await asyncio.sleep(0)
+
+    await watch.handle_raw_edit(_edit())
+
+    assert await waiter is False
+
+
+async def test_already_embedded_message_returns_immediately():
+    watch = _watch(deadline=5)
+
+    assert await watch.wait_for_embed(_message(embeds=[object()])) is True
+
+
+async def test_late_embed_retracts_fix_when_enabled():
+    deleted = []
+
+    class Channel:
+        def get_partial_message(self, message_id):
+            async def delete():
+                deleted.append(message_id)
+
+            return SimpleNamespace(delete=delete)
+
+    watch = EmbedWatch(
+        SimpleNamespace(get_channel=lambda _: Channel()),
+        logging.getLogger("test"),
+        retract_late_fixes=True,
+    )
+    watch.record_fix(1, 99)
+
+    await watch.handle_raw_edit(_edit(embeds=[{"type": "link"}]))
+
+    assert deleted == [99]
+    assert 1 not in watch.fixed_messages
@@ -0,0 +1,102 @@
+"""Tests for the subscription fan-out.
+
+The invariant that matters is that a subscription's watermark only ever moves
+past items that were actually posted to it: a failed send must leave the item
+pending for the next cycle, and must not hold up any other subscription.
+"""
+
+import logging
+import time
+from types import SimpleNamespace
+
+from cogs.common.fanout import GuildRateBudget, SubscriptionFanout
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild_id, fail_on=None):
+        self.id = channel_id
+        self.guild = SimpleNamespace(id=guild_id)
+        self.fail_on = fail_on
+        self.sent = []
+
+    async def send(self, item):
+        if item == self.fail_on:
+            raise RuntimeError("send failed")
+        self.sent.append(item)
+
+
+def _fanout(channels, budget=None):
+    bot = SimpleNamespace(get_channel=channels.get)
+    return SubscriptionFanout(
+        bot, logging.getLogger("test"), budget=budget or GuildRateBudget(100, 1)
+    )
+
+
+async def _deliver(fanout, subs, items):
+    def advance(sub, item):
+        sub.watermark = item
+
+    return await fanout.deliver(
+        subs,
+        items,
+        is_new=lambda sub, item: item > sub.watermark,
+        send=lambda channel, sub, item: channel.send(item),
+        advance=advance,
+    )
+
+
+async def test_each_subscription_gets_only_its_new_items():
+    channels = {1: FakeChannel(1, 10), 2: FakeChannel(2, 20)}
+    subs = [
+        SimpleNamespace(channel_id=1, watermark=0),
+        SimpleNamespace(channel_id=2, watermark=2),
+    ]
+
+    sent = await _deliver(_fanout(channels), subs, [1, 2, 3])
+
+    assert sent == 4
+    assert channels[1].sent == [1, 2, 3]
+    assert channels[2].sent == [3]
+    assert [s.watermark for s in subs] == [3, 3]
+
+
+async def test_failed_send_holds_watermark_without_blocking_others():
+    channels = {1: FakeChannel(1, 10, fail_on=2), 2: FakeChannel(2, 20)}
+    subs = [
+        SimpleNamespace(channel_id=1, watermark=0),
+        SimpleNamespace(channel_id=2, watermark=0),
+    ]
+
+    await _deliver(_fanout(channels), subs, [1, 2, 3])
+
+    assert subs[0].watermark == 1, "item 2 failed and must be retried"
+    assert channels[1].sent == [1]
+    assert channels[2].sent == [1, 2, 3]
+
+
+async def test_missing_channel_is_skipped():
+    subs = [SimpleNamespace(channel_id=99, watermark=0)]
+
+    assert await _deliver(_fanout({}), subs, [1]) == 0
+    assert subs[0].watermark == 0
+
+
+async def test_budget_spaces_out_sends_to_one_guild():
+    budget = GuildRateBudget(rate=2, per=0.2)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await budget.acquire("guild")
+
+    # two sends are free, the next two each wait for a 0.1s refill
+    assert time.monotonic() - started >= 0.18
+
+
+async def test_budget_keeps_a_bounded_number_of_buckets():
+    budget = GuildRateBudget(rate=1, per=60, max_keys=2, name="test.budget")
+
+    for guild in ("a", "b", "c"):
+        await budget.acquire(guild)
+
+    assert len(budget._buckets) == 2
+    assert "a" not in budget._buckets
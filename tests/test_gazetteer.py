@@ -0,0 +1,123 @@
+"""Tests for GeoGuesser guess resolution.
+
+A guess should only reach Google when the offline gazetteer cannot place it,
+and then only once: the answer (or the miss) is written through to the cache.
+"""
+
+import peewee
+import pytest
+from cogs.geoguesser.dbmodels import GeocodeCacheEntry
+from cogs.geoguesser.gazetteer import Gazetteer, Place, normalize
+from cogs.geoguesser.locationutils import LocationUtils
+
+CITY_CENTER = (40.0382, -76.3055)
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer.load()
+
+
+def test_normalize_expands_and_strips_qualifiers():
+    assert normalize("N. Queen St Lancaster City, PA") == "north queen street"
+    assert normalize("Queen St & King St") == normalize("king street and queen street")
+
+
+@pytest.mark.parametrize(
+    "guess, expected",
+    [
+        ("Lititz Lancaster County, PA", "Lititz"),
+        ("lititz pk", "Lititz Pike"),
+        ("King and Queen", "King Street & Queen Street"),
+        ("N Queen St", "Queen Street"),
+        ("Elizabethtwon", "Elizabethtown"),
+        ("bird in hand", "Bird-in-Hand"),
+        ("Manor", "Manor Township"),
+        ("manor st", "Manor Street"),
+    ],
+)
+def test_lookup(gazetteer, guess, expected):
+    assert gazetteer.lookup(guess, CITY_CENTER).name == expected
+
+
+def test_lookup_miss(gazetteer):
+    assert gazetteer.lookup("asdfgh Lancaster City, PA", CITY_CENTER) is None
+
+
+def test_shared_names_resolve_nearest():
+    gazetteer = Gazetteer(
+        [
+            Place("Main Street, Far", "street", 41.0, -77.0),
+            Place("Main Street, Near", "street", 40.0, -76.3),
+        ]
+    )
+    assert gazetteer.lookup("main st", CITY_CENTER).name == "Main Street, Near"
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_fuzzy_ties_prefer_municipalities_over_streets(reverse):
+    places = [
+        Place("Marion", "street", 40.0, -76.3),
+        Place("Marian", "municipality", 40.1, -76.4),
+    ]
+    gazetteer = Gazetteer(places[::-1] if reverse else places)
+    # one letter off from both
+    assert gazetteer.lookup("mariun", CITY_CENTER).name == "Marian"
+
+
+class FakeMaps:
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return self.results
+
+
+@pytest.fixture
+def cache_db():
+    db = peewee.SqliteDatabase(":memory:")
+    with db.bind_ctx([GeocodeCacheEntry]):
+        db.create_tables([GeocodeCacheEntry])
+        yield db
+
+
+def _result(lat, lng, **extra):
+    return [{"geometry": {"location": {"lat": lat, "lng": lng}}, **extra}]
+
+
+def test_gazetteer_hit_skips_google(gazetteer, cache_db):
+    gmaps = FakeMaps(_result(0, 0))
+    utils = LocationUtils(gmaps, gazetteer)
+
+    assert utils.get_coordinates_from_location("Ephrata") is not None
+    assert gmaps.calls == 0
+
+
+def test_google_result_is_written_through(gazetteer, cache_db):
+    gmaps = FakeMaps(_result(40.1, -76.2, types=["route"]))
+    first = LocationUtils(gmaps, gazetteer)
+
+    coords = first.get_coordinates_from_location("Somewhere Rd Lancaster County, PA")
+    assert first.get_coordinates_from_location("somewhere rd  lancaster county, pa")
+    # a fresh instance (e.g. after a restart) reads the persistent cache
+    second = LocationUtils(gmaps, gazetteer)
+    assert (
+        second.get_coordinates_from_location("Somewhere Rd Lancaster County, PA")
+        == coords
+    )
+    assert gmaps.calls == 1
+
+
+def test_area_only_match_is_a_cached_miss(gazetteer, cache_db):
+    gmaps = FakeMaps(
+        _result(
+            40.0378755, -76.3055144, partial_match=True, types=["locality", "political"]
+        )
+    )
+    utils = LocationUtils(gmaps, gazetteer)
+
+    assert utils.get_coordinates_from_location("qwxyz Lancaster City, PA") is None
+    assert utils.get_coordinates_from_location("qwxyz Lancaster City, PA") is None
+    assert gmaps.calls == 1
@@ -0,0 +1,112 @@
+"""Tests for the hot reloader's planning: which cogs a batch of changed files
+reloads."""
+
+import sys
+import types
+
+import pytest
+from utils import hot_reload
+
+TREE = {
+    "main.py": "from utils import core\nfrom cogs.lancocog import LancoCog\n",
+    "cogs/lancocog.py": "",
+    "utils/__init__.py": "",
+    "utils/core.py": "",
+    "utils/shared.py": "",
+    "utils/lazy.py": "",
+    "cogs/common/base.py": "from utils.shared import thing\n",
+    "cogs/alpha/__init__.py": "from .alpha import Alpha\n",
+    "cogs/alpha/alpha.py": "from cogs.common.base import Base\nfrom . import models\n",
+    "cogs/alpha/models.py": "",
+    "cogs/beta/__init__.py": "",
+    "cogs/beta/beta.py": "def later():\n    from utils import lazy\n",
+    "cogs/gamma/__init__.py": "import utils.core\n",
+}
+
+
+@pytest.fixture
+def app(tmp_path):
+    for name, source in TREE.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+    return tmp_path
+
+
+def test_parses_relative_imports():
+    imports = hot_reload.parse_imports(
+        "from . import models\nfrom ..common import base\n",
+        "cogs.alpha.alpha",
+        "cogs/alpha/alpha.py",
+    )
+
+    assert {"cogs.alpha.models", "cogs.common.base"} <= imports
+
+
+def test_many_changes_in_a_cog_reload_it_once(app):
+    graph = hot_reload.ImportGraph(str(app))
+
+    plan = graph.plan(
+        [str(app / "cogs/alpha/alpha.py"), str(app / "cogs/alpha/models.py")]
+    )
+
+    assert plan.reload == {"alpha"}
+    assert not plan.purge and not plan.restart
+
+
+def test_a_shared_module_reloads_only_the_cogs_importing_it(app):
+    graph = hot_reload.ImportGraph(str(app))
+
+    # alpha reaches utils.shared through cogs.common.base
+    plan = graph.plan([str(app / "utils/shared.py")])
+    assert plan.reload == {"alpha"}
+    assert plan.purge == {"utils.shared", "cogs.common.base"}
+
+    # imported inside a function
+    assert graph.plan([str(app / "utils/lazy.py")]).reload == {"beta"}
+
+
+def test_cogs_that_are_not_loaded_stay_unloaded(app):
+    graph = hot_reload.ImportGraph(str(app))
+
+    assert graph.plan([str(app / "utils/shared.py")], loaded={"beta"}).reload == set()
+    # unless their own files change
+    assert graph.plan([str(app / "cogs/alpha/alpha.py")], loaded=set()).reload == {
+        "alpha"
+    }
+
+
+def test_modules_the_core_imports_need_a_restart(app):
+    graph = hot_reload.ImportGraph(str(app))
+
+    plan = graph.plan([str(app / "utils/core.py"), str(app / "cogs/lancocog.py")])
+
+    assert plan.restart == {"utils.core", "cogs.lancocog"}
+    assert not plan.reload
+
+
+def test_a_deleted_cog_is_unloaded(app):
+    graph = hot_reload.ImportGraph(str(app))
+    graph.refresh()
+    for name in ("__init__.py", "beta.py"):
+        (app / "cogs/beta" / name).unlink()
+    (app / "cogs/beta").rmdir()
+
+    plan = graph.plan([str(app / "cogs/beta/beta.py")])
+
+    assert plan.unload == {"beta"}
+    assert not plan.reload
+
+
+def test_purged_modules_are_imported_afresh(monkeypatch):
+    package = types.ModuleType("pkg")
+    package.__path__ = []
+    module = types.ModuleType("pkg.mod")
+    package.mod = module
+    monkeypatch.setitem(sys.modules, "pkg", package)
+    monkeypatch.setitem(sys.modules, "pkg.mod", module)
+
+    hot_reload.purge_modules(["pkg.mod"])
+
+    assert "pkg.mod" not in sys.modules
+    assert not hasattr(package, "mod")
@@ -0,0 +1,107 @@
+"""Tests for the round game leaderboard rollups.
+
+The rollups are a cache of ``RoundGameResult``: whatever order games are
+recorded in, they must agree with summing the raw rows, and a rebuild from the
+raw rows must reproduce them exactly.
+"""
+
+import datetime
+import uuid
+
+import peewee
+import pytest
+from utils.roundgame import leaderboard
+from utils.roundgame.dbmodels import (
+    RoundGameDailyTotal,
+    RoundGameResult,
+    RoundGameTotal,
+)
+
+MODELS = [RoundGameResult, RoundGameTotal, RoundGameDailyTotal]
+NOW = datetime.datetime.utcnow()
+
+
+@pytest.fixture(autouse=True)
+def db():
+    db = peewee.SqliteDatabase(":memory:")
+    with db.bind_ctx(MODELS):
+        db.create_tables(MODELS)
+        yield db
+
+
+def _record(scores, days_ago=0, game="geoguesser", guild=1, version=4):
+    leaderboard.record_results(
+        game,
+        uuid.uuid4(),
+        guild,
+        "Lancaster City",
+        version,
+        scores,
+        rounds_played=5,
+        played_at=NOW - datetime.timedelta(days=days_ago),
+    )
+
+
+def _top(period="all", **kwargs):
+    args = {"game_name": "geoguesser", "guild_id": 1, "scoring_version": 4}
+    args.update(kwargs)
+    return leaderboard.top_scores(period=period, **args)
+
+
+def test_totals_accumulate_across_games():
+    _record({10: 50, 20: 80})
+    _record({10: 70, 20: 10})
+
+    assert _top() == [(10, 120), (20, 90)]
+    assert RoundGameTotal.get(RoundGameTotal.user_id == 10).games == 2
+
+
+def test_periods_use_daily_buckets():
+    _record({10: 100}, days_ago=3)
+    _record({20: 40}, days_ago=0)
+    _record({10: 5, 30: 500}, days_ago=30)
+
+    assert _top("today") == [(20, 40)]
+    assert _top("week") == [(10, 100), (20, 40)]
+    assert _top("all") == [(30, 500), (10, 105), (20, 40)]
+
+
+def test_leaderboards_are_scoped():
+    _record({10: 100})
+    _record({10: 1}, guild=2)
+    _record({10: 1}, game="captcha")
+    _record({10: 1}, version=3)
+
+    assert _top() == [(10, 100)]
+
+
+def test_limit():
+    _record({user: user for user in range(1, 30)})
+
+    assert [user for user, _ in _top(limit=3)] == [29, 28, 27]
+
+
+def test_rebuild_matches_incremental():
+    _record({10: 50, 20: 80}, days_ago=2)
+    _record({10: 70}, days_ago=0)
+    _record({10: 9}, game="captcha")
+    expected = {p: _top(p) for p in leaderboard.PERIODS}
+    daily = sorted(
+        (r.user_id, str(r.day), r.total, r.games) for r in RoundGameDailyTotal.select()
+    )
+
+    RoundGameTotal.update(total=0).execute()
+    RoundGameDailyTotal.delete().execute()
+    assert leaderboard.rebuild("geoguesser") == 3
+
+    assert {p: _top(p) for p in leaderboard.PERIODS} == expected
+    # the other game's rollups were left alone
+    assert _top(game_name="captcha") == [(10, 0)]
+    leaderboard.rebuild()
+    assert (
+        sorted(
+            (r.user_id, str(r.day), r.total, r.games)
+            for r in RoundGameDailyTotal.select()
+        )
+        == daily
+    )
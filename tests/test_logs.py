@@ -11,6 +11,7 @@ import json
 import logging
 import os
 import pathlib
+import queue
 import sys
 
 import elasticapm
@@ -307,3 +308,85 @@ def test_pruning_cannot_touch_the_human_readable_log(tmp_path, monkeypatch):
 
     assert doomed == ["lancobot.ecs.json.2026-08-10"]
     assert not any(name.startswith("logfile") for name in doomed)
+
+
+@pytest.fixture
+def queued(ecs_log, monkeypatch):
+    """The ECS logger, with its handler moved behind the log queue."""
+    log, read = ecs_log
+    # importing main elsewhere in the suite has queued the root logger already
+    monkeypatch.setattr(logs, "_listener", None)
+    logs.start_queue(log)
+
+    def drain():
+        logs.stop_queue()
+        return read()
+
+    yield log, drain
+    logs.stop_queue()
+
+
+def test_queued_lines_keep_their_transaction(queued, apm_client):
+    log, drain = queued
+    assert isinstance(log.handlers[0], logs.SheddingQueueHandler)
+
+    apm_client.begin_transaction("command")
+    log.warning("inside %s", "args")
+    apm_client.end_transaction("weather", "success")
+
+    (inside,) = drain()
+    assert inside["message"] == "inside args"
+    # the ids are taken when the record is made, not on the log thread
+    assert inside["transaction"]["id"]
+
+
+def test_queued_exceptions_are_formatted_on_the_log_thread(queued):
+    log, drain = queued
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        log.exception("failed")
+
+    (line,) = drain()
+    assert line["error"]["type"] == "ValueError"
+    assert "bad" in line["error"]["stack_trace"]
+
+
+def _record(level, msg="line"):
+    return logging.makeLogRecord(
+        {"levelno": level, "levelname": logging.getLevelName(level), "msg": msg}
+    )
+
+
+def test_overload_sheds_info_before_warnings():
+    log_queue = queue.Queue(maxsize=10)
+    handler = logs.SheddingQueueHandler(log_queue, shed_at=0.5)
+
+    for _ in range(5):
+        handler.handle(_record(logging.INFO))
+    handler.handle(_record(logging.INFO))
+    handler.handle(_record(logging.WARNING))
+    assert log_queue.qsize() == 6
+    assert handler.dropped == 1
+
+    while not log_queue.empty():
+        log_queue.get_nowait()
+    handler.handle(_record(logging.INFO))
+    queued = [log_queue.get_nowait().getMessage() for _ in range(2)]
+    assert queued[-1] == "Dropped 1 log record(s) while the log queue was full"
+
+
+def test_capture_limiter_deduplicates_and_caps():
+    now = [0.0]
+    limiter = logs.CaptureLimiter(window=60, limit=3, clock=lambda: now[0])
+
+    assert limiter.allow(_record(logging.ERROR, "guild 1 failed"))
+    # the same template with a different id is a repeat
+    assert not limiter.allow(_record(logging.ERROR, "guild 2 failed"))
+    assert limiter.allow(_record(logging.ERROR, "another"))
+    assert limiter.allow(_record(logging.ERROR, "third"))
+    assert not limiter.allow(_record(logging.ERROR, "fourth"))
+    assert limiter.suppressed == 2
+
+    now[0] = 61
+    assert limiter.allow(_record(logging.ERROR, "guild 3 failed"))
@@ -0,0 +1,90 @@
+"""Tests for the event loop lag sampler and stall watchdog."""
+
+import asyncio
+
+from utils.loop_health import Histogram, LoopMonitor, attribute
+
+# a blocking helper in utils, called from a blocking cog handler, both defined
+# under module names the monitor attributes stalls to
+UTILS_SOURCE = """
+import time
+
+def resize(seconds):
+    time.sleep(seconds)
+"""
+COG_SOURCE = """
+def handle(seconds):
+    resize(seconds)
+"""
+
+
+def load(source, module, **extra):
+    namespace = {"__name__": module, **extra}
+    exec(compile(source, f"{module.replace('.', '/')}.py", "exec"), namespace)
+    return namespace
+
+
+UTILS = load(UTILS_SOURCE, "utils.image_fake")
+COG = load(COG_SOURCE, "cogs.blocker.blocker", resize=UTILS["resize"])
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(bounds=(1, 10, 100))
+    for value in [0.5] * 90 + [5] * 9 + [500]:
+        histogram.observe(value)
+
+    snapshot = histogram.to_dict()
+    assert snapshot["buckets"] == {"le_1": 90, "le_10": 9, "le_100": 0, "le_inf": 1}
+    assert snapshot["p50_ms"] == 1
+    assert snapshot["p99_ms"] == 10
+    assert snapshot["max_ms"] == 500
+
+
+def test_attribute_blames_the_innermost_bot_frame_and_its_cog():
+    frames = []
+    namespace = load(
+        "def inner():\n    frames.append(sys._getframe())\n",
+        "utils.helper",
+        frames=frames,
+        sys=__import__("sys"),
+    )
+    caller = load(
+        "def handle():\n    inner()\n", "cogs.weather.weather", inner=namespace["inner"]
+    )
+    caller["handle"]()
+
+    cog, function, location = attribute(frames[0])
+    assert (cog, function) == ("weather", "inner")
+    assert location.startswith("helper.py:")
+
+
+async def test_stall_is_attributed_and_timed():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        COG["handle"](0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["stalls"] == 1
+    [site] = snapshot["stall_sites"]
+    assert (site["cog"], site["function"]) == ("blocker", "resize")
+    assert site["total_ms"] >= 200
+    assert snapshot["lag"]["max_ms"] >= 200
+    assert any("handle" in line for line in snapshot["recent_stalls"][0]["stack"])
+
+
+async def test_healthy_loop_records_no_stalls():
+    monitor = LoopMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["stalls"] == 0
+    assert snapshot["lag"]["count"] > 0
@@ -0,0 +1,83 @@
+"""Tests for the memory diagnostics behind /memory and /status."""
+
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+from utils import memory
+
+
+class FakeCog:
+    def __init__(self, name, **attributes):
+        self._name = name
+        self._bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        vars(self).update(attributes)
+
+    def get_cog_name(self):
+        return self._name
+
+
+def test_deep_size_does_not_walk_into_shared_objects():
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    small = {"a": 1}
+
+    size, objects, truncated = memory.deep_size({"bot": bot, **small})
+    alone, _, _ = memory.deep_size({"bot": None, **small})
+
+    assert not truncated
+    assert objects < 10
+    assert abs(size - alone) < 100
+
+
+def test_deep_size_stops_at_the_limit():
+    size, objects, truncated = memory.deep_size(list(range(1000)), limit=50)
+
+    assert truncated
+    assert objects == 50
+
+
+def test_census_ranks_the_attribute_holding_the_most():
+    leaky = FakeCog("Leaky", cache={i: f"{i:0100}" for i in range(500)}, flag=True)
+    tidy = FakeCog("Tidy", names=["a", "b"])
+    bot = SimpleNamespace(get_lanco_cogs=lambda: [tidy, leaky])
+
+    report = memory.census(bot)
+
+    assert [c["cog"] for c in report["cogs"]] == ["Leaky", "Tidy"]
+    top = report["cogs"][0]["top"][0]
+    assert top["attribute"] == "cache"
+    assert top["length"] == 500
+    assert top["size_kb"] > 50
+    # the bot a cog points at is not counted as the cog's
+    assert all(r["attribute"] != "_bot" for c in report["cogs"] for r in c["top"])
+
+
+def grow(store):
+    store.extend(bytearray(1024) for _ in range(200))
+
+
+def test_snapshot_diff_points_at_the_growth():
+    store = []
+    try:
+        assert memory.start_tracing()
+        memory.take_snapshot("before")
+        grow(store)
+        memory.take_snapshot("after")
+
+        assert memory.snapshot_labels() == ["before", "after"]
+        top = memory.diff("before", "after")[0]
+        assert top["location"].split(":")[0].endswith("test_memory.py")
+        assert top["size_diff_kb"] >= 200
+    finally:
+        memory.stop_tracing()
+
+    assert memory.snapshot_labels() == []
+
+
+def test_status_is_cheap_and_complete():
+    status = memory.status()
+
+    assert status["rss_mb"] > 0
+    assert status["tracing"] is False
+    assert len(status["gc"]["generations"]) == len(status["gc"]["thresholds"])
+    assert "top_types" not in status["gc"]
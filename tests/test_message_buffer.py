@@ -0,0 +1,180 @@
+"""Tests for the gateway-fed per-channel message buffer."""
+
+from types import SimpleNamespace
+
+import discord
+import pytest
+from utils import message_buffer
+from utils.message_buffer import CHANNEL_CAPACITY
+
+GUILD = SimpleNamespace(id=1)
+BASE_ID = discord.utils.time_snowflake(discord.utils.utcnow())
+
+
+def make_message(channel, n, content=None):
+    message_id = BASE_ID + n * 1000
+    author = SimpleNamespace(id=n % 3, name="user", display_name="User", bot=False)
+    return SimpleNamespace(
+        id=message_id,
+        channel=channel,
+        guild=GUILD,
+        author=author,
+        content=content or f"message {n}",
+        clean_content=content or f"message {n}",
+        attachments=[],
+        embeds=[],
+        created_at=discord.utils.snowflake_time(message_id),
+        edited_at=None,
+    )
+
+
+class FakeChannel:
+    """A channel whose REST history is ``self.messages``; counts REST calls"""
+
+    def __init__(self, channel_id=10):
+        self.id = channel_id
+        self.guild = GUILD
+        self.messages = []
+        self.rest_calls = []
+
+    def post(self, n, **kwargs):
+        message = make_message(self, n, **kwargs)
+        self.messages.append(message)
+        return message
+
+    async def history(self, limit, before=None, after=None, oldest_first=False):
+        self.rest_calls.append((limit, before and before.id, after and after.id))
+        matching = [
+            m
+            for m in self.messages
+            if (before is None or m.id < before.id)
+            and (after is None or m.id > after.id)
+        ]
+        matching.sort(key=lambda m: m.id, reverse=not oldest_first)
+        for m in matching[:limit]:
+            yield m
+
+
+@pytest.fixture(autouse=True)
+def clear_buffers():
+    message_buffer._buffers.clear()
+    yield
+    message_buffer._buffers.clear()
+
+
+async def live(channel, n, **kwargs):
+    """Post a message the bot receives over the gateway"""
+    message = channel.post(n, **kwargs)
+    await message_buffer.on_message(message)
+    return message
+
+
+def contents(messages):
+    return [m.content for m in messages]
+
+
+async def test_messages_seen_live_are_served_without_rest():
+    channel = FakeChannel()
+    for n in range(5):
+        await live(channel, n)
+
+    messages = await message_buffer.history(channel, 3)
+
+    assert contents(messages) == ["message 4", "message 3", "message 2"]
+    assert channel.rest_calls == []
+
+
+async def test_only_the_gap_is_fetched_and_then_kept():
+    channel = FakeChannel()
+    for n in range(10):
+        channel.post(n)  # before the bot was listening
+    for n in range(10, 13):
+        await live(channel, n)
+
+    messages = await message_buffer.history(channel, 6)
+
+    assert contents(messages) == [f"message {n}" for n in range(12, 6, -1)]
+    assert len(channel.rest_calls) == 1
+    assert channel.rest_calls[0][0] == 3  # only the three it had not seen
+
+    again = await message_buffer.history(channel, 6)
+    assert contents(again) == contents(messages)
+    assert len(channel.rest_calls) == 1
+
+
+async def test_a_short_channel_is_fetched_once():
+    channel = FakeChannel()
+    for n in range(3):
+        channel.post(n)
+
+    assert len(await message_buffer.history(channel, 25)) == 3
+    assert len(await message_buffer.history(channel, 25)) == 3
+    assert len(channel.rest_calls) == 1
+
+
+async def test_before_is_respected():
+    channel = FakeChannel()
+    messages = [await live(channel, n) for n in range(5)]
+
+    older = await message_buffer.history(channel, 10, before=messages[3])
+
+    assert contents(older)[:3] == ["message 2", "message 1", "message 0"]
+
+
+async def test_edits_and_deletes_are_applied():
+    channel = FakeChannel()
+    first = await live(channel, 0)
+    second = await live(channel, 1)
+
+    edited = make_message(channel, 0, content="edited")
+    await message_buffer.on_raw_message_edit(
+        SimpleNamespace(channel_id=channel.id, guild_id=GUILD.id, message=edited)
+    )
+    await message_buffer.on_raw_message_delete(
+        SimpleNamespace(channel_id=channel.id, message_id=second.id)
+    )
+
+    messages = await message_buffer.history(channel, 1, after=first.created_at)
+    assert messages == []
+    messages = await message_buffer.history(
+        channel, 5, after=discord.Object(id=first.id - 1)
+    )
+    assert contents(messages) == ["edited"]
+    assert channel.rest_calls == []
+
+
+async def test_capacity_is_bounded_and_older_requests_fall_back_to_rest():
+    channel = FakeChannel()
+    for n in range(CHANNEL_CAPACITY + 20):
+        await live(channel, n)
+
+    assert len(message_buffer.get_buffer(channel.id)) == CHANNEL_CAPACITY
+
+    messages = await message_buffer.history(channel, CHANNEL_CAPACITY + 5)
+    assert len(messages) == CHANNEL_CAPACITY + 5
+    assert contents(messages)[-1] == "message 15"
+    assert channel.rest_calls[0][0] == 5
+
+
+async def test_oldest_first_fetches_the_gap_then_uses_the_buffer():
+    channel = FakeChannel()
+    for n in range(3):
+        channel.post(n)
+    for n in range(3, 6):
+        await live(channel, n)
+
+    messages = await message_buffer.history(
+        channel, 10, after=discord.Object(id=0), oldest_first=True
+    )
+
+    assert contents(messages) == [f"message {n}" for n in range(6)]
+    assert len(channel.rest_calls) == 1
+
+
+async def test_reconnect_drops_buffers():
+    channel = FakeChannel()
+    await live(channel, 0)
+
+    await message_buffer.on_connect()
+
+    assert message_buffer.get_buffer(channel.id) is None
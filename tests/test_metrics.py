@@ -0,0 +1,142 @@
+"""Tests for the in-process metrics registry and its instrumentation."""
+
+from types import SimpleNamespace
+
+import peewee
+import pytest
+from aiohttp import web
+from cogs.lancocog import LancoCog
+from db import QUERY_SECONDS, TimedSqliteDatabase, classify_sql
+from discord.ext import commands
+from utils import http, metrics
+
+
+def sample(name, **labels):
+    """The value of one sample line in the rendered output"""
+    wanted = metrics._format_labels(list(labels), list(map(str, labels.values())))
+    for line in metrics.render().splitlines():
+        if line.startswith(f"{name}{wanted} "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_counter_and_gauge_render():
+    counter = metrics.counter("test_things_total", "Things", ["kind"])
+    counter.inc(kind="a")
+    counter.labels(kind='b"\n').inc(2)
+    metrics.gauge("test_level", "Level", function=lambda: 7)
+
+    text = metrics.render()
+    assert "# TYPE test_things_total counter" in text
+    assert 'test_things_total{kind="b\\"\\n"} 2' in text
+    assert sample("test_things_total", kind="a") == 1
+    assert "test_level 7" in text
+    assert metrics.counter("test_things_total", "Things", ["kind"]) is counter
+    with pytest.raises(ValueError):
+        metrics.counter("test_things_total", "Things", ["other"])
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.histogram("test_latency_seconds", "Latency", ["op"], [0.1, 1])
+    for value in (0.05, 0.5, 0.5, 3):
+        hist.observe(value, op="read")
+
+    assert sample("test_latency_seconds_bucket", op="read", le="0.1") == 1
+    assert sample("test_latency_seconds_bucket", op="read", le="1") == 3
+    assert sample("test_latency_seconds_bucket", op="read", le="+Inf") == 4
+    assert sample("test_latency_seconds_count", op="read") == 4
+    assert sample("test_latency_seconds_sum", op="read") == pytest.approx(4.05)
+
+
+async def test_instrumented_listener_counts_calls_and_errors():
+    async def on_thing(fail):
+        if fail:
+            raise RuntimeError("boom")
+        return "ok"
+
+    listener = metrics.instrument_listener("TestCog", "on_thing", on_thing)
+    assert await listener(False) == "ok"
+    with pytest.raises(RuntimeError):
+        await listener(True)
+
+    labels = {"cog": "TestCog", "event": "on_thing"}
+    assert sample("listener_calls_total", **labels) == 2
+    assert sample("listener_errors_total", **labels) == 1
+    assert sample("listener_duration_seconds_count", **labels) == 2
+
+
+async def test_cog_listeners_are_instrumented():
+    class Greeter(LancoCog, name="Greeter"):
+        @commands.Cog.listener()
+        async def on_member_join(self, member):
+            return member
+
+    cog = Greeter(SimpleNamespace())
+    assert cog.on_member_join.__wrapped__.__self__ is cog
+    await cog.on_member_join("someone")
+
+    labels = {"cog": "Greeter", "event": "on_member_join"}
+    assert sample("listener_calls_total", **labels) == 1
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        (
+            'SELECT "t1"."id" FROM "guild_config" AS "t1" WHERE ...',
+            ("SELECT", "guild_config"),
+        ),
+        (
+            'INSERT INTO "tracked_messages" ("message_id") VALUES (?)',
+            ("INSERT", "tracked_messages"),
+        ),
+        ('UPDATE "counter" SET "count" = ?', ("UPDATE", "counter")),
+        (
+            'CREATE TABLE IF NOT EXISTS "chatbot_memory" (...)',
+            ("CREATE", "chatbot_memory"),
+        ),
+        ("PRAGMA journal_mode", ("PRAGMA", "")),
+    ],
+)
+def test_classify_sql(sql, expected):
+    assert classify_sql(sql) == expected
+
+
+def test_timed_database_records_queries():
+    db = TimedSqliteDatabase(":memory:")
+
+    class Thing(peewee.Model):
+        name = peewee.TextField()
+
+        class Meta:
+            database = db
+            table_name = "metrics_thing"
+
+    db.create_tables([Thing])
+    before = QUERY_SECONDS.labels(operation="SELECT", table="metrics_thing")
+    count = sum(before.counts)
+    list(Thing.select())
+    assert sum(before.counts) == count + 1
+
+
+async def test_pooled_sessions_time_requests():
+    async def hello(request):
+        return web.Response(text="hi")
+
+    app = web.Application()
+    app.router.add_get("/", hello)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        session = http.get_session("metrics-test")
+        async with session.get(f"http://127.0.0.1:{port}/") as response:
+            assert await response.text() == "hi"
+    finally:
+        await http.close_sessions()
+        await runner.cleanup()
+
+    labels = {"session": "metrics-test", "method": "GET", "status": "200"}
+    assert sample("http_client_request_duration_seconds_count", **labels) == 1
@@ -198,3 +198,72 @@ def test_failed_migration_leaves_no_trace(legacy_db, monkeypatch):
         migrate.run_migrations()
 
     assert schema_of(legacy_db) == before
+
+
+ROUND_GAME_RESULTS = """
+CREATE TABLE round_game_results (
+    id INTEGER PRIMARY KEY, game_name TEXT, game_id TEXT, guild_id INTEGER,
+    user_id INTEGER, mode TEXT, score REAL, rounds_played INTEGER,
+    scoring_version INTEGER, played_at DATETIME
+);
+INSERT INTO round_game_results
+    (game_name, guild_id, user_id, score, scoring_version, played_at)
+VALUES
+    ('captcha', 1, 10, 50, 1, '2024-01-01 10:00:00'),
+    ('captcha', 1, 10, 25, 1, '2024-01-02 10:00:00'),
+    ('captcha', 1, 20, 5, 1, '2024-01-02 11:00:00');
+"""
+
+
+def rollups(path) -> tuple[list, list]:
+    conn = sqlite3.connect(path)
+    try:
+        totals = conn.execute(
+            "SELECT user_id, total, games FROM round_game_totals ORDER BY user_id"
+        ).fetchall()
+        daily = conn.execute(
+            "SELECT day, user_id, total FROM round_game_daily_totals "
+            "ORDER BY day, user_id"
+        ).fetchall()
+    finally:
+        conn.close()
+    return totals, daily
+
+
+def test_backfills_round_game_rollups(legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    conn.executescript(ROUND_GAME_RESULTS)
+    conn.commit()
+    conn.close()
+
+    migrate.run_migrations()
+
+    totals, daily = rollups(legacy_db)
+    assert totals == [(10, 75.0, 2), (20, 5.0, 1)]
+    assert daily == [
+        ("2024-01-01", 10, 50.0),
+        ("2024-01-02", 10, 25.0),
+        ("2024-01-02", 20, 5.0),
+    ]
+
+
+def test_rollups_a_cog_started_are_rebuilt_from_every_result(legacy_db):
+    # a cog created the rollup and recorded the latest game into it before
+    # the migration ran
+    conn = sqlite3.connect(legacy_db)
+    conn.executescript(ROUND_GAME_RESULTS + """
+        CREATE TABLE round_game_totals (
+            id INTEGER PRIMARY KEY, game_name VARCHAR(255), guild_id INTEGER,
+            scoring_version INTEGER, user_id INTEGER, total REAL, games INTEGER
+        );
+        INSERT INTO round_game_totals
+            (game_name, guild_id, scoring_version, user_id, total, games)
+        VALUES ('captcha', 1, 1, 20, 5, 1);
+        """)
+    conn.commit()
+    conn.close()
+
+    migrate.run_migrations()
+
+    totals, _ = rollups(legacy_db)
+    assert totals == [(10, 75.0, 2), (20, 5.0, 1)]
@@ -0,0 +1,135 @@
+"""Tests for the shared OpenGraph service.
+
+What matters is the cost of a lookup: only the head is read, repeated and
+concurrent lookups of one URL hit the network once, failures are remembered,
+and an expired entry is revalidated rather than re-downloaded. They run
+against a local aiohttp server that counts what it was asked for.
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from utils import http
+from utils.opengraph import OpenGraphService, canonical_url, parse_head
+
+HEAD = (
+    "<html><head><title>Plain title</title>"
+    '<meta name="description" content="Plain description">'
+    '<meta property="og:title" content="OG &amp; title">'
+    '<meta property="og:image" content="https://img/1.png">'
+    '<meta property="og:image" content="https://img/2.png">'
+    "</head>"
+)
+
+
+def test_parse_head_prefers_og_tags():
+    metadata = parse_head(HEAD.encode(), "https://example.com/")
+
+    assert metadata.title == "OG & title"
+    assert metadata.description == "Plain description"
+    assert metadata.images == ["https://img/1.png", "https://img/2.png"]
+    assert metadata.og()["og:image"] == "https://img/1.png"
+
+
+def test_parse_head_ignores_the_body():
+    page = HEAD + '<body><meta property="og:title" content="Body">'
+
+    assert parse_head(page.encode(), "https://example.com/").title == "OG & title"
+
+
+def test_canonical_url_drops_tracking_and_fragment():
+    assert (
+        canonical_url("HTTPS://Example.com/a?utm_source=x&id=1&fbclid=y#top")
+        == "https://example.com/a?id=1"
+    )
+
+
+@pytest.fixture
+async def server():
+    hits = {"page": 0, "missing": 0, "not_modified": 0}
+    delay = asyncio.Event()
+    delay.set()
+
+    async def page(request):
+        hits["page"] += 1
+        await delay.wait()
+        if request.headers.get("If-None-Match") == '"v1"':
+            hits["not_modified"] += 1
+            return web.Response(status=304)
+        body = HEAD + "<body>" + "x" * 1_000_000
+        return web.Response(
+            text=body, content_type="text/html", headers={"ETag": '"v1"'}
+        )
+
+    async def missing(request):
+        hits["missing"] += 1
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    app.router.add_get("/missing", missing)
+    async with TestServer(app) as test_server:
+        yield test_server, hits, delay
+    await http.close_sessions()
+
+
+async def test_repeat_lookups_are_cached(server):
+    test_server, hits, _ = server
+    service = OpenGraphService()
+
+    first = await service.get(str(test_server.make_url("/page")))
+    second = await service.get(str(test_server.make_url("/page?utm_source=x")))
+
+    assert first.title == "OG & title"
+    assert second is first
+    assert hits["page"] == 1
+
+
+async def test_concurrent_lookups_share_one_fetch(server):
+    test_server, hits, delay = server
+    service = OpenGraphService()
+    delay.clear()
+
+    url = str(test_server.make_url("/page"))
+    lookups = [asyncio.create_task(service.get(url)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    delay.set()
+    results = await asyncio.gather(*lookups)
+
+    assert hits["page"] == 1
+    assert all(r is results[0] for r in results)
+
+
+async def test_failures_are_negatively_cached(server):
+    test_server, hits, _ = server
+    service = OpenGraphService()
+
+    url = str(test_server.make_url("/missing"))
+    assert await service.get(url) is None
+    assert await service.get(url) is None
+    assert hits["missing"] == 1
+
+
+async def test_expired_entry_is_revalidated(server):
+    test_server, hits, _ = server
+    service = OpenGraphService(ttl=0)
+
+    url = str(test_server.make_url("/page"))
+    first = await service.get(url)
+    second = await service.get(url)
+
+    assert second is first
+    assert hits["not_modified"] == 1
+    assert service.revalidated == 1
+
+
+async def test_only_the_head_is_read(server):
+    test_server, _, _ = server
+    service = OpenGraphService(max_bytes=4096)
+
+    metadata = await service.get(str(test_server.make_url("/page")))
+
+    # the 1 MB body would have been past the cap, but the head closed first
+    assert metadata.title == "OG & title"
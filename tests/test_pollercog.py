@@ -0,0 +1,196 @@
+"""Tests for the shared feed poller.
+
+Two things are worth pinning here. The circuit breaker has to pause a failing
+source and then let exactly one probe through, or a dead feed is either hit
+every cycle or never retried. And a cycle has to isolate its sources: one
+feed raising must not stop the others from being delivered, and every
+watermark a cycle advances must reach the database in one go.
+"""
+
+from types import SimpleNamespace
+
+import peewee
+import pytest
+from cogs.common.pollercog import CircuitBreaker, PollerCog, PollSource, SeenIds
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    assert breaker.record_failure(now=0) is False
+    assert breaker.record_failure(now=0) is False
+    assert breaker.record_failure(now=0) is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow(now=30) is False
+
+
+def test_breaker_allows_single_probe_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(now=0)
+
+    assert breaker.allow(now=60) is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow(now=61) is False, "only one probe may be in flight"
+
+
+def test_failed_probe_reopens_without_reporting_a_new_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(now=0)
+    breaker.allow(now=60)
+
+    assert breaker.record_failure(now=60) is False
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow(now=90) is False
+    assert breaker.allow(now=120) is True
+
+
+def test_successful_probe_closes_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(now=0)
+    breaker.allow(now=60)
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow(now=61) is True
+
+
+def test_seen_ids_forgets_oldest():
+    seen = SeenIds(maxlen=3)
+    seen.update(["a", "b", "c"])
+
+    assert seen.add("a") is False
+    seen.add("d")
+
+    # "a" was refreshed by the re-add, so "b" is the oldest and goes first
+    assert "b" not in seen
+    assert "a" in seen
+    assert len(seen) == 3
+
+
+db = peewee.SqliteDatabase(":memory:")
+
+
+class Watermark(peewee.Model):
+    key = peewee.CharField(primary_key=True)
+    value = peewee.IntegerField(default=0)
+
+    class Meta:
+        database = db
+
+
+class FakePoller(PollerCog, name="FakePoller"):
+    FAILURE_THRESHOLD = 1
+
+    def __init__(self, bot, results):
+        super().__init__(bot)
+        self.results = results
+        self.fetched = []
+
+    async def get_sources(self):
+        return [PollSource(key=key) for key in self.results]
+
+    async def fetch(self, source):
+        self.fetched.append(source.key)
+        result = self.results[source.key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def process(self, source, items):
+        row = Watermark.get(Watermark.key == source.key)
+        for item in items:
+            if item > row.value:
+                row.value = item
+        self.mark_dirty(row)
+        return len(items)
+
+
+@pytest.fixture
+def poller():
+    db.connect(reuse_if_open=True)
+    db.create_tables([Watermark])
+    Watermark.insert_many([{"key": "ok"}, {"key": "broken"}]).execute()
+
+    bot = SimpleNamespace(database=db)
+    yield FakePoller(bot, {"ok": [1, 5, 3], "broken": RuntimeError("down")})
+
+    db.drop_tables([Watermark])
+    db.close()
+
+
+async def test_failing_source_does_not_block_others(poller):
+    delivered = await poller.poll_once()
+
+    assert delivered == 3
+    assert Watermark.get(Watermark.key == "ok").value == 5
+    assert poller.metrics["broken"].errors == 1
+    assert poller.breaker("broken").state == CircuitBreaker.OPEN
+
+
+async def test_open_source_is_skipped(poller):
+    await poller.poll_once()
+    poller.fetched.clear()
+
+    await poller.poll_once()
+
+    assert poller.fetched == ["ok"]
+    assert poller.metrics["broken"].skipped == 1
+
+
+async def test_delivery_errors_leave_the_breaker_closed(poller):
+    opened = []
+
+    async def refuse(source, items):
+        raise RuntimeError("403 Forbidden")
+
+    async def on_circuit_open(source):
+        opened.append(source.key)
+
+    poller.process = refuse
+    poller.on_circuit_open = on_circuit_open
+    poller.results = {"ok": [1]}
+
+    for _ in range(3):
+        await poller.poll_once()
+
+    assert poller.breaker("ok").state == CircuitBreaker.CLOSED
+    assert poller.metrics["ok"].errors == 3
+    assert opened == []
+
+
+async def test_watermarks_wait_for_flush(poller):
+    source = PollSource(key="ok")
+    await poller.process(source, [7])
+
+    assert Watermark.get(Watermark.key == "ok").value == 0
+    assert poller.flush_watermarks() == 1
+    assert Watermark.get(Watermark.key == "ok").value == 7
+    assert poller.flush_watermarks() == 0
+
+
+async def test_failed_flush_keeps_watermarks_queued(poller, monkeypatch):
+    await poller.process(PollSource(key="ok"), [7])
+
+    def fail(*args, **kwargs):
+        raise peewee.OperationalError("database is locked")
+
+    monkeypatch.setattr(Watermark, "save", fail)
+    assert poller.flush_watermarks() == 0
+    monkeypatch.undo()
+
+    assert poller.flush_watermarks() == 1
+    assert Watermark.get(Watermark.key == "ok").value == 7
+
+
+def test_interval_backs_off_when_idle_and_resets_on_delivery(poller):
+    poller._adapt_interval(0)
+    poller._adapt_interval(0)
+    assert poller.interval == pytest.approx(poller.POLL_INTERVAL * 2.25)
+
+    for _ in range(10):
+        poller._adapt_interval(0)
+    assert poller.interval == poller.POLL_INTERVAL * 3
+
+    poller._adapt_interval(1)
+    assert poller.interval == poller.POLL_INTERVAL
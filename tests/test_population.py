@@ -0,0 +1,129 @@
+"""Tests for GeoGuesser location population.
+
+A run streams locations into the database as it goes, so a crash keeps what
+was already paid for, the next run resumes instead of starting over, and
+games only ever see a complete pool: the old one until the new one is
+swapped in.
+"""
+
+import itertools
+import threading
+import time
+
+import peewee
+import pytest
+from cogs.geoguesser.dbmodels import GeoguesserLocation as LocationModel
+from cogs.geoguesser.dbmodels import GeoguesserPopulation
+from cogs.geoguesser.models import Coordinates, GeoGuesserLocation, Mode
+from cogs.geoguesser.population import (
+    Populator,
+    TokenBucket,
+    active_generations,
+    start_or_resume,
+)
+
+MODE = Mode("Test", "T", 1000, (40.0, -76.0), None, "")
+MODELS = [LocationModel, GeoguesserPopulation]
+
+
+@pytest.fixture(autouse=True)
+def db():
+    # shared cache so the populator's worker threads see the same database
+    db = peewee.SqliteDatabase(
+        "file:population?mode=memory&cache=shared",
+        uri=True,
+        check_same_thread=False,
+    )
+    with db.bind_ctx(MODELS):
+        db.create_tables(MODELS)
+        yield db
+        db.drop_tables(MODELS)
+
+
+class FakeLocationUtils:
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def get_geoguesser_location_sync(self, mode):
+        with self.lock:
+            n = next(self.calls)
+        if self.fail_after is not None and n > self.fail_after:
+            raise RuntimeError("quota exceeded")
+        coords = Coordinates(40.0 + n / 1000, -76.0)
+        return GeoGuesserLocation(coords, coords, label=f"Place {n}")
+
+
+def _populator(fail_after=None):
+    populator = Populator(FakeLocationUtils(fail_after))
+    populator.WORKERS = 1
+    populator.CHUNK_SIZE = 10
+    return populator
+
+
+def _legacy_location():
+    LocationModel.create(
+        mode=MODE.name, initial_lat=0, initial_lng=0, road_lat=0, road_lng=0
+    )
+
+
+def test_completed_run_replaces_the_pool():
+    _legacy_location()
+
+    run = _populator().run(start_or_resume(MODE, 25), MODE)
+
+    assert run.status == "active"
+    assert active_generations([MODE]) == {MODE.name: run.id}
+    assert LocationModel.select().count() == 25
+    assert (
+        LocationModel.select().where(LocationModel.generation == run.id).count() == 25
+    )
+
+
+def test_crash_keeps_progress_and_the_old_pool():
+    _legacy_location()
+
+    with pytest.raises(RuntimeError):
+        _populator(fail_after=23).run(start_or_resume(MODE, 50), MODE)
+
+    run = GeoguesserPopulation.get()
+    assert run.status == "running"
+    assert run.completed == 23
+    # the old pool is still the one games see
+    assert active_generations([MODE]) == {MODE.name: None}
+    assert LocationModel.select().where(LocationModel.generation.is_null()).count() == 1
+
+
+def test_resume_finishes_the_interrupted_run():
+    with pytest.raises(RuntimeError):
+        _populator(fail_after=12).run(start_or_resume(MODE, 30), MODE)
+
+    resumed = start_or_resume(MODE, 999)
+    assert resumed.completed == 12
+    assert resumed.target == 30
+
+    utils = FakeLocationUtils()
+    populator = _populator()
+    populator.location_utils = utils
+    populator.run(resumed, MODE)
+
+    assert next(utils.calls) == 19  # only the 18 missing locations were generated
+    assert LocationModel.select().count() == 30
+
+
+def test_second_run_retires_the_first():
+    first = _populator().run(start_or_resume(MODE, 5), MODE)
+    second = _populator().run(start_or_resume(MODE, 7), MODE)
+
+    assert GeoguesserPopulation.get_by_id(first.id).status == "retired"
+    assert active_generations([MODE]) == {MODE.name: second.id}
+    assert LocationModel.select().count() == 7
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
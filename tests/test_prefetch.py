@@ -0,0 +1,149 @@
+"""Tests for the round asset pool and round prefetching.
+
+Taking from the pool must never wait on production: it hands over what is
+ready and refills in the background, without running two refills at once.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+from cogs.lancocog import RoundGameCog
+from utils.roundgame.prefetch import AssetPool
+from utils.roundgame.session import RoundGameSession
+
+
+class Producer:
+    def __init__(self, limit=None):
+        self.calls = 0
+        self.made = 0
+        self.limit = limit
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, count):
+        self.calls += 1
+        await self.gate.wait()
+        if self.limit is not None:
+            count = min(count, self.limit - self.made)
+        items = list(range(self.made, self.made + count))
+        self.made += count
+        return items
+
+
+async def _settle(pool):
+    while pool._task and not pool._task.done():
+        await asyncio.sleep(0)
+
+
+async def test_refill_fills_to_size_in_batches():
+    produce = Producer()
+    pool = AssetPool("test", produce, size=5, batch=2)
+
+    pool.refill()
+    await _settle(pool)
+
+    assert len(pool) == 5
+    assert produce.calls == 3
+
+
+async def test_take_does_not_wait_for_production():
+    produce = Producer()
+    pool = AssetPool("test", produce, size=3, batch=3)
+    pool.refill()
+    await _settle(pool)
+
+    produce.gate.clear()
+    assert pool.take(5) == [0, 1, 2]
+    assert pool.take_one() is None
+    assert pool.stats()["misses"] == 3
+
+    produce.gate.set()
+    await _settle(pool)
+    assert len(pool) == 3
+    # the second take found a refill already running and did not start another
+    assert produce.calls == 2
+
+
+async def test_refill_stops_when_nothing_is_left():
+    pool = AssetPool("test", Producer(limit=2), size=5)
+
+    pool.refill()
+    await _settle(pool)
+
+    assert pool.peek() == [0, 1]
+
+
+async def test_refill_failure_is_contained():
+    async def produce(count):
+        raise RuntimeError("boom")
+
+    pool = AssetPool("test", produce, size=2)
+    pool.refill()
+    await _settle(pool)
+
+    assert len(pool) == 0
+    assert pool._task.exception() is None
+
+
+class FlakyGame(RoundGameCog):
+    GAME_NAME = "flaky"
+
+    def __init__(self, failures):
+        super().__init__(bot=None)
+        self.failures = failures
+        self.prepares = 0
+        self.sessions = {}
+        self.posted = []
+
+    @property
+    def active_sessions(self):
+        return self.sessions
+
+    @property
+    def sessions_starting(self):
+        return []
+
+    async def prepare_round(self, session, index):
+        self.prepares += 1
+        if self.prepares <= self.failures:
+            raise RuntimeError("street view unavailable")
+
+    async def build_round_embed(self, session, intro):
+        self.posted.append(session.current_round)
+        return discord.Embed(title="round"), []
+
+
+def _session(game):
+    channel = MagicMock(id=1)
+    channel.send = AsyncMock()
+    session = RoundGameSession(channel, host=None)
+    session.init(["only round"])
+    game.sessions[channel.id] = session
+    return session
+
+
+async def test_a_failed_prefetch_is_retried_inline():
+    game = FlakyGame(failures=1)
+    session = _session(game)
+
+    await game.post_current_round(session, immediate=True)
+
+    assert game.prepares == 2
+    assert game.posted == [0]
+    assert not session.cancelled
+    session.cancel()
+    session.round_task.cancel()
+    session.warning_task.cancel()
+
+
+async def test_a_round_that_cannot_be_prepared_ends_the_game():
+    game = FlakyGame(failures=2)
+    session = _session(game)
+
+    await game.post_current_round(session, immediate=True)
+
+    assert game.posted == []
+    assert session.cancelled
+    assert game.sessions == {}
+    assert session.channel.send.await_count == 2  # the apology and the standings
@@ -0,0 +1,76 @@
+"""Tests for the query auditor: fingerprints, the slow-query log and scan
+plans."""
+
+import peewee
+import pytest
+from db import TimedSqliteDatabase
+from utils import query_audit
+from utils.query_audit import QueryAuditor
+
+
+@pytest.fixture
+def db():
+    db = TimedSqliteDatabase(":memory:", auditor=QueryAuditor(slow_seconds=60))
+
+    class Post(peewee.Model):
+        subreddit = peewee.CharField()
+        created = peewee.IntegerField()
+
+        class Meta:
+            database = db
+            table_name = "audit_post"
+
+    db.create_tables([Post])
+    db.Post = Post
+    yield db
+    db.close()
+
+
+def test_fingerprints_ignore_literals_and_list_lengths():
+    a = query_audit.fingerprint(
+        "SELECT * FROM t WHERE a IN (?, ?, ?) AND b = 12 AND c = 'it''s'"
+    )
+    b = query_audit.fingerprint(
+        "SELECT *  FROM t\nWHERE a IN (?, ?) AND b = 7 AND c = 'x'"
+    )
+
+    assert a == b == "SELECT * FROM t WHERE a IN (?...) AND b = ? AND c = ?"
+
+
+def test_runs_of_a_query_share_its_statistics(db):
+    Post = db.Post
+    for subreddit in ("a", "b", "c"):
+        list(Post.select().where(Post.subreddit == subreddit))
+
+    (stats,) = [s for s in db.auditor.top() if s["fingerprint"].startswith("SELECT")]
+    assert stats["count"] == 3
+
+
+def test_filtering_scans_are_reported_with_their_plan(db):
+    Post = db.Post
+    list(Post.select())  # reads the whole table on purpose: not a finding
+    list(Post.select().where(Post.subreddit == "a"))
+
+    (scan,) = db.auditor.scans()
+    assert scan["scans"] == ["audit_post"]
+    assert any(line.startswith("SCAN") for line in scan["plan"])
+
+    # with an index the same query searches instead
+    db.execute_sql('CREATE INDEX "audit_post_subreddit" ON "audit_post" ("subreddit")')
+    db.auditor.reset()
+    list(Post.select().where(Post.subreddit == "a"))
+
+    assert db.auditor.scans() == []
+    (stats,) = db.auditor.top()
+    assert "USING INDEX audit_post_subreddit" in stats["plan"][0]
+
+
+def test_slow_statements_are_logged_with_their_parameters(db):
+    Post = db.Post
+    db.auditor.slow_seconds = 0
+    Post.create(subreddit="lancaster", created=1)
+
+    slow = db.auditor.slow_log()
+    assert slow[0]["fingerprint"].startswith('INSERT INTO "audit_post"')
+    assert "'lancaster'" in slow[0]["params"]
+    assert len(db.auditor.slow_log(1)) == 1
@@ -0,0 +1,134 @@
+"""Tests for the GeoGuesser road-yield sampling grid."""
+
+import math
+from types import SimpleNamespace
+
+import numpy as np
+from cogs.geoguesser.locationutils import LocationUtils
+from cogs.geoguesser.models import Mode
+from cogs.geoguesser.sampling import CELL_SIZE, METERS_PER_DEGREE, YieldGrid
+
+MODE = Mode("Test", "T", 5000, (40.0, -76.0), None, "")
+
+
+def _meters_from_center(lat, lng):
+    north = (lat - MODE.center[0]) * METERS_PER_DEGREE
+    east = (
+        (lng - MODE.center[1])
+        * METERS_PER_DEGREE
+        * math.cos(math.radians(MODE.center[0]))
+    )
+    return north, east
+
+
+def test_samples_stay_inside_the_circle_and_their_cell():
+    grid = YieldGrid(MODE, seed=1)
+    for _ in range(500):
+        lat, lng, cell = grid.sample()
+        north, east = _meters_from_center(lat, lng)
+        assert math.hypot(north, east) <= MODE.radius + 1
+        assert grid.cell_of(lat, lng) == cell
+
+
+def test_productive_cells_are_sampled_more():
+    grid = YieldGrid(MODE, seed=2)
+    good = grid.cell_of(*MODE.center)
+    for _ in range(5):
+        grid.record(good, True)
+
+    draws = [grid.sample()[2] for _ in range(2000)]
+    # one cell among ~1250 in the circle, weighted ~5x an unexplored cell
+    assert draws.count(good) > 2000 / grid.stats()["cells"] * 3
+
+
+def test_barren_cells_are_avoided():
+    grid = YieldGrid(MODE, seed=3)
+    north_half = slice(grid.size // 2, None)
+    grid.misses[north_half] = 10
+
+    draws = [grid.sample()[2] for _ in range(1000)]
+    assert sum(row >= grid.size // 2 for row, _ in draws) < 50
+
+
+def test_neighbours_of_productive_cells_are_favoured():
+    grid = YieldGrid(MODE, seed=5)
+    row, col = grid.cell_of(*MODE.center)
+    block = slice(row - row % 4, row - row % 4 + 4), slice(
+        col - col % 4, col - col % 4 + 4
+    )
+    grid.record((row, col), True)
+    grid.record((row, col), True)
+
+    untried_neighbour = grid._weights()[block].min()
+    unexplored = grid._weights()[0 if row > grid.size // 2 else -1, grid.size // 2]
+    assert untried_neighbour > unexplored
+
+
+def test_seed_counts_known_locations():
+    grid = YieldGrid(MODE)
+    seeded = grid.seed([MODE.center, MODE.center, (0.0, 0.0)])
+
+    assert seeded == 2
+    assert grid.hits[grid.cell_of(*MODE.center)] == 2
+    assert grid.stats()["productive"] == 1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    grid = YieldGrid(MODE)
+    grid.seed([MODE.center])
+    grid.record((0, 0), False)
+    path = tmp_path / "grid.npz"
+    grid.save(path)
+
+    loaded = YieldGrid.load(MODE, path)
+    assert np.array_equal(loaded.hits, grid.hits)
+    assert np.array_equal(loaded.misses, grid.misses)
+
+
+def test_load_discards_other_geometry(tmp_path):
+    path = tmp_path / "grid.npz"
+    YieldGrid(MODE).save(path)
+    wider = Mode("Test", "T", MODE.radius * 2, MODE.center, None, "")
+
+    assert YieldGrid.load(wider, path) is None
+    assert YieldGrid.load(MODE, tmp_path / "missing.npz") is None
+
+
+class FakeMaps:
+    """Roads (with street view and a name) only north-east of the centre"""
+
+    def snap_to_roads(self, point):
+        lat, lng = point
+        if lat > MODE.center[0] and lng > MODE.center[1]:
+            return [{"location": {"latitude": lat, "longitude": lng}}]
+        return []
+
+    def reverse_geocode(self, point):
+        return [{"types": ["intersection"], "formatted_address": "King & Queen, PA"}]
+
+
+class FakeHttp:
+    def get(self, url):
+        return SimpleNamespace(status_code=200, json=lambda: {"status": "OK"})
+
+
+def test_grid_raises_acceptance_rate():
+    grid = YieldGrid(MODE, seed=4)
+    utils = LocationUtils(FakeMaps(), grids={MODE.name: grid})
+    utils._local.http = FakeHttp()  # this thread's session
+
+    def calls_per_location(count):
+        before = dict(utils.generation_stats)
+        for _ in range(count):
+            utils.get_geoguesser_location_sync(MODE)
+        return (utils.generation_stats["api_calls"] - before["api_calls"]) / count
+
+    early = calls_per_location(50)
+    for _ in range(10):
+        calls_per_location(50)
+    late = calls_per_location(50)
+
+    # an accepted location always costs 3 calls; rejected samples cost 1
+    assert early > 3.5
+    assert late < early
+    assert late < 3.5
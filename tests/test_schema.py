@@ -0,0 +1,81 @@
+"""Tests for the model registry and startup schema verification."""
+
+import os
+import sys
+
+import pytest
+from peewee import CharField, IntegerField
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import db
+from db import BaseModel, TimedSqliteDatabase
+
+
+class Widget(BaseModel):
+    name = CharField(index=True)
+
+
+class ConfigBase(BaseModel, abstract=True):
+    guild_id = IntegerField(primary_key=True)
+
+
+class GadgetConfig(ConfigBase):
+    enabled = IntegerField(default=0)
+
+
+@pytest.fixture
+def database():
+    database = TimedSqliteDatabase(":memory:")
+    with database.bind_ctx([Widget, GadgetConfig]):
+        yield database
+    database.close()
+
+
+@pytest.fixture
+def statements(database, monkeypatch):
+    executed = []
+    execute_sql = database.execute_sql
+
+    def recording(sql, *args, **kwargs):
+        executed.append(sql)
+        return execute_sql(sql, *args, **kwargs)
+
+    monkeypatch.setattr(database, "execute_sql", recording)
+    return executed
+
+
+def test_registry_skips_abstract_models():
+    models = db.registered_models()
+
+    assert Widget in models and GadgetConfig in models
+    assert ConfigBase not in models
+
+
+def test_verify_creates_only_what_is_missing(database):
+    database.create_tables([Widget])
+
+    assert db.verify_schema(database, [Widget, GadgetConfig]) == [GadgetConfig]
+    assert set(database.get_tables()) == {"widget", "gadgetconfig"}
+    assert db.verify_schema(database, [Widget, GadgetConfig]) == []
+
+
+def test_verify_notices_a_missing_index(database):
+    database.create_tables([Widget])
+    database.execute_sql("DROP INDEX widget_name")
+
+    assert db.verify_schema(database, [Widget]) == [Widget]
+    assert [i.name for i in database.get_indexes("widget")] == ["widget_name"]
+
+
+def test_create_tables_is_free_once_verified(database, statements):
+    db.verify_schema(database, [Widget, GadgetConfig])
+    statements.clear()
+
+    database.create_tables([Widget, GadgetConfig])
+    assert statements == []
+
+    # dropping a table forgets it, so the next create_tables recreates it
+    database.drop_tables([Widget])
+    database.create_tables([Widget])
+    assert "widget" in database.get_tables()
@@ -0,0 +1,56 @@
+"""Tests for the --profile-startup import tree."""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from utils import startup_profile
+
+# -X importtime reports each module once its import finishes, children first
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       400 |        500 | _frozen_importlib_external
+import time:      3000 |       3000 |       heavy.leaf
+import time:       200 |       3200 |     heavy.core
+import time:        50 |         50 |     heavy.util
+import time:       500 |       3750 |   heavy
+import time:      1000 |       4750 | cogs.thing
+""".splitlines()
+
+
+def test_parses_nesting_from_indentation():
+    roots = startup_profile.parse_importtime(SAMPLE)
+
+    assert [r.name for r in roots] == ["_frozen_importlib_external", "cogs.thing"]
+    assert [c.name for c in roots[0].children] == ["_io"]
+    (heavy,) = roots[1].children
+    assert [c.name for c in heavy.children] == ["heavy.core", "heavy.util"]
+    assert heavy.children[0].children[0].name == "heavy.leaf"
+    assert (heavy.self_ms, heavy.cumulative_ms) == (0.5, 3.75)
+
+
+def test_render_prunes_cheap_imports():
+    lines = startup_profile.render(
+        startup_profile.parse_importtime(SAMPLE), threshold_ms=1
+    )
+
+    names = [line.split()[-1] for line in lines]
+    assert names == ["cogs.thing", "heavy", "heavy.core", "heavy.leaf"]
+    assert lines[2].endswith("    heavy.core")
+
+
+def test_parses_real_interpreter_output():
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import json"],
+        stderr=subprocess.PIPE,
+        text=True,
+    ).stderr
+
+    roots = startup_profile.parse_importtime(stderr.splitlines())
+
+    (json_node,) = [r for r in roots if r.name == "json"]
+    assert "json.decoder" in {c.name for c in json_node.children}
+    assert json_node.cumulative_ms >= json_node.self_ms
@@ -0,0 +1,111 @@
+"""Tests for the local token usage ledger."""
+
+import datetime
+from types import SimpleNamespace
+
+import peewee
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+from utils import ai_utils, token_tracker
+from utils.token_tracker import TokenUsage
+
+
+def usage(input_tokens=0, output_tokens=0, cached=0):
+    return SimpleNamespace(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cache_read_tokens=cached,
+    )
+
+
+@pytest.fixture
+def ledger():
+    # shared cache, so the upsert running in a worker thread sees the table
+    db = peewee.SqliteDatabase(
+        "file:token_usage?mode=memory&cache=shared",
+        uri=True,
+        check_same_thread=False,
+    )
+    token_tracker._pending.clear()
+    with db.bind_ctx([TokenUsage]):
+        db.create_tables([TokenUsage])
+        yield db
+        db.drop_tables([TokenUsage])
+    token_tracker._pending.clear()
+    db.close()
+
+
+async def test_flushes_accumulate_into_one_row_per_minute(ledger):
+    for _ in range(2):
+        token_tracker.record_usage("gpt", "chatbot", usage(10, 5, 4), guild_id=1)
+        token_tracker.record_usage("gpt", "chatbot", usage(1, 1), guild_id=1)
+        await token_tracker.flush()
+
+    assert not token_tracker._pending
+    row = TokenUsage.get()
+    assert (row.calls, row.input_tokens, row.output_tokens) == (4, 22, 12)
+    assert row.cached_tokens == 8
+    assert TokenUsage.select().count() == 1
+
+
+async def test_usage_by_includes_unflushed_totals(ledger):
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    token_tracker.record_usage("gpt", "chatbot", usage(10, 5), guild_id=1, cost=0.5)
+    await token_tracker.flush()
+    token_tracker.record_usage("gpt", "summarize", usage(3, 2), guild_id=2)
+    token_tracker.record_usage("nano", "summarize", usage(1, 1), guild_id=2)
+
+    by_model = token_tracker.usage_by("model", since)
+    assert by_model["gpt"].total_tokens == 20
+    assert by_model["gpt"].cost_usd == 0.5
+    assert by_model["nano"].calls == 1
+
+    by_cog = token_tracker.usage_by("cog", since, guild_id=2)
+    assert set(by_cog) == {"summarize"}
+    assert by_cog["summarize"].calls == 2
+
+    later = datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
+    assert token_tracker.usage_by("model", later) == {}
+
+
+async def test_failed_flush_keeps_totals(ledger, monkeypatch):
+    def fail(batch):
+        raise peewee.OperationalError("database is locked")
+
+    token_tracker.record_usage("gpt", "chatbot", usage(10, 5))
+    monkeypatch.setattr(token_tracker, "_write", fail)
+    with pytest.raises(peewee.OperationalError):
+        await token_tracker.flush()
+    token_tracker.record_usage("gpt", "chatbot", usage(1, 1))
+    monkeypatch.undo()
+
+    await token_tracker.flush()
+    row = TokenUsage.get()
+    assert (row.calls, row.input_tokens, row.guild_id) == (2, 11, 0)
+
+
+async def test_run_agent_records_the_calling_module(ledger):
+    agent = Agent(TestModel(custom_output_text="hi"))
+
+    result = await ai_utils.run_agent(lambda: agent.run("hello"), guild_id=7)
+
+    assert result.output == "hi"
+    ((key, totals),) = token_tracker._pending.items()
+    assert key[1:] == ("test", __name__, 7)
+    assert totals.calls == 1
+    assert totals.input_tokens == result.usage.input_tokens > 0
+    assert totals.output_tokens == result.usage.output_tokens
+
+
+async def test_failed_run_records_nothing(ledger):
+    async def fail():
+        raise RuntimeError("boom")
+
+    errors = []
+
+    async def on_error(message):
+        errors.append(message)
+
+    assert await ai_utils.run_agent(fail, on_error) is None
+    assert errors and not token_tracker._pending